@@ -3,7 +3,31 @@
 # SPDX-License-Identifier: MIT
 
 
-"""Define categorias de datas e períodos utilizadas em vários processos de ETL.
+"""Trata códigos de condições de saúde utilizados em vários processos de ETL.
+
+Além das funções [`e_cid10()`][] e [`remover_ponto_cid10()`][], que operam
+sobre um único texto, este módulo oferece funções que normalizam, validam e
+separam códigos da [CID-10][] em colunas inteiras de um objeto
+[`pandas.Series`][]. Essas funções aplicam as expressões regulares uma única
+vez para cada valor distinto da coluna - as mesmas combinações de causas se
+repetem em milhares de registros dos arquivos do DataSUS - e replicam o
+resultado para todas as linhas de uma só vez:
+
+```py
+>>> import pandas as pd
+>>> from impulsoetl.comum.condicoes_saude import listar_cids10
+>>> linhas = pd.Series(["*R578*J969", "J969/ /B342 U071", ""])
+>>> listar_cids10(linhas)
+0         {R578,J969}
+1    {J969,B342,U071}
+2                  {}
+dtype: object
+```
+
+[`e_cid10()`]: impulsoetl.comum.condicoes_saude.e_cid10
+[`remover_ponto_cid10()`]: impulsoetl.comum.condicoes_saude.remover_ponto_cid10
+[CID-10]: https://pt.wikipedia.org/wiki/CID-10
+[`pandas.Series`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.html
 """
 
 
@@ -12,11 +36,19 @@ from __future__ import annotations
 import re
 from typing import Final
 
+import numpy as np
+import pandas as pd
+
+from impulsoetl.utilitarios.mapeamentos import transformar_por_valor_distinto
 
 CID10: Final[re.Pattern] = re.compile(
     r"[A-Z][0-9]{2}\.?[0-9X]{,4}",
     re.IGNORECASE,
 )
+CID10_PONTO: Final[re.Pattern] = re.compile(
+    r"([A-Z][0-9]{2})\.?([0-9X]{,4})",
+)
+CID10_SEPARADORES: Final[re.Pattern] = re.compile(r"[^a-zA-Z0-9]")
 
 
 def e_cid10(texto: str) -> bool:
@@ -26,4 +58,131 @@ def e_cid10(texto: str) -> bool:
 
 def remover_ponto_cid10(texto: str) -> bool:
     """Remove caractere de ponto após o 3º dígito de um código CID-10."""
-    return re.sub(r"([A-Z][0-9]{2})\.?([0-9X]{,4})", r"\1\2", texto)
+    return CID10_PONTO.sub(r"\1\2", texto)
+
+
+def _validar_textos(textos: pd.Series) -> pd.Series:
+    return textos.str.len().between(3, 7) & textos.str.match(CID10)
+
+
+def _separar_textos(textos: pd.Series) -> pd.Series:
+    codigos = textos.str.split(CID10_SEPARADORES).explode()
+    return codigos[_validar_textos(codigos).astype(bool)]
+
+
+def _listar_textos(textos: pd.Series) -> pd.Series:
+    codigos = (
+        _separar_textos(textos)
+        .groupby(level=0, sort=False)
+        .agg(",".join)
+        .reindex(textos.index, fill_value="")
+    )
+    return "{" + codigos + "}"
+
+
+def validar_cids10(serie: pd.Series) -> pd.Series:
+    """Indica os elementos de uma coluna compatíveis com o padrão da CID-10.
+
+    Equivale a aplicar a função [`e_cid10()`][] a cada elemento da coluna.
+
+    Argumentos:
+        serie: Objeto [`pandas.Series`][] com textos a serem verificados.
+
+    Retorna:
+        Uma série de valores booleanos com o mesmo índice da série original.
+        Valores nulos nunca são considerados compatíveis.
+
+    [`e_cid10()`]: impulsoetl.comum.condicoes_saude.e_cid10
+    [`pandas.Series`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.html
+    """
+    return transformar_por_valor_distinto(
+        serie,
+        _validar_textos,
+        nulo=False,
+    ).astype(bool)
+
+
+def normalizar_cids10(serie: pd.Series) -> pd.Series:
+    """Remove os pontos dos códigos da CID-10 em uma coluna de textos.
+
+    Equivale a aplicar a função [`remover_ponto_cid10()`][] a cada elemento
+    da coluna.
+
+    Argumentos:
+        serie: Objeto [`pandas.Series`][] com textos contendo um ou mais
+            códigos da CID-10.
+
+    Retorna:
+        Uma série com o mesmo índice da série original, em que os códigos no
+        formato `A00.0` são substituídos pelo formato `A000`. Valores nulos
+        são mantidos.
+
+    [`remover_ponto_cid10()`]: impulsoetl.comum.condicoes_saude.remover_ponto_cid10
+    [`pandas.Series`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.html
+    """
+    return transformar_por_valor_distinto(
+        serie,
+        lambda textos: textos.str.replace(CID10_PONTO, r"\1\2", regex=True),
+    )
+
+
+def separar_cids10(serie: pd.Series) -> pd.Series:
+    """Separa os códigos da CID-10 de uma coluna com listas de condições.
+
+    Os textos são divididos em qualquer caractere que não seja uma letra ou
+    um algarismo, e apenas os trechos compatíveis com o padrão da CID-10
+    (ver [`e_cid10()`][]) são mantidos.
+
+    Argumentos:
+        serie: Objeto [`pandas.Series`][] com textos contendo códigos da
+            CID-10 - como as linhas da parte I da Declaração de Óbito.
+
+    Retorna:
+        Uma série com um código da CID-10 por elemento. O índice de cada
+        código é o da linha da série original de onde ele foi extraído, na
+        mesma ordem em que os códigos aparecem no texto. Linhas sem nenhum
+        código válido não aparecem no resultado.
+
+    [`e_cid10()`]: impulsoetl.comum.condicoes_saude.e_cid10
+    [`pandas.Series`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.html
+    """
+    posicoes, valores = pd.factorize(serie)
+    codigos = _separar_textos(pd.Series(valores, dtype=object))
+    linhas = pd.Series(np.arange(len(serie)), index=serie.index)
+    linhas = linhas[posicoes >= 0]
+    # cada código é replicado para todas as linhas com o mesmo texto
+    correspondencias = pd.DataFrame(
+        {"linha": linhas.to_numpy(), "posicao": posicoes[posicoes >= 0]},
+    ).merge(
+        codigos.rename("codigo").rename_axis("posicao").reset_index(),
+        on="posicao",
+    )
+    correspondencias = correspondencias.sort_values("linha", kind="stable")
+    return pd.Series(
+        correspondencias["codigo"].to_numpy(),
+        index=serie.index[correspondencias["linha"].to_numpy()],
+        name=serie.name,
+        dtype=object,
+    )
+
+
+def listar_cids10(serie: pd.Series) -> pd.Series:
+    """Converte textos com códigos da CID-10 em listas do PostgreSQL.
+
+    Argumentos:
+        serie: Objeto [`pandas.Series`][] com textos contendo códigos da
+            CID-10.
+
+    Retorna:
+        Uma série com o mesmo índice da série original, em que cada texto é
+        substituído pela representação literal de um *array* do PostgreSQL
+        (por exemplo, `{R578,J969}`) contendo os códigos extraídos conforme
+        [`separar_cids10()`][]. Textos sem nenhum código válido resultam em
+        uma lista vazia (`{}`); valores nulos são mantidos.
+
+    [`pandas.Series`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.html
+    [`separar_cids10()`]: impulsoetl.comum.condicoes_saude.separar_cids10
+    """
+    return transformar_por_valor_distinto(serie, _listar_textos).astype(
+        object,
+    )
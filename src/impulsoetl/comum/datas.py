@@ -9,18 +9,25 @@
 
 from __future__ import annotations
 
+import re
 from datetime import datetime, timedelta, timezone
 from functools import lru_cache
+from typing import Callable, Final
 
+import numpy as np
 import pandas as pd
 from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import NoResultFound
 
 from impulsoetl.bd import tabelas
 from impulsoetl.tipos import DatetimeLike
+from impulsoetl.utilitarios.mapeamentos import transformar_por_valor_distinto
 
 periodos = tabelas["listas_de_codigos.periodos"]
 
+HORA_HHMM: Final[re.Pattern] = re.compile(r"([01][0-9]|2[0-3])[0-5][0-9]")
+
 
 def agora_gmt_menos3():
     """Retorna o valor de data e hora atuais no fuso GMT-03:00."""
@@ -64,6 +71,145 @@ def de_aaaammdd_para_timestamp(
             raise
 
 
+def _datas_por_valor_distinto(
+    textos: pd.Series,
+    interpretar: Callable[[pd.Series], pd.Series],
+) -> pd.Series:
+    """Interpreta como datas os valores distintos de uma coluna."""
+    return transformar_por_valor_distinto(
+        textos,
+        interpretar,
+        nulo=np.datetime64("NaT", "ns"),
+    ).astype("datetime64[ns]")
+
+
+def de_textos_para_datas(textos: pd.Series, formato: str) -> pd.Series:
+    """Transforma uma coluna de textos em datas, conforme um formato fixo.
+
+    Argumentos:
+        textos: Objeto [`pandas.Series`][] com as datas representadas como
+            textos.
+        formato: Formato das datas, com os códigos aceitos pela função
+            [`datetime.strptime()`][] - por exemplo, `"%d/%m/%Y"`.
+
+    Retorna:
+        Uma série do tipo `datetime64[ns]`, com o mesmo índice da série
+        original. Valores nulos ou incompatíveis com o formato são
+        convertidos em [`pandas.NaT`][]. Cada valor distinto é interpretado
+        uma única vez.
+
+    [`pandas.Series`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.html
+    [`datetime.strptime()`]: https://docs.python.org/3/library/datetime.html#strftime-and-strptime-format-codes
+    [`pandas.NaT`]: https://pandas.pydata.org/docs/reference/api/pandas.NaT.html
+    """
+    return _datas_por_valor_distinto(
+        textos,
+        lambda valores: pd.to_datetime(
+            valores,
+            format=formato,
+            errors="coerce",
+        ),
+    )
+
+
+def de_aaaamm_para_datas(textos: pd.Series) -> pd.Series:
+    """Transforma uma coluna de textos no formato AAAAMM em datas.
+
+    Cada texto é interpretado como o primeiro dia do mês correspondente. Ver
+    [`de_textos_para_datas()`][].
+
+    [`de_textos_para_datas()`]: impulsoetl.comum.datas.de_textos_para_datas
+    """
+    return de_textos_para_datas(textos, "%Y%m")  # noqa: WPS323
+
+
+def _interpretar_aaaammdd(textos: pd.Series) -> pd.Series:
+    componentes = {}
+    for nome, inicio, fim in (("year", 0, 4), ("month", 4, 6), ("day", 6, 8)):
+        trechos = textos.str.slice(inicio, fim).str.strip()
+        trechos = trechos.where(trechos.str.fullmatch("[0-9]+", na=False))
+        componentes[nome] = pd.to_numeric(trechos)
+    return pd.to_datetime(
+        pd.DataFrame(componentes, index=textos.index),
+        errors="coerce",
+    )
+
+
+def de_aaaammdd_para_datas(textos: pd.Series) -> pd.Series:
+    """Transforma uma coluna de textos no formato AAAAMMDD em datas.
+
+    Equivale a aplicar a função [`de_aaaammdd_para_timestamp()`][] com o
+    argumento `erros="coerce"` a cada elemento da coluna: tolera espaços em
+    branco no lugar dos zeros à esquerda do mês ou do dia, e converte em
+    [`pandas.NaT`][] os valores que não correspondem a uma data válida.
+
+    Argumentos:
+        textos: Objeto [`pandas.Series`][] com as datas no formato AAAAMMDD.
+
+    Retorna:
+        Uma série do tipo `datetime64[ns]`, com o mesmo índice da série
+        original.
+
+    [`de_aaaammdd_para_timestamp()`]: impulsoetl.comum.datas.de_aaaammdd_para_timestamp
+    [`pandas.NaT`]: https://pandas.pydata.org/docs/reference/api/pandas.NaT.html
+    [`pandas.Series`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.html
+    """
+    return _datas_por_valor_distinto(textos, _interpretar_aaaammdd)
+
+
+def de_ano_mes_para_datas(anos: pd.Series, meses: pd.Series) -> pd.Series:
+    """Transforma colunas separadas de ano e mês no início de cada mês.
+
+    Argumentos:
+        anos: Objeto [`pandas.Series`][] com os anos, como números ou textos.
+        meses: Objeto [`pandas.Series`][] com os meses, como números ou
+            textos, e o mesmo índice da série de anos.
+
+    Retorna:
+        Uma série do tipo `datetime64[ns]`, com o mesmo índice das séries
+        originais, contendo o primeiro dia de cada mês. Anos ou meses nulos
+        ou inválidos resultam em [`pandas.NaT`][].
+
+    [`pandas.Series`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.html
+    [`pandas.NaT`]: https://pandas.pydata.org/docs/reference/api/pandas.NaT.html
+    """
+    componentes = pd.DataFrame(
+        {
+            "year": pd.to_numeric(anos, errors="coerce"),
+            "month": pd.to_numeric(meses, errors="coerce"),
+            "day": 1,
+        },
+        index=anos.index,
+    )
+    return pd.to_datetime(componentes, errors="coerce")
+
+
+def _interpretar_hhmm(textos: pd.Series) -> pd.Series:
+    # TODO: Corrigir hora > 24
+    validos = textos.str.match(HORA_HHMM)
+    horas = textos.str.slice(0, 2) + ":" + textos.str.slice(2, 4)
+    return horas.where(validos.astype(bool))
+
+
+def de_hhmm_para_horas(textos: pd.Series) -> pd.Series:
+    """Transforma uma coluna de textos no formato HHMM em horários HH:MM.
+
+    Argumentos:
+        textos: Objeto [`pandas.Series`][] com os horários representados
+            como textos.
+
+    Retorna:
+        Uma série de textos no formato `HH:MM`, com o mesmo índice da série
+        original - o pandas não tem um tipo apropriado para horários sem
+        data. Valores nulos ou que não comecem com um horário válido são
+        convertidos em nulos. Cada valor distinto é interpretado uma única
+        vez.
+
+    [`pandas.Series`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.html
+    """
+    return transformar_por_valor_distinto(textos, _interpretar_hhmm)
+
+
 @lru_cache(365)
 def periodo_por_data(  # noqa: WPS122 - permite argumento `data`
     sessao: Session,
@@ -93,6 +239,175 @@ def periodo_por_data(  # noqa: WPS122 - permite argumento `data`
     )
 
 
+class IndicePeriodos(object):
+    """Localiza os períodos que contêm cada data de uma coluna.
+
+    Em vez de consultar o banco de dados para cada data distinta, o índice
+    mantém em memória as datas de início e de fim de todos os períodos de um
+    tipo, ordenadas, e localiza os períodos de uma coluna inteira de datas
+    por meio de uma busca binária vetorizada
+    ([`numpy.searchsorted()`][]).
+
+    [`numpy.searchsorted()`]: https://numpy.org/doc/stable/reference/generated/numpy.searchsorted.html
+    """
+
+    def __init__(self, periodos_tabela: pd.DataFrame):
+        """Instancia um índice de períodos.
+
+        Argumentos:
+            periodos_tabela: Objeto [`pandas.DataFrame`][] com as colunas
+                `id`, `data_inicio` e `data_fim` de períodos de um mesmo
+                tipo, que não se sobrepõem.
+
+        [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+        """
+        periodos_tabela = periodos_tabela.sort_values("data_inicio")
+        self.inicios = pd.to_datetime(
+            periodos_tabela["data_inicio"],
+        ).to_numpy(dtype="datetime64[ns]")
+        self.fins = pd.to_datetime(periodos_tabela["data_fim"]).to_numpy(
+            dtype="datetime64[ns]",
+        )
+        self.ids = periodos_tabela["id"].astype(str).to_numpy(dtype=object)
+
+    @classmethod
+    def carregar(
+        cls,
+        sessao: Session,
+        tipo_periodo: str = "mensal",
+    ) -> IndicePeriodos:
+        """Carrega os períodos de um tipo a partir do banco de dados.
+
+        Argumentos:
+            sessao: objeto [`sqlalchemy.orm.session.Session`][] que permite
+                acessar a base de dados da ImpulsoGov.
+            tipo_periodo: O nível de agregação dos períodos. Por padrão,
+                são carregados os períodos do tipo `"mensal"`.
+
+        Retorna:
+            Um índice com todos os períodos do tipo indicado.
+
+        [`sqlalchemy.orm.session.Session`]: https://docs.sqlalchemy.org/en/14/orm/session_api.html#sqlalchemy.orm.Session
+        """
+        registros = (
+            sessao.query(
+                periodos.c.id,
+                periodos.c.data_inicio,
+                periodos.c.data_fim,
+            )
+            .filter(periodos.c.tipo == tipo_periodo.title())
+            .all()
+        )
+        return cls(
+            pd.DataFrame(registros, columns=["id", "data_inicio", "data_fim"]),
+        )
+
+    def localizar(
+        self,
+        datas: pd.Series,
+        erros: str = "raise",
+    ) -> pd.Series:
+        """Obtém os identificadores dos períodos que contêm cada data.
+
+        Argumentos:
+            datas: Série com as datas de referência.
+            erros: Define a atitude a ser tomada caso alguma data não esteja
+                incluída em nenhum período. Aceita as categorias `'raise'`
+                (levanta uma exceção; padrão) ou `'coerce'` (atribui um
+                valor nulo ao período correspondente).
+
+        Retorna:
+            Uma série, com o mesmo índice da série original, contendo os
+            identificadores dos períodos correspondentes a cada data.
+
+        Exceções:
+            Levanta um erro [`sqlalchemy.orm.exc.NoResultFound`][] se alguma
+            data não estiver incluída em nenhum período e o argumento `erros`
+            for `'raise'`.
+
+        [`sqlalchemy.orm.exc.NoResultFound`]: https://docs.sqlalchemy.org/en/14/orm/exceptions.html#sqlalchemy.orm.exc.NoResultFound
+        """
+        datas = pd.Series(pd.to_datetime(datas), index=datas.index)
+        valores = datas.to_numpy(dtype="datetime64[ns]")
+        posicoes = np.searchsorted(self.inicios, valores, side="right") - 1
+        encontrados = (posicoes >= 0) & ~np.isnat(valores)
+        posicoes = np.where(encontrados, posicoes, 0)
+        if len(self.ids):
+            encontrados &= valores <= self.fins[posicoes]
+            ids = self.ids[posicoes]
+        else:
+            ids = np.full(len(valores), None, dtype=object)
+        if erros == "raise" and not encontrados.all():
+            raise NoResultFound(
+                "Nenhum período encontrado para a data {}.".format(
+                    datas[~encontrados].iloc[0],
+                ),
+            )
+        return pd.Series(
+            np.where(encontrados, ids, None),
+            index=datas.index,
+            dtype=object,
+        )
+
+
+@lru_cache(10)
+def indice_periodos(
+    sessao: Session,
+    tipo_periodo: str = "mensal",
+) -> IndicePeriodos:
+    """Obtém o índice com todos os períodos de um tipo.
+
+    Argumentos:
+        sessao: objeto [`sqlalchemy.orm.session.Session`][] que permite
+            acessar a base de dados da ImpulsoGov.
+        tipo_periodo: O nível de agregação dos períodos. Por padrão, são
+            indexados os períodos do tipo `"mensal"`.
+
+    Retorna:
+        Uma instância da classe [`IndicePeriodos`][], carregada uma única vez
+        para cada sessão e tipo de período.
+
+    [`sqlalchemy.orm.session.Session`]: https://docs.sqlalchemy.org/en/14/orm/session_api.html#sqlalchemy.orm.Session
+    [`IndicePeriodos`]: impulsoetl.comum.datas.IndicePeriodos
+    """
+    return IndicePeriodos.carregar(sessao=sessao, tipo_periodo=tipo_periodo)
+
+
+def periodos_por_datas(
+    sessao: Session,
+    datas: pd.Series,
+    tipo_periodo: str = "mensal",
+    erros: str = "raise",
+) -> pd.Series:
+    """Busca os identificadores dos períodos de uma coluna de datas.
+
+    Equivale a obter o atributo `id` do resultado de
+    [`periodo_por_data()`][] para cada elemento da série, mas consulta o
+    banco de dados uma única vez para cada tipo de período.
+
+    Argumentos:
+        sessao: objeto [`sqlalchemy.orm.session.Session`][] que permite
+            acessar a base de dados da ImpulsoGov.
+        datas: Série com as datas de referência.
+        tipo_periodo: O nível de agregação do período desejado. Por padrão,
+            o tipo de período buscado é `"mensal"`.
+        erros: Define a atitude a ser tomada caso alguma data não esteja
+            incluída em nenhum período. Ver [`IndicePeriodos.localizar()`][].
+
+    Retorna:
+        Uma série, com o mesmo índice da série original, contendo os
+        identificadores dos períodos correspondentes a cada data.
+
+    [`periodo_por_data()`]: impulsoetl.comum.datas.periodo_por_data
+    [`sqlalchemy.orm.session.Session`]: https://docs.sqlalchemy.org/en/14/orm/session_api.html#sqlalchemy.orm.Session
+    [`IndicePeriodos.localizar()`]: impulsoetl.comum.datas.IndicePeriodos.localizar
+    """
+    return indice_periodos(sessao=sessao, tipo_periodo=tipo_periodo).localizar(
+        datas,
+        erros=erros,
+    )
+
+
 @lru_cache(365)
 def periodo_por_codigo(sessao: Session, codigo: str) -> Row:
     """Busca um período a partir do seu código.
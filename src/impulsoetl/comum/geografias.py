@@ -14,10 +14,13 @@ from __future__ import annotations
 
 from functools import lru_cache
 
+import pandas as pd
 from frozenlist import FrozenList
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import NoResultFound
 
 from impulsoetl.bd import tabelas
+from impulsoetl.loggers import logger
 
 BR_UFS: FrozenList[str] = FrozenList(
     [
@@ -142,3 +145,240 @@ def id_impulso_para_id_sus(sessao: Session, id_impulso: str) -> str:
         .filter(unidades_geograficas.c.id == str(id_impulso))
         .one()[0]
     )
+
+
+class DimensaoGeografica(object):
+    """Converte em memória os identificadores das unidades geográficas.
+
+    Em vez de consultar o banco de dados para cada código distinto, a
+    dimensão carrega de uma só vez as tabelas de unidades geográficas e de
+    unidades federativas, e converte colunas inteiras de códigos por meio do
+    método [`pandas.Series.map()`][].
+
+    Como os dados ficam em memória, alterações posteriores nas tabelas de
+    origem só são refletidas após uma chamada ao método
+    [`atualizar()`][].
+
+    [`pandas.Series.map()`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.map.html
+    [`atualizar()`]: impulsoetl.comum.geografias.DimensaoGeografica.atualizar
+    """
+
+    def __init__(
+        self,
+        unidades_geograficas_tabela: pd.DataFrame,
+        ufs_tabela: pd.DataFrame,
+    ):
+        """Instancia uma dimensão geográfica a partir de tabelas em memória.
+
+        Argumentos:
+            unidades_geograficas_tabela: Objeto [`pandas.DataFrame`][] com
+                as colunas `id`, `id_sus` e `id_sim` das unidades
+                geográficas.
+            ufs_tabela: Objeto [`pandas.DataFrame`][] com as colunas
+                `id_ibge` e `sigla` das unidades federativas.
+
+        [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+        """
+        self._definir_mapas(unidades_geograficas_tabela, ufs_tabela)
+
+    def _definir_mapas(
+        self,
+        unidades_geograficas_tabela: pd.DataFrame,
+        ufs_tabela: pd.DataFrame,
+    ) -> None:
+        self._mapas = {
+            "id_sus_para_id_impulso": _criar_mapa(
+                unidades_geograficas_tabela,
+                "id_sus",
+                "id",
+            ),
+            "id_sim_para_id_impulso": _criar_mapa(
+                unidades_geograficas_tabela,
+                "id_sim",
+                "id",
+            ),
+            "id_impulso_para_id_sus": _criar_mapa(
+                unidades_geograficas_tabela,
+                "id",
+                "id_sus",
+            ),
+            "uf_id_ibge_para_sigla": _criar_mapa(
+                ufs_tabela,
+                "id_ibge",
+                "sigla",
+            ),
+        }
+
+    @staticmethod
+    def _consultar(sessao: Session) -> tuple[pd.DataFrame, pd.DataFrame]:
+        unidades_geograficas_tabela = pd.DataFrame(
+            sessao.query(
+                unidades_geograficas.c.id,
+                unidades_geograficas.c.id_sus,
+                unidades_geograficas.c.id_sim,
+            ).all(),
+            columns=["id", "id_sus", "id_sim"],
+        )
+        ufs_tabela = pd.DataFrame(
+            sessao.query(ufs.c.id_ibge, ufs.c.sigla).all(),
+            columns=["id_ibge", "sigla"],
+        )
+        return unidades_geograficas_tabela, ufs_tabela
+
+    @classmethod
+    def carregar(cls, sessao: Session) -> DimensaoGeografica:
+        """Carrega a dimensão geográfica a partir do banco de dados.
+
+        Argumentos:
+            sessao: objeto [`sqlalchemy.orm.session.Session`][] que permite
+                acessar a base de dados da ImpulsoGov.
+
+        Retorna:
+            Uma dimensão com todas as unidades geográficas e unidades
+            federativas cadastradas.
+
+        [`sqlalchemy.orm.session.Session`]: https://docs.sqlalchemy.org/en/14/orm/session_api.html#sqlalchemy.orm.Session
+        """
+        return cls(*cls._consultar(sessao))
+
+    def atualizar(self, sessao: Session) -> None:
+        """Recarrega as unidades geográficas a partir do banco de dados.
+
+        Argumentos:
+            sessao: objeto [`sqlalchemy.orm.session.Session`][] que permite
+                acessar a base de dados da ImpulsoGov.
+
+        [`sqlalchemy.orm.session.Session`]: https://docs.sqlalchemy.org/en/14/orm/session_api.html#sqlalchemy.orm.Session
+        """
+        logger.debug("Recarregando a dimensão geográfica...")
+        self._definir_mapas(*self._consultar(sessao))
+
+    def converter(
+        self,
+        conversao: str,
+        codigos: pd.Series,
+        erros: str = "raise",
+    ) -> pd.Series:
+        """Converte uma coluna inteira de códigos geográficos.
+
+        Argumentos:
+            conversao: Nome da conversão desejada. Aceita os valores
+                `'id_sus_para_id_impulso'`, `'id_sim_para_id_impulso'`,
+                `'id_impulso_para_id_sus'` e `'uf_id_ibge_para_sigla'`,
+                equivalentes às funções homônimas deste módulo.
+            codigos: Série com os códigos a serem convertidos. Códigos
+                numéricos são convertidos em texto antes da busca.
+            erros: Define a atitude a ser tomada caso algum código não seja
+                encontrado. Aceita as categorias `'raise'` (levanta uma
+                exceção; padrão) ou `'coerce'` (atribui um valor nulo ao
+                código desconhecido). Em ambos os casos, os códigos
+                desconhecidos são registrados no log.
+
+        Retorna:
+            Uma série, com o mesmo índice da série original, contendo os
+            códigos convertidos.
+
+        Exceções:
+            Levanta um erro [`sqlalchemy.orm.exc.NoResultFound`][] se algum
+            código não for encontrado e o argumento `erros` for `'raise'`.
+
+        [`sqlalchemy.orm.exc.NoResultFound`]: https://docs.sqlalchemy.org/en/14/orm/exceptions.html#sqlalchemy.orm.exc.NoResultFound
+        """
+        mapa = self._mapas[conversao]
+        convertidos = codigos.astype(str).map(mapa)
+        desconhecidos = convertidos.isna()
+        if desconhecidos.any():
+            codigos_desconhecidos = sorted(
+                codigos[desconhecidos].astype(str).unique(),
+            )
+            logger.warning(
+                "{} registro(s) com código(s) desconhecido(s) na conversão "
+                + "`{}`: {}.",
+                desconhecidos.sum(),
+                conversao,
+                ", ".join(codigos_desconhecidos),
+            )
+            if erros == "raise":
+                raise NoResultFound(
+                    "Código(s) desconhecido(s) na conversão `{}`: {}.".format(
+                        conversao,
+                        ", ".join(codigos_desconhecidos),
+                    ),
+                )
+        return convertidos
+
+
+def _criar_mapa(
+    tabela: pd.DataFrame,
+    coluna_origem: str,
+    coluna_destino: str,
+) -> pd.Series:
+    """Cria uma série indexada pelos códigos de origem de uma conversão."""
+    tabela = tabela.dropna(subset=[coluna_origem, coluna_destino])
+    mapa = pd.Series(
+        tabela[coluna_destino].astype(str).to_numpy(dtype=object),
+        index=tabela[coluna_origem].astype(str).to_numpy(dtype=object),
+    )
+    return mapa[~mapa.index.duplicated(keep=False)]
+
+
+@lru_cache(10)
+def dimensao_geografica(sessao: Session) -> DimensaoGeografica:
+    """Obtém a dimensão geográfica, carregada uma única vez por sessão.
+
+    Argumentos:
+        sessao: objeto [`sqlalchemy.orm.session.Session`][] que permite
+            acessar a base de dados da ImpulsoGov.
+
+    Retorna:
+        Uma instância da classe [`DimensaoGeografica`][]. Para que
+        alterações nas tabelas de unidades geográficas sejam refletidas, use
+        o método [`DimensaoGeografica.atualizar()`][].
+
+    [`sqlalchemy.orm.session.Session`]: https://docs.sqlalchemy.org/en/14/orm/session_api.html#sqlalchemy.orm.Session
+    [`DimensaoGeografica`]: impulsoetl.comum.geografias.DimensaoGeografica
+    [`DimensaoGeografica.atualizar()`]: impulsoetl.comum.geografias.DimensaoGeografica.atualizar
+    """
+    return DimensaoGeografica.carregar(sessao)
+
+
+def ids_sus_para_ids_impulso(
+    sessao: Session,
+    ids_sus: pd.Series,
+    erros: str = "raise",
+) -> pd.Series:
+    """Converte uma coluna de identificadores SUS de municípios.
+
+    Equivale a aplicar a função [`id_sus_para_id_impulso()`][] a cada
+    elemento da série, mas consulta o banco de dados uma única vez por
+    sessão. Ver [`DimensaoGeografica.converter()`][].
+
+    [`id_sus_para_id_impulso()`]: impulsoetl.comum.geografias.id_sus_para_id_impulso
+    [`DimensaoGeografica.converter()`]: impulsoetl.comum.geografias.DimensaoGeografica.converter
+    """
+    return dimensao_geografica(sessao).converter(
+        "id_sus_para_id_impulso",
+        ids_sus,
+        erros=erros,
+    )
+
+
+def ids_sim_para_ids_impulso(
+    sessao: Session,
+    ids_sim: pd.Series,
+    erros: str = "raise",
+) -> pd.Series:
+    """Converte uma coluna de identificadores SIM de municípios.
+
+    Equivale a aplicar a função [`id_sim_para_id_impulso()`][] a cada
+    elemento da série, mas consulta o banco de dados uma única vez por
+    sessão. Ver [`DimensaoGeografica.converter()`][].
+
+    [`id_sim_para_id_impulso()`]: impulsoetl.comum.geografias.id_sim_para_id_impulso
+    [`DimensaoGeografica.converter()`]: impulsoetl.comum.geografias.DimensaoGeografica.converter
+    """
+    return dimensao_geografica(sessao).converter(
+        "id_sim_para_id_impulso",
+        ids_sim,
+        erros=erros,
+    )
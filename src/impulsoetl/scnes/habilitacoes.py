@@ -11,7 +11,7 @@ from __future__ import annotations
 import os
 import re
 from datetime import date
-from typing import Final, Generator
+from typing import Final, Generator, Iterable
 
 import janitor  # noqa: F401  # nopycln: import
 import numpy as np
@@ -19,13 +19,26 @@ import pandas as pd
 import roman
 from frozendict import frozendict
 from sqlalchemy.orm import Session
-from uuid6 import uuid7
 
-from impulsoetl.comum.datas import agora_gmt_menos3, periodo_por_data
-from impulsoetl.comum.geografias import id_sus_para_id_impulso
+from impulsoetl.comum.datas import (
+    agora_gmt_menos3,
+    de_aaaamm_para_datas,
+    de_textos_para_datas,
+    periodos_por_datas,
+)
+from impulsoetl.comum.geografias import ids_sus_para_ids_impulso
 from impulsoetl.loggers import logger
 from impulsoetl.utilitarios.bd import carregar_dataframe
 from impulsoetl.utilitarios.datasus_ftp import extrair_dbc_lotes
+from impulsoetl.utilitarios.especificacoes import (
+    EspecificacaoFonte,
+    PlanoTransformacao,
+    interpretar_booleano,
+)
+from impulsoetl.utilitarios.identificadores import adicionar_uuids7
+from impulsoetl.utilitarios.mapeamentos import por_valor_distinto
+from impulsoetl.utilitarios.paralelismo import transformar_lotes
+from impulsoetl.utilitarios.valores_nulos import PADRAO_ZEROS
 
 DE_PARA_HABILITACOES: Final[frozendict] = frozendict(
     {
@@ -69,38 +82,38 @@ TIPOS_HABILITACOES: Final[frozendict] = frozendict(
         "id": "object",
         "unidade_geografica_id": "object",
         "periodo_id": "object",
-        "estabelecimento_id_scnes": "object",
-        "estabelecimento_municipio_id_sus": "object",
-        "estabelecimento_regiao_saude_id_sus": "object",
-        "estabelecimento_microrregiao_saude_id_sus": "object",
-        "estabelecimento_distrito_sanitario_id_sus": "object",
-        "estabelecimento_distrito_administrativo_id_sus": "object",
-        "estabelecimento_gestao_condicao_id_scnes": "object",
-        "estabelecimento_personalidade_juridica_id_scnes": "object",
-        "estabelecimento_id_cpf_cnpj": "object",
+        "estabelecimento_id_scnes": "category",
+        "estabelecimento_municipio_id_sus": "category",
+        "estabelecimento_regiao_saude_id_sus": "category",
+        "estabelecimento_microrregiao_saude_id_sus": "category",
+        "estabelecimento_distrito_sanitario_id_sus": "category",
+        "estabelecimento_distrito_administrativo_id_sus": "category",
+        "estabelecimento_gestao_condicao_id_scnes": "category",
+        "estabelecimento_personalidade_juridica_id_scnes": "category",
+        "estabelecimento_id_cpf_cnpj": "category",
         "estabelecimento_mantido": "boolean",
-        "estabelecimento_mantenedora_id_cnpj": "object",
-        "estabelecimento_esfera_id_scnes": "object",
-        "estabelecimento_tributos_retencao_id_scnes": "object",
-        "estabelecimento_natureza_id_scnes": "object",
-        "estabelecimento_fluxo_id_scnes": "object",
-        "estabelecimento_atividade_ensino_id_scnes": "object",
-        "estabelecimento_tipo_id_scnes": "object",
-        "estabelecimento_turno_id_scnes": "object",
-        "estabelecimento_hierarquia_id_scnes": "object",
+        "estabelecimento_mantenedora_id_cnpj": "category",
+        "estabelecimento_esfera_id_scnes": "category",
+        "estabelecimento_tributos_retencao_id_scnes": "category",
+        "estabelecimento_natureza_id_scnes": "category",
+        "estabelecimento_fluxo_id_scnes": "category",
+        "estabelecimento_atividade_ensino_id_scnes": "category",
+        "estabelecimento_tipo_id_scnes": "category",
+        "estabelecimento_turno_id_scnes": "category",
+        "estabelecimento_hierarquia_id_scnes": "category",
         "estabelecimento_terceiro": "boolean",
         "atendimento_sus": "boolean",
-        "prestador_tipo_id_fca": "object",
-        "habilitacao_id_scnes": "object",
+        "prestador_tipo_id_fca": "category",
+        "habilitacao_id_scnes": "category",
         "vigencia_data_inicio": "datetime64[ns]",
         "vigencia_data_fim": "datetime64[ns]",
         "portaria_data": "datetime64[ns]",
-        "portaria_nome": "object",
+        "portaria_nome": "category",
         "portaria_periodo_data_inicio": "datetime64[ns]",
         "leitos_quantidade": "int64",
         "periodo_data_inicio": "datetime64[ns]",
-        "estabelecimento_natureza_juridica_id_scnes": "object",
-        "estabelecimento_cep": "object",
+        "estabelecimento_natureza_juridica_id_scnes": "category",
+        "estabelecimento_cep": "category",
         "criacao_data": "datetime64[ns]",
         "atualizacao_data": "datetime64[ns]",
     },
@@ -122,16 +135,6 @@ COLUNAS_NUMERICAS: Final[list[str]] = [
 ]
 
 
-def _para_booleano(valor: str) -> bool | float:
-    """Transforma um valor binário '0' ou '1' em booleano. Suporta NaNs."""
-    if valor == "0":
-        return False
-    elif valor == "1":
-        return True
-    else:
-        return np.nan
-
-
 def _romano_para_inteiro(texto: str) -> str | float:
     if pd.isna(texto):
         return np.nan
@@ -141,10 +144,64 @@ def _romano_para_inteiro(texto: str) -> str | float:
         return texto
 
 
+def _completar_regiao_saude(texto: str) -> str | float:
+    """Converte um código de região de saúde em um texto de 4 algarismos."""
+    if pd.isna(texto):
+        return np.nan
+    return re.sub("[^0-9]", "", _romano_para_inteiro(texto)).zfill(4)
+
+
+ESPECIFICACAO_HABILITACOES: Final[EspecificacaoFonte] = EspecificacaoFonte(
+    de_para=DE_PARA_HABILITACOES,
+    tipos=TIPOS_HABILITACOES,
+    interpretadores={
+        **{coluna: de_aaaamm_para_datas for coluna in COLUNAS_DATA_AAAAMM},
+        **{
+            coluna: lambda datas: de_textos_para_datas(datas, "%d/%m/%Y")
+            for coluna in COLUNAS_DATA_AAAAMMDD
+        },
+        # limpar e completar códigos de região e distrito de saúde
+        "estabelecimento_regiao_saude_id_sus": por_valor_distinto(
+            _completar_regiao_saude,
+        ),
+        "estabelecimento_distrito_sanitario_id_sus": (
+            lambda ids_sus: ids_sus.str.zfill(4)
+        ),
+        "estabelecimento_distrito_administrativo_id_sus": (
+            lambda ids_sus: ids_sus.str.zfill(4)
+        ),
+        "estabelecimento_microrregiao_saude_id_sus": (
+            lambda ids_sus: ids_sus.str.zfill(6)
+        ),
+        "estabelecimento_mantido": interpretar_booleano(["1"]),
+        "estabelecimento_terceiro": interpretar_booleano(["1"], ["0"]),
+        "atendimento_sus": interpretar_booleano(["1"], ["0"]),
+    },
+    nulos={
+        coluna: PADRAO_ZEROS
+        for coluna in (
+            "estabelecimento_microrregiao_saude_id_sus",
+            "estabelecimento_distrito_sanitario_id_sus",
+            "estabelecimento_distrito_administrativo_id_sus",
+            "estabelecimento_id_cpf_cnpj",
+            "estabelecimento_mantenedora_id_cnpj",
+        )
+    },
+    nulos_interpretados={
+        "estabelecimento_regiao_saude_id_sus": PADRAO_ZEROS,
+    },
+)
+
+PLANO_HABILITACOES: Final[PlanoTransformacao] = (
+    ESPECIFICACAO_HABILITACOES.compilar()
+)
+
+
 def extrair_habilitacoes(
     uf_sigla: str,
     periodo_data_inicio: date,
     passo: int = 10000,
+    colunas: Iterable[str] | None = tuple(DE_PARA_HABILITACOES),
 ) -> Generator[pd.DataFrame, None, None]:
     """Extrai registros de habilitações de estabelecimentos do FTP do DataSUS.
 
@@ -155,6 +212,9 @@ def extrair_habilitacoes(
             representado como um objeto [`datetime.date`][].
         passo: Número de registros que devem ser convertidos em DataFrame a
             cada iteração.
+        colunas: Nomes das colunas a serem lidas do arquivo de disseminação.
+            Por padrão, são lidas apenas as colunas usadas nas
+            transformações (ver [`DE_PARA_HABILITACOES`][]).
 
     Gera:
         A cada iteração, devolve um objeto [`pandas.DataFrames`][] com um
@@ -162,6 +222,7 @@ def extrair_habilitacoes(
 
     [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
     [`datetime.date`]: https://docs.python.org/3/library/datetime.html#date-objects
+    [`DE_PARA_HABILITACOES`]: impulsoetl.scnes.habilitacoes.DE_PARA_HABILITACOES
     """
 
     return extrair_dbc_lotes(
@@ -172,6 +233,7 @@ def extrair_habilitacoes(
             periodo_data_inicio=periodo_data_inicio,
         ),
         passo=passo,
+        colunas=colunas,
     )
 
 
@@ -207,108 +269,34 @@ def transformar_habilitacoes(
         memoria_usada=habilitacoes.memory_usage(deep=True).sum() / 10**6,
     )
     habilitacoes_transformado = (
-        habilitacoes  # noqa: WPS221  # ignorar linha complexa no pipeline
-        # renomear colunas
-        .rename_columns(function=lambda col: col.strip())
-        .rename_columns(DE_PARA_HABILITACOES)
-        # adicionar datas de inserção e atualização
-        .add_column("criacao_data", agora_gmt_menos3())
-        .add_column("atualizacao_data", agora_gmt_menos3())
-        # processar colunas com datas
-        .transform_columns(
-            COLUNAS_DATA_AAAAMM,
-            function=lambda dt: pd.to_datetime(
-                dt,
-                format="%Y%m",
-                errors="coerce",
-            ),
-        )
-        .transform_columns(
-            COLUNAS_DATA_AAAAMMDD,
-            function=lambda dt: pd.to_datetime(
-                dt,
-                format="%d/%m/%Y",
-                errors="coerce",
-            ),
-        )
-        # limpar e completar códigos de região e distrito de saúde
-        .transform_column(
-            "estabelecimento_regiao_saude_id_sus",
-            _romano_para_inteiro,
-        )
-        .transform_column(
-            "estabelecimento_regiao_saude_id_sus",
-            lambda id_sus: (
-                re.sub("[^0-9]", "", id_sus) if pd.notna(id_sus) else np.nan
-            ),
-        )
-        .transform_columns(
-            [
-                "estabelecimento_regiao_saude_id_sus",
-                "estabelecimento_distrito_sanitario_id_sus",
-                "estabelecimento_distrito_administrativo_id_sus",
-            ],
-            lambda id_sus: (id_sus.zfill(4) if pd.notna(id_sus) else np.nan),
-        )
-        .transform_column(
-            "estabelecimento_microrregiao_saude_id_sus",
-            lambda id_sus: (id_sus.zfill(6) if pd.notna(id_sus) else np.nan),
-        )
-        # tratar como NA colunas com valores nulos
-        .replace("", np.nan)
-        .transform_columns(
-            [
-                "estabelecimento_regiao_saude_id_sus",
-                "estabelecimento_microrregiao_saude_id_sus",
-                "estabelecimento_distrito_sanitario_id_sus",
-                "estabelecimento_distrito_administrativo_id_sus",
-                "estabelecimento_id_cpf_cnpj",
-                "estabelecimento_mantenedora_id_cnpj",
-            ],
-            function=lambda elemento: (
-                np.nan
-                if pd.notna(elemento)
-                and all(digito == "0" for digito in elemento)
-                else elemento
-            ),
-        )
-        # processar colunas lógicas
-        .transform_column(
-            "estabelecimento_mantido",
-            function=lambda elemento: True if elemento == "1" else False,
-        )
-        .transform_columns(
-            [
-                "estabelecimento_terceiro",
-                "atendimento_sus",
-            ],
-            function=_para_booleano,
-        )
+        PLANO_HABILITACOES.interpretar(habilitacoes)  # noqa: WPS221
         # adicionar id
-        .add_column("id", str())
-        .transform_column("id", function=lambda _: uuid7().hex)
+        .pipe(adicionar_uuids7)
         # adicionar id do periodo
         .transform_column(
             "periodo_data_inicio",
-            function=lambda dt: periodo_por_data(sessao=sessao, data=dt).id,
+            function=lambda datas: periodos_por_datas(
+                sessao=sessao,
+                datas=datas,
+            ),
             dest_column_name="periodo_id",
+            elementwise=False,
         )
         # adicionar id da unidade geografica
         .transform_column(
             "estabelecimento_municipio_id_sus",
-            function=lambda id_sus: id_sus_para_id_impulso(
+            function=lambda ids_sus: ids_sus_para_ids_impulso(
                 sessao=sessao,
-                id_sus=id_sus,
+                ids_sus=ids_sus,
             ),
             dest_column_name="unidade_geografica_id",
+            elementwise=False,
         )
+        # adicionar datas de inserção e atualização
+        .add_column("criacao_data", agora_gmt_menos3())
+        .add_column("atualizacao_data", agora_gmt_menos3())
         # garantir tipos
-        .change_type(
-            # HACK: ver https://github.com/pandas-dev/pandas/issues/25472
-            COLUNAS_NUMERICAS,
-            "float",
-        )
-        .astype(TIPOS_HABILITACOES)
+        .pipe(PLANO_HABILITACOES.tipar)
     )
     logger.debug(
         "Memória ocupada pelo DataFrame transformado: {memoria_usada:.2f} mB.",
@@ -364,12 +352,17 @@ def obter_habilitacoes(
         passo=passo,
     )
 
+    habilitacoes_transformadas = transformar_lotes(
+        transformar_habilitacoes,
+        habilitacoes_lotes,
+        sessao=sessao,
+        argumento="habilitacoes",
+    )
+
     contador = 0
-    for habilitacoes_lote in habilitacoes_lotes:
-        habilitacoes_transformada = transformar_habilitacoes(
-            sessao=sessao,
-            habilitacoes=habilitacoes_lote,
-        )
+    for habilitacoes_lote_tamanho, habilitacoes_transformada in (
+        habilitacoes_transformadas
+    ):
 
         carregamento_status = carregar_dataframe(
             sessao=sessao,
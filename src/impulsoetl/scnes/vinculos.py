@@ -11,7 +11,7 @@ from __future__ import annotations
 import os
 import re
 from datetime import date
-from typing import Final, Generator
+from typing import Final, Generator, Iterable
 
 import janitor  # noqa: F401  # nopycln: import
 import numpy as np
@@ -19,13 +19,25 @@ import pandas as pd
 import roman
 from frozendict import frozendict
 from sqlalchemy.orm import Session
-from uuid6 import uuid7
 
-from impulsoetl.comum.datas import agora_gmt_menos3, periodo_por_data
-from impulsoetl.comum.geografias import id_sus_para_id_impulso
+from impulsoetl.comum.datas import (
+    agora_gmt_menos3,
+    de_aaaamm_para_datas,
+    periodos_por_datas,
+)
+from impulsoetl.comum.geografias import ids_sus_para_ids_impulso
 from impulsoetl.loggers import logger
 from impulsoetl.utilitarios.bd import carregar_dataframe
 from impulsoetl.utilitarios.datasus_ftp import extrair_dbc_lotes
+from impulsoetl.utilitarios.especificacoes import (
+    EspecificacaoFonte,
+    PlanoTransformacao,
+    interpretar_booleano,
+)
+from impulsoetl.utilitarios.identificadores import adicionar_uuids7
+from impulsoetl.utilitarios.mapeamentos import por_valor_distinto
+from impulsoetl.utilitarios.paralelismo import transformar_lotes
+from impulsoetl.utilitarios.valores_nulos import PADRAO_ZEROS
 
 DE_PARA_VINCULOS: Final[frozendict] = frozendict(
     {
@@ -77,35 +89,35 @@ TIPOS_VINCULOS: Final[frozendict] = frozendict(
         "id": "object",
         "unidade_geografica_id": "object",
         "periodo_id": "object",
-        "estabelecimento_id_scnes": "object",
-        "estabelecimento_municipio_id_sus": "object",
-        "estabelecimento_regiao_saude_id_sus": "object",
-        "estabelecimento_microrregiao_saude_id_sus": "object",
-        "estabelecimento_distrito_sanitario_id_sus": "object",
-        "estabelecimento_distrito_administrativo_id_sus": "object",
-        "estabelecimento_gestao_condicao_id_scnes": "object",
-        "estabelecimento_personalidade_juridica_id_scnes": "object",
-        "estabelecimento_id_cpf_cnpj": "object",
+        "estabelecimento_id_scnes": "category",
+        "estabelecimento_municipio_id_sus": "category",
+        "estabelecimento_regiao_saude_id_sus": "category",
+        "estabelecimento_microrregiao_saude_id_sus": "category",
+        "estabelecimento_distrito_sanitario_id_sus": "category",
+        "estabelecimento_distrito_administrativo_id_sus": "category",
+        "estabelecimento_gestao_condicao_id_scnes": "category",
+        "estabelecimento_personalidade_juridica_id_scnes": "category",
+        "estabelecimento_id_cpf_cnpj": "category",
         "estabelecimento_mantido": "boolean",
-        "estabelecimento_mantenedora_id_cnpj": "object",
-        "estabelecimento_esfera_id_scnes": "object",
-        "estabelecimento_atividade_ensino_id_scnes": "object",
-        "estabelecimento_tributos_retencao_id_scnes": "object",
-        "estabelecimento_natureza_id_scnes": "object",
-        "estabelecimento_tipo_id_scnes": "object",
-        "estabelecimento_fluxo_id_scnes": "object",
-        "estabelecimento_turno_id_scnes": "object",
-        "estabelecimento_hierarquia_id_scnes": "object",
+        "estabelecimento_mantenedora_id_cnpj": "category",
+        "estabelecimento_esfera_id_scnes": "category",
+        "estabelecimento_atividade_ensino_id_scnes": "category",
+        "estabelecimento_tributos_retencao_id_scnes": "category",
+        "estabelecimento_natureza_id_scnes": "category",
+        "estabelecimento_tipo_id_scnes": "category",
+        "estabelecimento_fluxo_id_scnes": "category",
+        "estabelecimento_turno_id_scnes": "category",
+        "estabelecimento_hierarquia_id_scnes": "category",
         "estabelecimento_terceiro": "boolean",
         "profissional_id_cpf_criptografado": "object",
         "profissional_cpf_unico": "object",
-        "ocupacao_id_cbo2002": "object",
-        "ocupacao_cbo_unico": "object",
+        "ocupacao_id_cbo2002": "category",
+        "ocupacao_cbo_unico": "category",
         "profissional_nome": "object",
         "profissional_id_cns": "object",
-        "profissional_conselho_tipo_id_scnes": "object",
+        "profissional_conselho_tipo_id_scnes": "category",
         "profissional_id_conselho": "object",
-        "tipo_id_scnes": "object",
+        "tipo_id_scnes": "category",
         "contratado": "boolean",
         "autonomo": "boolean",
         "sem_vinculo_definido": "boolean",
@@ -115,8 +127,8 @@ TIPOS_VINCULOS: Final[frozendict] = frozendict(
         "atendimento_carga_hospitalar": "int64",
         "atendimento_carga_ambulatorial": "int64",
         "periodo_data_inicio": "datetime64[ns]",
-        "profissional_residencia_municipio_id_sus": "object",
-        "estabelecimento_natureza_juridica_id_scnes": "object",
+        "profissional_residencia_municipio_id_sus": "category",
+        "estabelecimento_natureza_juridica_id_scnes": "category",
         "criacao_data": "datetime64[ns]",
         "atualizacao_data": "datetime64[ns]",
     },
@@ -133,16 +145,6 @@ COLUNAS_NUMERICAS: Final[list[str]] = [
 ]
 
 
-def _para_booleano(valor: str) -> bool | float:
-    """Transforma um valor binário '0' ou '1' em booleano. Suporta NaNs."""
-    if valor == "0":
-        return False
-    elif valor == "1":
-        return True
-    else:
-        return np.nan
-
-
 def _romano_para_inteiro(texto: str) -> str | float:
     if pd.isna(texto):
         return np.nan
@@ -152,10 +154,73 @@ def _romano_para_inteiro(texto: str) -> str | float:
         return texto
 
 
+def _completar_regiao_saude(texto: str) -> str | float:
+    """Converte um código de região de saúde em um texto de 4 algarismos."""
+    if pd.isna(texto):
+        return np.nan
+    return re.sub("[^0-9]", "", _romano_para_inteiro(texto)).zfill(4)
+
+
+ESPECIFICACAO_VINCULOS: Final[EspecificacaoFonte] = EspecificacaoFonte(
+    de_para=DE_PARA_VINCULOS,
+    tipos=TIPOS_VINCULOS,
+    interpretadores={
+        **{coluna: de_aaaamm_para_datas for coluna in COLUNAS_DATA_AAAAMM},
+        # limpar e completar códigos de região e distrito de saúde
+        "estabelecimento_regiao_saude_id_sus": por_valor_distinto(
+            _completar_regiao_saude,
+        ),
+        "estabelecimento_distrito_sanitario_id_sus": (
+            lambda ids_sus: ids_sus.str.zfill(4)
+        ),
+        "estabelecimento_distrito_administrativo_id_sus": (
+            lambda ids_sus: ids_sus.str.zfill(4)
+        ),
+        "estabelecimento_microrregiao_saude_id_sus": (
+            lambda ids_sus: ids_sus.str.zfill(6)
+        ),
+        # limpar registros no conselho profissional
+        "profissional_id_conselho": (
+            lambda ids: ids.str.replace("[^0-9]", "", regex=True)
+        ),
+        "estabelecimento_mantido": interpretar_booleano(["1"]),
+        **{
+            coluna: interpretar_booleano(["1"], ["0"])
+            for coluna in (
+                "estabelecimento_terceiro",
+                "contratado",
+                "autonomo",
+                "sem_vinculo_definido",
+                "atendimento_sus",
+                "atendimento_nao_sus",
+            )
+        },
+    },
+    nulos={
+        coluna: PADRAO_ZEROS
+        for coluna in (
+            "estabelecimento_microrregiao_saude_id_sus",
+            "estabelecimento_distrito_sanitario_id_sus",
+            "estabelecimento_distrito_administrativo_id_sus",
+            "estabelecimento_id_cpf_cnpj",
+            "estabelecimento_mantenedora_id_cnpj",
+            "profissional_residencia_municipio_id_sus",
+        )
+    },
+    nulos_interpretados={
+        "estabelecimento_regiao_saude_id_sus": PADRAO_ZEROS,
+        "profissional_id_conselho": PADRAO_ZEROS,
+    },
+)
+
+PLANO_VINCULOS: Final[PlanoTransformacao] = ESPECIFICACAO_VINCULOS.compilar()
+
+
 def extrair_vinculos(
     uf_sigla: str,
     periodo_data_inicio: date,
     passo: int = 10000,
+    colunas: Iterable[str] | None = tuple(DE_PARA_VINCULOS),
 ) -> Generator[pd.DataFrame, None, None]:
     """Extrai registros de vínculos profissionais do FTP do DataSUS.
 
@@ -166,6 +231,9 @@ def extrair_vinculos(
             representado como um objeto [`datetime.date`][].
         passo: Número de registros que devem ser convertidos em DataFrame a
             cada iteração.
+        colunas: Nomes das colunas a serem lidas do arquivo de disseminação.
+            Por padrão, são lidas apenas as colunas usadas nas
+            transformações (ver [`DE_PARA_VINCULOS`][]).
 
     Gera:
         A cada iteração, devolve um objeto [`pandas.DataFrames`][] com um
@@ -173,6 +241,7 @@ def extrair_vinculos(
 
     [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
     [`datetime.date`]: https://docs.python.org/3/library/datetime.html#date-objects
+    [`DE_PARA_VINCULOS`]: impulsoetl.scnes.vinculos.DE_PARA_VINCULOS
     """
 
     return extrair_dbc_lotes(
@@ -183,6 +252,7 @@ def extrair_vinculos(
             periodo_data_inicio=periodo_data_inicio,
         ),
         passo=passo,
+        colunas=colunas,
     )
 
 
@@ -218,115 +288,34 @@ def transformar_vinculos(
         memoria_usada=vinculos.memory_usage(deep=True).sum() / 10 ** 6,
     )
     vinculos_transformado = (
-        vinculos  # noqa: WPS221  # ignorar linha complexa no pipeline
-        # renomear colunas
-        .rename_columns(function=lambda col: col.strip())
-        .rename_columns(DE_PARA_VINCULOS)
-        # processar colunas com datas
-        .transform_columns(
-            COLUNAS_DATA_AAAAMM,
-            function=lambda dt: pd.to_datetime(
-                dt,
-                format="%Y%m",
-                errors="coerce",
-            ),
-        )
-        # limpar e completar códigos de região e distrito de saúde
-        .transform_column(
-            "estabelecimento_regiao_saude_id_sus",
-            _romano_para_inteiro,
-        )
-        .transform_column(
-            "estabelecimento_regiao_saude_id_sus",
-            lambda id_sus: (
-                re.sub("[^0-9]", "", id_sus) if pd.notna(id_sus) else np.nan
-            ),
-        )
-        .transform_columns(
-            [
-                "estabelecimento_regiao_saude_id_sus",
-                "estabelecimento_distrito_sanitario_id_sus",
-                "estabelecimento_distrito_administrativo_id_sus",
-            ],
-            lambda id_sus: (id_sus.zfill(4) if pd.notna(id_sus) else np.nan),
-        )
-        .transform_column(
-            "estabelecimento_microrregiao_saude_id_sus",
-            lambda id_sus: (id_sus.zfill(6) if pd.notna(id_sus) else np.nan),
-        )
-        # limpar registros no conselho profissional
-        .transform_column(
-            "profissional_id_conselho",
-            lambda id_conselho: (
-                re.sub("[^0-9]", "", id_conselho)
-                if pd.notna(id_conselho)
-                else np.nan
-            ),
-        )
-        # tratar como NA colunas com valores nulos
-        .replace("", np.nan)
-        .transform_columns(
-            [
-                "estabelecimento_regiao_saude_id_sus",
-                "estabelecimento_microrregiao_saude_id_sus",
-                "estabelecimento_distrito_sanitario_id_sus",
-                "estabelecimento_distrito_administrativo_id_sus",
-                "estabelecimento_id_cpf_cnpj",
-                "estabelecimento_mantenedora_id_cnpj",
-                "profissional_id_conselho",
-                "profissional_residencia_municipio_id_sus",
-            ],
-            function=lambda elemento: (
-                np.nan
-                if pd.notna(elemento)
-                and all(digito == "0" for digito in elemento)
-                else elemento
-            ),
-        )
-        # processar colunas lógicas
-        .transform_column(
-            "estabelecimento_mantido",
-            function=lambda elemento: True if elemento == "1" else False,
-        )
-        .transform_columns(
-            [
-                "estabelecimento_terceiro",
-                "contratado",
-                "autonomo",
-                "sem_vinculo_definido",
-                "atendimento_sus",
-                "atendimento_nao_sus",
-            ],
-            function=_para_booleano,
-        )
+        PLANO_VINCULOS.interpretar(vinculos)  # noqa: WPS221  # linha complexa
         # adicionar id
-        .add_column("id", str())
-        .transform_column("id", function=lambda _: uuid7().hex)
+        .pipe(adicionar_uuids7)
         # adicionar id do periodo
         .transform_column(
             "periodo_data_inicio",
-            function=lambda dt: periodo_por_data(sessao=sessao, data=dt).id,
+            function=lambda datas: periodos_por_datas(
+                sessao=sessao,
+                datas=datas,
+            ),
             dest_column_name="periodo_id",
+            elementwise=False,
         )
         # adicionar id da unidade geografica
         .transform_column(
             "estabelecimento_municipio_id_sus",
-            function=lambda id_sus: id_sus_para_id_impulso(
+            function=lambda ids_sus: ids_sus_para_ids_impulso(
                 sessao=sessao,
-                id_sus=id_sus,
+                ids_sus=ids_sus,
             ),
             dest_column_name="unidade_geografica_id",
+            elementwise=False,
         )
         # adicionar datas de inserção e atualização
         .add_column("criacao_data", agora_gmt_menos3())
         .add_column("atualizacao_data", agora_gmt_menos3())
         # garantir tipos
-        .change_type(
-            # HACK: ver https://github.com/pandas-dev/pandas/issues/25472
-            COLUNAS_NUMERICAS,
-            "float",
-        )
-        .astype(TIPOS_VINCULOS)
+        .pipe(PLANO_VINCULOS.tipar)
     )
     logger.debug(
         "Memória ocupada pelo DataFrame transformado: {memoria_usada:.2f} mB.",
@@ -382,12 +371,15 @@ def obter_vinculos(
         passo=passo,
     )
 
+    vinculos_transformadas = transformar_lotes(
+        transformar_vinculos,
+        vinculos_lotes,
+        sessao=sessao,
+        argumento="vinculos",
+    )
+
     contador = 0
-    for vinculos_lote in vinculos_lotes:
-        vinculos_transformada = transformar_vinculos(
-            sessao=sessao,
-            vinculos=vinculos_lote,
-        )
+    for vinculos_lote_tamanho, vinculos_transformada in vinculos_transformadas:
 
         carregamento_status = carregar_dataframe(
             sessao=sessao,
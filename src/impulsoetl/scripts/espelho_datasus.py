@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+#
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Sincroniza o espelho local dos repositórios FTP do DataSUS.
+
+Exemplo de uso, para copiar os arquivos de procedimentos ambulatoriais de
+São Paulo em 2021 para o diretório definido na variável de ambiente
+`IMPULSOETL_DATASUS_ESPELHO`:
+
+```sh
+$ python -m impulsoetl.scripts.espelho_datasus \\
+    /dissemin/publicos/SIASUS/200801_/Dados --padrao "PASP21\\d{2}[a-z]?.dbc"
+```
+"""
+
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+
+from impulsoetl.loggers import logger
+from impulsoetl.utilitarios.datasus_espelho import (
+    ESPELHO_CAMINHO,
+    EspelhoDatasus,
+)
+from impulsoetl.utilitarios.datasus_ftp import (
+    DOWNLOADS_PARALELOS,
+    sincronizar_espelho,
+)
+
+
+def principal(argumentos: list[str] | None = None) -> None:
+    """Sincroniza os diretórios do DataSUS informados na linha de comando.
+
+    Argumentos:
+        argumentos: Argumentos de linha de comando. Por padrão, usa os
+            argumentos com os quais o programa foi executado.
+    """
+    interpretador = argparse.ArgumentParser(
+        description="Sincroniza o espelho local do FTP do DataSUS.",
+    )
+    interpretador.add_argument(
+        "diretorios",
+        nargs="+",
+        help="caminhos dos diretórios a sincronizar no servidor FTP",
+    )
+    interpretador.add_argument(
+        "--ftp",
+        default="ftp.datasus.gov.br",
+        help="endereço do servidor FTP (padrão: %(default)s)",
+    )
+    interpretador.add_argument(
+        "--padrao",
+        default=None,
+        help="expressão regular para selecionar os arquivos a sincronizar",
+    )
+    interpretador.add_argument(
+        "--espelho",
+        default=ESPELHO_CAMINHO,
+        help="diretório do espelho local (padrão: %(default)s)",
+    )
+    interpretador.add_argument(
+        "--downloads-paralelos",
+        type=int,
+        default=DOWNLOADS_PARALELOS,
+        help="número máximo de downloads simultâneos (padrão: %(default)s)",
+    )
+    opcoes = interpretador.parse_args(argumentos)
+    if not opcoes.espelho or opcoes.espelho.startswith("ftp://"):
+        interpretador.error(
+            "defina um diretório local para o espelho, com a opção "
+            + "--espelho ou a variável IMPULSOETL_DATASUS_ESPELHO.",
+        )
+
+    espelho = EspelhoDatasus(opcoes.espelho)
+    padrao = (
+        re.compile(opcoes.padrao, re.IGNORECASE) if opcoes.padrao else None
+    )
+    for caminho_diretorio in opcoes.diretorios:
+        sincronizar_espelho(
+            ftp=opcoes.ftp,
+            caminho_diretorio=caminho_diretorio,
+            arquivo_nome=padrao,
+            espelho=espelho,
+            downloads_paralelos=opcoes.downloads_paralelos,
+        )
+
+
+if __name__ == "__main__":
+    with logger.catch(onerror=lambda _: sys.exit(1)):
+        principal()
@@ -18,6 +18,7 @@ from impulsoetl.siasus.raas_ps import obter_raas_ps
 from impulsoetl.sihsus.aih_rd import obter_aih_rd
 from impulsoetl.sinan.violencia import obter_agravos_violencia
 from impulsoetl.sisab.producao import obter_relatorio_producao
+from impulsoetl.utilitarios.datasus_impressoes import planejar_recapturas
 
 agendamentos = tabelas["configuracoes.capturas_agendamentos"]
 capturas_historico = tabelas["configuracoes.capturas_historico"]
@@ -343,6 +344,68 @@ def agravos_violencia(
         logger.info("OK.")
 
 
+@logger.catch
+def recapturas_siasus(
+    sessao: Session,
+    teste: bool = False,
+) -> None:
+    logger.info(
+        "Agendando recaptura de arquivos republicados do SIASUS.",
+    )
+    if teste:
+        logger.info("Agendamento de recapturas ignorado no modo de teste.")
+        return
+    planejar_recapturas(
+        sessao=sessao,
+        ftp="ftp.datasus.gov.br",
+        caminho_diretorio="/dissemin/publicos/SIASUS/200801_/Dados",
+        operacoes={
+            # RAAS Psicossociais
+            "69bb7a34-05a8-4d9d-bc7e-c4e9e9722ece": (
+                "PS{uf_sigla}{periodo_data_inicio:%y%m}.dbc"
+            ),
+            # BPA individualizados
+            "50d46e1c-7fb3-4fbb-b495-825ff1f397d9": (
+                "BI{uf_sigla}{periodo_data_inicio:%y%m}.dbc"
+            ),
+            "063000e1-93e2-7c23-9bd0-1f0e7cf59178": (
+                "BI{uf_sigla}{periodo_data_inicio:%y%m}.dbc"
+            ),
+            # procedimentos ambulatoriais
+            "f2a62b56-932a-431d-aee5-e3c0af33914f": (
+                "PA{uf_sigla}{periodo_data_inicio:%y%m}[a-z]?.dbc"
+            ),
+            "063000ce-23f5-7c29-a1cb-1d631ea26685": (
+                "PA{uf_sigla}{periodo_data_inicio:%y%m}[a-z]?.dbc"
+            ),
+        },
+    )
+
+
+@logger.catch
+def recapturas_sihsus(
+    sessao: Session,
+    teste: bool = False,
+) -> None:
+    logger.info(
+        "Agendando recaptura de arquivos republicados do SIHSUS.",
+    )
+    if teste:
+        logger.info("Agendamento de recapturas ignorado no modo de teste.")
+        return
+    planejar_recapturas(
+        sessao=sessao,
+        ftp="ftp.datasus.gov.br",
+        caminho_diretorio="/dissemin/publicos/SIHSUS/200801_/Dados",
+        operacoes={
+            # AIHs reduzidas
+            "0411c818-d189-4f2a-9aa2-7e2cac1b2b79": (
+                "RD{uf_sigla}{periodo_data_inicio:%y%m}.dbc"
+            ),
+        },
+    )
+
+
 def principal(sessao: Session, teste: bool = False) -> None:
     """Executa todos os scripts de captura de dados de saúde mental.
 
@@ -359,6 +422,8 @@ def principal(sessao: Session, teste: bool = False) -> None:
     """
 
     resolutividade_aps_por_condicao(sessao=sessao, teste=teste)
+    recapturas_siasus(sessao=sessao, teste=teste)
+    recapturas_sihsus(sessao=sessao, teste=teste)
     raas_disseminacao(sessao=sessao, teste=teste)
     bpa_i_disseminacao(sessao=sessao, teste=teste)
     procedimentos_disseminacao(sessao=sessao, teste=teste)
@@ -11,24 +11,33 @@ from __future__ import annotations
 
 import os
 from datetime import date
-from typing import Final, Generator
+from typing import Final, Generator, Iterable
 
 import janitor  # noqa: F401  # nopycln: import
-import numpy as np
 import pandas as pd
 from frozendict import frozendict
 from sqlalchemy.orm import Session
-from uuid6 import uuid7
 
 from impulsoetl.comum.datas import (
     agora_gmt_menos3,
-    de_aaaammdd_para_timestamp,
-    periodo_por_data,
+    de_aaaamm_para_datas,
+    de_aaaammdd_para_datas,
+    periodos_por_datas,
 )
-from impulsoetl.comum.geografias import id_sus_para_id_impulso
+from impulsoetl.comum.geografias import ids_sus_para_ids_impulso
 from impulsoetl.loggers import logger
 from impulsoetl.utilitarios.bd import carregar_dataframe
+from impulsoetl.utilitarios.condicoes import colunas_necessarias
 from impulsoetl.utilitarios.datasus_ftp import extrair_dbc_lotes
+from impulsoetl.utilitarios.datasus_impressoes import ImpressoesPendentes
+from impulsoetl.utilitarios.especificacoes import (
+    EspecificacaoFonte,
+    PlanoTransformacao,
+    interpretar_booleano,
+)
+from impulsoetl.utilitarios.identificadores import adicionar_uuids7
+from impulsoetl.utilitarios.paralelismo import transformar_lotes
+from impulsoetl.utilitarios.valores_nulos import PADRAO_ZEROS
 
 DE_PARA_BPA_I: Final[frozendict] = frozendict(
     {
@@ -73,42 +82,42 @@ DE_PARA_BPA_I: Final[frozendict] = frozendict(
 
 TIPOS_BPA_I: Final[frozendict] = frozendict(
     {
-        "estabelecimento_id_scnes": "object",
-        "gestao_unidade_geografica_id_sus": "object",
-        "gestao_condicao_id_siasus": "object",
-        "unidade_geografica_id_sus": "object",
-        "estabelecimento_tipo_id_sigtap": "object",
-        "prestador_tipo_id_sigtap": "object",
+        "estabelecimento_id_scnes": "category",
+        "gestao_unidade_geografica_id_sus": "category",
+        "gestao_condicao_id_siasus": "category",
+        "unidade_geografica_id_sus": "category",
+        "estabelecimento_tipo_id_sigtap": "category",
+        "prestador_tipo_id_sigtap": "category",
         "estabelecimento_mantido": "bool",
         "estabelecimento_id_cnpj": "object",
         "mantenedora_id_cnpj": "object",
         "receptor_credito_id_cnpj": "object",
         "processamento_periodo_data_inicio": "datetime64[ns]",
         "realizacao_periodo_data_inicio": "datetime64[ns]",
-        "procedimento_id_sigtap": "object",
-        "financiamento_tipo_id_sigtap": "object",
-        "financiamento_subtipo_id_sigtap": "object",
-        "complexidade_id_siasus": "object",
+        "procedimento_id_sigtap": "category",
+        "financiamento_tipo_id_sigtap": "category",
+        "financiamento_subtipo_id_sigtap": "category",
+        "complexidade_id_siasus": "category",
         "autorizacao_id_siasus": "object",
         "profissional_id_cns": "object",
-        "profissional_vinculo_ocupacao_id_cbo2002": "object",
-        "condicao_principal_id_cid10": "object",
-        "carater_atendimento_id_siasus": "object",
+        "profissional_vinculo_ocupacao_id_cbo2002": "category",
+        "condicao_principal_id_cid10": "category",
+        "carater_atendimento_id_siasus": "category",
         "usuario_id_cns_criptografado": "object",
         "usuario_nascimento_data": "datetime64[ns]",
-        "usuario_idade_tipo_id_sigtap": "object",
+        "usuario_idade_tipo_id_sigtap": "category",
         "usuario_idade": "Int64",
-        "usuario_sexo_id_sigtap": "object",
-        "usuario_raca_cor_id_siasus": "object",
-        "usuario_residencia_municipio_id_sus": "object",
+        "usuario_sexo_id_sigtap": "category",
+        "usuario_raca_cor_id_siasus": "category",
+        "usuario_residencia_municipio_id_sus": "category",
         "quantidade_apresentada": "Int64",
         "quantidade_aprovada": "Int64",
         "valor_apresentado": "Float64",
         "valor_aprovado": "Float64",
         "atendimento_residencia_ufs_distintas": "bool",
         "atendimento_residencia_municipios_distintos": "bool",
-        "usuario_etnia_id_sus": "object",
-        "estabelecimento_natureza_juridica_id_scnes": "object",
+        "usuario_etnia_id_sus": "category",
+        "estabelecimento_natureza_juridica_id_scnes": "category",
         "id": "str",
         "periodo_id": "str",
         "unidade_geografica_id": "str",
@@ -133,10 +142,40 @@ COLUNAS_NUMERICAS: Final[list[str]] = [
 ]
 
 
+ESPECIFICACAO_BPA_I: Final[EspecificacaoFonte] = EspecificacaoFonte(
+    de_para=DE_PARA_BPA_I,
+    tipos=TIPOS_BPA_I,
+    interpretadores={
+        **{coluna: de_aaaamm_para_datas for coluna in COLUNAS_DATA_AAAAMM},
+        **{coluna: de_aaaammdd_para_datas for coluna in COLUNAS_DATA_AAAAMMDD},
+        "estabelecimento_mantido": interpretar_booleano(["M"]),
+        "atendimento_residencia_ufs_distintas": interpretar_booleano(["1"]),
+        "atendimento_residencia_municipios_distintos": interpretar_booleano(
+            ["1"],
+        ),
+    },
+    nulos={
+        coluna: PADRAO_ZEROS
+        for coluna in (
+            "mantenedora_id_cnpj",
+            "receptor_credito_id_cnpj",
+            "financiamento_subtipo_id_sigtap",
+            "condicao_principal_id_cid10",
+            "autorizacao_id_siasus",
+        )
+    },
+)
+
+PLANO_BPA_I: Final[PlanoTransformacao] = ESPECIFICACAO_BPA_I.compilar()
+
+
 def extrair_bpa_i(
     uf_sigla: str,
     periodo_data_inicio: date,
     passo: int = 10000,
+    colunas: Iterable[str] | None = tuple(DE_PARA_BPA_I),
+    condicoes: str | None = None,
+    impressoes: ImpressoesPendentes | None = None,
 ) -> Generator[pd.DataFrame, None, None]:
     """Extrai registros de Boletins de Produção Ambulatorial do FTP do DataSUS.
 
@@ -147,6 +186,17 @@ def extrair_bpa_i(
             representado como um objeto [`datetime.date`][].
         passo: Número de registros que devem ser convertidos em DataFrame a
             cada iteração.
+        colunas: Nomes das colunas a serem lidas do arquivo de disseminação.
+            Por padrão, são lidas apenas as colunas usadas nas
+            transformações (ver [`DE_PARA_BPA_I`][]).
+        condicoes: Expressão opcional com a sintaxe do método
+            [`pandas.DataFrame.query()`][]. Os registros que certamente não
+            atendem a essas condições são descartados durante a leitura do
+            arquivo, antes de serem decodificados (ver
+            [`extrair_dbc_lotes()`][]).
+        impressoes: Instância opcional de [`ImpressoesPendentes`][], à qual
+            são adicionadas as versões dos arquivos lidos (ver
+            [`extrair_dbc_lotes()`][]).
 
     Gera:
         A cada iteração, devolve um objeto [`pandas.DataFrames`][] com um
@@ -154,6 +204,10 @@ def extrair_bpa_i(
 
     [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
     [`datetime.date`]: https://docs.python.org/3/library/datetime.html#date-objects
+    [`DE_PARA_BPA_I`]: impulsoetl.siasus.bpa_i.DE_PARA_BPA_I
+    [`pandas.DataFrame.query()`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.query.html
+    [`extrair_dbc_lotes()`]: impulsoetl.utilitarios.datasus_ftp.extrair_dbc_lotes
+    [`ImpressoesPendentes`]: impulsoetl.utilitarios.datasus_impressoes.ImpressoesPendentes
     """
 
     return extrair_dbc_lotes(
@@ -164,6 +218,9 @@ def extrair_bpa_i(
             periodo_data_inicio=periodo_data_inicio,
         ),
         passo=passo,
+        colunas=colunas,
+        condicoes=condicoes,
+        impressoes=impressoes,
     )
 
 
@@ -219,79 +276,34 @@ def transformar_bpa_i(
         )
 
     bpa_i_transformada = (
-        bpa_i  # noqa: WPS221  # ignorar linha complexa no pipeline
-        # renomear colunas
-        .rename_columns(function=lambda col: col.strip())
-        .rename_columns(DE_PARA_BPA_I)
-        # processar colunas com datas
-        .transform_columns(
-            COLUNAS_DATA_AAAAMM,
-            function=lambda dt: pd.to_datetime(
-                dt,
-                format="%Y%m",
-                errors="coerce",
-            ),
-        )
-        .transform_columns(
-            COLUNAS_DATA_AAAAMMDD,
-            function=lambda dt: de_aaaammdd_para_timestamp(dt, erros="coerce"),
-        )
-        # processar colunas lógicas
-        .transform_column(
-            "estabelecimento_mantido",
-            function=lambda elemento: True if elemento == "M" else False,
-        )
-        .transform_columns(
-            [
-                "atendimento_residencia_ufs_distintas",
-                "atendimento_residencia_municipios_distintos",
-            ],
-            function=lambda elemento: True if elemento == "1" else False,
-        )
-        # tratar como NA colunas com valores nulos
-        .replace("", np.nan)
-        .transform_columns(
-            [
-                "mantenedora_id_cnpj",
-                "receptor_credito_id_cnpj",
-                "financiamento_subtipo_id_sigtap",
-                "condicao_principal_id_cid10",
-                "autorizacao_id_siasus",
-            ],
-            function=lambda elemento: (
-                np.nan
-                if all(digito == "0" for digito in elemento)
-                else elemento
-            ),
-        )
+        PLANO_BPA_I.interpretar(bpa_i)  # noqa: WPS221  # linha complexa
         # adicionar id
-        .add_column("id", str())
-        .transform_column("id", function=lambda _: uuid7().hex)
+        .pipe(adicionar_uuids7)
         # adicionar id do periodo
         .transform_column(
             "realizacao_periodo_data_inicio",
-            function=lambda dt: periodo_por_data(sessao=sessao, data=dt).id,
+            function=lambda datas: periodos_por_datas(
+                sessao=sessao,
+                datas=datas,
+            ),
             dest_column_name="periodo_id",
+            elementwise=False,
         )
         # adicionar id da unidade geografica
         .transform_column(
             "unidade_geografica_id_sus",
-            function=lambda id_sus: id_sus_para_id_impulso(
+            function=lambda ids_sus: ids_sus_para_ids_impulso(
                 sessao=sessao,
-                id_sus=id_sus,
+                ids_sus=ids_sus,
             ),
             dest_column_name="unidade_geografica_id",
+            elementwise=False,
         )
         # adicionar datas de inserção e atualização
         .add_column("criacao_data", agora_gmt_menos3())
         .add_column("atualizacao_data", agora_gmt_menos3())
         # garantir tipos
-        .change_type(
-            # HACK: ver https://github.com/pandas-dev/pandas/issues/25472
-            COLUNAS_NUMERICAS,
-            "float",
-        )
-        .astype(TIPOS_BPA_I)
+        .pipe(PLANO_BPA_I.tipar)
     )
     logger.debug(
         "Memória ocupada pelo DataFrame transformado: {memoria_usada:.2f} mB.",
@@ -345,19 +357,29 @@ def obter_bpa_i(
     # obter tamanho do lote de processamento
     passo = int(os.getenv("IMPULSOETL_LOTE_TAMANHO", 100000))
 
+    impressoes = ImpressoesPendentes()
     bpa_i_lotes = extrair_bpa_i(
         uf_sigla=uf_sigla,
         periodo_data_inicio=periodo_data_inicio,
         passo=passo,
+        colunas=colunas_necessarias(
+            DE_PARA_BPA_I,
+            condicoes=kwargs.get("condicoes"),
+        ),
+        condicoes=kwargs.get("condicoes"),
+        impressoes=impressoes,
+    )
+
+    bpa_i_transformadas = transformar_lotes(
+        transformar_bpa_i,
+        bpa_i_lotes,
+        sessao=sessao,
+        argumento="bpa_i",
+        condicoes=kwargs.get("condicoes"),
     )
 
     contador = 0
-    for bpa_i_lote in bpa_i_lotes:
-        bpa_i_transformada = transformar_bpa_i(
-            sessao=sessao,
-            bpa_i=bpa_i_lote,
-            condicoes=kwargs.get("condicoes"),
-        )
+    for bpa_i_lote_tamanho, bpa_i_transformada in bpa_i_transformadas:
 
         carregamento_status = carregar_dataframe(
             sessao=sessao,
@@ -371,11 +393,16 @@ def obter_bpa_i(
                 "Execução interrompida em razão de um erro no "
                 + "carregamento."
             )
-        contador += len(bpa_i_lote)
+        contador += bpa_i_lote_tamanho
         if teste and contador > 1000:
             logger.info("Execução interrompida para fins de teste.")
             break
 
+    if not teste:
+        # as versões dos arquivos lidos são registradas na mesma transação
+        # que os dados carregados
+        impressoes.registrar(sessao)
+
     if teste:
         logger.info("Desfazendo alterações realizadas durante o teste...")
         sessao.rollback()
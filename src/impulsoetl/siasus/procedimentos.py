@@ -12,7 +12,7 @@ import os
 import re
 from datetime import date
 from ftplib import FTP
-from typing import Final, Generator
+from typing import Final, Generator, Iterable
 from urllib.error import URLError
 
 import janitor  # noqa: F401  # nopycln: import
@@ -20,13 +20,27 @@ import numpy as np
 import pandas as pd
 from frozendict import frozendict
 from sqlalchemy.orm import Session
-from uuid6 import uuid7
 
-from impulsoetl.comum.datas import agora_gmt_menos3, periodo_por_data
-from impulsoetl.comum.geografias import id_sus_para_id_impulso
+from impulsoetl.comum.datas import (
+    agora_gmt_menos3,
+    de_aaaamm_para_datas,
+    periodos_por_datas,
+)
+from impulsoetl.comum.geografias import ids_sus_para_ids_impulso
 from impulsoetl.loggers import logger
 from impulsoetl.utilitarios.bd import carregar_dataframe
+from impulsoetl.utilitarios.condicoes import colunas_necessarias
 from impulsoetl.utilitarios.datasus_ftp import extrair_dbc_lotes
+from impulsoetl.utilitarios.datasus_impressoes import ImpressoesPendentes
+from impulsoetl.utilitarios.especificacoes import (
+    EspecificacaoFonte,
+    PlanoTransformacao,
+    interpretar_booleano,
+    interpretar_fatia,
+)
+from impulsoetl.utilitarios.identificadores import adicionar_uuids7
+from impulsoetl.utilitarios.paralelismo import transformar_lotes
+from impulsoetl.utilitarios.valores_nulos import PADRAO_NOVES, PADRAO_ZEROS
 
 DE_PARA_PA: Final[frozendict] = frozendict(
     {
@@ -95,46 +109,46 @@ DE_PARA_PA: Final[frozendict] = frozendict(
 
 TIPOS_PA: Final[frozendict] = frozendict(
     {
-        "estabelecimento_id_scnes": "object",
-        "gestao_unidade_geografica_id_sus": "object",
-        "gestao_condicao_id_siasus": "object",
-        "unidade_geografica_id_sus": "object",
-        "regra_contratual_id_scnes": "object",
-        "incremento_outros_id_sigtap": "object",
-        "incremento_urgencia_id_sigtap": "object",
-        "estabelecimento_tipo_id_sigtap": "object",
-        "prestador_tipo_id_sigtap": "object",
+        "estabelecimento_id_scnes": "category",
+        "gestao_unidade_geografica_id_sus": "category",
+        "gestao_condicao_id_siasus": "category",
+        "unidade_geografica_id_sus": "category",
+        "regra_contratual_id_scnes": "category",
+        "incremento_outros_id_sigtap": "category",
+        "incremento_urgencia_id_sigtap": "category",
+        "estabelecimento_tipo_id_sigtap": "category",
+        "prestador_tipo_id_sigtap": "category",
         "estabelecimento_mantido": "bool",
         "estabelecimento_id_cnpj": "object",
         "mantenedora_id_cnpj": "object",
         "receptor_credito_id_cnpj": "object",
         "processamento_periodo_data_inicio": "datetime64[ns]",
         "realizacao_periodo_data_inicio": "datetime64[ns]",
-        "procedimento_id_sigtap": "object",
-        "financiamento_tipo_id_sigtap": "object",
-        "financiamento_subtipo_id_sigtap": "object",
-        "complexidade_id_siasus": "object",
-        "instrumento_registro_id_siasus": "object",
+        "procedimento_id_sigtap": "category",
+        "financiamento_tipo_id_sigtap": "category",
+        "financiamento_subtipo_id_sigtap": "category",
+        "complexidade_id_siasus": "category",
+        "instrumento_registro_id_siasus": "category",
         "autorizacao_id_siasus": "object",
         "profissional_id_cns": "object",
-        "profissional_vinculo_ocupacao_id_cbo2002": "object",
-        "desfecho_motivo_id_siasus": "object",
+        "profissional_vinculo_ocupacao_id_cbo2002": "category",
+        "desfecho_motivo_id_siasus": "category",
         "obito": "bool",
         "encerramento": "bool",
         "permanencia": "bool",
         "alta": "bool",
         "transferencia": "bool",
-        "condicao_principal_id_cid10": "object",
-        "condicao_secundaria_id_cid10": "object",
-        "condicao_associada_id_cid10": "object",
-        "carater_atendimento_id_siasus": "object",
+        "condicao_principal_id_cid10": "category",
+        "condicao_secundaria_id_cid10": "category",
+        "condicao_associada_id_cid10": "category",
+        "carater_atendimento_id_siasus": "category",
         "usuario_idade": "Int64",
         "procedimento_idade_minima": "Int64",
         "procedimento_idade_maxima": "Int64",
-        "compatibilidade_idade_id_siasus": "object",
-        "usuario_sexo_id_sigtap": "object",
-        "usuario_raca_cor_id_siasus": "object",
-        "usuario_residencia_municipio_id_sus": "object",
+        "compatibilidade_idade_id_siasus": "category",
+        "usuario_sexo_id_sigtap": "category",
+        "usuario_raca_cor_id_siasus": "category",
+        "usuario_residencia_municipio_id_sus": "category",
         "quantidade_apresentada": "Int64",
         "quantidade_aprovada": "Int64",
         "valor_apresentado": "Float64",
@@ -144,18 +158,18 @@ TIPOS_PA: Final[frozendict] = frozendict(
         "procedimento_valor_diferenca_sigtap": "Float64",
         "procedimento_valor_vpa": "Float64",
         "procedimento_valor_sigtap": "Float64",
-        "aprovacao_status_id_siasus": "object",
-        "ocorrencia_id_siasus": "object",
-        "erro_quantidade_apresentada_id_siasus": "object",
-        "erro_apac": "object",
-        "usuario_etnia_id_sus": "object",
+        "aprovacao_status_id_siasus": "category",
+        "ocorrencia_id_siasus": "category",
+        "erro_quantidade_apresentada_id_siasus": "category",
+        "erro_apac": "category",
+        "usuario_etnia_id_sus": "category",
         "complemento_valor_federal": "Float64",
         "complemento_valor_local": "Float64",
         "incremento_valor": "Float64",
-        "servico_id_sigtap": "object",
-        "servico_classificacao_id_sigtap": "object",
+        "servico_id_sigtap": "category",
+        "servico_classificacao_id_sigtap": "category",
         "equipe_id_ine": "object",
-        "estabelecimento_natureza_juridica_id_scnes": "object",
+        "estabelecimento_natureza_juridica_id_scnes": "category",
         "id": "object",
         "periodo_id": "object",
         "unidade_geografica_id": "object",
@@ -176,20 +190,80 @@ COLUNAS_NUMERICAS: Final[list[str]] = [
 ]
 
 
-def _para_booleano(valor: str) -> bool | float:
-    """Transforma um valor binário '0' ou '1' em booleano. Suporta NaNs."""
-    if valor == "0":
-        return False
-    elif valor == "1":
-        return True
-    else:
-        return np.nan
+ESPECIFICACAO_PA: Final[EspecificacaoFonte] = EspecificacaoFonte(
+    de_para=DE_PARA_PA,
+    tipos=TIPOS_PA,
+    interpretadores={
+        **{coluna: de_aaaamm_para_datas for coluna in COLUNAS_DATA_AAAAMM},
+        "estabelecimento_mantido": interpretar_booleano(["M"]),
+        **{
+            coluna: interpretar_booleano(["1"], ["0"])
+            for coluna in (
+                "obito",
+                "encerramento",
+                "permanencia",
+                "alta",
+                "transferencia",
+                "atendimento_residencia_ufs_distintas",
+                "atendimento_residencia_municipios_distintos",
+            )
+        },
+    },
+    nulos={
+        **{
+            coluna: PADRAO_ZEROS
+            for coluna in (
+                "regra_contratual_id_scnes",
+                "incremento_outros_id_sigtap",
+                "incremento_urgencia_id_sigtap",
+                "mantenedora_id_cnpj",
+                "receptor_credito_id_cnpj",
+                "financiamento_subtipo_id_sigtap",
+                "autorizacao_id_siasus",
+                "profissional_id_cns",
+                "condicao_principal_id_cid10",
+                "condicao_secundaria_id_cid10",
+                "condicao_associada_id_cid10",
+                "desfecho_motivo_id_siasus",
+                "usuario_sexo_id_sigtap",
+                "usuario_raca_cor_id_siasus",
+            )
+        },
+        **{
+            coluna: PADRAO_NOVES
+            for coluna in (
+                "carater_atendimento_id_siasus",
+                "usuario_residencia_municipio_id_sus",
+                "atendimento_residencia_ufs_distintas",
+                "atendimento_residencia_municipios_distintos",
+            )
+        },
+        "usuario_idade": "999",
+    },
+    # separar código do serviço e código da classificação do serviço
+    derivadas={
+        "servico_id_sigtap": (
+            "servico_especializado_id_scnes",
+            interpretar_fatia(0, 3),
+        ),
+        "servico_classificacao_id_sigtap": (
+            "servico_especializado_id_scnes",
+            interpretar_fatia(3),
+        ),
+    },
+    descartar=["servico_especializado_id_scnes"],
+)
+
+PLANO_PA: Final[PlanoTransformacao] = ESPECIFICACAO_PA.compilar()
 
 
 def extrair_pa(
     uf_sigla: str,
     periodo_data_inicio: date,
     passo: int = 10000,
+    colunas: Iterable[str] | None = tuple(DE_PARA_PA),
+    condicoes: str | None = None,
+    impressoes: ImpressoesPendentes | None = None,
 ) -> Generator[pd.DataFrame, None, None]:
     """Extrai registros de procedimentos ambulatoriais do FTP do DataSUS.
 
@@ -200,6 +274,17 @@ def extrair_pa(
             representado como um objeto [`datetime.date`][].
         passo: Número de registros que devem ser convertidos em DataFrame a
             cada iteração.
+        colunas: Nomes das colunas a serem lidas do arquivo de disseminação.
+            Por padrão, são lidas apenas as colunas usadas nas
+            transformações (ver [`DE_PARA_PA`][]).
+        condicoes: Expressão opcional com a sintaxe do método
+            [`pandas.DataFrame.query()`][]. Os registros que certamente não
+            atendem a essas condições são descartados durante a leitura do
+            arquivo, antes de serem decodificados (ver
+            [`extrair_dbc_lotes()`][]).
+        impressoes: Instância opcional de [`ImpressoesPendentes`][], à qual
+            são adicionadas as versões dos arquivos lidos (ver
+            [`extrair_dbc_lotes()`][]).
 
     Gera:
         A cada iteração, devolve um objeto [`pandas.DataFrames`][] com um
@@ -207,6 +292,10 @@ def extrair_pa(
 
     [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
     [`datetime.date`]: https://docs.python.org/3/library/datetime.html#date-objects
+    [`DE_PARA_PA`]: impulsoetl.siasus.procedimentos.DE_PARA_PA
+    [`pandas.DataFrame.query()`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.query.html
+    [`extrair_dbc_lotes()`]: impulsoetl.utilitarios.datasus_ftp.extrair_dbc_lotes
+    [`ImpressoesPendentes`]: impulsoetl.utilitarios.datasus_impressoes.ImpressoesPendentes
     """
 
     arquivo_padrao = "PA{uf_sigla}{periodo_data_inicio:%y%m}[a-z]?.dbc".format(
@@ -219,6 +308,9 @@ def extrair_pa(
         caminho_diretorio="/dissemin/publicos/SIASUS/200801_/Dados",
         arquivo_nome=re.compile(arquivo_padrao, re.IGNORECASE),
         passo=passo,
+        colunas=colunas,
+        condicoes=condicoes,
+        impressoes=impressoes,
     )
 
 
@@ -275,82 +367,7 @@ def transformar_pa(
         )
 
     pa_transformada = (
-        pa  # noqa: WPS221  # ignorar linha complexa no pipeline
-        # renomear colunas
-        .rename_columns(function=lambda col: col.strip())
-        .rename_columns(DE_PARA_PA)
-        # processar colunas com datas
-        .transform_columns(
-            COLUNAS_DATA_AAAAMM,
-            function=lambda dt: pd.to_datetime(
-                dt,
-                format="%Y%m",
-                errors="coerce",
-            ),
-        )
-        # tratar como NA colunas com valores nulos
-        .replace("", np.nan)
-        .transform_columns(
-            [
-                "regra_contratual_id_scnes",
-                "incremento_outros_id_sigtap",
-                "incremento_urgencia_id_sigtap",
-                "mantenedora_id_cnpj",
-                "receptor_credito_id_cnpj",
-                "financiamento_subtipo_id_sigtap",
-                "condicao_principal_id_cid10",
-                "autorizacao_id_siasus",
-                "profissional_id_cns",
-                "condicao_principal_id_cid10",
-                "condicao_secundaria_id_cid10",
-                "condicao_associada_id_cid10",
-                "desfecho_motivo_id_siasus",
-                "usuario_sexo_id_sigtap",
-                "usuario_raca_cor_id_siasus",
-            ],
-            function=lambda elemento: (
-                np.nan
-                if pd.notna(elemento)
-                and all(digito == "0" for digito in elemento)
-                else elemento
-            ),
-        )
-        .transform_columns(
-            [
-                "carater_atendimento_id_siasus",
-                "usuario_residencia_municipio_id_sus",
-                "atendimento_residencia_ufs_distintas",
-                "atendimento_residencia_municipios_distintos",
-            ],
-            function=lambda elemento: (
-                np.nan
-                if pd.isna(elemento)
-                or all(digito == "9" for digito in elemento)
-                else elemento
-            ),
-        )
-        .update_where(
-            "usuario_idade == '999'",
-            target_column_name="usuario_idade",
-            target_val=np.nan,
-        )
-        # processar colunas lógicas
-        .transform_column(
-            "estabelecimento_mantido",
-            function=lambda elemento: True if elemento == "M" else False,
-        )
-        .transform_columns(
-            [
-                "obito",
-                "encerramento",
-                "permanencia",
-                "alta",
-                "transferencia",
-                "atendimento_residencia_ufs_distintas",
-                "atendimento_residencia_municipios_distintos",
-            ],
-            function=_para_booleano,
-        )
+        PLANO_PA.interpretar(pa)  # noqa: WPS221  # ignorar linha complexa
         .update_where(
             "@pd.isna(desfecho_motivo_id_siasus)",
             target_column_name=[
@@ -362,46 +379,33 @@ def transformar_pa(
             ],
             target_val=np.nan,
         )
-        # separar código do serviço e código da classificação do serviço
-        .transform_column(
-            "servico_especializado_id_scnes",
-            function=lambda cod: cod[:3] if pd.notna(cod) else np.nan,
-            dest_column_name="servico_id_sigtap",
-        )
-        .transform_column(
-            "servico_especializado_id_scnes",
-            function=lambda cod: cod[3:] if pd.notna(cod) else np.nan,
-            dest_column_name="servico_classificacao_id_sigtap",
-        )
-        .remove_columns("servico_especializado_id_scnes")
         # adicionar id
-        .add_column("id", str())
-        .transform_column("id", function=lambda _: uuid7().hex)
+        .pipe(adicionar_uuids7)
         # adicionar id do periodo
         .transform_column(
             "realizacao_periodo_data_inicio",
-            function=lambda dt: periodo_por_data(sessao=sessao, data=dt).id,
+            function=lambda datas: periodos_por_datas(
+                sessao=sessao,
+                datas=datas,
+            ),
             dest_column_name="periodo_id",
+            elementwise=False,
         )
         # adicionar id da unidade geografica
         .transform_column(
             "unidade_geografica_id_sus",
-            function=lambda id_sus: id_sus_para_id_impulso(
+            function=lambda ids_sus: ids_sus_para_ids_impulso(
                 sessao=sessao,
-                id_sus=id_sus,
+                ids_sus=ids_sus,
             ),
             dest_column_name="unidade_geografica_id",
+            elementwise=False,
         )
         # adicionar datas de inserção e atualização
         .add_column("criacao_data", agora_gmt_menos3())
         .add_column("atualizacao_data", agora_gmt_menos3())
         # garantir tipos
-        .change_type(
-            # HACK: ver https://github.com/pandas-dev/pandas/issues/25472
-            COLUNAS_NUMERICAS,
-            "float",
-        )
-        .astype(TIPOS_PA)
+        .pipe(PLANO_PA.tipar)
     )
     logger.debug(
         "Memória ocupada pelo DataFrame transformado: {memoria_usada:.2f} mB.",
@@ -471,19 +475,29 @@ def obter_pa(
     # obter tamanho do lote de processamento
     passo = int(os.getenv("IMPULSOETL_LOTE_TAMANHO", 100000))
 
+    impressoes = ImpressoesPendentes()
     pa_lotes = extrair_pa(
         uf_sigla=uf_sigla,
         periodo_data_inicio=periodo_data_inicio,
         passo=passo,
+        colunas=colunas_necessarias(
+            DE_PARA_PA,
+            condicoes=kwargs.get("condicoes"),
+        ),
+        condicoes=kwargs.get("condicoes"),
+        impressoes=impressoes,
+    )
+
+    pa_transformadas = transformar_lotes(
+        transformar_pa,
+        pa_lotes,
+        sessao=sessao,
+        argumento="pa",
+        condicoes=kwargs.get("condicoes"),
     )
 
     contador = 0
-    for pa_lote in pa_lotes:
-        pa_transformada = transformar_pa(
-            sessao=sessao, 
-            pa=pa_lote,
-            condicoes=kwargs.get("condicoes"),
-        )
+    for pa_lote_tamanho, pa_transformada in pa_transformadas:
         try:
             validar_pa(pa_transformada)
         except AssertionError as mensagem:
@@ -506,11 +520,16 @@ def obter_pa(
                 "Execução interrompida em razão de um erro no "
                 + "carregamento."
             )
-        contador += len(pa_lote)
+        contador += pa_lote_tamanho
         if teste and contador > 1000:
             logger.info("Execução interrompida para fins de teste.")
             break
 
+    if not teste:
+        # as versões dos arquivos lidos são registradas na mesma transação
+        # que os dados carregados
+        impressoes.registrar(sessao)
+
     if teste:
         logger.info("Desfazendo alterações realizadas durante o teste...")
         sessao.rollback()
@@ -9,24 +9,34 @@ from __future__ import annotations
 
 import os
 from datetime import date
-from typing import Final, Generator
+from typing import Final, Generator, Iterable
 
 import janitor  # noqa: F401  # nopycln: import
-import numpy as np
 import pandas as pd
 from frozendict import frozendict
 from sqlalchemy.orm import Session
-from uuid6 import uuid7
 
 from impulsoetl.comum.datas import (
     agora_gmt_menos3,
-    de_aaaammdd_para_timestamp,
-    periodo_por_data,
+    de_aaaamm_para_datas,
+    de_aaaammdd_para_datas,
+    periodos_por_datas,
 )
-from impulsoetl.comum.geografias import id_sus_para_id_impulso
+from impulsoetl.comum.geografias import ids_sus_para_ids_impulso
 from impulsoetl.loggers import logger
 from impulsoetl.utilitarios.bd import carregar_dataframe
+from impulsoetl.utilitarios.condicoes import colunas_necessarias
 from impulsoetl.utilitarios.datasus_ftp import extrair_dbc_lotes
+from impulsoetl.utilitarios.datasus_impressoes import ImpressoesPendentes
+from impulsoetl.utilitarios.especificacoes import (
+    EspecificacaoFonte,
+    PlanoTransformacao,
+    interpretar_booleano,
+    interpretar_contem,
+    interpretar_preenchido,
+)
+from impulsoetl.utilitarios.identificadores import adicionar_uuids7
+from impulsoetl.utilitarios.paralelismo import transformar_lotes
 
 DE_PARA_RAAS_PS: Final[frozendict] = frozendict(
     {
@@ -80,12 +90,12 @@ DE_PARA_RAAS_PS: Final[frozendict] = frozendict(
 
 TIPOS_RAAS_PS: Final[frozendict] = frozendict(
     {
-        "estabelecimento_id_scnes": "object",
-        "gestao_unidade_geografica_id_sus": "object",
-        "gestao_condicao_id_siasus": "object",
-        "unidade_geografica_id_sus": "object",
-        "estabelecimento_tipo_id_sigtap": "object",
-        "prestador_tipo_id_sigtap": "object",
+        "estabelecimento_id_scnes": "category",
+        "gestao_unidade_geografica_id_sus": "category",
+        "gestao_condicao_id_siasus": "category",
+        "unidade_geografica_id_sus": "category",
+        "estabelecimento_tipo_id_sigtap": "category",
+        "prestador_tipo_id_sigtap": "category",
         "estabelecimento_mantido": "bool",
         "estabelecimento_id_cnpj": "object",
         "mantenedora_id_cnpj": "object",
@@ -93,35 +103,35 @@ TIPOS_RAAS_PS: Final[frozendict] = frozendict(
         "realizacao_periodo_data_inicio": "datetime64[ns]",
         "usuario_id_cns_criptografado": "object",
         "usuario_nascimento_data": "datetime64[ns]",
-        "usuario_idade_tipo_id_sigtap": "object",
+        "usuario_idade_tipo_id_sigtap": "category",
         "usuario_idade": "Int64",
-        "usuario_nacionalidade_id_sus": "object",
-        "usuario_sexo_id_sigtap": "object",
-        "usuario_raca_cor_id_siasus": "object",
-        "usuario_etnia_id_sus": "object",
-        "usuario_residencia_municipio_id_sus": "object",
-        "desfecho_motivo_id_siasus": "object",
+        "usuario_nacionalidade_id_sus": "category",
+        "usuario_sexo_id_sigtap": "category",
+        "usuario_raca_cor_id_siasus": "category",
+        "usuario_etnia_id_sus": "category",
+        "usuario_residencia_municipio_id_sus": "category",
+        "desfecho_motivo_id_siasus": "category",
         "desfecho_data": "datetime64[ns]",
-        "carater_atendimento_id_siasus": "object",
-        "condicao_principal_id_cid10": "object",
-        "condicao_associada_id_cid10": "object",
-        "procedencia_id_siasus": "object",
+        "carater_atendimento_id_siasus": "category",
+        "condicao_principal_id_cid10": "category",
+        "condicao_associada_id_cid10": "category",
+        "procedencia_id_siasus": "category",
         "raas_data_inicio": "datetime64[ns]",
         "raas_data_fim": "datetime64[ns]",
         "esf_cobertura": "bool",
-        "esf_estabelecimento_id_scnes": "object",
-        "desfecho_destino_id_siasus": "object",
-        "procedimento_id_sigtap": "object",
+        "esf_estabelecimento_id_scnes": "category",
+        "desfecho_destino_id_siasus": "category",
+        "procedimento_id_sigtap": "category",
         "quantidade_apresentada": "Int64",
         "quantidade_aprovada": "Int64",
-        "servico_id_sigtap": "object",
-        "servico_classificacao_id_sigtap": "object",
+        "servico_id_sigtap": "category",
+        "servico_classificacao_id_sigtap": "category",
         "usuario_situacao_rua": "bool",
         "usuario_abuso_substancias": "bool",
         "usuario_abuso_substancias_alcool": "bool",
         "usuario_abuso_substancias_crack": "bool",
         "usuario_abuso_substancias_outras": "bool",
-        "local_realizacao_id_siasus": "object",
+        "local_realizacao_id_siasus": "category",
         "data_inicio": "datetime64[ns]",
         "data_fim": "datetime64[ns]",
         # coluna de duração idealmente seria do tipo 'timedelta[ns]', mas esse
@@ -130,7 +140,7 @@ TIPOS_RAAS_PS: Final[frozendict] = frozendict(
         "permanencia_duracao": "object",
         "quantidade_atendimentos": "Int64",
         "quantidade_usuarios": "Int64",
-        "estabelecimento_natureza_juridica_id_scnes": "object",
+        "estabelecimento_natureza_juridica_id_scnes": "category",
         "id": str,
         "periodo_id": str,
         "unidade_geografica_id": str,
@@ -160,10 +170,50 @@ COLUNAS_NUMERICAS: Final[list[str]] = [
 ]
 
 
+def _interpretar_duracao(dias: pd.Series) -> pd.Series:
+    """Representa um número de dias como um intervalo do PostgreSQL."""
+    return dias + " days"
+
+
+ESPECIFICACAO_RAAS_PS: Final[EspecificacaoFonte] = EspecificacaoFonte(
+    de_para=DE_PARA_RAAS_PS,
+    tipos=TIPOS_RAAS_PS,
+    interpretadores={
+        **{coluna: de_aaaamm_para_datas for coluna in COLUNAS_DATA_AAAAMM},
+        **{coluna: de_aaaammdd_para_datas for coluna in COLUNAS_DATA_AAAAMMDD},
+        "estabelecimento_mantido": interpretar_booleano(["M"]),
+        "usuario_situacao_rua": interpretar_booleano(["S"]),
+        "esf_cobertura": interpretar_booleano(["S"]),
+        "usuario_abuso_substancias": interpretar_preenchido,
+        "permanencia_duracao": _interpretar_duracao,
+    },
+    # processar coluna de uso de substâncias
+    derivadas={
+        "usuario_abuso_substancias_alcool": (
+            "usuario_abuso_substancias",
+            interpretar_contem("A"),
+        ),
+        "usuario_abuso_substancias_crack": (
+            "usuario_abuso_substancias",
+            interpretar_contem("C"),
+        ),
+        "usuario_abuso_substancias_outras": (
+            "usuario_abuso_substancias",
+            interpretar_contem("O"),
+        ),
+    },
+)
+
+PLANO_RAAS_PS: Final[PlanoTransformacao] = ESPECIFICACAO_RAAS_PS.compilar()
+
+
 def extrair_raas_ps(
     uf_sigla: str,
     periodo_data_inicio: date,
     passo: int = 100000,
+    colunas: Iterable[str] | None = tuple(DE_PARA_RAAS_PS),
+    condicoes: str | None = None,
+    impressoes: ImpressoesPendentes | None = None,
 ) -> Generator[pd.DataFrame, None, None]:
     """Extrai registros de RAAS Psicossociais do FTP do DataSUS.
 
@@ -174,6 +224,17 @@ def extrair_raas_ps(
             representado como um objeto [`datetime.date`][].
         passo: Número de registros que devem ser convertidos em DataFrame a
             cada iteração.
+        colunas: Nomes das colunas a serem lidas do arquivo de disseminação.
+            Por padrão, são lidas apenas as colunas usadas nas
+            transformações (ver [`DE_PARA_RAAS_PS`][]).
+        condicoes: Expressão opcional com a sintaxe do método
+            [`pandas.DataFrame.query()`][]. Os registros que certamente não
+            atendem a essas condições são descartados durante a leitura do
+            arquivo, antes de serem decodificados (ver
+            [`extrair_dbc_lotes()`][]).
+        impressoes: Instância opcional de [`ImpressoesPendentes`][], à qual
+            são adicionadas as versões dos arquivos lidos (ver
+            [`extrair_dbc_lotes()`][]).
 
     Gera:
         A cada iteração, devolve um objeto [`pandas.DataFrames`][] com um
@@ -181,6 +242,10 @@ def extrair_raas_ps(
 
     [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
     [`datetime.date`]: https://docs.python.org/3/library/datetime.html#date-objects
+    [`DE_PARA_RAAS_PS`]: impulsoetl.siasus.raas_ps.DE_PARA_RAAS_PS
+    [`pandas.DataFrame.query()`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.query.html
+    [`extrair_dbc_lotes()`]: impulsoetl.utilitarios.datasus_ftp.extrair_dbc_lotes
+    [`ImpressoesPendentes`]: impulsoetl.utilitarios.datasus_impressoes.ImpressoesPendentes
     """
 
     return extrair_dbc_lotes(
@@ -191,6 +256,9 @@ def extrair_raas_ps(
             periodo_data_inicio=periodo_data_inicio,
         ),
         passo=passo,
+        colunas=colunas,
+        condicoes=condicoes,
+        impressoes=impressoes,
     )
 
 
@@ -243,91 +311,35 @@ def transformar_raas_ps(
         )
 
     return (
-        raas_ps  # noqa: WPS221  # ignorar linha complexa no pipeline
-        # renomear colunas
-        .rename_columns(function=lambda col: col.strip())
-        .rename_columns(DE_PARA_RAAS_PS)
-        # processar colunas com datas
-        .transform_columns(
-            COLUNAS_DATA_AAAAMM,
-            function=lambda dt: pd.to_datetime(
-                dt,
-                format="%Y%m",
-                errors="coerce",
-            ),
-        )
-        .transform_columns(
-            COLUNAS_DATA_AAAAMMDD,
-            function=lambda dt: de_aaaammdd_para_timestamp(dt, erros="coerce"),
-        )
-        # processar colunas lógicas
-        .transform_column(
-            "estabelecimento_mantido",
-            function=lambda elemento: True if elemento == "M" else False,
-        )
-        .transform_columns(
-            ["usuario_situacao_rua", "esf_cobertura"],
-            function=lambda elemento: True if elemento == "S" else False,
-        )
-        # processar coluna de uso de substâncias
-        .transform_column(
-            "usuario_abuso_substancias",
-            function=lambda elemento: bool("A" in elemento),
-            dest_column_name="usuario_abuso_substancias_alcool",
-        )
-        .transform_column(
-            "usuario_abuso_substancias",
-            function=lambda elemento: bool("C" in elemento),
-            dest_column_name="usuario_abuso_substancias_crack",
-        )
-        .transform_column(
-            "usuario_abuso_substancias",
-            function=lambda elemento: bool("O" in elemento),
-            dest_column_name="usuario_abuso_substancias_outras",
-        )
-        .transform_column(
-            "usuario_abuso_substancias",
-            function=lambda elemento: bool(len(elemento)),
-        )
-        # transformar coluna de duração
-        .transform_column(
-            "permanencia_duracao",
-            function=lambda elemento: (
-                "{} days".format(elemento) if elemento else np.nan
-            ),
-        )
-        # tratar como NA colunas com valores nulos
-        .replace("", np.nan)
+        PLANO_RAAS_PS.interpretar(raas_ps)  # noqa: WPS221  # linha complexa
         # adicionar id
-        .add_column("id", str())
-        .transform_column("id", function=lambda _: uuid7().hex)
+        .pipe(adicionar_uuids7)
         # adicionar id do periodo
         .transform_column(
             "realizacao_periodo_data_inicio",
-            function=lambda dt: periodo_por_data(sessao=sessao, data=dt).id,
+            function=lambda datas: periodos_por_datas(
+                sessao=sessao,
+                datas=datas,
+            ),
             dest_column_name="periodo_id",
+            elementwise=False,
         )
         # adicionar id da unidade geografica
         .transform_column(
             "unidade_geografica_id_sus",
-            function=lambda id_sus: id_sus_para_id_impulso(
+            function=lambda ids_sus: ids_sus_para_ids_impulso(
                 sessao=sessao,
-                id_sus=id_sus,
+                ids_sus=ids_sus,
             ),
             dest_column_name="unidade_geografica_id",
+            elementwise=False,
         )
         # adicionar datas de inserção e atualização
         .add_column("criacao_data", agora_gmt_menos3())
         .add_column("atualizacao_data", agora_gmt_menos3())
         # garantir tipos
-        .change_type(
-            # HACK: ver https://github.com/pandas-dev/pandas/issues/25472
-            COLUNAS_NUMERICAS,
-            "float",
-        )
-        .astype(TIPOS_RAAS_PS)
+        .pipe(PLANO_RAAS_PS.tipar)
     )
-    breakpoint()
 
 
 def obter_raas_ps(
@@ -372,19 +384,29 @@ def obter_raas_ps(
     # obter tamanho do lote de processamento
     passo = int(os.getenv("IMPULSOETL_LOTE_TAMANHO", 100000))
 
+    impressoes = ImpressoesPendentes()
     raas_ps_lotes = extrair_raas_ps(
         uf_sigla=uf_sigla,
         periodo_data_inicio=periodo_data_inicio,
         passo=passo,
+        colunas=colunas_necessarias(
+            DE_PARA_RAAS_PS,
+            condicoes=kwargs.get("condicoes"),
+        ),
+        condicoes=kwargs.get("condicoes"),
+        impressoes=impressoes,
+    )
+
+    raas_ps_transformadas = transformar_lotes(
+        transformar_raas_ps,
+        raas_ps_lotes,
+        sessao=sessao,
+        argumento="raas_ps",
+        condicoes=kwargs.get("condicoes"),
     )
 
     contador = 0
-    for raas_ps_lote in raas_ps_lotes:
-        raas_ps_transformada = transformar_raas_ps(
-            sessao=sessao,
-            raas_ps=raas_ps_lote,
-            condicoes=kwargs.get("condicoes"),
-        )
+    for raas_ps_lote_tamanho, raas_ps_transformada in raas_ps_transformadas:
 
         carregamento_status = carregar_dataframe(
             sessao=sessao,
@@ -398,11 +420,16 @@ def obter_raas_ps(
                 "Execução interrompida em razão de um erro no "
                 + "carregamento."
             )
-        contador += len(raas_ps_lote)
+        contador += raas_ps_lote_tamanho
         if teste and contador > 1000:
             logger.info("Execução interrompida para fins de teste.")
             break
 
+    if not teste:
+        # as versões dos arquivos lidos são registradas na mesma transação
+        # que os dados carregados
+        impressoes.registrar(sessao)
+
     if teste:
         logger.info("Desfazendo alterações realizadas durante o teste...")
         sessao.rollback()
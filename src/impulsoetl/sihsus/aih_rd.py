@@ -10,24 +10,32 @@ from __future__ import annotations
 
 import os
 from datetime import date
-from typing import Final, Generator
+from typing import Final, Generator, Iterable
 
 import janitor  # noqa: F401  # nopycln: import
-import numpy as np
 import pandas as pd
 from frozendict import frozendict
 from sqlalchemy.orm import Session
-from uuid6 import uuid7
 
 from impulsoetl.comum.datas import (
     agora_gmt_menos3,
-    de_aaaammdd_para_timestamp,
-    periodo_por_data,
+    de_aaaammdd_para_datas,
+    de_ano_mes_para_datas,
+    periodos_por_datas,
 )
-from impulsoetl.comum.geografias import id_sus_para_id_impulso
+from impulsoetl.comum.geografias import ids_sus_para_ids_impulso
 from impulsoetl.loggers import logger
 from impulsoetl.utilitarios.bd import carregar_dataframe
 from impulsoetl.utilitarios.datasus_ftp import extrair_dbc_lotes
+from impulsoetl.utilitarios.datasus_impressoes import ImpressoesPendentes
+from impulsoetl.utilitarios.especificacoes import (
+    EspecificacaoFonte,
+    PlanoTransformacao,
+    interpretar_booleano,
+)
+from impulsoetl.utilitarios.identificadores import adicionar_uuids7
+from impulsoetl.utilitarios.paralelismo import transformar_lotes
+from impulsoetl.utilitarios.valores_nulos import PADRAO_ZEROS
 
 DE_PARA_AIH_RD: Final[frozendict] = frozendict(
     {
@@ -154,23 +162,23 @@ DE_PARA_AIH_RD_ADICIONAIS: Final[frozendict] = frozendict(
 
 TIPOS_AIH_RD: Final[frozendict] = frozendict(
     {
-        "gestao_unidade_geografica_id_sus": "object",
+        "gestao_unidade_geografica_id_sus": "category",
         "periodo_data_inicio": "datetime64[ns]",
-        "leito_especialidade_id_sigtap": "object",
-        "estabelecimento_id_cnpj": "object",
+        "leito_especialidade_id_sigtap": "category",
+        "estabelecimento_id_cnpj": "category",
         "aih_id_sihsus": "object",
-        "aih_tipo_id_sihsus": "object",
+        "aih_tipo_id_sihsus": "category",
         "usuario_residencia_cep": "object",
-        "usuario_residencia_municipio_id_sus": "object",
+        "usuario_residencia_municipio_id_sus": "category",
         "usuario_nascimento_data": "datetime64[ns]",
-        "usuario_sexo_id_sigtap": "object",
+        "usuario_sexo_id_sigtap": "category",
         "uti_diarias": "int64",
-        "uti_tipo_id_sihsus": "object",
+        "uti_tipo_id_sihsus": "category",
         "unidade_intermediaria_diarias": "int64",
         "acompanhante_diarias": "int64",
         "diarias": "int64",
-        "procedimento_solicitado_id_sigtap": "object",
-        "procedimento_realizado_id_sigtap": "object",
+        "procedimento_solicitado_id_sigtap": "category",
+        "procedimento_realizado_id_sigtap": "category",
         "valor_servicos_hospitalares": "object",
         "valor_servicos_profissionais": "object",
         "valor_total": "float64",
@@ -178,75 +186,75 @@ TIPOS_AIH_RD: Final[frozendict] = frozendict(
         "valor_total_dolar": "float64",
         "aih_data_inicio": "datetime64[ns]",
         "aih_data_fim": "datetime64[ns]",
-        "condicao_principal_id_cid10": "object",
-        "condicao_secundaria_id_cid10": "object",
-        "desfecho_motivo_id_sihsus": "object",
-        "estabelecimento_natureza_id_scnes": "object",
-        "estabelecimento_natureza_juridica_id_scnes": "object",
-        "gestao_condicao_id_sihsus": "object",
+        "condicao_principal_id_cid10": "category",
+        "condicao_secundaria_id_cid10": "category",
+        "desfecho_motivo_id_sihsus": "category",
+        "estabelecimento_natureza_id_scnes": "category",
+        "estabelecimento_natureza_juridica_id_scnes": "category",
+        "gestao_condicao_id_sihsus": "category",
         "exame_vdrl": "bool",
-        "unidade_geografica_id_sus": "object",
-        "usuario_idade_tipo_id_sigtap": "object",
+        "unidade_geografica_id_sus": "category",
+        "usuario_idade_tipo_id_sigtap": "category",
         "usuario_idade": "int64",
         "permanencia_duracao": "int64",
         "obito": "bool",
-        "usuario_nacionalidade_id_sigtap": "object",
-        "carater_atendimento_id_sihsus": "object",
+        "usuario_nacionalidade_id_sigtap": "category",
+        "carater_atendimento_id_sihsus": "category",
         "usuario_homonimo": "bool",
         "usuario_filhos_quantidade": "Int64",
-        "usuario_instrucao_id_sihsus": "object",
-        "condicao_notificacao_id_cid10": "object",
-        "usuario_contraceptivo_principal_id_sihsus": "object",
-        "usuario_contraceptivo_secundario_id_sihsus": "object",
+        "usuario_instrucao_id_sihsus": "category",
+        "condicao_notificacao_id_cid10": "category",
+        "usuario_contraceptivo_principal_id_sihsus": "category",
+        "usuario_contraceptivo_secundario_id_sihsus": "category",
         "gestacao_risco": "bool",
         "usuario_id_pre_natal": "object",
         "remessa_aih_id_sequencial_longa_permanencia": "object",
-        "usuario_ocupacao_id_cbo2002": "object",
-        "usuario_atividade_id_cnae": "object",
-        "usuario_vinculo_previdencia_id_sihsus": "object",
-        "autorizacao_gestor_motivo_id_sihsus": "object",
-        "autorizacao_gestor_tipo_id_sihsus": "object",
+        "usuario_ocupacao_id_cbo2002": "category",
+        "usuario_atividade_id_cnae": "category",
+        "usuario_vinculo_previdencia_id_sihsus": "category",
+        "autorizacao_gestor_motivo_id_sihsus": "category",
+        "autorizacao_gestor_tipo_id_sihsus": "category",
         "autorizacao_gestor_id_cpf": "object",
         "autorizacao_gestor_data": "datetime64[ns]",
-        "estabelecimento_id_scnes": "object",
-        "mantenedora_id_cnpj": "object",
+        "estabelecimento_id_scnes": "category",
+        "mantenedora_id_cnpj": "category",
         "infeccao_hospitalar": "bool",
-        "condicao_associada_id_cid10": "object",
-        "condicao_obito_id_cid10": "object",
-        "complexidade_id_sihsus": "object",
-        "financiamento_tipo_id_sigtap": "object",
-        "financiamento_subtipo_id_sigtap": "object",
-        "regra_contratual_id_scnes": "object",
-        "usuario_raca_cor_id_sihsus": "object",
-        "usuario_etnia_id_sus": "object",
+        "condicao_associada_id_cid10": "category",
+        "condicao_obito_id_cid10": "category",
+        "complexidade_id_sihsus": "category",
+        "financiamento_tipo_id_sigtap": "category",
+        "financiamento_subtipo_id_sigtap": "category",
+        "regra_contratual_id_scnes": "category",
+        "usuario_raca_cor_id_sihsus": "category",
+        "usuario_etnia_id_sus": "category",
         "remessa_aih_id_sequencial": "object",
-        "remessa_id_sihsus": "object",
-        "cns_ausente_justificativa_auditor": "object",
-        "cns_ausente_justificativa_estabelecimento": "object",
+        "remessa_id_sihsus": "category",
+        "cns_ausente_justificativa_auditor": "category",
+        "cns_ausente_justificativa_estabelecimento": "category",
         "valor_servicos_hospitalares_complemento_federal": "float64",
         "valor_servicos_profissionais_complemento_federal": "float64",
         "valor_servicos_hospitalares_complemento_local": "float64",
         "valor_servicos_profissionais_complemento_local": "float64",
         "valor_unidade_neonatal": "float64",
-        "unidade_neonatal_tipo_id_sihsus": "object",
-        "condicao_secundaria_1_id_cid10": "object",
-        "condicao_secundaria_2_id_cid10": "object",
-        "condicao_secundaria_3_id_cid10": "object",
-        "condicao_secundaria_4_id_cid10": "object",
-        "condicao_secundaria_5_id_cid10": "object",
-        "condicao_secundaria_6_id_cid10": "object",
-        "condicao_secundaria_7_id_cid10": "object",
-        "condicao_secundaria_8_id_cid10": "object",
-        "condicao_secundaria_9_id_cid10": "object",
-        "condicao_secundaria_1_tipo_id_sihsus": "object",
-        "condicao_secundaria_2_tipo_id_sihsus": "object",
-        "condicao_secundaria_3_tipo_id_sihsus": "object",
-        "condicao_secundaria_4_tipo_id_sihsus": "object",
-        "condicao_secundaria_5_tipo_id_sihsus": "object",
-        "condicao_secundaria_6_tipo_id_sihsus": "object",
-        "condicao_secundaria_7_tipo_id_sihsus": "object",
-        "condicao_secundaria_8_tipo_id_sihsus": "object",
-        "condicao_secundaria_9_tipo_id_sihsus": "object",
+        "unidade_neonatal_tipo_id_sihsus": "category",
+        "condicao_secundaria_1_id_cid10": "category",
+        "condicao_secundaria_2_id_cid10": "category",
+        "condicao_secundaria_3_id_cid10": "category",
+        "condicao_secundaria_4_id_cid10": "category",
+        "condicao_secundaria_5_id_cid10": "category",
+        "condicao_secundaria_6_id_cid10": "category",
+        "condicao_secundaria_7_id_cid10": "category",
+        "condicao_secundaria_8_id_cid10": "category",
+        "condicao_secundaria_9_id_cid10": "category",
+        "condicao_secundaria_1_tipo_id_sihsus": "category",
+        "condicao_secundaria_2_tipo_id_sihsus": "category",
+        "condicao_secundaria_3_tipo_id_sihsus": "category",
+        "condicao_secundaria_4_tipo_id_sihsus": "category",
+        "condicao_secundaria_5_tipo_id_sihsus": "category",
+        "condicao_secundaria_6_tipo_id_sihsus": "category",
+        "condicao_secundaria_7_tipo_id_sihsus": "category",
+        "condicao_secundaria_8_tipo_id_sihsus": "category",
+        "condicao_secundaria_9_tipo_id_sihsus": "category",
         "id": "object",
         "periodo_id": "object",
         "unidade_geografica_id": "object",
@@ -287,21 +295,75 @@ COLUNAS_NUMERICAS: Final[list[str]] = [
     if tipo_coluna.lower() == "int64" or tipo_coluna.lower() == "float64"
 ]
 
+ESPECIFICACAO_AIH_RD: Final[EspecificacaoFonte] = EspecificacaoFonte(
+    de_para=dict(DE_PARA_AIH_RD, **DE_PARA_AIH_RD_ADICIONAIS),
+    tipos=TIPOS_AIH_RD,
+    interpretadores={
+        **{coluna: de_aaaammdd_para_datas for coluna in COLUNAS_DATA_AAAAMMDD},
+        **{
+            coluna: interpretar_booleano(["1"], ["0"])
+            for coluna in (
+                "obito",
+                "exame_vdrl",
+                "usuario_homonimo",
+                "gestacao_risco",
+            )
+        },
+        # em alguns arquivos, a quantidade de filhos é lida como número
+        "usuario_filhos_quantidade": lambda quantidades: quantidades.astype(
+            str,
+        ),
+    },
+    nulos={
+        coluna: PADRAO_ZEROS
+        for coluna in (
+            "uti_tipo_id_sihsus",
+            "condicao_secundaria_id_cid10",
+            "estabelecimento_natureza_id_scnes",
+            "estabelecimento_natureza_juridica_id_scnes",
+            "usuario_instrucao_id_sihsus",
+            "condicao_notificacao_id_cid10",
+            "usuario_contraceptivo_principal_id_sihsus",
+            "usuario_contraceptivo_secundario_id_sihsus",
+            "usuario_id_pre_natal",
+            "usuario_ocupacao_id_cbo2002",
+            "usuario_atividade_id_cnae",
+            "usuario_vinculo_previdencia_id_sihsus",
+            "autorizacao_gestor_motivo_id_sihsus",
+            "autorizacao_gestor_tipo_id_sihsus",
+            "autorizacao_gestor_id_cpf",
+            "condicao_associada_id_cid10",
+            "condicao_obito_id_cid10",
+            "regra_contratual_id_scnes",
+            "usuario_etnia_id_sus",
+            "condicao_secundaria_1_tipo_id_sihsus",
+            "condicao_secundaria_2_tipo_id_sihsus",
+            "condicao_secundaria_3_tipo_id_sihsus",
+            "condicao_secundaria_4_tipo_id_sihsus",
+            "condicao_secundaria_5_tipo_id_sihsus",
+            "condicao_secundaria_6_tipo_id_sihsus",
+            "condicao_secundaria_7_tipo_id_sihsus",
+            "condicao_secundaria_8_tipo_id_sihsus",
+            "condicao_secundaria_9_tipo_id_sihsus",
+        )
+    },
+    nulos_interpretados={"usuario_filhos_quantidade": PADRAO_ZEROS},
+    # colunas ausentes dos arquivos mais antigos
+    opcionais=DE_PARA_AIH_RD_ADICIONAIS.values(),
+)
 
-def _para_booleano(valor: str) -> bool | float:
-    """Transforma um valor binário '0' ou '1' em booleano. Suporta NaNs."""
-    if valor == "0":
-        return False
-    elif valor == "1":
-        return True
-    else:
-        return np.nan
+PLANO_AIH_RD: Final[PlanoTransformacao] = ESPECIFICACAO_AIH_RD.compilar()
 
 
 def extrair_aih_rd(
     uf_sigla: str,
     periodo_data_inicio: date,
     passo: int = 10000,
+    colunas: Iterable[str] | None = (
+        *DE_PARA_AIH_RD,
+        *DE_PARA_AIH_RD_ADICIONAIS,
+    ),
+    impressoes: ImpressoesPendentes | None = None,
 ) -> Generator[pd.DataFrame, None, None]:
     """Extrai autorizações de internações hospitalares do FTP do DataSUS.
 
@@ -311,6 +373,13 @@ def extrair_aih_rd(
             representado como um objeto [`datetime.date`][].
         passo: Número de registros que devem ser convertidos em DataFrame a
             cada iteração.
+        colunas: Nomes das colunas a serem lidas do arquivo de disseminação.
+            Por padrão, são lidas apenas as colunas usadas nas
+            transformações (ver [`DE_PARA_AIH_RD`][] e
+            [`DE_PARA_AIH_RD_ADICIONAIS`][]).
+        impressoes: Instância opcional de [`ImpressoesPendentes`][], à qual
+            são adicionadas as versões dos arquivos lidos (ver
+            [`extrair_dbc_lotes()`][]).
 
     Gera:
         A cada iteração, devolve um objeto [`pandas.DataFrames`][] com um
@@ -319,6 +388,10 @@ def extrair_aih_rd(
 
     [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
     [`datetime.date`]: https://docs.python.org/3/library/datetime.html#date-objects
+    [`DE_PARA_AIH_RD`]: impulsoetl.sihsus.aih_rd.DE_PARA_AIH_RD
+    [`DE_PARA_AIH_RD_ADICIONAIS`]: impulsoetl.sihsus.aih_rd.DE_PARA_AIH_RD_ADICIONAIS
+    [`ImpressoesPendentes`]: impulsoetl.utilitarios.datasus_impressoes.ImpressoesPendentes
+    [`extrair_dbc_lotes()`]: impulsoetl.utilitarios.datasus_ftp.extrair_dbc_lotes
     """
 
     return extrair_dbc_lotes(
@@ -329,6 +402,8 @@ def extrair_aih_rd(
             periodo_data_inicio=periodo_data_inicio,
         ),
         passo=passo,
+        colunas=colunas,
+        impressoes=impressoes,
     )
 
 
@@ -347,31 +422,17 @@ def transformar_aih_rd(
         memoria_usada=aih_rd.memory_usage(deep=True).sum() / 10**6,
     )
 
-    # Junta nomes de colunas e tipos adicionais aos obrigatórios
-    de_para = dict(DE_PARA_AIH_RD, **DE_PARA_AIH_RD_ADICIONAIS)
-
     # corrigir nomes de colunas mal formatados
     aih_rd = aih_rd.rename_columns(function=lambda col: col.strip().upper())
 
     aih_rd_transformada = (
-        aih_rd  # noqa: WPS221  # ignorar linha complexa no pipeline
-        # adicionar colunas faltantes, com valores vazios
-        .add_columns(
-            **{
-                coluna: ""
-                for coluna in DE_PARA_AIH_RD_ADICIONAIS.keys()
-                if not (coluna in aih_rd.columns)
-            }
-        )
-        .rename_columns(de_para)
+        PLANO_AIH_RD.interpretar(aih_rd)  # noqa: WPS221  # linha complexa
         # processar colunas com datas
-        .join_apply(
-            lambda i: pd.Timestamp(
-                int(i["processamento_periodo_ano_inicio"]),
-                int(i["processamento_periodo_mes_inicio"]),
-                1,
+        .assign(
+            periodo_data_inicio=lambda df: de_ano_mes_para_datas(
+                df["processamento_periodo_ano_inicio"],
+                df["processamento_periodo_mes_inicio"],
             ),
-            new_column_name="periodo_data_inicio",
         )
         .remove_columns(
             [
@@ -379,87 +440,33 @@ def transformar_aih_rd(
                 "processamento_periodo_mes_inicio",
             ]
         )
-        .transform_columns(
-            COLUNAS_DATA_AAAAMMDD,
-            function=lambda dt: de_aaaammdd_para_timestamp(dt, erros="coerce"),
-        )
-        # tratar como NA colunas com valores nulos
-        .replace("", np.nan)
-        .change_type("usuario_filhos_quantidade", str)
-        .transform_columns(
-            [
-                "uti_tipo_id_sihsus",
-                "condicao_secundaria_id_cid10",
-                "estabelecimento_natureza_id_scnes",
-                "estabelecimento_natureza_juridica_id_scnes",
-                "usuario_instrucao_id_sihsus",
-                "condicao_notificacao_id_cid10",
-                "usuario_contraceptivo_principal_id_sihsus",
-                "usuario_contraceptivo_secundario_id_sihsus",
-                "usuario_filhos_quantidade",
-                "usuario_id_pre_natal",
-                "usuario_ocupacao_id_cbo2002",
-                "usuario_atividade_id_cnae",
-                "usuario_vinculo_previdencia_id_sihsus",
-                "autorizacao_gestor_motivo_id_sihsus",
-                "autorizacao_gestor_tipo_id_sihsus",
-                "autorizacao_gestor_id_cpf",
-                "condicao_associada_id_cid10",
-                "condicao_obito_id_cid10",
-                "regra_contratual_id_scnes",
-                "usuario_etnia_id_sus",
-                "condicao_secundaria_1_tipo_id_sihsus",
-                "condicao_secundaria_2_tipo_id_sihsus",
-                "condicao_secundaria_3_tipo_id_sihsus",
-                "condicao_secundaria_4_tipo_id_sihsus",
-                "condicao_secundaria_5_tipo_id_sihsus",
-                "condicao_secundaria_6_tipo_id_sihsus",
-                "condicao_secundaria_7_tipo_id_sihsus",
-                "condicao_secundaria_8_tipo_id_sihsus",
-                "condicao_secundaria_9_tipo_id_sihsus",
-            ],
-            function=lambda elemento: (
-                np.nan
-                if pd.notna(elemento)
-                and all(digito == "0" for digito in elemento)
-                else elemento
-            ),
-        )
-        # processar colunas lógicas
-        .transform_columns(
-            [
-                "obito",
-                "exame_vdrl",
-                "usuario_homonimo",
-                "gestacao_risco",
-            ],
-            function=_para_booleano,
-        )
         # adicionar id
-        .add_column("id", str())
-        .transform_column("id", function=lambda _: uuid7().hex)
+        .pipe(adicionar_uuids7)
         # adicionar id do periodo
         .transform_column(
             "periodo_data_inicio",
-            function=lambda dt: periodo_por_data(sessao=sessao, data=dt).id,
+            function=lambda datas: periodos_por_datas(
+                sessao=sessao,
+                datas=datas,
+            ),
             dest_column_name="periodo_id",
+            elementwise=False,
         )
         # adicionar id da unidade geografica
         .transform_column(
             "unidade_geografica_id_sus",
-            function=lambda id_sus: id_sus_para_id_impulso(
+            function=lambda ids_sus: ids_sus_para_ids_impulso(
                 sessao=sessao,
-                id_sus=id_sus,
+                ids_sus=ids_sus,
             ),
             dest_column_name="unidade_geografica_id",
+            elementwise=False,
         )
         # adicionar datas de inserção e atualização
         .add_column("criacao_data", agora_gmt_menos3())
         .add_column("atualizacao_data", agora_gmt_menos3())
         # garantir tipos
-        # HACK: ver https://github.com/pandas-dev/pandas/issues/25472
-        .astype({col: "float" for col in COLUNAS_NUMERICAS})
-        .astype(TIPOS_AIH_RD)
+        .pipe(PLANO_AIH_RD.tipar)
     )
     logger.debug(
         "Memória ocupada pelo DataFrame transformado: {memoria_usada:.2f} mB.",
@@ -507,18 +514,23 @@ def obter_aih_rd(
     # obter tamanho do lote de processamento
     passo = int(os.getenv("IMPULSOETL_LOTE_TAMANHO", 100000))
 
+    impressoes = ImpressoesPendentes()
     aih_rd_lotes = extrair_aih_rd(
         uf_sigla=uf_sigla,
         periodo_data_inicio=periodo_data_inicio,
         passo=passo,
+        impressoes=impressoes,
+    )
+
+    aih_rd_transformadas = transformar_lotes(
+        transformar_aih_rd,
+        aih_rd_lotes,
+        sessao=sessao,
+        argumento="aih_rd",
     )
 
     contador = 0
-    for aih_rd_lote in aih_rd_lotes:
-        aih_rd_transformada = transformar_aih_rd(
-            sessao=sessao,
-            aih_rd=aih_rd_lote,
-        )
+    for aih_rd_lote_tamanho, aih_rd_transformada in aih_rd_transformadas:
 
         carregamento_status = carregar_dataframe(
             sessao=sessao,
@@ -532,11 +544,16 @@ def obter_aih_rd(
                 "Execução interrompida em razão de um erro no "
                 + "carregamento."
             )
-        contador += len(aih_rd_lote)
+        contador += aih_rd_lote_tamanho
         if teste and contador > 1000:
             logger.info("Execução interrompida para fins de teste.")
             break
 
+    if not teste:
+        # as versões dos arquivos lidos são registradas na mesma transação
+        # que os dados carregados
+        impressoes.registrar(sessao)
+
     if teste:
         logger.info("Desfazendo alterações realizadas durante o teste...")
         sessao.rollback()
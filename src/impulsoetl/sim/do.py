@@ -9,23 +9,43 @@
 from __future__ import annotations
 
 import os
-import re
 from datetime import date
-from typing import Final, Generator
+from typing import Final, Generator, Iterable
 
 import janitor  # noqa: F401  # nopycln: import
 import numpy as np
 import pandas as pd
 from frozendict import frozendict
 from sqlalchemy.orm import Session
-from uuid6 import uuid7
 
-from impulsoetl.comum.condicoes_saude import e_cid10, remover_ponto_cid10
-from impulsoetl.comum.datas import agora_gmt_menos3
-from impulsoetl.comum.geografias import id_sim_para_id_impulso
+from impulsoetl.comum.condicoes_saude import (
+    listar_cids10,
+    normalizar_cids10,
+)
+from impulsoetl.comum.datas import (
+    agora_gmt_menos3,
+    de_hhmm_para_horas,
+    de_textos_para_datas,
+)
+from impulsoetl.comum.geografias import ids_sim_para_ids_impulso
 from impulsoetl.loggers import logger
 from impulsoetl.utilitarios.bd import carregar_dataframe
+from impulsoetl.utilitarios.condicoes import colunas_necessarias
 from impulsoetl.utilitarios.datasus_ftp import extrair_dbc_lotes
+from impulsoetl.utilitarios.datasus_impressoes import ImpressoesPendentes
+from impulsoetl.utilitarios.especificacoes import (
+    EspecificacaoFonte,
+    PlanoTransformacao,
+    interpretar_booleano,
+    interpretar_fatia,
+)
+from impulsoetl.utilitarios.identificadores import adicionar_uuids7
+from impulsoetl.utilitarios.mapeamentos import (
+    por_valor_distinto,
+    transformar_por_valor_distinto,
+)
+from impulsoetl.utilitarios.paralelismo import transformar_lotes
+from impulsoetl.utilitarios.valores_nulos import PADRAO_ZEROS
 
 DE_PARA_DO: Final[frozendict] = frozendict(
     {
@@ -141,28 +161,28 @@ TIPOS_DO: Final[frozendict] = frozendict(
         "id": "object",
         "periodo_id": "object",
         "unidade_geografica_id": "object",
-        "tipo_id_sim": "object",
+        "tipo_id_sim": "category",
         "ocorrencia_data": "datetime64[ns]",
-        "usuario_nascimento_pais_uf_id_sus": "object",
+        "usuario_nascimento_pais_uf_id_sus": "category",
         "usuario_nascimento_data": "datetime64[ns]",
-        "usuario_idade_id_sim": "object",
-        "usuario_sexo_id_sim": "object",
-        "usuario_raca_cor_id_sim": "object",
-        "usuario_estado_civil_id_sim": "object",
-        "usuario_escolaridade_id_sim1996": "object",
-        "usuario_ocupacao_id_cbo2002": "object",
-        "usuario_residencia_municipio_id_sim": "object",
-        "local_ocorrencia_id_sim": "object",
-        "unidade_geografica_id_sim": "object",
+        "usuario_idade_id_sim": "category",
+        "usuario_sexo_id_sim": "category",
+        "usuario_raca_cor_id_sim": "category",
+        "usuario_estado_civil_id_sim": "category",
+        "usuario_escolaridade_id_sim1996": "category",
+        "usuario_ocupacao_id_cbo2002": "category",
+        "usuario_residencia_municipio_id_sim": "category",
+        "local_ocorrencia_id_sim": "category",
+        "unidade_geografica_id_sim": "category",
         "mae_idade": "Int64",
-        "mae_escolaridade_id_sim1996": "object",
-        "mae_ocupacao_id_cbo2002": "object",
+        "mae_escolaridade_id_sim1996": "category",
+        "mae_ocupacao_id_cbo2002": "category",
         "mae_filhos_nascidos_vivos": "Int64",
         "mae_filhos_perdas_fetais": "Int64",
-        "gestacao_tipo_id_sim": "object",
-        "gestacao_semanas_id_sim": "object",
-        "parto_tipo_id_sim": "object",
-        "parto_relacao_id_sim": "object",
+        "gestacao_tipo_id_sim": "category",
+        "gestacao_semanas_id_sim": "category",
+        "parto_tipo_id_sim": "category",
+        "parto_relacao_id_sim": "category",
         "usuario_nascimento_peso": "Int64",
         "gestacao_relacao": "boolean",
         "puerperio_relacao": "boolean",
@@ -175,10 +195,10 @@ TIPOS_DO: Final[frozendict] = frozendict(
         "condicoes_antecedentes_consequenciais_2_ids_cid10": "object",  # array
         "condicoes_basicas_ids_cid10": "object",  # array
         "condicoes_contribuintes_ids_cid10": "object",  # array
-        "causa_basica_resselecao_apos_id_cid10": "object",
-        "circunstancia_id_sim": "object",
+        "causa_basica_resselecao_apos_id_cid10": "category",
+        "circunstancia_id_sim": "category",
         "acidente_trabalho": "boolean",
-        "circunstancia_fonte_id_sim": "object",
+        "circunstancia_fonte_id_sim": "category",
         "criacao_data": "datetime64[ns]",
         "atualizacao_data": "datetime64[ns]",
     },
@@ -186,50 +206,50 @@ TIPOS_DO: Final[frozendict] = frozendict(
 
 TIPOS_DO_ADICIONAIS: Final[frozendict] = frozendict(
     {
-        "origem_id_sim": "object",
+        "origem_id_sim": "category",
         "ocorrencia_hora": "object",  # pandas não tem tipo apropriado p/ hora
         "atestado_atestante_id_crm": "object",
-        "usuario_nascimento_municipio_id_sim": "object",
-        "usuario_escolaridade_id_sim2010": "object",
-        "usuario_escolaridade_serie": "object",
-        "estabelecimento_id_scnes": "object",
+        "usuario_nascimento_municipio_id_sim": "category",
+        "usuario_escolaridade_id_sim2010": "category",
+        "usuario_escolaridade_serie": "category",
+        "estabelecimento_id_scnes": "category",
         "_nao_documentado_estabdescr": "object",
-        "mae_escolaridade_id_sim2010": "object",
-        "mae_escolaridade_serie": "object",
+        "mae_escolaridade_id_sim2010": "category",
+        "mae_escolaridade_serie": "category",
         "gestacao_semanas": "Int64",
-        "gestacao_situacao_id_sim2012": "object",
-        "causa_basica_resselecao_antes_localidade_id_cid10": "object",
-        "svo_iml_municipio_id_sim": "object",
+        "gestacao_situacao_id_sim2012": "category",
+        "causa_basica_resselecao_antes_localidade_id_cid10": "category",
+        "svo_iml_municipio_id_sim": "category",
         "atestado_data": "datetime64[ns]",
         "lote_id_sim": "object",
         "investigacao_houve": "boolean",
         "investigacao_data": "datetime64[ns]",
-        "causa_basica_resselecao_antes_id_cid10": "object",
+        "causa_basica_resselecao_antes_id_cid10": "category",
         "cadastro_data": "datetime64[ns]",
-        "atestado_atestante_tipo_id_sim": "object",
+        "atestado_atestante_tipo_id_sim": "category",
         "sistema_instalacao_codificadora": "boolean",
         "declaracao_codificada": "boolean",
-        "sistema_versao": "object",
-        "causa_basica_seletor_versao": "object",
-        "investigacao_fonte_id_sim": "object",
+        "sistema_versao": "category",
+        "causa_basica_seletor_versao": "category",
+        "investigacao_fonte_id_sim": "category",
         "recebimento_data": "datetime64[ns]",
         "atestado_condicoes_ids_cid10": "object",
         "recebimento_original_data": "datetime64[ns]",
         "recebimento_original_data_tratamento": "datetime64[ns]",
-        "causa_externa_id_cid10": "object",
-        "mae_escolaridade_agregada_id_sim": "object",
-        "usuario_escolaridade_agregada_id_sim": "object",
+        "causa_externa_id_cid10": "category",
+        "mae_escolaridade_agregada_id_sim": "category",
+        "usuario_escolaridade_agregada_id_sim": "category",
         "declaracao_modelo_epidemiologica": "boolean",
         "declaracao_modelo_novo": "boolean",
         "recebimento_original_intervalo": "object",  # intervalo
         "investigacao_duracao": "object",  # intervalo
         "_nao_documentado_nudiasobin": "object",
         "investigacao_cadastro_data": "datetime64[ns]",
-        "gestacao_situacao_id_sim2009": "object",
+        "gestacao_situacao_id_sim2009": "category",
         "investigacao_conclusao_data": "datetime64[ns]",
-        "fontes_combinacao_id_sim": "object",
-        "investigacao_desfecho_id_sim": "object",
-        "investigacao_esfera_id_sim": "object",
+        "fontes_combinacao_id_sim": "category",
+        "investigacao_desfecho_id_sim": "category",
+        "investigacao_esfera_id_sim": "category",
         "_nao_documentado_nudiasinf": "object",
         "_nao_documentado_dtcadinf": "object",
         "_nao_documentado_morteparto": "object",
@@ -238,11 +258,11 @@ TIPOS_DO_ADICIONAIS: Final[frozendict] = frozendict(
         "investigacao_gerou_alteracao": "boolean",
         "_nao_documentado_contador": "object",
         "usuario_residencia_bairro_id_sim": "object",
-        "uf_id_ibge": "object",
+        "uf_id_ibge": "category",
         "ocorrencia_bairro_id_sim": "object",
         "_nao_documentado_tpassina": "object",
         "usuario_id_declaracao_nascido_vivo": "object",
-        "cartorio_municipio_id_sim": "object",
+        "cartorio_municipio_id_sim": "category",
         "_nao_documentado_codcart": "object",
         "_nao_documentado_numregcart": "object",
         "_nao_documentado_dtregcart": "object",
@@ -275,21 +295,167 @@ COLUNAS_INTERVALOS: Final[list[str]] = [
     "investigacao_duracao",
 ]
 
+COLUNAS_MUNICIPIOS: Final[list[str]] = [
+    "svo_iml_municipio_id_sim",
+    "unidade_geografica_id_sim",
+    "usuario_nascimento_municipio_id_sim",
+    "usuario_residencia_municipio_id_sim",
+    "cartorio_municipio_id_sim",
+]
+
+
+def _corrigir_espacos(textos: pd.Series) -> pd.Series:
+    """Corrige textos com dígitos 0 substituídos por espaços."""
+    return transformar_por_valor_distinto(
+        textos,
+        lambda valores: valores.str.replace(" ", "0", regex=False),
+    )
 
-def _para_booleano(valor: str) -> bool | float:
-    """Transforma um valor binário '0' ou '1' em booleano. Suporta NaNs."""
-    if valor == "1":
-        return True
-    elif valor == "2":
-        return False
-    else:
+
+def _para_intervalo(dias: str) -> str | float:
+    """Transforma um número de dias em um intervalo do PostgreSQL."""
+    if pd.isna(dias) or not dias:
         return np.nan
+    return str(int(dias)) + " days"
+
+
+def _limpar_cids10(cids: pd.Series) -> pd.Series:
+    """Remove separadores do início e do fim de textos com códigos CID-10."""
+    return cids.str.strip("*/ ")
+
+
+def _listar_cids10(linhas: pd.Series) -> pd.Series:
+    """Lista os códigos CID-10 válidos de uma linha da Declaração de Óbito.
+
+    Linhas em branco resultam em listas vazias.
+    """
+    return listar_cids10(normalizar_cids10(_limpar_cids10(linhas.fillna(""))))
+
+
+ESPECIFICACAO_DO: Final[EspecificacaoFonte] = EspecificacaoFonte(
+    de_para=dict(DE_PARA_DO, **DE_PARA_DO_ADICIONAIS),
+    tipos=dict(TIPOS_DO, **TIPOS_DO_ADICIONAIS),
+    interpretadores={
+        # corrigir datas com dígito 0 substituído por espaço
+        **{
+            coluna: lambda datas: de_textos_para_datas(
+                _corrigir_espacos(datas),
+                "%d%m%Y",  # noqa: WPS323
+            )
+            for coluna in COLUNAS_DATA_DDMMAAAA
+        },
+        "ocorrencia_hora": lambda horas: de_hhmm_para_horas(
+            _corrigir_espacos(horas),
+        ),
+        **{
+            coluna: por_valor_distinto(_para_intervalo)
+            for coluna in COLUNAS_INTERVALOS
+        },
+        "sistema_instalacao_codificadora": interpretar_booleano(["S"]),
+        "declaracao_modelo_epidemiologica": interpretar_booleano(["1"]),
+        "declaracao_modelo_novo": interpretar_booleano(["1"]),
+        **{
+            coluna: interpretar_booleano(["1"], ["2"])
+            for coluna in (
+                "gestacao_relacao",
+                "puerperio_relacao",
+                "assistencia_medica_recebeu",
+                "exame_realizou",
+                "cirurgia_realizou",
+                "necropsia_realizou",
+                "acidente_trabalho",
+                "investigacao_houve",
+                "declaracao_codificada",
+                "investigacao_gerou_alteracao",
+            )
+        },
+        **{
+            coluna: _listar_cids10
+            for coluna in (
+                "condicoes_terminais_ids_cid10",
+                "condicoes_antecedentes_consequenciais_1_ids_cid10",
+                "condicoes_antecedentes_consequenciais_2_ids_cid10",
+                "condicoes_basicas_ids_cid10",
+                "condicoes_contribuintes_ids_cid10",
+            )
+        },
+        "causa_basica_resselecao_apos_id_cid10": _limpar_cids10,
+        "causa_basica_resselecao_antes_localidade_id_cid10": _limpar_cids10,
+        "causa_externa_id_cid10": _limpar_cids10,
+        # Processar identificadores que podem ser IBGE ou SUS - antes de
+        # 2008, alguns desses campos utilizavam identificadores de
+        # municípios do IBGE (7 dígitos); depois passaram a usar
+        # identificadores SUS (6 dígitos).
+        **{
+            coluna: interpretar_fatia(0, 6)
+            for coluna in COLUNAS_MUNICIPIOS
+        },
+    },
+    nulos={
+        coluna: PADRAO_ZEROS
+        for coluna in (
+            "origem_id_sim",
+            "tipo_id_sim",
+            "usuario_nascimento_pais_uf_id_sus",
+            "usuario_sexo_id_sim",
+            "usuario_raca_cor_id_sim",
+            "usuario_estado_civil_id_sim",
+            "usuario_escolaridade_id_sim1996",
+            "usuario_escolaridade_serie",
+            "usuario_ocupacao_id_cbo2002",
+            "local_ocorrencia_id_sim",
+            "estabelecimento_id_scnes",
+            "_nao_documentado_estabdescr",
+            "mae_escolaridade_id_sim1996",
+            "mae_escolaridade_serie",
+            "mae_ocupacao_id_cbo2002",
+            "gestacao_tipo_id_sim",
+            "gestacao_semanas_id_sim",
+            "parto_tipo_id_sim",
+            "parto_relacao_id_sim",
+            "gestacao_situacao_id_sim2012",
+            "circunstancia_id_sim",
+            "circunstancia_fonte_id_sim",
+            "lote_id_sim",
+            "causa_basica_resselecao_antes_id_cid10",
+            "atestado_atestante_tipo_id_sim",
+            "sistema_versao",
+            "causa_basica_seletor_versao",
+            "investigacao_fonte_id_sim",
+            "atestado_condicoes_ids_cid10",
+            "gestacao_situacao_id_sim2009",
+            "fontes_combinacao_id_sim",
+            "investigacao_desfecho_id_sim",
+            "investigacao_esfera_id_sim",
+        )
+    },
+    # códigos que só resultam em zeros após a limpeza
+    nulos_interpretados={
+        coluna: PADRAO_ZEROS
+        for coluna in (
+            *COLUNAS_MUNICIPIOS,
+            "causa_basica_resselecao_apos_id_cid10",
+            "causa_basica_resselecao_antes_localidade_id_cid10",
+            "causa_externa_id_cid10",
+        )
+    },
+    # colunas ausentes dos arquivos mais antigos
+    opcionais=DE_PARA_DO_ADICIONAIS.values(),
+)
+
+PLANO_DO: Final[PlanoTransformacao] = ESPECIFICACAO_DO.compilar()
 
 
 def extrair_do(
     uf_sigla: str,
     periodo_data_inicio: date,
     passo: int = 10000,
+    colunas: Iterable[str] | None = (
+        *DE_PARA_DO,
+        *DE_PARA_DO_ADICIONAIS,
+    ),
+    condicoes: str | None = None,
+    impressoes: ImpressoesPendentes | None = None,
 ) -> Generator[pd.DataFrame, None, None]:
     """Extrai registros de Declarações de Óbito do FTP do DataSUS.
 
@@ -300,6 +466,18 @@ def extrair_do(
             representado como um objeto [`datetime.date`][].
         passo: Número de registros que devem ser convertidos em DataFrame a
             cada iteração.
+        colunas: Nomes das colunas a serem lidas do arquivo de disseminação.
+            Por padrão, são lidas apenas as colunas usadas nas
+            transformações (ver [`DE_PARA_DO`][] e
+            [`DE_PARA_DO_ADICIONAIS`][]).
+        condicoes: Expressão opcional com a sintaxe do método
+            [`pandas.DataFrame.query()`][]. Os registros que certamente não
+            atendem a essas condições são descartados durante a leitura do
+            arquivo, antes de serem decodificados (ver
+            [`extrair_dbc_lotes()`][]).
+        impressoes: Instância opcional de [`ImpressoesPendentes`][], à qual
+            são adicionadas as versões dos arquivos lidos (ver
+            [`extrair_dbc_lotes()`][]).
 
     Gera:
         A cada iteração, devolve um objeto [`pandas.DataFrames`][] com um
@@ -307,6 +485,11 @@ def extrair_do(
 
     [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
     [`datetime.date`]: https://docs.python.org/3/library/datetime.html#date-objects
+    [`DE_PARA_DO`]: impulsoetl.sim.do.DE_PARA_DO
+    [`DE_PARA_DO_ADICIONAIS`]: impulsoetl.sim.do.DE_PARA_DO_ADICIONAIS
+    [`pandas.DataFrame.query()`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.query.html
+    [`extrair_dbc_lotes()`]: impulsoetl.utilitarios.datasus_ftp.extrair_dbc_lotes
+    [`ImpressoesPendentes`]: impulsoetl.utilitarios.datasus_impressoes.ImpressoesPendentes
     """
 
     return extrair_dbc_lotes(
@@ -317,6 +500,9 @@ def extrair_do(
             periodo_data_inicio=periodo_data_inicio,
         ),
         passo=passo,
+        colunas=colunas,
+        condicoes=condicoes,
+        impressoes=impressoes,
     )
 
 
@@ -371,226 +557,30 @@ def transformar_do(
             num_registros=len(do),
         )
 
-    # Junta nomes de colunas e tipos adicionais aos obrigatórios
-    de_para = dict(DE_PARA_DO, **DE_PARA_DO_ADICIONAIS)
-    tipos = dict(TIPOS_DO, **TIPOS_DO_ADICIONAIS)
-
     # corrigir nomes de colunas mal formatados
     do = do.rename_columns(function=lambda col: col.strip().upper())
 
     do_transformada = (
-        do  # noqa: WPS221  # ignorar linha complexa no pipeline
-        # adicionar colunas faltantes, com valores vazios
-        .add_columns(
-            **{
-                coluna: ""
-                for coluna in DE_PARA_DO_ADICIONAIS.keys()
-                if not (coluna in do.columns)
-            }
-        )
-        # renomear colunas
-        .rename_columns(de_para)
-        # processar colunas com datas
-        .transform_columns(
-            # corrigir datas com dígito 0 substituído por espaço
-            COLUNAS_DATA_DDMMAAAA + ["ocorrencia_hora"],
-            function=lambda dt: dt.replace(" ", "0"),
-        )
-        .transform_columns(
-            COLUNAS_DATA_DDMMAAAA,
-            function=lambda dt: pd.to_datetime(
-                dt,
-                format="%d%m%Y",  # noqa: WPS323
-                errors="coerce",
-            ),
-        )
-        .transform_column(
-            "ocorrencia_hora",
-            function=lambda hora: (
-                # TODO: Corrigir hora > 24
-                hora[:2] + ":" + hora[2:4]
-                if re.match(r"([01][0-9]|2[0-3])[0-5][0-9]", hora)
-                else np.nan
-            ),
-        )
-        # processar colunas com intervalos
-        .transform_columns(
-            COLUNAS_INTERVALOS,
-            function=lambda intervalo: (
-                str(int(intervalo)) + " days" if intervalo else np.nan
-            ),
-        )
-        # processar colunas lógicas
-        .transform_column(
-            "sistema_instalacao_codificadora",
-            function=lambda elemento: True if elemento == "S" else False,
-        )
-        .transform_columns(
-            [
-                "declaracao_modelo_epidemiologica",
-                "declaracao_modelo_novo",
-            ],
-            function=lambda elemento: True if elemento == "1" else False,
-        )
-        .transform_columns(
-            [
-                "gestacao_relacao",
-                "puerperio_relacao",
-                "assistencia_medica_recebeu",
-                "exame_realizou",
-                "cirurgia_realizou",
-                "necropsia_realizou",
-                "acidente_trabalho",
-                "investigacao_houve",
-                "declaracao_codificada",
-                "investigacao_gerou_alteracao",
-            ],
-            function=_para_booleano,
-        )
-        # processar colunas com CIDs
-        .transform_columns(
-            [
-                "condicoes_terminais_ids_cid10",
-                "condicoes_antecedentes_consequenciais_1_ids_cid10",
-                "condicoes_antecedentes_consequenciais_2_ids_cid10",
-                "condicoes_basicas_ids_cid10",
-                "condicoes_contribuintes_ids_cid10",
-                "causa_basica_resselecao_apos_id_cid10",
-                "causa_basica_resselecao_antes_localidade_id_cid10",
-                "causa_externa_id_cid10",
-            ],
-            function=lambda cids: cids.strip("*/ "),
-        )
-        .transform_columns(
-            [
-                "condicoes_terminais_ids_cid10",
-                "condicoes_antecedentes_consequenciais_1_ids_cid10",
-                "condicoes_antecedentes_consequenciais_2_ids_cid10",
-                "condicoes_basicas_ids_cid10",
-                "condicoes_contribuintes_ids_cid10",
-            ],
-            function=remover_ponto_cid10,
-        )
-        .transform_columns(
-            [
-                "condicoes_terminais_ids_cid10",
-                "condicoes_antecedentes_consequenciais_1_ids_cid10",
-                "condicoes_antecedentes_consequenciais_2_ids_cid10",
-                "condicoes_basicas_ids_cid10",
-                "condicoes_contribuintes_ids_cid10",
-            ],
-            function=lambda cids: (
-                "{"
-                + ",".join(
-                    [
-                        cid
-                        for cid in re.split("[^a-zA-Z0-9]", cids)
-                        if e_cid10(
-                            cid
-                        )  # remove texto que não é um CID10 válido
-                    ]
-                )
-                + "}"
-            ),
-        )
-        # Processar identificadores que podem ser IBGE ou SUS - antes de 2008,
-        # alguns desses campos utilizavam identificadores de municípios do
-        # IBGE (7 dígitos); depois passaram a usar identificadores SUS (6
-        # dígitos).
-        .transform_columns(
-            [
-                "svo_iml_municipio_id_sim",
-                "unidade_geografica_id_sim",
-                "usuario_nascimento_municipio_id_sim",
-                "usuario_residencia_municipio_id_sim",
-                "cartorio_municipio_id_sim",
-            ],
-            function=lambda id_ibge_ou_sus: (
-                id_ibge_ou_sus[0 : min(6, len(id_ibge_ou_sus))]
-                if id_ibge_ou_sus
-                else np.nan
-            ),
-        )
-        # tratar como NA colunas com valores nulos
-        .replace("", np.nan)
-        .transform_columns(
-            [
-                "origem_id_sim",
-                "tipo_id_sim",
-                "ocorrencia_hora",
-                "usuario_nascimento_pais_uf_id_sus",
-                "usuario_nascimento_municipio_id_sim",
-                "usuario_sexo_id_sim",
-                "usuario_raca_cor_id_sim",
-                "usuario_estado_civil_id_sim",
-                "usuario_escolaridade_id_sim1996",
-                "usuario_escolaridade_serie",
-                "usuario_ocupacao_id_cbo2002",
-                "usuario_residencia_municipio_id_sim",
-                "local_ocorrencia_id_sim",
-                "estabelecimento_id_scnes",
-                "_nao_documentado_estabdescr",
-                "unidade_geografica_id_sim",
-                "mae_escolaridade_id_sim1996",
-                "mae_escolaridade_serie",
-                "mae_ocupacao_id_cbo2002",
-                "gestacao_tipo_id_sim",
-                "gestacao_semanas_id_sim",
-                "parto_tipo_id_sim",
-                "parto_relacao_id_sim",
-                "gestacao_situacao_id_sim2012",
-                "causa_basica_resselecao_apos_id_cid10",
-                "causa_basica_resselecao_antes_localidade_id_cid10",
-                "svo_iml_municipio_id_sim",
-                "circunstancia_id_sim",
-                "circunstancia_fonte_id_sim",
-                "lote_id_sim",
-                "causa_basica_resselecao_antes_id_cid10",
-                "atestado_atestante_tipo_id_sim",
-                "sistema_versao",
-                "causa_basica_seletor_versao",
-                "investigacao_fonte_id_sim",
-                "atestado_condicoes_ids_cid10",
-                "causa_externa_id_cid10",
-                "gestacao_situacao_id_sim2009",
-                "fontes_combinacao_id_sim",
-                "investigacao_desfecho_id_sim",
-                "investigacao_esfera_id_sim",
-                "cartorio_municipio_id_sim",
-            ],
-            function=lambda elemento: (
-                np.nan
-                if (
-                    pd.notna(elemento)
-                    and all(digito == "0" for digito in elemento)
-                )
-                else elemento
-            ),
-        )
+        PLANO_DO.interpretar(do)  # noqa: WPS221  # linha complexa
         # adicionar id
-        .add_column("id", str())
-        .transform_column("id", function=lambda _: uuid7().hex)
+        .pipe(adicionar_uuids7)
         # adicionar id do periodo
         .assign(periodo_id=periodo_id)
         # adicionar id da unidade geografica
         .transform_column(
             "unidade_geografica_id_sim",
-            function=lambda id_sim: id_sim_para_id_impulso(
+            function=lambda ids_sim: ids_sim_para_ids_impulso(
                 sessao=sessao,
-                id_sim=id_sim,
+                ids_sim=ids_sim,
             ),
             dest_column_name="unidade_geografica_id",
+            elementwise=False,
         )
         # adicionar datas de inserção e atualização
         .add_column("criacao_data", agora_gmt_menos3())
         .add_column("atualizacao_data", agora_gmt_menos3())
         # garantir tipos
-        .change_type(
-            # HACK: ver https://github.com/pandas-dev/pandas/issues/25472
-            COLUNAS_NUMERICAS,
-            "float",
-        )
-        .astype(tipos)
+        .pipe(PLANO_DO.tipar)
     )
 
     logger.debug(
@@ -649,20 +639,33 @@ def obter_do(
     # obter tamanho do lote de processamento
     passo = int(os.getenv("IMPULSOETL_LOTE_TAMANHO", 100000))
 
+    impressoes = ImpressoesPendentes()
     do_lotes = extrair_do(
         uf_sigla=uf_sigla,
         periodo_data_inicio=periodo_data_inicio,
         passo=passo,
+        colunas=colunas_necessarias(
+            [
+                *DE_PARA_DO,
+                *DE_PARA_DO_ADICIONAIS,
+            ],
+            condicoes=kwargs.get("condicoes"),
+        ),
+        condicoes=kwargs.get("condicoes"),
+        impressoes=impressoes,
+    )
+
+    do_transformadas = transformar_lotes(
+        transformar_do,
+        do_lotes,
+        sessao=sessao,
+        argumento="do",
+        periodo_id=periodo_id,
+        condicoes=kwargs.get("condicoes"),
     )
 
     contador = 0
-    for do_lote in do_lotes:
-        do_transformada = transformar_do(
-            sessao=sessao,
-            do=do_lote,
-            periodo_id=periodo_id,
-            condicoes=kwargs.get("condicoes"),
-        )
+    for do_lote_tamanho, do_transformada in do_transformadas:
 
         carregamento_status = carregar_dataframe(
             sessao=sessao,
@@ -676,11 +679,16 @@ def obter_do(
                 "Execução interrompida em razão de um erro no "
                 + "carregamento."
             )
-        contador += len(do_lote)
+        contador += do_lote_tamanho
         if teste and contador > 1000:
             logger.info("Execução interrompida para fins de teste.")
             break
 
+    if not teste:
+        # as versões dos arquivos lidos são registradas na mesma transação
+        # que os dados carregados
+        impressoes.registrar(sessao)
+
     if teste:
         logger.info("Desfazendo alterações realizadas durante o teste...")
         sessao.rollback()
@@ -9,25 +9,36 @@
 from __future__ import annotations
 
 import os
-import re
 from datetime import date
 from ftplib import error_perm
-from typing import Final, Generator
+from typing import Final, Generator, Iterable
 from urllib.error import URLError
 
 import janitor  # noqa: F401  # nopycln: import
-import numpy as np
 import pandas as pd
 from frozendict import frozendict
 from sqlalchemy.orm import Session
-from uuid6 import uuid7
 
-from impulsoetl.comum.condicoes_saude import e_cid10, remover_ponto_cid10
-from impulsoetl.comum.datas import agora_gmt_menos3
-from impulsoetl.comum.geografias import id_sim_para_id_impulso
+from impulsoetl.comum.condicoes_saude import normalizar_cids10
+from impulsoetl.comum.datas import (
+    agora_gmt_menos3,
+    de_hhmm_para_horas,
+    de_textos_para_datas,
+)
+from impulsoetl.comum.geografias import ids_sim_para_ids_impulso
 from impulsoetl.loggers import logger
 from impulsoetl.utilitarios.bd import carregar_dataframe
+from impulsoetl.utilitarios.condicoes import colunas_necessarias
 from impulsoetl.utilitarios.datasus_ftp import extrair_dbc_lotes
+from impulsoetl.utilitarios.datasus_impressoes import ImpressoesPendentes
+from impulsoetl.utilitarios.especificacoes import (
+    EspecificacaoFonte,
+    PlanoTransformacao,
+    interpretar_booleano,
+)
+from impulsoetl.utilitarios.identificadores import adicionar_uuids7
+from impulsoetl.utilitarios.mapeamentos import por_valor_distinto
+from impulsoetl.utilitarios.paralelismo import transformar_lotes
 
 DE_PARA_AGRAVOS_VIOLENCIA: Final[frozendict] = frozendict(
     {
@@ -213,47 +224,47 @@ DE_PARA_AGRAVOS_VIOLENCIA_ADICIONAIS: Final[frozendict] = frozendict(
 TIPOS_AGRAVOS_VIOLENCIA: Final[frozendict] = frozendict(
     {
         "id_sinan": "object",
-        "tipo_id_sinan": "object",
-        "condicao_principal_id_cid10": "object",
+        "tipo_id_sinan": "category",
+        "condicao_principal_id_cid10": "category",
         "notificacao_data": "datetime64[ns]",
-        "notificacao_semana_epidemiologica_id_sinan": "object",
+        "notificacao_semana_epidemiologica_id_sinan": "category",
         "notificacao_ano": "Int64",
-        "notificacao_uf_id_ibge": "object",
-        "notificacao_municipio_id_sus": "object",
-        "notificacao_regiao_saude_id_sus": "object",
-        "notificacao_estabelecimento_tipo_id_sinan": "object",
+        "notificacao_uf_id_ibge": "category",
+        "notificacao_municipio_id_sus": "category",
+        "notificacao_regiao_saude_id_sus": "category",
+        "notificacao_estabelecimento_tipo_id_sinan": "category",
         "notificacao_estabelecimento_nome": "object",
         "notificacao_estabelecimento_id_sinan": "object",
-        "notificacao_estabelecimento_id_scnes": "object",
-        "usuario_residencia_regiao_saude_id_sus": "object",
+        "notificacao_estabelecimento_id_scnes": "category",
+        "usuario_residencia_regiao_saude_id_sus": "category",
         "ocorrencia_data": "datetime64[ns]",
-        "ocorrencia_semana_epidemiologica_id_sinan": "object",
+        "ocorrencia_semana_epidemiologica_id_sinan": "category",
         "usuario_nascimento_data": "datetime64[ns]",
         "usuario_idade_id_sinan": "string",
-        "usuario_sexo_id_sinan": "object",
-        "usuario_gestacao_idade_id_sinan": "object",
-        "usuario_raca_cor_id_sinan": "object",
-        "usuario_escolaridade_id_sinan": "object",
-        "usuario_residencia_uf_id_ibge": "object",
-        "usuario_residencia_municipio_id_sus": "object",
-        "usuario_residencia_pais_id_sigtap": "object",
+        "usuario_sexo_id_sinan": "category",
+        "usuario_gestacao_idade_id_sinan": "category",
+        "usuario_raca_cor_id_sinan": "category",
+        "usuario_escolaridade_id_sinan": "category",
+        "usuario_residencia_uf_id_ibge": "category",
+        "usuario_residencia_municipio_id_sus": "category",
+        "usuario_residencia_pais_id_sigtap": "category",
         "duplicado": "bool",
         "_nao_documentado_dt_invest": "object",
-        "usuario_ocupacao_id_cbo2002": "object",
-        "usuario_estado_civil_id_sinan": "object",
+        "usuario_ocupacao_id_cbo2002": "category",
+        "usuario_estado_civil_id_sinan": "category",
         "usuario_deficiencia_possui": "bool",
-        "usuario_deficiencia_fisica_id_sinan": "object",
-        "usuario_deficiencia_mental_id_sinan": "object",
-        "usuario_deficiencia_visual_id_sinan": "object",
+        "usuario_deficiencia_fisica_id_sinan": "category",
+        "usuario_deficiencia_mental_id_sinan": "category",
+        "usuario_deficiencia_visual_id_sinan": "category",
         "usuario_deficiencia_auditiva_id_sinan": "bool",
-        "usuario_transtorno_mental_id_sinan": "object",
-        "usuario_transtorno_comportamento_id_sinan": "object",
-        "usuario_deficiencia_outras_id_sinan": "object",
+        "usuario_transtorno_mental_id_sinan": "category",
+        "usuario_transtorno_comportamento_id_sinan": "category",
+        "usuario_deficiencia_outras_id_sinan": "category",
         "usuario_deficiencia_outras_descricao": "object",
-        "ocorrencia_uf_id_ibge": "object",
-        "ocorrencia_municipio_id_sus": "object",
+        "ocorrencia_uf_id_ibge": "category",
+        "ocorrencia_municipio_id_sus": "category",
         "ocorrencia_hora": "object",
-        "ocorrencia_local_tipo_id_sinan": "object",
+        "ocorrencia_local_tipo_id_sinan": "category",
         "ocorrencia_local_outros_descricao": "object",
         "ocorreu_outras_vezes": "bool",
         "autoprovocada": "bool",
@@ -308,7 +319,7 @@ TIPOS_AGRAVOS_VIOLENCIA: Final[frozendict] = frozendict(
         "_nao_documentado_lesao_nat": "object",
         "_nao_documentado_lesao_espe": "object",
         "_nao_documentado_lesao_corp": "object",
-        "envolvidos_numero_id_sinan": "object",
+        "envolvidos_numero_id_sinan": "category",
         "_nao_documentado_rel_sexual": "object",
         "autor_relacao_pai": "bool",
         "autor_relacao_mae": "bool",
@@ -328,7 +339,7 @@ TIPOS_AGRAVOS_VIOLENCIA: Final[frozendict] = frozendict(
         "autor_relacao_propria_pessoa": "bool",
         "autor_relacao_outras": "bool",
         "autor_relacao_outras_descricao": "object",
-        "autor_sexo_id_sinan": "object",
+        "autor_sexo_id_sinan": "category",
         "autor_alcoolizado": "bool",
         "encaminhamentos_rede_saude": "bool",
         "_nao_documentado_enc_tutela": "object",
@@ -345,16 +356,16 @@ TIPOS_AGRAVOS_VIOLENCIA: Final[frozendict] = frozendict(
         "_nao_documentado_enc_outr": "object",
         "_nao_documentado_enc_espec": "object",
         "relacao_trabalho": "bool",
-        "emissao_cat_id_sinan": "object",
-        "circunstancia_id_cid10": "object",
+        "emissao_cat_id_sinan": "category",
+        "circunstancia_id_cid10": "category",
         "_nao_documentado_classi_fin": "object",
         "_nao_documentado_evolucao": "object",
         "_nao_documentado_dt_obito": "object",
         "autor_relacao_madrasta": "bool",
         "_nao_documentado_tpuninot": "object",
-        "usuario_orientacao_sexual_id_sinan": "object",
-        "usuario_genero_id_sinan": "object",
-        "violencia_motivacao_id_sinan": "object",
+        "usuario_orientacao_sexual_id_sinan": "category",
+        "usuario_genero_id_sinan": "category",
+        "violencia_motivacao_id_sinan": "category",
         "_nao_documentado_cicl_vid": "object",
         "_nao_documentado_rede_sau": "object",
         "encaminhamentos_assistencia_social": "bool",
@@ -376,8 +387,8 @@ TIPOS_AGRAVOS_VIOLENCIA: Final[frozendict] = frozendict(
         "unidade_geografica_id": "object",
         "criacao_data": "datetime64[ns]",
         "atualizacao_data": "datetime64[ns]",
-        "usuario_residencia_tipologia_id_sinan": "object",
-        "ocorrencia_tipologia_id_sinan": "object",
+        "usuario_residencia_tipologia_id_sinan": "category",
+        "ocorrencia_tipologia_id_sinan": "category",
         "_nao_documentado_dt_digita": "object",
         "_nao_documentado_dt_transus": "object",
         "_nao_documentado_dt_transdm": "object",
@@ -411,19 +422,52 @@ COLUNAS_BOOLEANAS: Final[list[str]] = [
 ]
 
 
-def _para_booleano(valor: str) -> bool | float:
-    """Transforma um valor binário '1' ou '2' em booleano. Suporta NaNs."""
-    if valor == "1":
-        return True
-    elif valor == "2":
-        return False
-    else:
-        return np.nan
+ESPECIFICACAO_AGRAVOS_VIOLENCIA: Final[EspecificacaoFonte] = (
+    EspecificacaoFonte(
+        de_para=dict(
+            DE_PARA_AGRAVOS_VIOLENCIA,
+            **DE_PARA_AGRAVOS_VIOLENCIA_ADICIONAIS,
+        ),
+        tipos=TIPOS_AGRAVOS_VIOLENCIA,
+        interpretadores={
+            **{
+                coluna: lambda datas: de_textos_para_datas(
+                    datas,
+                    "%Y-%m-%d",  # noqa: WPS323
+                )
+                for coluna in COLUNAS_DATA
+            },
+            "ocorrencia_hora": de_hhmm_para_horas,
+            **{
+                coluna: interpretar_booleano(["1"], ["2"])
+                for coluna in COLUNAS_BOOLEANAS
+            },
+            "condicao_principal_id_cid10": normalizar_cids10,
+            "circunstancia_id_cid10": normalizar_cids10,
+            # corrigir leitura de coluna de códigos de idade
+            "usuario_idade_id_sinan": por_valor_distinto(
+                lambda cod: str(int(cod)).zfill(4) if pd.notna(cod) else pd.NA,
+            ),
+        },
+        # colunas ausentes dos arquivos mais antigos
+        opcionais=DE_PARA_AGRAVOS_VIOLENCIA_ADICIONAIS.values(),
+    )
+)
+
+PLANO_AGRAVOS_VIOLENCIA: Final[PlanoTransformacao] = (
+    ESPECIFICACAO_AGRAVOS_VIOLENCIA.compilar()
+)
 
 
 def extrair_agravos_violencia(
     periodo_data_inicio: date,
     passo: int = 100000,
+    colunas: Iterable[str] | None = (
+        *DE_PARA_AGRAVOS_VIOLENCIA,
+        *DE_PARA_AGRAVOS_VIOLENCIA_ADICIONAIS,
+    ),
+    condicoes: str | None = None,
+    impressoes: ImpressoesPendentes | None = None,
 ) -> Generator[pd.DataFrame, None, None]:
     """Extrai registros de notificações de agravo de violências do SINAN.
 
@@ -432,6 +476,18 @@ def extrair_agravos_violencia(
             representado como um objeto [`datetime.date`][].
         passo: Número de registros que devem ser convertidos em DataFrame a
             cada iteração.
+        colunas: Nomes das colunas a serem lidas do arquivo de disseminação.
+            Por padrão, são lidas apenas as colunas usadas nas
+            transformações (ver [`DE_PARA_AGRAVOS_VIOLENCIA`][] e
+            [`DE_PARA_AGRAVOS_VIOLENCIA_ADICIONAIS`][]).
+        condicoes: Expressão opcional com a sintaxe do método
+            [`pandas.DataFrame.query()`][]. Os registros que certamente não
+            atendem a essas condições são descartados durante a leitura do
+            arquivo, antes de serem decodificados (ver
+            [`extrair_dbc_lotes()`][]).
+        impressoes: Instância opcional de [`ImpressoesPendentes`][], à qual
+            são adicionadas as versões dos arquivos lidos (ver
+            [`extrair_dbc_lotes()`][]).
 
     Gera:
         A cada iteração, devolve um objeto [`pandas.DataFrames`][] com um
@@ -439,6 +495,11 @@ def extrair_agravos_violencia(
 
     [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
     [`datetime.date`]: https://docs.python.org/3/library/datetime.html#date-objects
+    [`DE_PARA_AGRAVOS_VIOLENCIA`]: impulsoetl.sinan.violencia.DE_PARA_AGRAVOS_VIOLENCIA
+    [`DE_PARA_AGRAVOS_VIOLENCIA_ADICIONAIS`]: impulsoetl.sinan.violencia.DE_PARA_AGRAVOS_VIOLENCIA_ADICIONAIS
+    [`pandas.DataFrame.query()`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.query.html
+    [`extrair_dbc_lotes()`]: impulsoetl.utilitarios.datasus_ftp.extrair_dbc_lotes
+    [`ImpressoesPendentes`]: impulsoetl.utilitarios.datasus_impressoes.ImpressoesPendentes
     """
 
     try:
@@ -449,6 +510,9 @@ def extrair_agravos_violencia(
                 periodo_data_inicio=periodo_data_inicio,
             ),
             passo=passo,
+            colunas=colunas,
+            condicoes=condicoes,
+            impressoes=impressoes,
         )
     except (error_perm, URLError):
         logger.info("Buscando no diretório de arquivos preliminares...")
@@ -459,6 +523,9 @@ def extrair_agravos_violencia(
                 periodo_data_inicio=periodo_data_inicio,
             ),
             passo=passo,
+            colunas=colunas,
+            condicoes=condicoes,
+            impressoes=impressoes,
         )
 
 
@@ -520,90 +587,34 @@ def transformar_agravos_violencia(
             num_registros=len(agravos_violencia),
         )
 
-    # Junta nomes de colunas e tipos adicionais aos obrigatórios
-    de_para = dict(
-        DE_PARA_AGRAVOS_VIOLENCIA, **DE_PARA_AGRAVOS_VIOLENCIA_ADICIONAIS
-    )
-
     # corrigir nomes de colunas mal formatados
     agravos_violencia = agravos_violencia.rename_columns(
         function=lambda col: col.strip().upper(),
     )
 
     agravos_violencia_transformada = (
-        agravos_violencia  # noqa: WPS221  # ignorar linha complexa no pipeline
-        # adicionar colunas faltantes, com valores vazios
-        .add_columns(
-            **{
-                coluna: ""
-                for coluna in DE_PARA_AGRAVOS_VIOLENCIA_ADICIONAIS.keys()
-                if not (coluna in agravos_violencia.columns)
-            }
-        )
-        # renomear colunas
-        .rename_columns(de_para)
-        # processar colunas com datas
-        .transform_columns(
-            COLUNAS_DATA,
-            function=lambda dt: pd.to_datetime(
-                dt,
-                format="%Y-%m-%d",  # noqa: WPS323
-                errors="coerce",
-            ),
-        )
-        .transform_column(
-            "ocorrencia_hora",
-            function=lambda hora: (
-                # TODO: Corrigir hora > 24
-                hora[:2] + ":" + hora[2:4]
-                if re.match(r"([01][0-9]|2[0-3])[0-5][0-9]", hora)
-                else np.nan
-            ),
-        )
-        # processar colunas lógicas
-        .transform_columns(
-            COLUNAS_BOOLEANAS,
-            function=_para_booleano,
-        )
-        # processar colunas com CIDs
-        .transform_columns(
-            [
-                "condicao_principal_id_cid10",
-                "circunstancia_id_cid10",
-            ],
-            function=remover_ponto_cid10,
-        )
-        # tratar como NA colunas com valores nulos
-        .replace("", np.nan)
-        # corrigir leitura de coluna de códigos de idade
-        .transform_column(
-            "usuario_idade_id_sinan",
-            lambda cod: str(int(cod)).zfill(4) if pd.notna(cod) else pd.NA,
+        PLANO_AGRAVOS_VIOLENCIA.interpretar(  # noqa: WPS221  # linha complexa
+            agravos_violencia,
         )
         # adicionar id
-        .add_column("id", str())
-        .transform_column("id", function=lambda _: uuid7().hex)
+        .pipe(adicionar_uuids7)
         # adicionar id do periodo
         .assign(periodo_id=periodo_id)
         # adicionar id da unidade geografica
         .transform_column(
             "notificacao_municipio_id_sus",
-            function=lambda id_sim: id_sim_para_id_impulso(
+            function=lambda ids_sim: ids_sim_para_ids_impulso(
                 sessao=sessao,
-                id_sim=id_sim,
+                ids_sim=ids_sim,
             ),
             dest_column_name="unidade_geografica_id",
+            elementwise=False,
         )
         # adicionar datas de inserção e atualização
         .add_column("criacao_data", agora_gmt_menos3())
         .add_column("atualizacao_data", agora_gmt_menos3())
         # garantir tipos
-        .change_type(
-            # HACK: ver https://github.com/pandas-dev/pandas/issues/25472
-            COLUNAS_NUMERICAS,
-            "float",
-        )
-        .astype(TIPOS_AGRAVOS_VIOLENCIA)
+        .pipe(PLANO_AGRAVOS_VIOLENCIA.tipar)
     )
 
     logger.debug(
@@ -661,19 +672,34 @@ def obter_agravos_violencia(
     else:
         passo = int(os.getenv("IMPULSOETL_LOTE_TAMANHO", 100000))
 
+    impressoes = ImpressoesPendentes()
     agravos_violencia_lotes = extrair_agravos_violencia(
         periodo_data_inicio=periodo_data_inicio,
         passo=passo,
+        colunas=colunas_necessarias(
+            [
+                *DE_PARA_AGRAVOS_VIOLENCIA,
+                *DE_PARA_AGRAVOS_VIOLENCIA_ADICIONAIS,
+            ],
+            condicoes=kwargs.get("condicoes"),
+        ),
+        condicoes=kwargs.get("condicoes"),
+        impressoes=impressoes,
+    )
+
+    agravos_violencia_transformadas = transformar_lotes(
+        transformar_agravos_violencia,
+        agravos_violencia_lotes,
+        sessao=sessao,
+        argumento="agravos_violencia",
+        periodo_id=periodo_id,
+        condicoes=kwargs.get("condicoes"),
     )
 
     contador = 0
-    for agravos_violencia_lote in agravos_violencia_lotes:
-        agravos_violencia_transformada = transformar_agravos_violencia(
-            sessao=sessao,
-            agravos_violencia=agravos_violencia_lote,
-            periodo_id=periodo_id,
-            condicoes=kwargs.get("condicoes"),
-        )
+    for agravos_violencia_lote_tamanho, agravos_violencia_transformada in (
+        agravos_violencia_transformadas
+    ):
 
         carregamento_status = carregar_dataframe(
             sessao=sessao,
@@ -687,11 +713,16 @@ def obter_agravos_violencia(
                 "Execução interrompida em razão de um erro no "
                 + "carregamento."
             )
-        contador += len(agravos_violencia_lote)
+        contador += agravos_violencia_lote_tamanho
         if teste and contador >= 1000:
             logger.info("Execução interrompida para fins de teste.")
             break
 
+    if not teste:
+        # as versões dos arquivos lidos são registradas na mesma transação
+        # que os dados carregados
+        impressoes.registrar(sessao)
+
     if teste:
         logger.info("Desfazendo alterações realizadas durante o teste...")
         sessao.rollback()
@@ -7,10 +7,10 @@ from datetime import date, datetime
 
 import pandas as pd
 from sqlalchemy.orm import Session
-from uuid6 import uuid7
 
 from impulsoetl.comum.datas import periodo_por_codigo, periodo_por_data
-from impulsoetl.comum.geografias import id_sus_para_id_impulso
+from impulsoetl.comum.geografias import ids_sus_para_ids_impulso
+from impulsoetl.utilitarios.identificadores import gerar_uuids7
 
 
 def tratamento_dados(
@@ -51,9 +51,7 @@ def tratamento_dados(
     tabela_consolidada["criterio_pontuacao"] = com_ponderacao
     tabela_consolidada["periodo_codigo"] = periodo_cod[3]
     tabela_consolidada.reset_index(drop=True, inplace=True)
-    tabela_consolidada["id"] = tabela_consolidada.apply(
-        lambda row: uuid7(), axis=1
-    )
+    tabela_consolidada["id"] = gerar_uuids7(len(tabela_consolidada))
     tabela_consolidada["criacao_data"] = datetime.now().strftime(
         "%Y-%m-%d %H:%M:%S"
     )
@@ -63,13 +61,9 @@ def tratamento_dados(
 
     periodo_obj = periodo_por_codigo(sessao=sessao, codigo=periodo_cod[3])
     tabela_consolidada["periodo_id"] = periodo_obj.id
-    tabela_consolidada["unidade_geografica_id"] = tabela_consolidada[
-        "municipio_id_sus"
-    ].apply(
-        lambda municipio_id_sus: id_sus_para_id_impulso(
-            sessao=sessao,
-            id_sus=municipio_id_sus,
-        )
+    tabela_consolidada["unidade_geografica_id"] = ids_sus_para_ids_impulso(
+        sessao=sessao,
+        ids_sus=tabela_consolidada["municipio_id_sus"],
     )
 
     tabela_consolidada["id"] = tabela_consolidada["id"].astype("string")
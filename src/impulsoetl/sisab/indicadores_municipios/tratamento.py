@@ -16,7 +16,7 @@ from impulsoetl.loggers import logger
 from sqlalchemy.orm import Session
 
 from impulsoetl.comum.datas import periodo_por_codigo, periodo_por_data
-from impulsoetl.comum.geografias import id_sus_para_id_impulso
+from impulsoetl.comum.geografias import ids_sus_para_ids_impulso
 from impulsoetl.sisab.indicadores_municipios.modelos import indicadores_regras
 
 TIPOS: Final[frozendict] = frozendict(
@@ -116,11 +116,9 @@ def transformar_indicadores(
     df_tratado["municipio_id_sus"] = (
         df_tratado["municipio_id_sus"].astype(int).astype("string")
     )
-    df_tratado["unidade_geografica_id"] = df_tratado["municipio_id_sus"].apply(
-        lambda municipio_id_sus: id_sus_para_id_impulso(
-            sessao=sessao,
-            id_sus=municipio_id_sus,
-        )
+    df_tratado["unidade_geografica_id"] = ids_sus_para_ids_impulso(
+        sessao=sessao,
+        ids_sus=df_tratado["municipio_id_sus"],
     )
     df_tratado = df_tratado.astype(TIPOS)
     logger.info(
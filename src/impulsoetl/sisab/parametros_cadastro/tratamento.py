@@ -9,7 +9,7 @@ import pandas as pd
 from sqlalchemy.orm import Session
 
 from impulsoetl.comum.datas import periodo_por_codigo, periodo_por_data
-from impulsoetl.comum.geografias import id_sus_para_id_impulso
+from impulsoetl.comum.geografias import ids_sus_para_ids_impulso
 
 
 def tratamento_dados(
@@ -58,12 +58,9 @@ def tratamento_dados(
 
     periodo_obj = periodo_por_codigo(sessao=sessao, codigo=periodo_cod[3])
     tabela_consolidada["periodo_id"] = periodo_obj.id
-    tabela_consolidada["unidade_geografica_id"] = tabela_consolidada[
-        "municipio_id_sus"
-    ].apply(
-        lambda municipio_id_sus: id_sus_para_id_impulso(
-            sessao=sessao, id_sus=municipio_id_sus
-        )
+    tabela_consolidada["unidade_geografica_id"] = ids_sus_para_ids_impulso(
+        sessao=sessao,
+        ids_sus=tabela_consolidada["municipio_id_sus"],
     )
 
     tabela_consolidada["municipio_id_sus"] = tabela_consolidada[
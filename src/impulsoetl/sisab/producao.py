@@ -36,13 +36,12 @@ from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
 from sqlalchemy.orm import Session
 from toolz.functoolz import compose_left
-from uuid6 import uuid7
 
 from impulsoetl.bd import Base
-from impulsoetl.comum.datas import periodo_por_data
+from impulsoetl.comum.datas import periodos_por_datas
 from impulsoetl.comum.geografias import (
     id_impulso_para_id_sus,
-    id_sus_para_id_impulso,
+    ids_sus_para_ids_impulso,
     uf_id_ibge_para_sigla,
 )
 from impulsoetl.loggers import logger
@@ -58,6 +57,7 @@ from impulsoetl.sisab.comum import (
 from impulsoetl.sisab.excecoes import SisabErroRotuloOuValorInexistente
 from impulsoetl.sisab.modelos import TabelaProducao
 from impulsoetl.tipos import DatetimeLike
+from impulsoetl.utilitarios.identificadores import gerar_uuids7
 from impulsoetl.utilitarios.repetidores import repetir_por_ano_mes
 from impulsoetl.utilitarios.textos import normalizar_texto, tratar_nomes_campos
 
@@ -1091,19 +1091,22 @@ class RelatorioProducao(RelatorioAbstrato):
         return (
             df.transform_column(
                 "municipio_id_sus",
-                function=lambda id_: id_sus_para_id_impulso(
+                function=lambda ids_sus: ids_sus_para_ids_impulso(
                     sessao=self.sessao,
-                    id_sus=id_,
+                    ids_sus=ids_sus,
                 ),
                 dest_column_name="unidade_geografica_id",
+                elementwise=False,
             )
             .drop(columns=["municipio_id_sus"])
             .transform_column(
                 "competencias",
-                function=lambda dt: (
-                    periodo_por_data(data=dt, sessao=self.sessao).id
+                function=lambda datas: periodos_por_datas(
+                    sessao=self.sessao,
+                    datas=datas,
                 ),
                 dest_column_name="periodo_id",
+                elementwise=False,
             )
             .drop(columns=["competencias"])
         )
@@ -1251,10 +1254,11 @@ def carregar_relatorio_producao(
 
     # apontar carregamento de linhas do DataFrame na tabela do banco
     adicionados = 0
-    for linha_relatorio in dados_producao.itertuples():
+    ids = gerar_uuids7(len(dados_producao))
+    for linha_relatorio, linha_id in zip(dados_producao.itertuples(), ids):
         dicionario_linha = linha_relatorio._asdict()
         del dicionario_linha["Index"]
-        dicionario_linha["id"] = uuid7().hex
+        dicionario_linha["id"] = linha_id
         relatorio_orm = modelo_tabela(**dicionario_linha)
         sessao.add(relatorio_orm)
         adicionados += 1
@@ -14,7 +14,7 @@ import pandas as pd
 from frozendict import frozendict
 from sqlalchemy.orm import Session
 
-from impulsoetl.comum.geografias import id_sus_para_id_impulso
+from impulsoetl.comum.geografias import ids_sus_para_ids_impulso
 from impulsoetl.loggers import logger
 
 VALIDACAO_TIPOS: Final[frozendict] = frozendict(
@@ -87,11 +87,9 @@ def tratamento_dados(
     df_tratado["aplicacao"] = aplicacao
     df_tratado["periodo_codigo"] = periodo_codigo
     df_tratado["periodo_id"] = periodo_id
-    df_tratado["unidade_geografica_id"] = df_tratado["municipio_id_sus"].apply(
-        lambda municipio_id_sus: id_sus_para_id_impulso(
-            sessao=sessao,
-            id_sus=municipio_id_sus,
-        )
+    df_tratado["unidade_geografica_id"] = ids_sus_para_ids_impulso(
+        sessao=sessao,
+        ids_sus=df_tratado["municipio_id_sus"],
     )
 
     df_tratado.reset_index(drop=True, inplace=True)
@@ -0,0 +1,425 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Analisa as condições usadas para filtrar registros das fontes de dados."""
+
+
+from __future__ import annotations
+
+import ast
+import functools
+import operator
+import re
+from typing import Any, Callable, Iterable, Optional
+
+import numpy as np
+
+from impulsoetl.loggers import logger
+
+# Função que devolve os bytes de uma coluna de texto de um lote de registros,
+# como uma matriz (registros x bytes) em que os espaços e nulos à direita de
+# cada valor foram substituídos por zeros; ou `None`, caso a coluna não esteja
+# disponível ou não seja de texto.
+ObterTextos = Callable[[str], Optional[np.ndarray]]
+
+
+def _substituir_nomes_entre_crases(condicoes: str) -> tuple[str, dict]:
+    """Troca nomes de colunas entre crases por identificadores válidos."""
+    nomes: dict[str, str] = {}
+
+    def substituir(correspondencia: re.Match) -> str:
+        identificador = "_coluna_{}".format(len(nomes))
+        nomes[identificador] = correspondencia.group(1)
+        return identificador
+
+    return re.sub(r"`([^`]+)`", substituir, condicoes), nomes
+
+
+def listar_colunas_referenciadas(condicoes: str) -> set[str] | None:
+    """Lista os nomes de colunas mencionados em uma expressão de filtro.
+
+    Argumentos:
+        condicoes: Expressão com a sintaxe utilizada pelo método
+            [`pandas.DataFrame.query()`][].
+
+    Retorna:
+        Um conjunto com os nomes de todas as variáveis mencionadas na
+        expressão; ou `None`, se não for possível interpretá-la.
+
+    [`pandas.DataFrame.query()`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.query.html
+    """
+    # nomes entre crases são permitidos pelo `query()`, mas não são
+    # expressões Python válidas
+    expressao, nomes_entre_crases = _substituir_nomes_entre_crases(condicoes)
+    try:
+        arvore = ast.parse(expressao.strip(), mode="eval")
+    except SyntaxError:
+        logger.warning(
+            "Não foi possível identificar as colunas usadas nas condições "
+            + "`{}`.",
+            condicoes,
+        )
+        return None
+    return {
+        nomes_entre_crases.get(no.id, no.id)
+        for no in ast.walk(arvore)
+        if isinstance(no, ast.Name)
+    }
+
+
+def colunas_necessarias(
+    colunas: Iterable[str],
+    condicoes: str | None = None,
+) -> list[str] | None:
+    """Define as colunas de um arquivo de disseminação que devem ser lidas.
+
+    Argumentos:
+        colunas: Nomes das colunas originais usadas nas transformações - em
+            geral, as chaves dos dicionários `DE_PARA_*` de cada fonte.
+        condicoes: Expressão opcional usada para filtrar os registros, com a
+            sintaxe do método [`pandas.DataFrame.query()`][]. As colunas
+            mencionadas na expressão também são incluídas.
+
+    Retorna:
+        Uma lista com os nomes das colunas necessárias; ou `None`, se não
+        for possível determinar as colunas usadas nas condições - caso em que
+        todas as colunas devem ser lidas.
+
+    [`pandas.DataFrame.query()`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.query.html
+    """
+    colunas = list(colunas)
+    if not condicoes:
+        return colunas
+    colunas_condicoes = listar_colunas_referenciadas(condicoes)
+    if colunas_condicoes is None:
+        return None
+    return colunas + sorted(colunas_condicoes.difference(colunas))
+
+
+class OperacoesFiltro(object):
+    """Define como as condições de um filtro são avaliadas sobre os dados.
+
+    Subclasses devem implementar as operações elementares suportadas pelo
+    [`FiltroRegistros`][] para uma forma específica de representar os
+    registros. Cada operação devolve um resultado que indica quais registros
+    podem atender à condição; ou `None`, quando a condição não pode ser
+    avaliada - e, portanto, não deve restringir os registros.
+
+    [`FiltroRegistros`]: impulsoetl.utilitarios.condicoes.FiltroRegistros
+    """
+
+    def pertence(self, coluna: str, valores: list[str]) -> Any:
+        """Verifica se os valores de uma coluna estão em uma lista."""
+        return None
+
+    def comeca_com(self, coluna: str, prefixos: list[str]) -> Any:
+        """Verifica se os valores de uma coluna começam com algum prefixo."""
+        return None
+
+    def conjuncao(self, resultados: list) -> Any:
+        """Combina resultados com o operador lógico "e"."""
+        return functools.reduce(operator.and_, resultados)
+
+    def disjuncao(self, resultados: list) -> Any:
+        """Combina resultados com o operador lógico "ou"."""
+        return functools.reduce(operator.or_, resultados)
+
+    def negacao(self, resultado: Any) -> Any:
+        """Inverte um resultado."""
+        return ~resultado
+
+
+class _OperacoesBytes(OperacoesFiltro):
+    """Avalia condições sobre os bytes de um lote de registros DBF."""
+
+    def __init__(self, obter_textos: ObterTextos, codificacao: str):
+        self.obter_textos = obter_textos
+        self.codificacao = codificacao
+
+    def _codificar(self, valores: list[str]) -> list[bytes] | None:
+        try:
+            return [valor.encode(self.codificacao) for valor in valores]
+        except UnicodeEncodeError:
+            return None
+
+    def pertence(self, coluna: str, valores: list[str]) -> np.ndarray | None:
+        textos = self.obter_textos(coluna)
+        literais = self._codificar(valores)
+        if textos is None or literais is None:
+            return None
+        registros_num, largura = textos.shape
+        if largura:
+            valores_brutos = (
+                np.ascontiguousarray(textos)
+                .view("S{}".format(largura))
+                .reshape(registros_num)
+            )
+        else:
+            valores_brutos = np.zeros(registros_num, dtype="S1")
+        # valores com espaços ou nulos à direita nunca são iguais a um texto
+        # lido do arquivo, que tem esses caracteres removidos
+        literais = [
+            literal
+            for literal in literais
+            if literal == literal.rstrip(b"\0 ")
+        ]
+        if not literais:
+            return np.zeros(registros_num, dtype=bool)
+        return np.isin(
+            valores_brutos,
+            np.array(literais, dtype=valores_brutos.dtype),
+        )
+
+    def comeca_com(
+        self,
+        coluna: str,
+        prefixos: list[str],
+    ) -> np.ndarray | None:
+        textos = self.obter_textos(coluna)
+        literais = self._codificar(prefixos)
+        if textos is None or literais is None:
+            return None
+        mascara = np.zeros(len(textos), dtype=bool)
+        for prefixo in literais:
+            if b"\0" in prefixo or len(prefixo) > textos.shape[1]:
+                continue
+            prefixo_bytes = np.frombuffer(prefixo, dtype=np.uint8)
+            mascara |= (textos[:, : len(prefixo)] == prefixo_bytes).all(
+                axis=1,
+            )
+        return mascara
+
+
+class FiltroRegistros(object):
+    """Avalia condições simples diretamente sobre os dados brutos.
+
+    Permite descartar, durante a leitura de um arquivo DBF, os registros que
+    certamente não atendem às condições definidas para uma captura - antes
+    que seus valores sejam convertidos em objetos Python.
+
+    São suportadas comparações de igualdade (`==`) e desigualdade (`!=`),
+    os operadores `in` e `not in` e os métodos `isin()` e `str.startswith()`
+    aplicados a colunas de texto e valores literais, combinados com os
+    operadores `and`, `or`, `not`, `&`, `|` e `~`.
+
+    Partes das condições que não puderem ser avaliadas dessa forma são
+    consideradas satisfeitas por todos os registros. Assim, o filtro nunca
+    descarta um registro que atenderia às condições, mas pode manter
+    registros que não as atendem. Por isso, as condições originais ainda
+    devem ser aplicadas aos DataFrames resultantes.
+
+    Pelo mesmo motivo, os operadores `not` e `~` só são aplicados a
+    condições que puderam ser avaliadas integralmente: a negação de uma
+    condição avaliada apenas em parte descartaria registros que podem
+    atendê-la.
+    """
+
+    def __init__(self, arvore: ast.expr, nomes_entre_crases: dict[str, str]):
+        self._arvore = arvore
+        self._nomes_entre_crases = nomes_entre_crases
+
+    @classmethod
+    def compilar(cls, condicoes: str | None) -> FiltroRegistros | None:
+        """Interpreta uma expressão de filtro.
+
+        Argumentos:
+            condicoes: Expressão com a sintaxe utilizada pelo método
+                [`pandas.DataFrame.query()`][].
+
+        Retorna:
+            Uma instância de `FiltroRegistros`; ou `None`, se a expressão
+            estiver vazia ou não puder ser interpretada.
+
+        [`pandas.DataFrame.query()`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.query.html
+        """
+        if not condicoes:
+            return None
+        expressao, nomes_entre_crases = _substituir_nomes_entre_crases(
+            condicoes,
+        )
+        try:
+            arvore = ast.parse(expressao.strip(), mode="eval").body
+        except SyntaxError:
+            return None
+        return cls(arvore, nomes_entre_crases)
+
+    def avaliar(
+        self,
+        obter_textos: ObterTextos,
+        codificacao: str = "iso-8859-1",
+    ) -> np.ndarray | None:
+        """Indica quais registros de um lote podem atender às condições.
+
+        Argumentos:
+            obter_textos: Função que recebe o nome de uma coluna e devolve os
+                bytes dessa coluna no lote (ver `ObterTextos`).
+            codificacao: Codificação dos textos armazenados no arquivo.
+
+        Retorna:
+            Um vetor booleano com uma posição para cada registro do lote, em
+            que `False` indica que o registro certamente não atende às
+            condições; ou `None`, se nenhuma parte das condições puder ser
+            avaliada.
+        """
+        return self.traduzir(_OperacoesBytes(obter_textos, codificacao))
+
+    def traduzir(self, operacoes: OperacoesFiltro) -> Any:
+        """Avalia as condições por meio de um conjunto de operações.
+
+        Argumentos:
+            operacoes: Instância de uma subclasse de [`OperacoesFiltro`][],
+                que implementa as operações elementares para uma forma
+                específica de representar os registros.
+
+        Retorna:
+            O resultado da combinação das operações elementares que compõem
+            as condições; ou `None`, se nenhuma parte das condições puder ser
+            avaliada.
+
+        [`OperacoesFiltro`]: impulsoetl.utilitarios.condicoes.OperacoesFiltro
+        """
+        resultado, _ = self._traduzir(self._arvore, operacoes)
+        return resultado
+
+    def _traduzir(
+        self,
+        no: ast.expr,
+        operacoes: OperacoesFiltro,
+    ) -> tuple[Any, bool]:
+        """Avalia um nó da expressão.
+
+        Retorna o resultado da avaliação e um indicador de que o resultado é
+        exato - isto é, de que nenhuma parte do nó deixou de ser avaliada.
+        Um resultado aproximado pode manter registros que não atendem às
+        condições, e por isso não pode ser negado.
+        """
+        if isinstance(no, ast.BoolOp):
+            return self._combinar(
+                isinstance(no.op, ast.And),
+                [self._traduzir(valor, operacoes) for valor in no.values],
+                operacoes,
+            )
+        if isinstance(no, ast.BinOp) and isinstance(
+            no.op,
+            (ast.BitAnd, ast.BitOr),
+        ):
+            return self._combinar(
+                isinstance(no.op, ast.BitAnd),
+                [
+                    self._traduzir(no.left, operacoes),
+                    self._traduzir(no.right, operacoes),
+                ],
+                operacoes,
+            )
+        if isinstance(no, ast.UnaryOp) and isinstance(
+            no.op,
+            (ast.Not, ast.Invert),
+        ):
+            resultado, exato = self._traduzir(no.operand, operacoes)
+            # a negação de uma aproximação descartaria registros que podem
+            # atender às condições
+            if resultado is None or not exato:
+                return None, False
+            return operacoes.negacao(resultado), True
+        if isinstance(no, ast.Compare):
+            resultado = self._traduzir_comparacao(no, operacoes)
+        elif isinstance(no, ast.Call):
+            resultado = self._traduzir_chamada(no, operacoes)
+        else:
+            resultado = None
+        return resultado, resultado is not None
+
+    @staticmethod
+    def _combinar(
+        conjuncao: bool,
+        resultados: list[tuple[Any, bool]],
+        operacoes: OperacoesFiltro,
+    ) -> tuple[Any, bool]:
+        exato = all(exato_parte for _, exato_parte in resultados)
+        if conjuncao:
+            # partes não avaliadas não restringem a conjunção
+            resultados_validos = [r for r, _ in resultados if r is not None]
+            if not resultados_validos:
+                return None, False
+            return operacoes.conjuncao(resultados_validos), exato
+        # uma parte não avaliada pode ser satisfeita por qualquer registro
+        if any(resultado is None for resultado, _ in resultados):
+            return None, False
+        return operacoes.disjuncao([r for r, _ in resultados]), exato
+
+    def _coluna(self, no: ast.expr) -> str | None:
+        if not isinstance(no, ast.Name):
+            return None
+        return self._nomes_entre_crases.get(no.id, no.id)
+
+    @staticmethod
+    def _literais(no: ast.expr) -> list[str] | None:
+        if isinstance(no, (ast.List, ast.Tuple, ast.Set)):
+            valores = no.elts
+        else:
+            valores = [no]
+        literais = []
+        for valor in valores:
+            if not isinstance(valor, ast.Constant):
+                return None
+            if not isinstance(valor.value, str):
+                return None
+            literais.append(valor.value)
+        return literais
+
+    def _traduzir_comparacao(
+        self,
+        no: ast.Compare,
+        operacoes: OperacoesFiltro,
+    ) -> Any:
+        if len(no.ops) != 1:
+            return None
+        operador = no.ops[0]
+        esquerda, direita = no.left, no.comparators[0]
+        if isinstance(operador, (ast.Eq, ast.NotEq)):
+            if isinstance(esquerda, ast.Constant):
+                esquerda, direita = direita, esquerda
+            if not isinstance(direita, ast.Constant):
+                return None
+        elif not isinstance(operador, (ast.In, ast.NotIn)):
+            return None
+        coluna = self._coluna(esquerda)
+        literais = self._literais(direita)
+        if coluna is None or literais is None:
+            return None
+        resultado = operacoes.pertence(coluna, literais)
+        if resultado is None or isinstance(operador, (ast.Eq, ast.In)):
+            return resultado
+        return operacoes.negacao(resultado)
+
+    def _traduzir_chamada(
+        self,
+        no: ast.Call,
+        operacoes: OperacoesFiltro,
+    ) -> Any:
+        funcao = no.func
+        if no.keywords or len(no.args) != 1 or not isinstance(
+            funcao,
+            ast.Attribute,
+        ):
+            return None
+        literais = self._literais(no.args[0])
+        if literais is None:
+            return None
+        if funcao.attr == "isin":
+            coluna = self._coluna(funcao.value)
+            if coluna is None:
+                return None
+            return operacoes.pertence(coluna, literais)
+        if (
+            funcao.attr == "startswith"
+            and isinstance(funcao.value, ast.Attribute)
+            and funcao.value.attr == "str"
+        ):
+            coluna = self._coluna(funcao.value.value)
+            if coluna is None:
+                return None
+            return operacoes.comeca_com(coluna, literais)
+        return None
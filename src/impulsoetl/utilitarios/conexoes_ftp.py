@@ -0,0 +1,248 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Reaproveita conexões com servidores FTP ao longo de todo o processo.
+
+Atributos:
+    FTP_TEMPO_LIMITE: Tempo máximo, em segundos, de espera por uma resposta
+        do servidor FTP antes de considerar a conexão perdida. Pode ser
+        definido por meio da variável de ambiente
+        `IMPULSOETL_FTP_TEMPO_LIMITE`.
+    FTP_CONEXOES_OCIOSAS_MAX: Número máximo de conexões ociosas mantidas
+        abertas para cada servidor FTP. Pode ser definido por meio da
+        variável de ambiente `IMPULSOETL_FTP_CONEXOES_OCIOSAS_MAX`.
+    FTP_MANTER_ATIVA_INTERVALO: Intervalo, em segundos, entre os comandos
+        `NOOP` enviados às conexões ociosas para evitar que o servidor as
+        encerre. Pode ser definido por meio da variável de ambiente
+        `IMPULSOETL_FTP_MANTER_ATIVA_INTERVALO`.
+    FTP_OCIOSIDADE_MAX: Tempo máximo, em segundos, que uma conexão pode
+        permanecer ociosa antes de ser encerrada. Pode ser definido por meio
+        da variável de ambiente `IMPULSOETL_FTP_OCIOSIDADE_MAX`.
+"""
+
+
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+from ftplib import FTP, all_errors  # noqa: B402  # nosec: B402
+from typing import Final, Generator
+
+from impulsoetl.loggers import logger
+
+FTP_TEMPO_LIMITE: Final[float] = float(
+    os.getenv("IMPULSOETL_FTP_TEMPO_LIMITE", 120),
+)
+FTP_CONEXOES_OCIOSAS_MAX: Final[int] = int(
+    os.getenv("IMPULSOETL_FTP_CONEXOES_OCIOSAS_MAX", 4),
+)
+FTP_MANTER_ATIVA_INTERVALO: Final[float] = float(
+    os.getenv("IMPULSOETL_FTP_MANTER_ATIVA_INTERVALO", 60),
+)
+FTP_OCIOSIDADE_MAX: Final[float] = float(
+    os.getenv("IMPULSOETL_FTP_OCIOSIDADE_MAX", 1800),
+)
+
+
+class PoolConexoesFtp(object):
+    """Mantém um conjunto de conexões reaproveitáveis com um servidor FTP.
+
+    As conexões devolvidas ao conjunto permanecem abertas e autenticadas, de
+    modo que as próximas extrações não precisem repetir o estabelecimento da
+    conexão e o login. Antes de ser entregue, cada conexão ociosa é testada
+    com um comando `NOOP`; as que não respondem são descartadas.
+
+    Uma *thread* em segundo plano envia periodicamente comandos `NOOP` para
+    as conexões ociosas, evitando que o servidor as encerre entre uma captura
+    e outra, e encerra as conexões que ficaram sem uso por tempo demais.
+    """
+
+    def __init__(
+        self,
+        ftp: str,
+        conexoes_ociosas_max: int = FTP_CONEXOES_OCIOSAS_MAX,
+        tempo_limite: float = FTP_TEMPO_LIMITE,
+        manter_ativa_intervalo: float = FTP_MANTER_ATIVA_INTERVALO,
+        ociosidade_max: float = FTP_OCIOSIDADE_MAX,
+    ):
+        """Instancia um conjunto de conexões com um servidor FTP.
+
+        Argumentos:
+            ftp: Endereço do servidor FTP.
+            conexoes_ociosas_max: Número máximo de conexões mantidas abertas
+                enquanto não estão em uso. Conexões devolvidas além desse
+                limite são encerradas.
+            tempo_limite: Tempo máximo, em segundos, de espera por uma
+                resposta do servidor.
+            manter_ativa_intervalo: Intervalo, em segundos, entre os comandos
+                `NOOP` enviados às conexões ociosas. Se for zero, as conexões
+                ociosas não são mantidas ativas em segundo plano.
+            ociosidade_max: Tempo máximo, em segundos, que uma conexão pode
+                permanecer sem uso antes de ser encerrada.
+        """
+        self.ftp = ftp
+        self.conexoes_ociosas_max = conexoes_ociosas_max
+        self.tempo_limite = tempo_limite
+        self.manter_ativa_intervalo = manter_ativa_intervalo
+        self.ociosidade_max = ociosidade_max
+        self._ociosas: list[tuple[FTP, float]] = []
+        self._trava = threading.Lock()
+        self._encerrar = threading.Event()
+        self._mantenedor: threading.Thread | None = None
+
+    def _abrir(self) -> FTP:
+        logger.info("Conectando-se ao servidor FTP `{}`...", self.ftp)
+        cliente_ftp = FTP(self.ftp, timeout=self.tempo_limite)
+        try:
+            cliente_ftp.login()
+        except all_errors:
+            cliente_ftp.close()
+            raise
+        logger.info("Conexão estabelecida com sucesso!")
+        return cliente_ftp
+
+    def _descartar(self, cliente_ftp: FTP) -> None:
+        logger.debug(
+            "Encerrando a conexão com o servidor FTP `{}`...",
+            self.ftp,
+        )
+        try:
+            cliente_ftp.quit()
+        except all_errors:
+            cliente_ftp.close()
+
+    @staticmethod
+    def _responde(cliente_ftp: FTP) -> bool:
+        try:
+            cliente_ftp.voidcmd("NOOP")
+        except all_errors:
+            return False
+        return True
+
+    def _retirar(self) -> FTP:
+        """Obtém uma conexão ociosa e funcional, ou abre uma nova."""
+        while True:
+            with self._trava:
+                if not self._ociosas:
+                    break
+                cliente_ftp, _ = self._ociosas.pop()
+            if self._responde(cliente_ftp):
+                logger.debug(
+                    "Reaproveitando conexão com o servidor FTP `{}`.",
+                    self.ftp,
+                )
+                return cliente_ftp
+            logger.debug("Conexão ociosa não responde; descartando.")
+            cliente_ftp.close()
+        return self._abrir()
+
+    def _devolver(self, cliente_ftp: FTP) -> None:
+        with self._trava:
+            if (
+                not self._encerrar.is_set()
+                and len(self._ociosas) < self.conexoes_ociosas_max
+            ):
+                self._ociosas.append((cliente_ftp, time.monotonic()))
+                self._iniciar_mantenedor()
+                return
+        self._descartar(cliente_ftp)
+
+    @contextmanager
+    def conexao(self) -> Generator[FTP, None, None]:
+        """Fornece uma conexão autenticada com o servidor FTP.
+
+        Gera:
+            Uma instância de [`ftplib.FTP`][] pronta para uso. Ao final do
+            bloco `with`, a conexão é devolvida ao conjunto - a menos que
+            tenha ocorrido algum erro, caso em que ela é encerrada.
+
+        [`ftplib.FTP`]: https://docs.python.org/3/library/ftplib.html#ftplib.FTP
+        """
+        cliente_ftp = self._retirar()
+        try:
+            yield cliente_ftp
+        except GeneratorExit:
+            # a leitura foi interrompida por quem consumia os dados, mas a
+            # conexão permanece em condições de uso
+            self._devolver(cliente_ftp)
+            raise
+        except BaseException:
+            # o estado da conexão é desconhecido após uma falha
+            cliente_ftp.close()
+            raise
+        self._devolver(cliente_ftp)
+
+    def manter_ativas(self) -> None:
+        """Testa as conexões ociosas e encerra as inativas há muito tempo."""
+        with self._trava:
+            ociosas, self._ociosas = self._ociosas, []
+        agora = time.monotonic()
+        sobreviventes = []
+        for cliente_ftp, ociosa_desde in ociosas:
+            if agora - ociosa_desde > self.ociosidade_max:
+                self._descartar(cliente_ftp)
+            elif self._responde(cliente_ftp):
+                sobreviventes.append((cliente_ftp, ociosa_desde))
+            else:
+                cliente_ftp.close()
+        with self._trava:
+            self._ociosas.extend(sobreviventes)
+
+    def _iniciar_mantenedor(self) -> None:
+        if self.manter_ativa_intervalo <= 0 or self._mantenedor is not None:
+            return
+        self._mantenedor = threading.Thread(
+            target=self._manter_ativas_periodicamente,
+            name="manter-ftp-{}".format(self.ftp),
+            daemon=True,
+        )
+        self._mantenedor.start()
+
+    def _manter_ativas_periodicamente(self) -> None:
+        while not self._encerrar.wait(self.manter_ativa_intervalo):
+            self.manter_ativas()
+
+    def fechar(self) -> None:
+        """Encerra todas as conexões ociosas e interrompe sua manutenção."""
+        self._encerrar.set()
+        with self._trava:
+            ociosas, self._ociosas = self._ociosas, []
+        for cliente_ftp, _ in ociosas:
+            self._descartar(cliente_ftp)
+
+
+_POOLS: dict[str, PoolConexoesFtp] = {}
+_POOLS_TRAVA = threading.Lock()
+
+
+def obter_pool(ftp: str) -> PoolConexoesFtp:
+    """Obtém o conjunto de conexões do processo para um servidor FTP.
+
+    Argumentos:
+        ftp: Endereço do servidor FTP.
+
+    Retorna:
+        Uma instância de [`PoolConexoesFtp`][] compartilhada por todas as
+        extrações do processo atual que usam o mesmo servidor.
+
+    [`PoolConexoesFtp`]: impulsoetl.utilitarios.conexoes_ftp.PoolConexoesFtp
+    """
+    with _POOLS_TRAVA:
+        if ftp not in _POOLS:
+            _POOLS[ftp] = PoolConexoesFtp(ftp)
+        return _POOLS[ftp]
+
+
+@atexit.register
+def fechar_pools() -> None:
+    """Encerra as conexões ociosas com todos os servidores FTP."""
+    with _POOLS_TRAVA:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.fechar()
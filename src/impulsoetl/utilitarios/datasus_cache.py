@@ -0,0 +1,387 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Armazena em disco os arquivos baixados dos repositórios do DataSUS.
+
+Atributos:
+    CACHE_CAMINHO: Diretório onde são guardadas as cópias locais dos arquivos
+        baixados do FTP do DataSUS. Pode ser definido por meio da variável de
+        ambiente `IMPULSOETL_DATASUS_CACHE_CAMINHO`.
+    CACHE_TAMANHO_MAX: Espaço máximo em disco, em bytes, a ser ocupado pelas
+        cópias locais. Pode ser definido, em megabytes, por meio da variável
+        de ambiente `IMPULSOETL_DATASUS_CACHE_TAMANHO_MAX`. Se o valor for
+        zero, o armazenamento local fica desabilitado.
+"""
+
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Final, Generator
+
+from impulsoetl.loggers import logger
+
+CACHE_CAMINHO: Final[str] = os.getenv(
+    "IMPULSOETL_DATASUS_CACHE_CAMINHO",
+    os.path.join(tempfile.gettempdir(), "impulsoetl", "datasus"),
+)
+CACHE_TAMANHO_MAX: Final[int] = (
+    int(os.getenv("IMPULSOETL_DATASUS_CACHE_TAMANHO_MAX", 5000)) * 10**6
+)
+
+
+def calcular_sha256(caminho: Path | str, bloco: int = 2**20) -> str:
+    """Calcula o resumo criptográfico SHA-256 do conteúdo de um arquivo."""
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for trecho in iter(lambda: arquivo.read(bloco), b""):
+            resumo.update(trecho)
+    return resumo.hexdigest()
+
+
+class CacheDatasus(object):
+    """Representa um diretório com cópias locais de arquivos do DataSUS.
+
+    Cada arquivo é endereçado por uma chave derivada do caminho no servidor
+    FTP, do tamanho declarado e da data de modificação informada pelo
+    servidor - de modo que uma republicação do arquivo com o mesmo nome gera
+    uma nova entrada, em vez de reaproveitar a cópia desatualizada.
+
+    Quando o espaço ocupado ultrapassa o limite definido, as entradas usadas
+    há mais tempo são removidas primeiro (política LRU). A data de
+    modificação de cada arquivo no sistema local é usada para registrar o
+    último acesso.
+
+    O mesmo diretório pode ser compartilhado por várias linhas de execução,
+    processos e contêineres. A remoção de entradas antigas e o armazenamento
+    de novas entradas são serializados por meio de uma trava de arquivo
+    (`fcntl.flock()`). Os arquivos retornados pelos métodos [`obter()`][] e
+    [`armazenar()`][] ficam reservados - e, portanto, não são removidos para
+    liberar espaço - até serem devolvidos por meio do método
+    [`devolver()`][].
+
+    [`obter()`]: impulsoetl.utilitarios.datasus_cache.CacheDatasus.obter
+    [`armazenar()`]: impulsoetl.utilitarios.datasus_cache.CacheDatasus.armazenar
+    [`devolver()`]: impulsoetl.utilitarios.datasus_cache.CacheDatasus.devolver
+    """
+
+    def __init__(
+        self,
+        diretorio: Path | str = CACHE_CAMINHO,
+        tamanho_max: int = CACHE_TAMANHO_MAX,
+    ):
+        """Instancia uma representação do armazenamento local de arquivos.
+
+        Argumentos:
+            diretorio: Caminho do diretório onde os arquivos devem ser
+                armazenados. É criado, caso ainda não exista.
+            tamanho_max: Espaço máximo, em bytes, a ser ocupado pelos arquivos
+                armazenados.
+        """
+        self.diretorio = Path(diretorio)
+        self.tamanho_max = tamanho_max
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        # arquivos abertos que mantêm as reservas das entradas em uso
+        self._reservas: dict[Path, list[IO[bytes]]] = {}
+        self._trava = threading.Lock()
+
+    @staticmethod
+    def gerar_chave(
+        ftp: str,
+        caminho: str,
+        tamanho: int,
+        modificacao: str | None,
+    ) -> str:
+        """Gera a chave de um arquivo a partir dos seus metadados no FTP.
+
+        Argumentos:
+            ftp: Endereço do servidor FTP.
+            caminho: Caminho completo do arquivo no servidor FTP.
+            tamanho: Tamanho do arquivo declarado pelo servidor FTP, em bytes.
+            modificacao: Data e hora da última modificação do arquivo,
+                conforme retornada pelo comando `MDTM`.
+
+        Retorna:
+            Uma sequência hexadecimal que identifica unicamente a versão do
+            arquivo.
+        """
+        identificacao = "|".join(
+            [ftp, caminho, str(tamanho), modificacao or ""],
+        )
+        return hashlib.sha256(identificacao.encode("utf-8")).hexdigest()
+
+    def _caminho_dados(self, chave: str) -> Path:
+        return self.diretorio / "{}.dbc".format(chave)
+
+    def _caminho_metadados(self, chave: str) -> Path:
+        return self.diretorio / "{}.json".format(chave)
+
+    def _remover(self, chave: str) -> None:
+        for caminho in (
+            self._caminho_dados(chave),
+            self._caminho_metadados(chave),
+        ):
+            try:
+                caminho.unlink()
+            except FileNotFoundError:
+                pass
+
+    @contextmanager
+    def _travar(self) -> Generator[None, None, None]:
+        """Impede alterações simultâneas nas entradas do armazenamento."""
+        with open(self.diretorio / ".trava", "a") as trava:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+            yield
+
+    def _reservar(self, caminho_dados: Path) -> IO[bytes] | None:
+        """Abre uma entrada, impedindo sua remoção enquanto estiver aberta.
+
+        Retorna `None` se a entrada não existir - inclusive se tiver sido
+        removida enquanto a reserva era obtida.
+        """
+        try:
+            arquivo = open(caminho_dados, "rb")
+        except FileNotFoundError:
+            return None
+        fcntl.flock(arquivo, fcntl.LOCK_SH)
+        try:
+            estado = os.stat(caminho_dados)
+        except FileNotFoundError:
+            estado = None
+        estado_reservado = os.fstat(arquivo.fileno())
+        if estado is None or (estado.st_dev, estado.st_ino) != (
+            estado_reservado.st_dev,
+            estado_reservado.st_ino,
+        ):
+            arquivo.close()
+            return None
+        return arquivo
+
+    def _registrar_reserva(
+        self,
+        caminho_dados: Path,
+        arquivo: IO[bytes],
+    ) -> None:
+        with self._trava:
+            self._reservas.setdefault(caminho_dados, []).append(arquivo)
+
+    def _remover_se_livre(self, chave: str) -> bool:
+        """Remove uma entrada, caso ela não esteja reservada.
+
+        Deve ser chamado apenas com a trava do diretório adquirida.
+        """
+        try:
+            arquivo = open(self._caminho_dados(chave), "rb")
+        except FileNotFoundError:
+            self._remover(chave)
+            return True
+        with arquivo:
+            try:
+                fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            self._remover(chave)
+        return True
+
+    def devolver(self, caminho: Path | str) -> None:
+        """Desfaz a reserva de um arquivo obtido do armazenamento local.
+
+        Argumentos:
+            caminho: Caminho retornado por um dos métodos [`obter()`][] ou
+                [`armazenar()`][]. Caminhos que não correspondem a entradas
+                reservadas são ignorados.
+
+        [`obter()`]: impulsoetl.utilitarios.datasus_cache.CacheDatasus.obter
+        [`armazenar()`]: impulsoetl.utilitarios.datasus_cache.CacheDatasus.armazenar
+        """
+        with self._trava:
+            reservas = self._reservas.get(Path(caminho))
+            if not reservas:
+                return
+            arquivo = reservas.pop()
+            if not reservas:
+                del self._reservas[Path(caminho)]
+        arquivo.close()
+
+    def devolver_todos(self) -> None:
+        """Desfaz as reservas de todos os arquivos ainda não devolvidos."""
+        with self._trava:
+            reservas = [
+                arquivo
+                for arquivos in self._reservas.values()
+                for arquivo in arquivos
+            ]
+            self._reservas.clear()
+        for arquivo in reservas:
+            arquivo.close()
+
+    def obter(self, chave: str) -> Path | None:
+        """Busca um arquivo armazenado localmente, checando sua integridade.
+
+        Argumentos:
+            chave: Identificador do arquivo, conforme gerado pelo método
+                [`gerar_chave()`][].
+
+        Retorna:
+            O caminho da cópia local do arquivo, se houver uma cópia íntegra
+            armazenada; ou `None`, caso contrário. Cópias corrompidas são
+            removidas do armazenamento. A cópia retornada fica reservada até
+            ser devolvida por meio do método [`devolver()`][].
+
+        [`gerar_chave()`]: impulsoetl.utilitarios.datasus_cache.CacheDatasus.gerar_chave
+        [`devolver()`]: impulsoetl.utilitarios.datasus_cache.CacheDatasus.devolver
+        """
+        caminho_dados = self._caminho_dados(chave)
+        arquivo_reservado = self._reservar(caminho_dados)
+        if arquivo_reservado is None:
+            return None
+
+        logger.info("Checando integridade da cópia local do arquivo...")
+        try:
+            with open(
+                self._caminho_metadados(chave),
+                "r",
+                encoding="utf-8",
+            ) as arquivo:
+                metadados = json.load(arquivo)
+        except FileNotFoundError:
+            arquivo_reservado.close()
+            return None
+        if (
+            caminho_dados.stat().st_size != metadados["tamanho"]
+            or calcular_sha256(caminho_dados) != metadados["sha256"]
+        ):
+            logger.warning(
+                "Cópia local de `{}` está corrompida; descartando.",
+                metadados["caminho"],
+            )
+            arquivo_reservado.close()
+            with self._travar():
+                self._remover(chave)
+            return None
+
+        # marca o arquivo como utilizado recentemente
+        os.utime(caminho_dados)
+        self._registrar_reserva(caminho_dados, arquivo_reservado)
+        logger.info("Usando cópia local de `{}`.", metadados["caminho"])
+        return caminho_dados
+
+    def armazenar(
+        self,
+        chave: str,
+        arquivo_origem: Path | str,
+        caminho: str,
+    ) -> Path:
+        """Move um arquivo baixado para o armazenamento local.
+
+        Argumentos:
+            chave: Identificador do arquivo, conforme gerado pelo método
+                [`gerar_chave()`][].
+            arquivo_origem: Caminho do arquivo baixado. O arquivo é movido
+                para o diretório de armazenamento.
+            caminho: Caminho do arquivo no servidor FTP, usado apenas para
+                fins de registro.
+
+        Retorna:
+            O caminho da cópia local do arquivo, que fica reservada até ser
+            devolvida por meio do método [`devolver()`][]. Se o arquivo for
+            maior do que o espaço total disponível para armazenamento - ou
+            se não houver espaço suficiente fora das entradas reservadas -,
+            ele não é movido, e o caminho original é retornado.
+
+        [`gerar_chave()`]: impulsoetl.utilitarios.datasus_cache.CacheDatasus.gerar_chave
+        [`devolver()`]: impulsoetl.utilitarios.datasus_cache.CacheDatasus.devolver
+        """
+        arquivo_origem = Path(arquivo_origem)
+        tamanho = arquivo_origem.stat().st_size
+        if tamanho > self.tamanho_max:
+            logger.warning(
+                "O arquivo `{}` ({:n} bytes) excede o espaço disponível para "
+                + "armazenamento local e não será guardado.",
+                caminho,
+                tamanho,
+            )
+            return arquivo_origem
+
+        metadados = {
+            "caminho": caminho,
+            "tamanho": tamanho,
+            "sha256": calcular_sha256(arquivo_origem),
+            "armazenamento_data": time.time(),
+        }
+
+        caminho_dados = self._caminho_dados(chave)
+        with self._travar():
+            if not self._liberar_espaco(reservar=tamanho):
+                logger.warning(
+                    "Não há espaço livre para guardar o arquivo `{}` no "
+                    + "armazenamento local, pois as demais entradas estão "
+                    + "em uso.",
+                    caminho,
+                )
+                return arquivo_origem
+
+            # copia primeiro para um arquivo temporário no mesmo diretório,
+            # de forma que outros processos nunca vejam um arquivo incompleto
+            with tempfile.NamedTemporaryFile(
+                dir=self.diretorio,
+                suffix=".parcial",
+                delete=False,
+            ) as arquivo_temporario:
+                caminho_temporario = Path(arquivo_temporario.name)
+            shutil.move(str(arquivo_origem), str(caminho_temporario))
+            os.replace(caminho_temporario, caminho_dados)
+            with open(
+                self._caminho_metadados(chave),
+                "w",
+                encoding="utf-8",
+            ) as arquivo:
+                json.dump(metadados, arquivo)
+            arquivo_reservado = self._reservar(caminho_dados)
+        if arquivo_reservado is not None:
+            self._registrar_reserva(caminho_dados, arquivo_reservado)
+
+        logger.debug(
+            "Arquivo `{}` armazenado localmente em `{}`.",
+            caminho,
+            caminho_dados,
+        )
+        return caminho_dados
+
+    def _liberar_espaco(self, reservar: int = 0) -> bool:
+        """Remove as entradas menos usadas até caber o espaço reservado.
+
+        Deve ser chamado apenas com a trava do diretório adquirida. Entradas
+        reservadas são mantidas, e entradas removidas por outros processos
+        são desconsideradas.
+
+        Retorna verdadeiro se houver espaço suficiente após as remoções.
+        """
+        entradas = []
+        for caminho in self.diretorio.glob("*.dbc"):
+            try:
+                entradas.append((caminho, caminho.stat()))
+            except FileNotFoundError:
+                continue
+        entradas.sort(key=lambda entrada: entrada[1].st_mtime)
+        ocupado = sum(estado.st_size for _, estado in entradas)
+        for caminho, estado in entradas:
+            if ocupado + reservar <= self.tamanho_max:
+                break
+            if self._remover_se_livre(caminho.stem):
+                logger.debug("Removida entrada antiga `{}`.", caminho.stem)
+                ocupado -= estado.st_size
+            else:
+                logger.debug("Entrada `{}` em uso; mantida.", caminho.stem)
+        return ocupado + reservar <= self.tamanho_max
@@ -0,0 +1,257 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Representa espelhos locais dos repositórios FTP do DataSUS.
+
+Um espelho é um diretório - tipicamente, um volume compartilhado entre
+vários contêineres - com cópias dos arquivos dos servidores FTP do DataSUS,
+organizadas com a mesma estrutura de diretórios dos servidores. Por exemplo,
+o arquivo `PASP2108a.dbc`, do diretório
+`/dissemin/publicos/SIASUS/200801_/Dados` do servidor `ftp.datasus.gov.br`, é
+guardado no diretório
+`<espelho>/ftp.datasus.gov.br/dissemin/publicos/SIASUS/200801_/Dados`.
+
+O espelho é mantido atualizado pela função [`sincronizar_espelho()`][], e
+lido pela função [`extrair_dbc_lotes()`][]. A data de modificação de cada
+cópia é igualada à informada pelo servidor FTP para o arquivo original, de
+modo que versões desatualizadas possam ser identificadas sem descarregar
+novamente os arquivos.
+
+Atributos:
+    ESPELHO_CAMINHO: Espelho dos repositórios do DataSUS a ser usado nas
+        extrações. Pode ser o caminho de um diretório local ou o endereço de
+        um servidor FTP substituto, no formato `ftp://<endereço>[/<prefixo>]`.
+        Pode ser definido por meio da variável de ambiente
+        `IMPULSOETL_DATASUS_ESPELHO`. Se não for definido, os arquivos são
+        obtidos diretamente dos servidores do DataSUS.
+
+[`sincronizar_espelho()`]: impulsoetl.utilitarios.datasus_ftp.sincronizar_espelho
+[`extrair_dbc_lotes()`]: impulsoetl.utilitarios.datasus_ftp.extrair_dbc_lotes
+"""
+
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Final
+from urllib.parse import urlparse
+
+from impulsoetl.loggers import logger
+from impulsoetl.utilitarios.datasus_indice import EntradasDiretorio
+
+ESPELHO_CAMINHO: Final[str] = os.getenv("IMPULSOETL_DATASUS_ESPELHO", "")
+
+_MODIFICACAO_FORMATO: Final[str] = "%Y%m%d%H%M%S"
+
+
+def resolver_ftp_substituto(
+    ftp: str,
+    caminho_diretorio: str,
+    espelho: str = ESPELHO_CAMINHO,
+) -> tuple[str, str]:
+    """Obtém o endereço equivalente de um diretório em um FTP substituto.
+
+    Argumentos:
+        ftp: Endereço do servidor FTP do DataSUS.
+        caminho_diretorio: Caminho do diretório no servidor do DataSUS.
+        espelho: Endereço do servidor FTP substituto, no formato
+            `ftp://<endereço>[/<prefixo>]`. Se não estiver nesse formato, o
+            endereço original é mantido.
+
+    Retorna:
+        Uma tupla com o endereço do servidor e o caminho do diretório a
+        serem consultados.
+    """
+    if not espelho.startswith("ftp://"):
+        return ftp, caminho_diretorio
+    endereco = urlparse(espelho)
+    return (
+        endereco.netloc,
+        "{}/{}".format(
+            endereco.path.rstrip("/"),
+            caminho_diretorio.strip("/"),
+        ),
+    )
+
+
+def _data_para_modificacao(instante: float) -> str:
+    return datetime.fromtimestamp(instante, tz=timezone.utc).strftime(
+        _MODIFICACAO_FORMATO,
+    )
+
+
+def _modificacao_para_data(modificacao: str) -> float:
+    return (
+        datetime.strptime(modificacao[:14], _MODIFICACAO_FORMATO)
+        .replace(tzinfo=timezone.utc)
+        .timestamp()
+    )
+
+
+class EspelhoDatasus(object):
+    """Representa um diretório local com cópias dos arquivos do DataSUS."""
+
+    def __init__(self, diretorio: Path | str = ESPELHO_CAMINHO):
+        """Instancia uma representação de um espelho local.
+
+        Argumentos:
+            diretorio: Caminho do diretório raiz do espelho.
+        """
+        self.diretorio = Path(diretorio)
+
+    def caminho(
+        self,
+        ftp: str,
+        caminho_diretorio: str,
+        arquivo_nome: str = "",
+    ) -> Path:
+        """Define o caminho local de um diretório ou arquivo do servidor FTP.
+
+        Argumentos:
+            ftp: Endereço do servidor FTP.
+            caminho_diretorio: Caminho do diretório no servidor FTP.
+            arquivo_nome: Nome de um arquivo do diretório, opcional.
+
+        Retorna:
+            O caminho correspondente no espelho.
+        """
+        return self.diretorio.joinpath(
+            ftp,
+            *caminho_diretorio.strip("/").split("/"),
+            arquivo_nome,
+        )
+
+    def listar(self, ftp: str, caminho_diretorio: str) -> EntradasDiretorio:
+        """Lista os arquivos completos de um diretório do espelho.
+
+        Argumentos:
+            ftp: Endereço do servidor FTP.
+            caminho_diretorio: Caminho do diretório no servidor FTP.
+
+        Retorna:
+            Um dicionário com os nomes dos arquivos como chaves e, como
+            valores, dicionários com o tamanho (`tamanho`) e a data de
+            modificação no servidor de origem (`modificacao`) de cada
+            arquivo. Se o diretório não existir no espelho, o dicionário é
+            vazio.
+        """
+        diretorio = self.caminho(ftp, caminho_diretorio)
+        if not diretorio.is_dir():
+            return {}
+        entradas = {}
+        for caminho in diretorio.iterdir():
+            if not caminho.is_file() or caminho.suffix == ".parcial":
+                continue
+            estado = caminho.stat()
+            entradas[caminho.name] = {
+                "tamanho": estado.st_size,
+                "modificacao": _data_para_modificacao(estado.st_mtime),
+            }
+        return entradas
+
+    def listar_desatualizados(
+        self,
+        ftp: str,
+        caminho_diretorio: str,
+        entradas: EntradasDiretorio,
+    ) -> list[str]:
+        """Lista os arquivos do servidor ausentes ou desatualizados no espelho.
+
+        Argumentos:
+            ftp: Endereço do servidor FTP.
+            caminho_diretorio: Caminho do diretório no servidor FTP.
+            entradas: Listagem atual do diretório no servidor, conforme
+                obtida com o método [`IndiceDiretorioFtp.listar()`][].
+
+        Retorna:
+            Lista ordenada com os nomes dos arquivos que não existem no
+            espelho ou cujo tamanho ou data de modificação diferem dos
+            informados pelo servidor. Arquivos cujos atributos não são
+            informados pelo servidor são considerados atualizados, caso já
+            existam no espelho.
+
+        [`IndiceDiretorioFtp.listar()`]: impulsoetl.utilitarios.datasus_indice.IndiceDiretorioFtp.listar
+        """
+        copias = self.listar(ftp, caminho_diretorio)
+        desatualizados = []
+        for arquivo_nome, entrada in entradas.items():
+            copia = copias.get(arquivo_nome)
+            if copia is None:
+                desatualizados.append(arquivo_nome)
+            elif entrada["tamanho"] is not None and (
+                entrada["tamanho"] != copia["tamanho"]
+                or (entrada["modificacao"] or "")[:14] != copia["modificacao"]
+            ):
+                desatualizados.append(arquivo_nome)
+        return sorted(desatualizados)
+
+    def caminho_parcial(
+        self,
+        ftp: str,
+        caminho_diretorio: str,
+        arquivo_nome: str,
+        modificacao: str | None,
+    ) -> Path:
+        """Define o caminho da transferência em andamento de um arquivo.
+
+        O caminho inclui a data de modificação do arquivo no servidor, de
+        modo que uma transferência interrompida só seja retomada se o
+        arquivo não tiver sido republicado desde então.
+
+        Argumentos:
+            ftp: Endereço do servidor FTP.
+            caminho_diretorio: Caminho do diretório no servidor FTP.
+            arquivo_nome: Nome do arquivo.
+            modificacao: Data de modificação do arquivo no servidor, no
+                formato `AAAAMMDDHHMMSS`.
+
+        Retorna:
+            O caminho do arquivo parcial no espelho.
+        """
+        return self.caminho(
+            ftp,
+            caminho_diretorio,
+            "{}.{}.parcial".format(arquivo_nome, (modificacao or "")[:14]),
+        )
+
+    def concluir(
+        self,
+        caminho_parcial: Path,
+        ftp: str,
+        caminho_diretorio: str,
+        arquivo_nome: str,
+        modificacao: str | None,
+    ) -> Path:
+        """Substitui a cópia de um arquivo por uma transferência concluída.
+
+        Argumentos:
+            caminho_parcial: Caminho do arquivo transferido.
+            ftp: Endereço do servidor FTP.
+            caminho_diretorio: Caminho do diretório no servidor FTP.
+            arquivo_nome: Nome do arquivo.
+            modificacao: Data de modificação do arquivo no servidor, no
+                formato `AAAAMMDDHHMMSS`, a ser registrada na cópia.
+
+        Retorna:
+            O caminho da cópia atualizada no espelho.
+        """
+        if modificacao:
+            instante = _modificacao_para_data(modificacao)
+            os.utime(caminho_parcial, (instante, instante))
+        caminho = self.caminho(ftp, caminho_diretorio, arquivo_nome)
+        os.replace(caminho_parcial, caminho)
+
+        # remove transferências interrompidas de versões anteriores
+        for caminho_antigo in caminho.parent.glob(
+            "{}.*.parcial".format(arquivo_nome),
+        ):
+            logger.debug(
+                "Removendo transferência antiga `{}`...",
+                caminho_antigo,
+            )
+            caminho_antigo.unlink(missing_ok=True)
+        return caminho
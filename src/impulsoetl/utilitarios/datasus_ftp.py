@@ -3,34 +3,109 @@
 # SPDX-License-Identifier: MIT
 
 
-"""Funções e classes úteis para interagir com os repositórios do DataSUS."""
+"""Funções e classes úteis para interagir com os repositórios do DataSUS.
+
+Atributos:
+    DOWNLOADS_PARALELOS: Número máximo de arquivos baixados simultaneamente
+        quando um padrão de nome corresponde a vários arquivos no servidor
+        FTP. Pode ser definido por meio da variável de ambiente
+        `IMPULSOETL_DOWNLOADS_PARALELOS`.
+    DOWNLOAD_TENTATIVAS: Número máximo de tentativas de transferência de cada
+        arquivo. A cada nova tentativa, o download é retomado a partir do
+        ponto em que a anterior foi interrompida. Pode ser definido por meio
+        da variável de ambiente `IMPULSOETL_DOWNLOAD_TENTATIVAS`.
+    LOTES_ANTECIPADOS: Número máximo de lotes de registros lidos com
+        antecedência, em segundo plano, enquanto os lotes anteriores são
+        processados. Pode ser definido por meio da variável de ambiente
+        `IMPULSOETL_LOTES_ANTECIPADOS`. Se o valor for zero, os lotes são
+        lidos apenas quando solicitados.
+    LOTE_MEMORIA_MAX: Memória máxima, em megabytes, ocupada pelos lotes de
+        registros lidos de cada extração. Pode ser definida por meio da
+        variável de ambiente `IMPULSOETL_LOTE_MEMORIA_MAX`. Se o valor for
+        zero, os lotes têm um número fixo de registros.
+"""
 
 
 from __future__ import annotations
 
+import functools
+import os
+import queue
 import re
-import shutil
-from contextlib import closing
-from ftplib import FTP, error_perm  # noqa: B402  # nosec: B402
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from ftplib import FTP, all_errors, error_perm  # noqa: B402  # nosec: B402
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from typing import Generator, cast
-from urllib.request import urlopen
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Final,
+    Generator,
+    Iterable,
+    Iterator,
+    cast,
+)
 
 import pandas as pd
-from dbfread import DBF, FieldParser
-from more_itertools import ichunked
-from pysus.utilities.readdbc import dbc2dbf
+from dbfread import FieldParser
 
 from impulsoetl.loggers import logger
+from impulsoetl.utilitarios.condicoes import FiltroRegistros
+from impulsoetl.utilitarios.conexoes_ftp import FTP_TEMPO_LIMITE, obter_pool
+from impulsoetl.utilitarios.datasus_cache import (
+    CACHE_TAMANHO_MAX,
+    CacheDatasus,
+    calcular_sha256,
+)
+from impulsoetl.utilitarios.datasus_espelho import (
+    ESPELHO_CAMINHO,
+    EspelhoDatasus,
+    resolver_ftp_substituto,
+)
+from impulsoetl.utilitarios.datasus_impressoes import (
+    Impressoes,
+    ImpressoesPendentes,
+)
+from impulsoetl.utilitarios.datasus_indice import (
+    EntradasDiretorio,
+    IndiceDiretorioFtp,
+)
+from impulsoetl.utilitarios.datasus_parquet import (
+    PARQUET_CAMINHO,
+    ArmazenamentoParquet,
+    abrir_tabela_parquet,
+    ler_lotes_parquet,
+)
+from impulsoetl.utilitarios.dbc import abrir_dbc
+from impulsoetl.utilitarios.dbf import TabelaDBF
+from impulsoetl.utilitarios.memoria import PassoAdaptativo
+
+DOWNLOADS_PARALELOS: Final[int] = int(
+    os.getenv("IMPULSOETL_DOWNLOADS_PARALELOS", 4),
+)
+DOWNLOAD_TENTATIVAS: Final[int] = int(
+    os.getenv("IMPULSOETL_DOWNLOAD_TENTATIVAS", 5),
+)
+LOTES_ANTECIPADOS: Final[int] = int(
+    os.getenv("IMPULSOETL_LOTES_ANTECIPADOS", 2),
+)
+LOTE_MEMORIA_MAX: Final[int] = int(
+    os.getenv("IMPULSOETL_LOTE_MEMORIA_MAX", 0),
+)
 
 
 class LeitorCamposDBF(FieldParser):
-    def parseD(self, field, data):
-        # lê datas como strings
-        # VER: https://dbfread.readthedocs.io/en/latest
-        # /introduction.html#custom-field-types
-        return self.parseC(field, data)
+    # lê datas como strings
+    # VER: https://dbfread.readthedocs.io/en/latest
+    # /introduction.html#custom-field-types
+    # (definido como o próprio método `parseC`, para que a `TabelaDBF`
+    # reconheça que as datas podem ser lidas como textos vetorizados)
+    parseD = FieldParser.parseC
 
 
 def _checar_arquivo_corrompido(
@@ -63,10 +138,92 @@ def _checar_arquivo_corrompido(
         return False
 
 
-def _listar_arquivos(
+def _obter_modificacao(cliente_ftp: FTP, arquivo_nome: str) -> str | None:
+    """Obtém a data de modificação de um arquivo no servidor FTP.
+
+    Argumentos:
+        cliente_ftp: Instância de conexão com o servidor FTP, já no diretório
+            onde se encontra o arquivo.
+        arquivo_nome: Nome do arquivo, incluindo a extensão.
+
+    Retorna:
+        A data e hora da última modificação do arquivo, no formato
+        `AAAAMMDDHHMMSS` retornado pelo comando `MDTM`; ou `None`, se o
+        servidor não suportar o comando.
+    """
+    try:
+        resposta = cliente_ftp.sendcmd("MDTM " + arquivo_nome)
+    except error_perm:
+        logger.warning(
+            "Não foi possível obter a data de modificação do arquivo `{}`.",
+            arquivo_nome,
+        )
+        return None
+    return resposta.split(maxsplit=1)[-1].strip()
+
+
+def _obter_versao(
     cliente_ftp: FTP,
+    arquivo_nome: str,
+    entrada: Dict[str, Any] | None = None,
+) -> Dict[str, Any]:
+    """Obtém o tamanho e a data de modificação de um arquivo no servidor.
+
+    Argumentos:
+        cliente_ftp: Instância de conexão com o servidor FTP, já no diretório
+            onde se encontra o arquivo.
+        arquivo_nome: Nome do arquivo, incluindo a extensão.
+        entrada: Atributos do arquivo informados na listagem do diretório,
+            conforme retornados pela função [`_listar_entradas()`][]. Apenas
+            os atributos ausentes são consultados no servidor, com os
+            comandos `SIZE` e `MDTM`.
+
+    Retorna:
+        Um dicionário com o tamanho do arquivo (`tamanho`), em bytes, e a
+        data de sua última modificação (`modificacao`), no formato
+        `AAAAMMDDHHMMSS` - ou `None`, se o servidor não a informar.
+
+    [`_listar_entradas()`]: impulsoetl.utilitarios.datasus_ftp._listar_entradas
+    """
+    entrada = entrada or {}
+    tamanho = entrada.get("tamanho")
+    if tamanho is None:
+        tamanho = cast(int, cliente_ftp.size(arquivo_nome))
+    modificacao = entrada.get("modificacao")
+    if modificacao is None:
+        modificacao = _obter_modificacao(cliente_ftp, arquivo_nome)
+    return {
+        "tamanho": tamanho,
+        # o comando MLSD pode incluir frações de segundo
+        "modificacao": modificacao[:14] if modificacao else None,
+    }
+
+
+def _filtrar_nomes(
+    arquivos_nomes: Iterable[str],
     arquivo_nome_ou_padrao: str | re.Pattern,
 ) -> list[str]:
+    """Seleciona os nomes de arquivos compatíveis com um nome ou padrão."""
+    if isinstance(arquivo_nome_ou_padrao, re.Pattern):
+        return [
+            arquivo
+            for arquivo in arquivos_nomes
+            if arquivo_nome_ou_padrao.match(arquivo)
+        ]
+    return [
+        arquivo
+        for arquivo in arquivos_nomes
+        if arquivo == arquivo_nome_ou_padrao
+    ]
+
+
+def _listar_entradas(
+    cliente_ftp: FTP,
+    arquivo_nome_ou_padrao: str | re.Pattern,
+    ftp: str | None = None,
+    caminho_diretorio: str | None = None,
+    indice: IndiceDiretorioFtp | None = None,
+) -> EntradasDiretorio:
     """Busca em um diretório FTP um ou mais arquivos pelo nome ou padrão.
 
     Argumentos:
@@ -75,41 +232,59 @@ def _listar_arquivos(
         arquivo_nome_ou_padrao: Nome do arquivo desejado, incluindo a
             extensão; ou expressão regular a ser comparada com os nomes de
             arquivos disponíveis no servidor FTP.
+        ftp: Endereço do servidor FTP. Necessário apenas se for usado um
+            índice local do diretório.
+        caminho_diretorio: Caminho do diretório no servidor FTP. Necessário
+            apenas se for usado um índice local do diretório.
+        indice: Índice local dos diretórios do servidor FTP, opcional. Se
+            for informado, o diretório é listado por meio do índice, que é
+            sempre atualizado com a listagem atual do servidor (ver
+            [`IndiceDiretorioFtp`][]); caso contrário, o conteúdo do
+            diretório é listado com o comando `NLST`.
 
     Retorna:
-        Uma lista de nomes de arquivos compatíveis com o nome ou padrão
-        informados no diretório FTP.
+        Um dicionário com os nomes dos arquivos compatíveis com o nome ou
+        padrão informados como chaves e, como valores, dicionários com o
+        tamanho (`tamanho`) e a data de modificação (`modificacao`) de cada
+        arquivo, conforme a listagem do diretório - ou `None`, caso não
+        tenham sido informados pelo servidor.
 
     Exceções:
         Levanta um erro [`ftplib.error_perm`][] se nenhum arquivo
         correspondente for encontrado.
 
+    [`IndiceDiretorioFtp`]: impulsoetl.utilitarios.datasus_indice.IndiceDiretorioFtp
     [`ftplib.error_perm`]: https://docs.python.org/3/library/ftplib.html#ftplib.error_perm
     """
 
     logger.info("Listando arquivos compatíveis...")
-    arquivos_todos = cliente_ftp.nlst()
-
-    if isinstance(arquivo_nome_ou_padrao, re.Pattern):
-        arquivos_compativeis = [
-            arquivo
-            for arquivo in arquivos_todos
-            if arquivo_nome_ou_padrao.match(arquivo)
-        ]
+    if indice is None or ftp is None or caminho_diretorio is None:
+        entradas = {
+            nome: {"tamanho": None, "modificacao": None}
+            for nome in cliente_ftp.nlst()
+        }
     else:
-        arquivos_compativeis = [
-            arquivo
-            for arquivo in arquivos_todos
-            if arquivo == arquivo_nome_ou_padrao
-        ]
+        # uma listagem guardada pode não incluir partes de um arquivo
+        # publicadas depois da última atualização do índice; por isso, o
+        # servidor é sempre consultado
+        entradas = indice.listar(
+            cliente_ftp,
+            ftp,
+            caminho_diretorio,
+            atualizar=True,
+        )
+    entradas_compativeis = {
+        nome: entradas[nome]
+        for nome in _filtrar_nomes(entradas, arquivo_nome_ou_padrao)
+    }
 
-    arquivos_compativeis_num = len(arquivos_compativeis)
+    arquivos_compativeis_num = len(entradas_compativeis)
     if arquivos_compativeis_num > 0:
         logger.info(
             "Encontrados {numero_arquivos} arquivos.",
             numero_arquivos=arquivos_compativeis_num,
         )
-        return arquivos_compativeis
+        return entradas_compativeis
     else:
         logger.error(
             "Nenhum arquivo compatível com o padrão fornecido foi "
@@ -118,11 +293,723 @@ def _listar_arquivos(
         raise error_perm
 
 
+@contextmanager
+def _conectar(
+    ftp: str,
+    caminho_diretorio: str,
+) -> Generator[FTP, None, None]:
+    """Obtém uma conexão com um servidor FTP, já no diretório indicado.
+
+    As conexões são compartilhadas entre as extrações do processo (ver
+    [`PoolConexoesFtp`][]), e devolvidas para reaproveitamento ao final do
+    bloco `with`.
+
+    [`PoolConexoesFtp`]: impulsoetl.utilitarios.conexoes_ftp.PoolConexoesFtp
+    """
+    with obter_pool(ftp).conexao() as cliente_ftp:
+        logger.info("Buscando diretório `{}`...", caminho_diretorio)
+        cliente_ftp.cwd(caminho_diretorio)
+        logger.info("OK!")
+        yield cliente_ftp
+
+
+class _ProgressoDownload(object):
+    """Grava os blocos recebidos do FTP e registra o progresso do download."""
+
+    def __init__(
+        self,
+        arquivo: BinaryIO,
+        arquivo_nome: str,
+        tamanho_total: int,
+        deslocamento: int = 0,
+        intervalo: float = 15.0,
+    ):
+        self.arquivo = arquivo
+        self.arquivo_nome = arquivo_nome
+        self.tamanho_total = tamanho_total
+        self.deslocamento = deslocamento
+        self.intervalo = intervalo
+        self.recebidos = 0
+        self.inicio = time.monotonic()
+        self.ultimo_registro = self.inicio
+
+    def __call__(self, bloco: bytes) -> None:
+        self.arquivo.write(bloco)
+        self.recebidos += len(bloco)
+        agora = time.monotonic()
+        if agora - self.ultimo_registro >= self.intervalo:
+            self.ultimo_registro = agora
+            self.registrar()
+
+    @property
+    def vazao(self) -> float:
+        """Taxa média de transferência desde o início, em bytes/segundo."""
+        return self.recebidos / max(time.monotonic() - self.inicio, 1e-6)
+
+    def registrar(self) -> None:
+        transferido = self.deslocamento + self.recebidos
+        logger.info(
+            "Download de `{}`: {:n} de {:n} bytes ({:.1%}) a {:.2f} MB/s.",
+            self.arquivo_nome,
+            transferido,
+            self.tamanho_total,
+            transferido / max(self.tamanho_total, 1),
+            self.vazao / 10**6,
+        )
+
+
+def _reconectar(cliente_ftp: FTP, ftp: str, caminho_diretorio: str) -> None:
+    """Restabelece uma conexão FTP perdida, preservando a mesma instância."""
+    logger.info("Reconectando-se ao servidor FTP `{}`...", ftp)
+    cliente_ftp.close()
+    cliente_ftp.connect(ftp, timeout=FTP_TEMPO_LIMITE)
+    cliente_ftp.login()
+    cliente_ftp.cwd(caminho_diretorio)
+
+
+def _transferir_arquivo(
+    cliente_ftp: FTP,
+    ftp: str,
+    caminho_diretorio: str,
+    arquivo_nome: str,
+    arquivo_destino: Path,
+    tamanho_esperado: int,
+    tentativas: int = DOWNLOAD_TENTATIVAS,
+) -> None:
+    """Transfere um arquivo do FTP, retomando downloads interrompidos.
+
+    Caso a transferência seja interrompida, a conexão é restabelecida e o
+    download prossegue a partir do último byte gravado em disco, por meio do
+    comando `REST` do protocolo FTP. Se o servidor não aceitar a retomada, o
+    arquivo parcial é descartado e o download recomeça do início.
+
+    Argumentos:
+        cliente_ftp: Instância de conexão com o servidor FTP, já no diretório
+            onde se encontra o arquivo.
+        ftp: Endereço do servidor FTP, usado para restabelecer a conexão.
+        caminho_diretorio: Caminho do diretório onde se encontra o arquivo no
+            servidor FTP.
+        arquivo_nome: Nome do arquivo desejado, incluindo a extensão.
+        arquivo_destino: Caminho onde o arquivo deve ser gravado no sistema
+            local. Se já existir um arquivo parcial nesse caminho, o download
+            é retomado a partir do seu tamanho atual.
+        tamanho_esperado: Tamanho do arquivo declarado pelo servidor FTP, em
+            bytes.
+        tentativas: Número máximo de tentativas de transferência.
+
+    Exceções:
+        Repassa o último erro de conexão ou transferência, caso todas as
+        tentativas falhem.
+    """
+    reconectar = False
+    for tentativa in range(1, tentativas + 1):
+        if reconectar:
+            try:
+                _reconectar(cliente_ftp, ftp, caminho_diretorio)
+            except all_errors as erro:
+                if tentativa == tentativas:
+                    raise
+                logger.warning(
+                    "Falha ao reconectar (tentativa {} de {}): {}",
+                    tentativa,
+                    tentativas,
+                    erro,
+                )
+                continue
+            reconectar = False
+
+        deslocamento = (
+            arquivo_destino.stat().st_size if arquivo_destino.exists() else 0
+        )
+        if deslocamento > tamanho_esperado:
+            logger.warning(
+                "Arquivo parcial de `{}` maior do que o esperado; "
+                + "reiniciando o download.",
+                arquivo_nome,
+            )
+            arquivo_destino.unlink()
+            deslocamento = 0
+        elif deslocamento == tamanho_esperado:
+            break
+        elif deslocamento:
+            logger.info(
+                "Retomando download de `{}` a partir do byte {:n}...",
+                arquivo_nome,
+                deslocamento,
+            )
+        else:
+            logger.info("Iniciando download do arquivo `{}`...", arquivo_nome)
+
+        with open(arquivo_destino, "ab") as arquivo:
+            progresso = _ProgressoDownload(
+                arquivo=arquivo,
+                arquivo_nome=arquivo_nome,
+                tamanho_total=tamanho_esperado,
+                deslocamento=deslocamento,
+            )
+            try:
+                cliente_ftp.retrbinary(
+                    "RETR " + arquivo_nome,
+                    progresso,
+                    blocksize=2**16,
+                    rest=deslocamento or None,
+                )
+            except error_perm as erro:
+                if not deslocamento:
+                    raise
+                # o servidor não aceitou retomar a transferência; recomeça
+                logger.warning(
+                    "Não foi possível retomar o download de `{}` ({}).",
+                    arquivo_nome,
+                    erro,
+                )
+                arquivo.truncate(0)
+                continue
+            except all_errors as erro:
+                if tentativa == tentativas:
+                    raise
+                logger.warning(
+                    "Download de `{}` interrompido após {:n} bytes "
+                    + "(tentativa {} de {}): {}",
+                    arquivo_nome,
+                    deslocamento + progresso.recebidos,
+                    tentativa,
+                    tentativas,
+                    erro,
+                )
+                reconectar = True
+                continue
+
+        progresso.registrar()
+        if arquivo_destino.stat().st_size == tamanho_esperado:
+            logger.info("Download de `{}` concluído.", arquivo_nome)
+            break
+
+
+def _gerar_chave_arquivo(
+    ftp: str,
+    caminho_diretorio: str,
+    arquivo_nome: str,
+    versao: Dict[str, Any],
+) -> str:
+    """Identifica a versão de um arquivo disponível no FTP do DataSUS."""
+    return CacheDatasus.gerar_chave(
+        ftp=ftp,
+        caminho="{}/{}".format(caminho_diretorio.rstrip("/"), arquivo_nome),
+        tamanho=versao["tamanho"],
+        modificacao=versao["modificacao"],
+    )
+
+
+def _baixar_arquivo(
+    cliente_ftp: FTP,
+    ftp: str,
+    caminho_diretorio: str,
+    arquivo_nome: str,
+    diretorio_destino: str,
+    versao: Dict[str, Any],
+    cache: CacheDatasus | None = None,
+) -> Path:
+    """Baixa um arquivo do FTP do DataSUS, ou obtém sua cópia local.
+
+    Argumentos:
+        cliente_ftp: Instância de conexão com o servidor FTP, já no diretório
+            onde se encontra o arquivo.
+        ftp: Endereço do repositório FTP público do DataSUS.
+        caminho_diretorio: Caminho do diretório onde se encontra o arquivo
+            desejado no repositório.
+        arquivo_nome: Nome do arquivo desejado, incluindo a extensão.
+        diretorio_destino: Diretório onde o arquivo deve ser salvo, caso não
+            haja uma cópia local disponível.
+        versao: Tamanho e data de modificação do arquivo no servidor,
+            conforme obtidos com a função [`_obter_versao()`][].
+        cache: Armazenamento local de arquivos já baixados, opcional.
+
+    Retorna:
+        O caminho do arquivo baixado no sistema local. Se o arquivo estiver
+        no armazenamento local, a cópia permanece reservada até ser devolvida
+        por meio do método `devolver()` do armazenamento.
+
+    Exceções:
+        Levanta um erro [`RuntimeError`][] se o tamanho do arquivo baixado
+        for diferente do declarado pelo servidor FTP.
+
+    [`_obter_versao()`]: impulsoetl.utilitarios.datasus_ftp._obter_versao
+    [`RuntimeError`]: https://docs.python.org/3/library/exceptions.html#RuntimeError
+    """
+    arquivo_dbc = Path(diretorio_destino, arquivo_nome)
+    arquivo_caminho_ftp = "{}/{}".format(
+        caminho_diretorio.rstrip("/"),
+        arquivo_nome,
+    )
+    tamanho_arquivo_ftp = versao["tamanho"]
+
+    if cache:
+        chave_cache = _gerar_chave_arquivo(
+            ftp=ftp,
+            caminho_diretorio=caminho_diretorio,
+            arquivo_nome=arquivo_nome,
+            versao=versao,
+        )
+        arquivo_dbc_cache = cache.obter(chave_cache)
+        if arquivo_dbc_cache:
+            return arquivo_dbc_cache
+
+    logger.info("Tudo pronto para o download.")
+    _transferir_arquivo(
+        cliente_ftp=cliente_ftp,
+        ftp=ftp,
+        caminho_diretorio=caminho_diretorio,
+        arquivo_nome=arquivo_nome,
+        arquivo_destino=arquivo_dbc,
+        tamanho_esperado=tamanho_arquivo_ftp,
+    )
+
+    if _checar_arquivo_corrompido(
+        tamanho_arquivo_ftp=tamanho_arquivo_ftp,
+        tamanho_arquivo_local=arquivo_dbc.stat().st_size,
+    ):
+        raise RuntimeError(
+            "A extração da fonte `{}{}` ".format(ftp, caminho_diretorio)
+            + "falhou porque o arquivo baixado está corrompido."
+        )
+
+    if cache:
+        arquivo_dbc = cache.armazenar(
+            chave=chave_cache,
+            arquivo_origem=arquivo_dbc,
+            caminho=arquivo_caminho_ftp,
+        )
+    return arquivo_dbc
+
+
+def _baixar_arquivo_nova_conexao(
+    ftp: str,
+    caminho_diretorio: str,
+    **kwargs,
+) -> Path:
+    """Baixa um arquivo do FTP do DataSUS usando uma conexão exclusiva."""
+    with _conectar(ftp, caminho_diretorio) as cliente_ftp:
+        return _baixar_arquivo(
+            cliente_ftp=cliente_ftp,
+            ftp=ftp,
+            caminho_diretorio=caminho_diretorio,
+            **kwargs,
+        )
+
+
+def _registrar_lotes(
+    lotes: Iterable[pd.DataFrame],
+    passo: int | PassoAdaptativo | None = None,
+) -> Generator[pd.DataFrame, None, None]:
+    """Registra no log a quantidade de linhas lidas a cada lote.
+
+    Se o número de registros por lote for ajustado a um limite de memória,
+    também registra a memória ocupada por cada lote gerado.
+    """
+    contador = 0
+    for lote in lotes:
+        logger.info(
+            "Lido trecho do arquivo DBF disponibilizado pelo DataSUS "
+            + "(linhas {} a {}).",
+            contador,
+            contador + len(lote),
+        )
+        if isinstance(passo, PassoAdaptativo):
+            passo.registrar(lote)
+        yield lote
+        contador += len(lote)
+
+
+def _ler_dbc_lotes(
+    arquivo_dbc: Path,
+    passo: int | PassoAdaptativo,
+    colunas: Iterable[str] | None = None,
+    filtro: FiltroRegistros | None = None,
+    **kwargs,
+) -> Generator[pd.DataFrame, None, None]:
+    """Descompacta um arquivo .dbc local e gera DataFrames com seus dados.
+
+    Os registros são lidos à medida em que são descompactados, sem gerar um
+    arquivo DBF intermediário em disco. Se houver um filtro, os registros que
+    certamente não atendem às suas condições são descartados antes de serem
+    decodificados.
+    """
+    logger.info("Descompactando e lendo arquivo DBC...")
+    with abrir_dbc(arquivo_dbc) as arquivo_dbf:
+        tabela_dbf = TabelaDBF(
+            arquivo_dbf,
+            encoding="iso-8859-1",
+            parserclass=LeitorCamposDBF,
+            colunas=colunas,
+            **kwargs,
+        )
+        if isinstance(passo, PassoAdaptativo):
+            passo.configurar(tabela_dbf)
+        yield from _registrar_lotes(
+            tabela_dbf.ler_lotes(passo, filtro=filtro),
+            passo=passo,
+        )
+
+
+def _converter_parquet(
+    arquivo_dbc: Path,
+    armazenamento: ArmazenamentoParquet,
+    arquivo_nome: str,
+    chave: str,
+    passo: int | PassoAdaptativo = 100000,
+    **kwargs,
+) -> Path:
+    """Gera a cópia colunar de um arquivo .dbc local."""
+    logger.info("Descompactando arquivo DBC...")
+    with abrir_dbc(arquivo_dbc) as arquivo_dbf:
+        tabela_dbf = TabelaDBF(
+            arquivo_dbf,
+            encoding="iso-8859-1",
+            parserclass=LeitorCamposDBF,
+            **kwargs,
+        )
+        if isinstance(passo, PassoAdaptativo):
+            passo.configurar(tabela_dbf)
+        return armazenamento.armazenar(
+            tabela_dbf=tabela_dbf,
+            arquivo_nome=arquivo_nome,
+            chave=chave,
+            passo=passo,
+        )
+
+
+def _ler_parquet_lotes(
+    arquivo_parquet: Path,
+    passo: int | PassoAdaptativo,
+    colunas: Iterable[str] | None = None,
+    filtro: FiltroRegistros | None = None,
+    **kwargs,
+) -> Generator[pd.DataFrame, None, None]:
+    """Lê lotes de registros da cópia colunar de um arquivo .dbc."""
+    if isinstance(passo, PassoAdaptativo):
+        passo.configurar(
+            abrir_tabela_parquet(
+                arquivo_parquet,
+                colunas=colunas,
+                encoding="iso-8859-1",
+                parserclass=LeitorCamposDBF,
+                **kwargs,
+            ),
+        )
+    yield from _registrar_lotes(
+        ler_lotes_parquet(
+            arquivo_parquet,
+            passo=passo,
+            colunas=colunas,
+            filtro=filtro,
+            encoding="iso-8859-1",
+            parserclass=LeitorCamposDBF,
+            **kwargs,
+        ),
+        passo=passo,
+    )
+
+
+class _FalhaLeitura(object):
+    """Transporta uma exceção levantada durante a leitura antecipada."""
+
+    def __init__(self, erro: BaseException):
+        self.erro = erro
+
+
+_FIM_LEITURA: Final = object()
+
+
+def _antecipar_lotes(
+    lotes: Generator[pd.DataFrame, None, None],
+    lotes_antecipados: int,
+) -> Iterator[pd.DataFrame]:
+    """Lê lotes em segundo plano, enquanto os anteriores são processados.
+
+    Os lotes são gerados em uma linha de execução separada e guardados em uma
+    fila com capacidade limitada: quando a fila está cheia, a leitura é
+    pausada até que o próximo lote seja consumido. Assim, no máximo
+    `lotes_antecipados + 1` lotes lidos aguardam processamento a cada
+    momento.
+
+    Exceções levantadas durante a leitura são repassadas a quem consome os
+    lotes. Se o consumo for interrompido, a leitura em segundo plano também é
+    encerrada.
+    """
+    fila: queue.Queue = queue.Queue(maxsize=lotes_antecipados)
+    interromper = threading.Event()
+
+    def enfileirar(item) -> bool:
+        while not interromper.is_set():
+            try:
+                fila.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def produzir() -> None:
+        try:
+            for lote in lotes:
+                if not enfileirar(lote):
+                    return
+            enfileirar(_FIM_LEITURA)
+        except BaseException as erro:  # noqa: B902
+            enfileirar(_FalhaLeitura(erro))
+        finally:
+            lotes.close()
+
+    produtor = threading.Thread(
+        target=produzir,
+        name="impulsoetl-leitura-antecipada",
+        daemon=True,
+    )
+    produtor.start()
+    try:
+        while True:
+            item = fila.get()
+            if item is _FIM_LEITURA:
+                return
+            if isinstance(item, _FalhaLeitura):
+                raise item.erro
+            yield item
+    finally:
+        interromper.set()
+        produtor.join()
+
+
+def _usar_copia_espelho(arquivo_espelho: Path) -> Path:
+    """Usa a cópia de um arquivo guardada em um espelho local."""
+    logger.info("Usando cópia de `{}` do espelho local.", arquivo_espelho.name)
+    return arquivo_espelho
+
+
+def _extrair_dbc_lotes(
+    ftp: str,
+    caminho_diretorio: str,
+    arquivo_nome: str | re.Pattern,
+    passo: int | PassoAdaptativo,
+    usar_cache: bool,
+    downloads_paralelos: int,
+    colunas: Iterable[str] | None,
+    condicoes: str | None,
+    usar_parquet: bool,
+    usar_espelho: bool,
+    impressoes: ImpressoesPendentes | None,
+    **kwargs,
+) -> Generator[pd.DataFrame, None, None]:
+    """Baixa os arquivos compatíveis e lê seus registros, em sequência."""
+    cache = CacheDatasus() if usar_cache and CACHE_TAMANHO_MAX > 0 else None
+    armazenamento = (
+        ArmazenamentoParquet() if usar_parquet and PARQUET_CAMINHO else None
+    )
+    filtro = FiltroRegistros.compilar(condicoes)
+
+    if not caminho_diretorio.startswith("/"):
+        caminho_diretorio = "/" + caminho_diretorio
+
+    # as versões dos arquivos são registradas com o endereço de origem,
+    # mesmo que sejam lidas de um servidor substituto
+    ftp_origem, caminho_diretorio_origem = ftp, caminho_diretorio
+    espelho: EspelhoDatasus | None = None
+    if usar_espelho and ESPELHO_CAMINHO.startswith("ftp://"):
+        ftp, caminho_diretorio = resolver_ftp_substituto(
+            ftp,
+            caminho_diretorio,
+            espelho=ESPELHO_CAMINHO,
+        )
+        logger.info("Usando servidor FTP substituto `{}`.", ftp)
+    elif usar_espelho and ESPELHO_CAMINHO:
+        espelho = EspelhoDatasus(ESPELHO_CAMINHO)
+
+    with ExitStack() as pilha:
+        if cache:
+            # as cópias locais obtidas ficam reservadas até serem lidas; as
+            # que não chegarem a ser lidas são devolvidas ao final, depois
+            # que todos os downloads em andamento terminarem
+            pilha.callback(cache.devolver_todos)
+        cliente_ftp = pilha.enter_context(_conectar(ftp, caminho_diretorio))
+        # ordena os arquivos para que os lotes sejam sempre gerados na mesma
+        # ordem, independentemente de qual download termine primeiro
+        entradas = _listar_entradas(
+            cliente_ftp=cliente_ftp,
+            arquivo_nome_ou_padrao=arquivo_nome,
+            ftp=ftp,
+            caminho_diretorio=caminho_diretorio,
+            indice=IndiceDiretorioFtp(),
+        )
+        arquivos_compativeis = sorted(entradas)
+
+        # obtém as versões dos arquivos disponíveis no servidor a partir da
+        # listagem do diretório; os comandos `SIZE` e `MDTM` só são enviados
+        # se o servidor não informar esses atributos na listagem
+        versoes: Impressoes = {
+            arquivo_compativel_nome: _obter_versao(
+                cliente_ftp,
+                arquivo_compativel_nome,
+                entradas[arquivo_compativel_nome],
+            )
+            for arquivo_compativel_nome in arquivos_compativeis
+        }
+
+        # identifica os arquivos com cópias atualizadas no espelho local; os
+        # demais são baixados do servidor
+        arquivos_espelho: dict[str, Path] = {}
+        if espelho is not None:
+            desatualizados = espelho.listar_desatualizados(
+                ftp,
+                caminho_diretorio,
+                versoes,
+            )
+            if desatualizados:
+                logger.warning(
+                    "Arquivos ausentes ou desatualizados no espelho local: "
+                    + "{}. Buscando no servidor FTP...",
+                    ", ".join(desatualizados),
+                )
+            for arquivo_compativel_nome in arquivos_compativeis:
+                if arquivo_compativel_nome not in desatualizados:
+                    arquivos_espelho[arquivo_compativel_nome] = (
+                        espelho.caminho(
+                            ftp,
+                            caminho_diretorio,
+                            arquivo_compativel_nome,
+                        )
+                    )
+
+        # identifica os arquivos que já possuem cópias colunares
+        chaves: dict[str, str] = {}
+        arquivos_parquet: dict[str, Path] = {}
+        if armazenamento:
+            for arquivo_compativel_nome in arquivos_compativeis:
+                chaves[arquivo_compativel_nome] = _gerar_chave_arquivo(
+                    ftp=ftp,
+                    caminho_diretorio=caminho_diretorio,
+                    arquivo_nome=arquivo_compativel_nome,
+                    versao=versoes[arquivo_compativel_nome],
+                )
+                arquivo_parquet = armazenamento.obter(
+                    arquivo_nome=arquivo_compativel_nome,
+                    chave=chaves[arquivo_compativel_nome],
+                )
+                if arquivo_parquet:
+                    arquivos_parquet[arquivo_compativel_nome] = arquivo_parquet
+        arquivos_baixar = [
+            arquivo_compativel_nome
+            for arquivo_compativel_nome in arquivos_compativeis
+            if arquivo_compativel_nome not in arquivos_parquet
+            and arquivo_compativel_nome not in arquivos_espelho
+        ]
+
+        logger.info("Preparando ambiente para o download...")
+        diretorio_temporario = pilha.enter_context(TemporaryDirectory())
+
+        downloads: dict[str, Callable[[], Path]] = {}
+        if downloads_paralelos > 1 and len(arquivos_baixar) > 1:
+            logger.info(
+                "Baixando até {} arquivos simultaneamente...",
+                downloads_paralelos,
+            )
+            executor = pilha.enter_context(
+                ThreadPoolExecutor(
+                    max_workers=min(downloads_paralelos, len(arquivos_baixar)),
+                ),
+            )
+            futuros = [
+                executor.submit(
+                    _baixar_arquivo_nova_conexao,
+                    ftp=ftp,
+                    caminho_diretorio=caminho_diretorio,
+                    arquivo_nome=arquivo_baixar_nome,
+                    diretorio_destino=diretorio_temporario,
+                    versao=versoes[arquivo_baixar_nome],
+                    cache=cache,
+                )
+                for arquivo_baixar_nome in arquivos_baixar
+            ]
+            # se a leitura for interrompida, não inicia downloads pendentes
+            pilha.callback(lambda: [futuro.cancel() for futuro in futuros])
+            for arquivo_baixar_nome, futuro in zip(arquivos_baixar, futuros):
+                downloads[arquivo_baixar_nome] = futuro.result
+        else:
+            for arquivo_baixar_nome in arquivos_baixar:
+                downloads[arquivo_baixar_nome] = functools.partial(
+                    _baixar_arquivo,
+                    cliente_ftp=cliente_ftp,
+                    ftp=ftp,
+                    caminho_diretorio=caminho_diretorio,
+                    arquivo_nome=arquivo_baixar_nome,
+                    diretorio_destino=diretorio_temporario,
+                    versao=versoes[arquivo_baixar_nome],
+                    cache=cache,
+                )
+
+        for arquivo_espelho_nome, arquivo_espelho in arquivos_espelho.items():
+            downloads[arquivo_espelho_nome] = functools.partial(
+                _usar_copia_espelho,
+                arquivo_espelho,
+            )
+
+        for arquivo_compativel_nome in arquivos_compativeis:
+            arquivo_dbc = None
+            if not armazenamento:
+                arquivo_dbc = downloads[arquivo_compativel_nome]()
+                yield from _ler_dbc_lotes(
+                    arquivo_dbc=arquivo_dbc,
+                    passo=passo,
+                    colunas=colunas,
+                    filtro=filtro,
+                    **kwargs,
+                )
+            else:
+                arquivo_parquet = arquivos_parquet.get(arquivo_compativel_nome)
+                if not arquivo_parquet:
+                    arquivo_dbc = downloads[arquivo_compativel_nome]()
+                    arquivo_parquet = _converter_parquet(
+                        arquivo_dbc=arquivo_dbc,
+                        armazenamento=armazenamento,
+                        arquivo_nome=arquivo_compativel_nome,
+                        chave=chaves[arquivo_compativel_nome],
+                        passo=passo,
+                        **kwargs,
+                    )
+                yield from _ler_parquet_lotes(
+                    arquivo_parquet,
+                    passo=passo,
+                    colunas=colunas,
+                    filtro=filtro,
+                    **kwargs,
+                )
+
+            if impressoes is not None:
+                versoes[arquivo_compativel_nome]["sha256"] = (
+                    calcular_sha256(arquivo_dbc) if arquivo_dbc else None
+                )
+                impressoes.adicionar(
+                    ftp=ftp_origem,
+                    caminho_diretorio=caminho_diretorio_origem,
+                    arquivo_nome=arquivo_compativel_nome,
+                    impressao=versoes[arquivo_compativel_nome],
+                )
+            if cache and arquivo_dbc:
+                cache.devolver(arquivo_dbc)
+
+
 def extrair_dbc_lotes(
     ftp: str,
     caminho_diretorio: str,
     arquivo_nome: str | re.Pattern,
     passo: int = 10000,
+    usar_cache: bool = True,
+    downloads_paralelos: int = DOWNLOADS_PARALELOS,
+    colunas: Iterable[str] | None = None,
+    condicoes: str | None = None,
+    usar_parquet: bool = True,
+    usar_espelho: bool = True,
+    lotes_antecipados: int = LOTES_ANTECIPADOS,
+    memoria_max: int = LOTE_MEMORIA_MAX,
+    impressoes: ImpressoesPendentes | None = None,
     **kwargs,
 ) -> Generator[pd.DataFrame, None, None]:
     """Extrai dados de um arquivo .dbc do FTP do DataSUS e retorna DataFrames.
@@ -132,6 +1019,30 @@ def extrair_dbc_lotes(
     o disco, descompacta-o e itera sobre seus registros, gerando objetos
     [`pandas.DataFrames`][] com lotes de linhas lidas.
 
+    Os arquivos baixados são guardados em um armazenamento local (ver
+    [`CacheDatasus`][]), de modo que extrações repetidas de um mesmo arquivo
+    não precisem baixá-lo novamente, enquanto ele não for modificado no
+    servidor.
+
+    Quando o nome do arquivo é dado por uma expressão regular compatível com
+    vários arquivos (por exemplo, arquivos de disseminação divididos em
+    partes `a`, `b`, `c`...), as partes são baixadas simultaneamente e lidas
+    em ordem alfabética dos nomes dos arquivos.
+
+    Se a variável de ambiente `IMPULSOETL_DATASUS_PARQUET_CAMINHO` estiver
+    definida, cada arquivo é convertido, na primeira leitura, em uma cópia
+    colunar no formato Parquet (ver [`ArmazenamentoParquet`][]). As leituras
+    seguintes da mesma versão do arquivo são feitas a partir dessa cópia,
+    sem novos downloads ou descompactações.
+
+    Se a variável de ambiente `IMPULSOETL_DATASUS_ESPELHO` estiver definida,
+    os arquivos listados no servidor FTP são lidos do espelho local indicado
+    (ver [`EspelhoDatasus`][]), desde que as cópias do espelho tenham o mesmo
+    tamanho e a mesma data de modificação informados pelo servidor. Arquivos
+    ausentes ou desatualizados no espelho são baixados do servidor FTP. Se a
+    variável contiver o endereço de um servidor FTP substituto, os arquivos
+    são baixados desse servidor.
+
     Argumentos:
         ftp: Endereço do repositório FTP público do DataSUS.
         caminho_diretorio: Caminho do diretório onde se encontra o arquivo
@@ -141,10 +1052,62 @@ def extrair_dbc_lotes(
             arquivos disponíveis no servidor FTP.
         passo: Número de registros que devem ser convertidos em DataFrame a
             cada iteração.
+        usar_cache: Indica se devem ser usadas e armazenadas cópias locais
+            dos arquivos baixados. Por padrão, é `True`. O armazenamento local
+            também pode ser desabilitado definindo a variável de ambiente
+            `IMPULSOETL_DATASUS_CACHE_TAMANHO_MAX` como zero.
+        downloads_paralelos: Número máximo de arquivos a serem baixados ao
+            mesmo tempo, cada um em uma conexão própria com o servidor FTP.
+            Se for `1`, os arquivos são baixados um de cada vez, à medida em
+            que os anteriores terminam de ser lidos. Por padrão, usa o valor
+            definido na variável de ambiente `IMPULSOETL_DOWNLOADS_PARALELOS`
+            (ou `4`, se a variável não estiver definida).
+        colunas: Nomes das colunas a serem lidas do arquivo. As demais
+            colunas não são decodificadas nem incluídas nos DataFrames
+            gerados. Se for `None` (padrão), todas as colunas são lidas.
+        condicoes: Expressão opcional com a sintaxe do método
+            [`pandas.DataFrame.query()`][], usada para descartar registros
+            durante a leitura do arquivo. Apenas comparações simples com
+            colunas de texto são avaliadas nessa etapa (ver
+            [`FiltroRegistros`][]), de modo que os DataFrames gerados ainda
+            podem conter registros que não atendem às condições - que devem
+            ser aplicadas novamente sobre o resultado.
+        usar_parquet: Indica se devem ser usadas e geradas cópias colunares
+            dos arquivos, caso a variável de ambiente
+            `IMPULSOETL_DATASUS_PARQUET_CAMINHO` esteja definida. Por padrão,
+            é `True`.
+        usar_espelho: Indica se os arquivos devem ser obtidos do espelho
+            definido na variável de ambiente `IMPULSOETL_DATASUS_ESPELHO`,
+            caso ela esteja definida. Por padrão, é `True`.
+        lotes_antecipados: Número máximo de lotes lidos com antecedência.
+            Os downloads, a descompactação e a decodificação dos registros
+            são feitos em segundo plano, enquanto os lotes já gerados são
+            processados; a leitura é pausada quando há esse número de lotes
+            aguardando processamento. Se for `0`, os lotes são lidos apenas
+            quando solicitados. Por padrão, usa o valor definido na variável
+            de ambiente `IMPULSOETL_LOTES_ANTECIPADOS` (ou `2`, se a variável
+            não estiver definida).
+        memoria_max: Memória máxima, em megabytes, a ser ocupada pelos lotes
+            lidos - incluindo os lotes lidos com antecedência e o lote em
+            processamento. Se for maior que zero, o número de registros de
+            cada lote é calculado a partir do tamanho dos registros do
+            arquivo e da memória efetivamente ocupada pelos lotes anteriores
+            (ver [`PassoAdaptativo`][]). Nesse caso, o argumento `passo` é
+            ignorado, e arquivos com registros estreitos podem gerar lotes
+            maiores. Por padrão, usa o valor definido na variável de
+            ambiente `IMPULSOETL_LOTE_MEMORIA_MAX` (ou `0`, se a variável
+            não estiver definida).
+        impressoes: Instância opcional de [`ImpressoesPendentes`][]. Se
+            for informada, o tamanho, a data de modificação e o resumo do
+            conteúdo de cada arquivo são adicionados a ela ao final da sua
+            leitura. Depois que os lotes forem carregados, as impressões
+            devem ser gravadas no banco de dados com o método
+            [`ImpressoesPendentes.registrar()`][], para que republicações
+            dos arquivos possam ser identificadas posteriormente (ver
+            [`planejar_recapturas()`][]).
         \*\*kwargs: Argumentos adicionais a serem passados para o construtor
-            da classe
-            [`dbfread.DBF`](https://dbfread.readthedocs.io/en/latest/dbf_objects.html#dbf-objects)
-            ao instanciar a representação do arquivo DBF lido.
+            da classe [`TabelaDBF`][] ao instanciar a representação do
+            arquivo DBF lido.
 
     Gera:
         A cada iteração, devolve um objeto [`pandas.DataFrames`][] com um
@@ -153,87 +1116,194 @@ def extrair_dbc_lotes(
         DataFrame e a conexão com o servidor FTP é encerrada.
 
     [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+    [`CacheDatasus`]: impulsoetl.utilitarios.datasus_cache.CacheDatasus
+    [`ArmazenamentoParquet`]: impulsoetl.utilitarios.datasus_parquet.ArmazenamentoParquet
+    [`EspelhoDatasus`]: impulsoetl.utilitarios.datasus_espelho.EspelhoDatasus
+    [`pandas.DataFrame.query()`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.query.html
+    [`FiltroRegistros`]: impulsoetl.utilitarios.condicoes.FiltroRegistros
+    [`PassoAdaptativo`]: impulsoetl.utilitarios.memoria.PassoAdaptativo
+    [`ImpressoesPendentes`]: impulsoetl.utilitarios.datasus_impressoes.ImpressoesPendentes
+    [`ImpressoesPendentes.registrar()`]: impulsoetl.utilitarios.datasus_impressoes.ImpressoesPendentes.registrar
+    [`planejar_recapturas()`]: impulsoetl.utilitarios.datasus_impressoes.planejar_recapturas
+    [`TabelaDBF`]: impulsoetl.utilitarios.dbf.TabelaDBF
     """
 
-    logger.info("Conectando-se ao servidor FTP `{}`...", ftp)
-    cliente_ftp = FTP(ftp)
-    cliente_ftp.login()
-    logger.info("Conexão estabelecida com sucesso!")
+    passo_lotes: int | PassoAdaptativo = passo
+    if memoria_max > 0:
+        # a memória é dividida entre os lotes enfileirados, o lote sendo lido
+        # e o lote em processamento
+        passo_lotes = PassoAdaptativo(
+            memoria_max * 2**20 // (max(lotes_antecipados, 0) + 2),
+        )
 
-    if not caminho_diretorio.startswith("/"):
-        caminho_diretorio = "/" + caminho_diretorio
-    logger.info("Buscando diretório `{}`...", caminho_diretorio)
-    cliente_ftp.cwd(caminho_diretorio)
-    logger.info("OK!")
+    lotes = _extrair_dbc_lotes(
+        ftp=ftp,
+        caminho_diretorio=caminho_diretorio,
+        arquivo_nome=arquivo_nome,
+        passo=passo_lotes,
+        usar_cache=usar_cache,
+        downloads_paralelos=downloads_paralelos,
+        colunas=colunas,
+        condicoes=condicoes,
+        usar_parquet=usar_parquet,
+        usar_espelho=usar_espelho,
+        impressoes=impressoes,
+        **kwargs,
+    )
+    if lotes_antecipados > 0:
+        yield from _antecipar_lotes(lotes, lotes_antecipados)
+    else:
+        yield from lotes
 
-    arquivos_compativeis = _listar_arquivos(
-        cliente_ftp=cliente_ftp,
-        arquivo_nome_ou_padrao=arquivo_nome,
+
+def _espelhar_arquivo(
+    espelho: EspelhoDatasus,
+    ftp: str,
+    caminho_diretorio: str,
+    arquivo_nome: str,
+) -> Path:
+    """Copia a versão atual de um arquivo do servidor FTP para o espelho."""
+    with _conectar(ftp, caminho_diretorio) as cliente_ftp:
+        tamanho = cast(int, cliente_ftp.size(arquivo_nome))
+        modificacao = _obter_modificacao(cliente_ftp, arquivo_nome)
+        caminho_parcial = espelho.caminho_parcial(
+            ftp=ftp,
+            caminho_diretorio=caminho_diretorio,
+            arquivo_nome=arquivo_nome,
+            modificacao=modificacao,
+        )
+        _transferir_arquivo(
+            cliente_ftp=cliente_ftp,
+            ftp=ftp,
+            caminho_diretorio=caminho_diretorio,
+            arquivo_nome=arquivo_nome,
+            arquivo_destino=caminho_parcial,
+            tamanho_esperado=tamanho,
+        )
+    if _checar_arquivo_corrompido(
+        tamanho_arquivo_ftp=tamanho,
+        tamanho_arquivo_local=caminho_parcial.stat().st_size,
+    ):
+        caminho_parcial.unlink()
+        raise RuntimeError(
+            "A cópia de `{}` para o espelho falhou ".format(arquivo_nome)
+            + "porque o arquivo baixado está corrompido."
+        )
+    return espelho.concluir(
+        caminho_parcial,
+        ftp=ftp,
+        caminho_diretorio=caminho_diretorio,
+        arquivo_nome=arquivo_nome,
+        modificacao=modificacao,
     )
 
-    logger.info("Preparando ambiente para o download...")
 
-    with TemporaryDirectory() as diretorio_temporario:
-        for arquivo_compativel_nome in arquivos_compativeis:
-            arquivo_dbf_nome = arquivo_compativel_nome.replace(".dbc", ".dbf")
-            arquivo_dbc = Path(diretorio_temporario, arquivo_compativel_nome)
-            logger.info("Tudo pronto para o download.")
+def sincronizar_espelho(
+    ftp: str,
+    caminho_diretorio: str,
+    arquivo_nome: str | re.Pattern | None = None,
+    espelho: EspelhoDatasus | None = None,
+    downloads_paralelos: int = DOWNLOADS_PARALELOS,
+    indice: IndiceDiretorioFtp | None = None,
+) -> list[str]:
+    """Atualiza as cópias de um diretório do DataSUS em um espelho local.
 
-            # baixar do FTP usando urllib
-            # ver https://stackoverflow.com/a/11768443/7733563
-            url = "ftp://{}{}/{}".format(
-                ftp,
-                caminho_diretorio,
-                arquivo_compativel_nome,
-            )
+    Copia para o espelho os arquivos do diretório que ainda não existem
+    localmente ou que foram modificados no servidor desde a última
+    sincronização. Os arquivos são baixados simultaneamente, cada um em uma
+    conexão própria com o servidor, e gravados primeiro em arquivos parciais:
+    transferências interrompidas - inclusive por falhas em execuções
+    anteriores - são retomadas a partir do último byte gravado, desde que o
+    arquivo não tenha sido republicado nesse meio tempo. Leitores do espelho
+    nunca veem cópias incompletas.
 
-            logger.info(
-                "Iniciando download do arquivo `{}`...",
-                arquivo_compativel_nome,
-            )
-            with closing(urlopen(url)) as resposta:  # nosec: B310
-                with open(arquivo_dbc, "wb") as arquivo:
-                    shutil.copyfileobj(resposta, arquivo)
-            logger.info("Download concluído.")
-
-            if _checar_arquivo_corrompido(
-                tamanho_arquivo_ftp=cast(
-                    int,
-                    cliente_ftp.size(arquivo_compativel_nome),
-                ),
-                tamanho_arquivo_local=arquivo_dbc.stat().st_size,
-            ):
-                raise RuntimeError(
-                    "A extração da fonte `{}{}` ".format(
-                        ftp,
-                        caminho_diretorio,
-                    )
-                    + "falhou porque o arquivo baixado está corrompido."
-                )
+    Argumentos:
+        ftp: Endereço do repositório FTP público do DataSUS.
+        caminho_diretorio: Caminho do diretório a ser sincronizado.
+        arquivo_nome: Nome de um arquivo ou expressão regular a ser comparada
+            com os nomes dos arquivos do diretório, opcional. Se for `None`
+            (padrão), todos os arquivos do diretório são sincronizados.
+        espelho: Espelho local a ser atualizado. Por padrão, usa o diretório
+            definido na variável de ambiente `IMPULSOETL_DATASUS_ESPELHO`.
+        downloads_paralelos: Número máximo de arquivos a serem baixados ao
+            mesmo tempo. Por padrão, usa o valor definido na variável de
+            ambiente `IMPULSOETL_DOWNLOADS_PARALELOS` (ou `4`, se a variável
+            não estiver definida).
+        indice: Índice local dos diretórios do servidor FTP, opcional. O
+            servidor sempre é consultado, para obter a listagem atual.
 
-            logger.info("Descompactando arquivo DBC...")
-            arquivo_dbf_caminho = Path(diretorio_temporario, arquivo_dbf_nome)
-            dbc2dbf(str(arquivo_dbc), str(arquivo_dbf_caminho))
-            logger.info("Lendo arquivo DBF...")
-            arquivo_dbf = DBF(
-                arquivo_dbf_caminho,
-                encoding="iso-8859-1",
-                load=False,
-                parserclass=LeitorCamposDBF,
-                **kwargs,
+    Retorna:
+        Lista ordenada com os nomes dos arquivos copiados para o espelho.
+
+    Exceções:
+        Levanta um erro [`RuntimeError`][] se a cópia de algum arquivo
+        falhar, depois de tentar copiar todos os demais arquivos.
+
+    [`RuntimeError`]: https://docs.python.org/3/library/exceptions.html#RuntimeError
+    """
+    espelho = espelho or EspelhoDatasus()
+    if not caminho_diretorio.startswith("/"):
+        caminho_diretorio = "/" + caminho_diretorio
+
+    with _conectar(ftp, caminho_diretorio) as cliente_ftp:
+        entradas = (indice or IndiceDiretorioFtp()).listar(
+            cliente_ftp,
+            ftp,
+            caminho_diretorio,
+            atualizar=True,
+        )
+    if arquivo_nome is not None:
+        entradas = {
+            nome: entradas[nome]
+            for nome in _filtrar_nomes(entradas, arquivo_nome)
+        }
+    desatualizados = espelho.listar_desatualizados(
+        ftp,
+        caminho_diretorio,
+        entradas,
+    )
+    if not desatualizados:
+        logger.info("Espelho de `{}` já está atualizado.", caminho_diretorio)
+        return []
+
+    logger.info(
+        "Copiando {} arquivo(s) de `{}` para o espelho...",
+        len(desatualizados),
+        caminho_diretorio,
+    )
+    espelho.caminho(ftp, caminho_diretorio).mkdir(parents=True, exist_ok=True)
+    falhas = []
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(downloads_paralelos, len(desatualizados))),
+    ) as executor:
+        futuros = {
+            arquivo_desatualizado_nome: executor.submit(
+                _espelhar_arquivo,
+                espelho=espelho,
+                ftp=ftp,
+                caminho_diretorio=caminho_diretorio,
+                arquivo_nome=arquivo_desatualizado_nome,
             )
-            arquivo_dbf_fatias = ichunked(arquivo_dbf, passo)
-
-            contador = 0
-            for fatia in arquivo_dbf_fatias:
-                logger.info(
-                    "Lendo trecho do arquivo DBF disponibilizado pelo DataSUS "
-                    + "e convertendo em DataFrame (linhas {} a {})...",
-                    contador,
-                    contador + passo,
+            for arquivo_desatualizado_nome in desatualizados
+        }
+        for arquivo_desatualizado_nome, futuro in futuros.items():
+            try:
+                futuro.result()
+            except (RuntimeError, *all_errors) as erro:
+                logger.error(
+                    "Falha ao copiar `{}` para o espelho: {}",
+                    arquivo_desatualizado_nome,
+                    erro,
                 )
-                yield pd.DataFrame(fatia)
-                contador += passo
+                falhas.append(arquivo_desatualizado_nome)
 
-    logger.debug("Encerrando a conexão com o servidor FTP `{}`...", ftp)
-    cliente_ftp.close()
+    if falhas:
+        raise RuntimeError(
+            "A sincronização do espelho de `{}{}` ".format(
+                ftp,
+                caminho_diretorio,
+            )
+            + "falhou para os arquivos: {}.".format(", ".join(falhas))
+        )
+    logger.info("Espelho de `{}` atualizado.", caminho_diretorio)
+    return desatualizados
@@ -0,0 +1,444 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Registra as versões capturadas dos arquivos do DataSUS e planeja recapturas.
+
+O DataSUS republica, sem aviso, arquivos de competências anteriores - por
+exemplo, arquivos de procedimentos ambulatoriais e de internações revisados
+pelos gestores. A cada extração, a função [`extrair_dbc_lotes()`][] pode
+coletar uma impressão digital de cada arquivo lido: o tamanho e a data de
+modificação informados pelo servidor FTP e o resumo criptográfico (SHA-256)
+do conteúdo baixado. As impressões coletadas (ver [`ImpressoesPendentes`][])
+são gravadas no banco de dados na mesma transação que os dados carregados a
+partir dos arquivos.
+
+A função [`planejar_recapturas()`][] compara essas impressões com a listagem
+atual de um diretório do servidor e remove do histórico de capturas apenas os
+registros das capturas que dependem de arquivos republicados, de forma que
+elas voltem a ser agendadas - sem a necessidade de recapturar todo o
+histórico de uma fonte de dados.
+
+As impressões são gravadas na tabela
+`configuracoes.datasus_arquivos_impressoes`, que deve ser criada previamente
+no banco de dados, com as colunas `ftp`, `caminho_diretorio` e `arquivo_nome`
+(que compõem a chave primária), `tamanho`, `modificacao`, `sha256` e
+`atualizacao_data` (com o valor padrão `now()`). Enquanto a tabela não
+existir, as impressões são descartadas com um aviso - sem interromper as
+capturas -, e nenhuma recaptura é planejada.
+
+[`extrair_dbc_lotes()`]: impulsoetl.utilitarios.datasus_ftp.extrair_dbc_lotes
+[`ImpressoesPendentes`]: impulsoetl.utilitarios.datasus_impressoes.ImpressoesPendentes
+[`planejar_recapturas()`]: impulsoetl.utilitarios.datasus_impressoes.planejar_recapturas
+"""
+
+
+from __future__ import annotations
+
+import re
+import threading
+from typing import Any, Dict, Final, Iterable, Mapping, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from impulsoetl.bd import tabelas
+from impulsoetl.loggers import logger
+from impulsoetl.utilitarios.conexoes_ftp import obter_pool
+from impulsoetl.utilitarios.datasus_indice import (
+    EntradasDiretorio,
+    IndiceDiretorioFtp,
+)
+
+# nome do arquivo -> tamanho, data de modificação e resumo do conteúdo
+Impressoes = Dict[str, Dict[str, Any]]
+
+ARQUIVOS_IMPRESSOES_TABELA: Final[str] = (
+    "configuracoes.datasus_arquivos_impressoes"
+)
+
+# representações mínimas das tabelas pré-existentes consultadas pelo
+# planejamento, que dispensam o espelhamento do banco de dados na importação
+_capturas_historico = sa.table(
+    "capturas_historico",
+    sa.column("operacao_id"),
+    sa.column("periodo_id"),
+    sa.column("unidade_geografica_id"),
+    schema="configuracoes",
+)
+_periodos = sa.table(
+    "periodos",
+    sa.column("id"),
+    sa.column("data_inicio"),
+    schema="listas_de_codigos",
+)
+_unidades_geograficas = sa.table(
+    "unidades_geograficas",
+    sa.column("id"),
+    sa.column("id_sus"),
+    schema="listas_de_codigos",
+)
+_ufs = sa.table(
+    "ufs",
+    sa.column("sigla"),
+    sa.column("id_ibge"),
+    schema="listas_de_codigos",
+)
+
+
+def _existe_tabela_impressoes(conexao: Connection) -> bool:
+    esquema, tabela_nome = ARQUIVOS_IMPRESSOES_TABELA.split(".")
+    return sa.inspect(conexao).has_table(tabela_nome, schema=esquema)
+
+
+def registrar_impressoes(
+    sessao: Session,
+    ftp: str,
+    caminho_diretorio: str,
+    impressoes: Impressoes,
+) -> None:
+    """Grava no banco de dados as impressões de arquivos extraídos.
+
+    Esta função não faz *commit* das alterações do banco, de forma que as
+    impressões sejam gravadas na mesma transação que os dados carregados a
+    partir dos arquivos. Se a tabela de impressões não existir no banco de
+    dados, as impressões são descartadas, com um aviso.
+
+    Argumentos:
+        sessao: objeto [`sqlalchemy.orm.session.Session`][] que permite
+            acessar a base de dados da ImpulsoGov.
+        ftp: Endereço do servidor FTP do DataSUS.
+        caminho_diretorio: Caminho do diretório dos arquivos no servidor.
+        impressoes: Dicionário com os nomes dos arquivos como chaves e, como
+            valores, dicionários com o tamanho (`tamanho`), a data de
+            modificação (`modificacao`) e o resumo SHA-256 do conteúdo
+            (`sha256`) de cada arquivo. Se o resumo for `None` - por exemplo,
+            quando o arquivo foi lido a partir de uma cópia colunar -, é
+            mantido o resumo registrado anteriormente.
+
+    [`sqlalchemy.orm.session.Session`]: https://docs.sqlalchemy.org/en/14/orm/session_api.html#sqlalchemy.orm.Session
+    """
+    if not impressoes:
+        return
+    if not _existe_tabela_impressoes(sessao.connection()):
+        logger.warning(
+            "A tabela `{}` não existe no banco de dados; as impressões de {} "
+            + "arquivo(s) de `{}` não serão registradas.",
+            ARQUIVOS_IMPRESSOES_TABELA,
+            len(impressoes),
+            caminho_diretorio,
+        )
+        return
+    arquivos_impressoes = tabelas[ARQUIVOS_IMPRESSOES_TABELA]
+    requisicao = insert(arquivos_impressoes).values(
+        [
+            {
+                "ftp": ftp,
+                "caminho_diretorio": caminho_diretorio.rstrip("/"),
+                "arquivo_nome": arquivo_nome,
+                "tamanho": impressao["tamanho"],
+                "modificacao": impressao["modificacao"],
+                "sha256": impressao["sha256"],
+            }
+            for arquivo_nome, impressao in impressoes.items()
+        ],
+    )
+    sessao.execute(
+        requisicao.on_conflict_do_update(
+            index_elements=[
+                arquivos_impressoes.c.ftp,
+                arquivos_impressoes.c.caminho_diretorio,
+                arquivos_impressoes.c.arquivo_nome,
+            ],
+            set_={
+                "tamanho": requisicao.excluded.tamanho,
+                "modificacao": requisicao.excluded.modificacao,
+                "sha256": sa.func.coalesce(
+                    requisicao.excluded.sha256,
+                    arquivos_impressoes.c.sha256,
+                ),
+                "atualizacao_data": sa.func.now(),
+            },
+        ),
+    )
+    logger.debug(
+        "Registradas impressões de {} arquivo(s) de `{}`.",
+        len(impressoes),
+        caminho_diretorio,
+    )
+
+
+class ImpressoesPendentes(object):
+    """Acumula as impressões dos arquivos lidos durante uma extração.
+
+    As impressões são informadas pela função [`extrair_dbc_lotes()`][] à
+    medida que a leitura de cada arquivo termina - possivelmente em segundo
+    plano, antes que os lotes lidos tenham sido carregados. Por isso, elas
+    são apenas guardadas, e devem ser gravadas com o método
+    [`registrar()`][] depois que todos os lotes forem carregados no banco de
+    dados.
+
+    [`extrair_dbc_lotes()`]: impulsoetl.utilitarios.datasus_ftp.extrair_dbc_lotes
+    [`registrar()`]: impulsoetl.utilitarios.datasus_impressoes.ImpressoesPendentes.registrar
+    """
+
+    def __init__(self):
+        self._impressoes: dict[Tuple[str, str], Impressoes] = {}
+        self._trava = threading.Lock()
+
+    def adicionar(
+        self,
+        ftp: str,
+        caminho_diretorio: str,
+        arquivo_nome: str,
+        impressao: Dict[str, Any],
+    ) -> None:
+        """Guarda a impressão de um arquivo cuja leitura foi concluída."""
+        with self._trava:
+            self._impressoes.setdefault((ftp, caminho_diretorio), {})[
+                arquivo_nome
+            ] = impressao
+
+    def registrar(self, sessao: Session) -> None:
+        """Grava as impressões acumuladas, na transação atual da sessão.
+
+        Argumentos:
+            sessao: objeto [`sqlalchemy.orm.session.Session`][] usado para
+                carregar os dados extraídos dos arquivos.
+
+        [`sqlalchemy.orm.session.Session`]: https://docs.sqlalchemy.org/en/14/orm/session_api.html#sqlalchemy.orm.Session
+        """
+        with self._trava:
+            impressoes_diretorios = self._impressoes
+            self._impressoes = {}
+        for (ftp, caminho_diretorio), impressoes in sorted(
+            impressoes_diretorios.items(),
+        ):
+            registrar_impressoes(
+                sessao,
+                ftp=ftp,
+                caminho_diretorio=caminho_diretorio,
+                impressoes=impressoes,
+            )
+
+
+def consultar_impressoes(
+    conexao: Connection,
+    ftp: str,
+    caminho_diretorio: str,
+) -> Impressoes:
+    """Obtém as impressões registradas dos arquivos de um diretório.
+
+    Argumentos:
+        conexao: Conexão com o banco de dados da ImpulsoGov.
+        ftp: Endereço do servidor FTP do DataSUS.
+        caminho_diretorio: Caminho do diretório no servidor.
+
+    Retorna:
+        Um dicionário no formato aceito pela função
+        [`registrar_impressoes()`][], com os arquivos já extraídos do
+        diretório.
+
+    [`registrar_impressoes()`]: impulsoetl.utilitarios.datasus_impressoes.registrar_impressoes
+    """
+    if not _existe_tabela_impressoes(conexao):
+        return {}
+    arquivos_impressoes = tabelas[ARQUIVOS_IMPRESSOES_TABELA]
+    registros = conexao.execute(
+        sa.select(
+            arquivos_impressoes.c.arquivo_nome,
+            arquivos_impressoes.c.tamanho,
+            arquivos_impressoes.c.modificacao,
+            arquivos_impressoes.c.sha256,
+        ).where(
+            arquivos_impressoes.c.ftp == ftp,
+            arquivos_impressoes.c.caminho_diretorio
+            == caminho_diretorio.rstrip("/"),
+        ),
+    )
+    return {
+        registro.arquivo_nome: {
+            "tamanho": registro.tamanho,
+            "modificacao": registro.modificacao,
+            "sha256": registro.sha256,
+        }
+        for registro in registros
+    }
+
+
+def _normalizar_modificacao(modificacao: str | None) -> str | None:
+    # os comandos MDTM e MLSD podem incluir frações de segundo
+    return modificacao[:14] if modificacao else None
+
+
+def listar_republicacoes(
+    impressoes: Impressoes,
+    entradas: EntradasDiretorio,
+) -> list[str]:
+    """Lista os arquivos já extraídos que foram alterados no servidor.
+
+    Argumentos:
+        impressoes: Impressões registradas dos arquivos de um diretório,
+            conforme obtidas com a função [`consultar_impressoes()`][].
+        entradas: Listagem atual do mesmo diretório, conforme obtida com o
+            método [`IndiceDiretorioFtp.listar()`][].
+
+    Retorna:
+        Lista ordenada com os nomes dos arquivos cujo tamanho ou data de
+        modificação atuais diferem dos registrados. Arquivos que ainda não
+        foram extraídos, que foram removidos do servidor ou cujos atributos
+        não são informados pelo servidor não são incluídos.
+
+    [`consultar_impressoes()`]: impulsoetl.utilitarios.datasus_impressoes.consultar_impressoes
+    [`IndiceDiretorioFtp.listar()`]: impulsoetl.utilitarios.datasus_indice.IndiceDiretorioFtp.listar
+    """
+    republicacoes = []
+    for arquivo_nome, impressao in impressoes.items():
+        entrada = entradas.get(arquivo_nome)
+        if not entrada or entrada["tamanho"] is None:
+            continue
+        if (
+            entrada["tamanho"],
+            _normalizar_modificacao(entrada["modificacao"]),
+        ) != (
+            impressao["tamanho"],
+            _normalizar_modificacao(impressao["modificacao"]),
+        ):
+            republicacoes.append(arquivo_nome)
+    return sorted(republicacoes)
+
+
+def _selecionar_capturas(
+    capturas: Iterable[Mapping[str, Any]],
+    operacoes: Mapping[str, str],
+    republicacoes: Iterable[str],
+) -> list[dict[str, Any]]:
+    """Seleciona as capturas que dependem de arquivos republicados."""
+    republicacoes = list(republicacoes)
+    selecionadas = []
+    for captura in capturas:
+        padrao = re.compile(
+            operacoes[captura["operacao_id"]].format(
+                uf_sigla=captura["uf_sigla"],
+                periodo_data_inicio=captura["periodo_data_inicio"],
+            ),
+            re.IGNORECASE,
+        )
+        if any(padrao.fullmatch(nome) for nome in republicacoes):
+            selecionadas.append(
+                {
+                    "operacao_id": captura["operacao_id"],
+                    "periodo_id": captura["periodo_id"],
+                    "unidade_geografica_id": captura["unidade_geografica_id"],
+                },
+            )
+    return selecionadas
+
+
+def planejar_recapturas(
+    sessao: Session,
+    ftp: str,
+    caminho_diretorio: str,
+    operacoes: Mapping[str, str],
+    indice: IndiceDiretorioFtp | None = None,
+) -> list[dict[str, Any]]:
+    """Agenda novamente as capturas que dependem de arquivos republicados.
+
+    Compara as impressões registradas dos arquivos de um diretório com a
+    listagem atual do servidor FTP e remove do histórico de capturas os
+    registros, em nível de unidade federativa, das capturas cujos arquivos
+    foram alterados. Com isso, essas capturas voltam a constar entre os
+    agendamentos das respectivas operações.
+
+    Argumentos:
+        sessao: objeto [`sqlalchemy.orm.session.Session`][] que permite
+            acessar a base de dados da ImpulsoGov.
+        ftp: Endereço do servidor FTP do DataSUS.
+        caminho_diretorio: Caminho do diretório no servidor.
+        operacoes: Dicionário com os identificadores das operações de
+            captura que usam arquivos do diretório como chaves e, como
+            valores, os padrões dos nomes dos arquivos lidos por cada
+            captura - expressões regulares com os campos de substituição
+            `{uf_sigla}` e `{periodo_data_inicio}`, como
+            `"PA{uf_sigla}{periodo_data_inicio:%y%m}[a-z]?.dbc"`. Todas as
+            operações que dependem do diretório devem ser informadas na
+            mesma chamada, já que as impressões são atualizadas na primeira
+            recaptura de cada arquivo.
+        indice: Índice local dos diretórios do servidor FTP, opcional. O
+            servidor sempre é consultado, para obter a listagem atual.
+
+    Retorna:
+        Lista de dicionários com os identificadores da operação
+        (`operacao_id`), do período (`periodo_id`) e da unidade geográfica
+        (`unidade_geografica_id`) de cada captura agendada novamente.
+
+    [`sqlalchemy.orm.session.Session`]: https://docs.sqlalchemy.org/en/14/orm/session_api.html#sqlalchemy.orm.Session
+    """
+    impressoes = consultar_impressoes(
+        sessao.connection(),
+        ftp,
+        caminho_diretorio,
+    )
+    if not impressoes:
+        logger.info("Nenhum arquivo de `{}` registrado.", caminho_diretorio)
+        return []
+
+    indice = indice or IndiceDiretorioFtp()
+    with obter_pool(ftp).conexao() as cliente_ftp:
+        cliente_ftp.cwd(caminho_diretorio)
+        entradas = indice.listar(
+            cliente_ftp,
+            ftp,
+            caminho_diretorio,
+            atualizar=True,
+        )
+    republicacoes = listar_republicacoes(impressoes, entradas)
+    if not republicacoes:
+        logger.info("Nenhum arquivo republicado em `{}`.", caminho_diretorio)
+        return []
+    logger.info(
+        "Arquivos republicados em `{}`: {}.",
+        caminho_diretorio,
+        ", ".join(republicacoes),
+    )
+
+    capturas = sessao.execute(
+        sa.select(
+            _capturas_historico.c.operacao_id,
+            _capturas_historico.c.periodo_id,
+            _capturas_historico.c.unidade_geografica_id,
+            _periodos.c.data_inicio.label("periodo_data_inicio"),
+            _ufs.c.sigla.label("uf_sigla"),
+        )
+        .join(
+            _periodos,
+            _periodos.c.id == _capturas_historico.c.periodo_id,
+        )
+        .join(
+            _unidades_geograficas,
+            _unidades_geograficas.c.id
+            == _capturas_historico.c.unidade_geografica_id,
+        )
+        .join(_ufs, _ufs.c.id_ibge == _unidades_geograficas.c.id_sus)
+        .where(_capturas_historico.c.operacao_id.in_(list(operacoes))),
+    )
+    recapturas = _selecionar_capturas(
+        (captura._mapping for captura in capturas),
+        operacoes=operacoes,
+        republicacoes=republicacoes,
+    )
+    for recaptura in recapturas:
+        sessao.execute(
+            _capturas_historico.delete().where(
+                *(
+                    _capturas_historico.c[coluna] == valor
+                    for coluna, valor in recaptura.items()
+                ),
+            ),
+        )
+    sessao.commit()
+    logger.info("{} captura(s) agendada(s) novamente.", len(recapturas))
+    return recapturas
@@ -0,0 +1,243 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Mantém índices locais do conteúdo dos diretórios do FTP do DataSUS.
+
+Atributos:
+    INDICE_CAMINHO: Diretório onde são guardados os índices dos diretórios
+        do FTP do DataSUS. Pode ser definido por meio da variável de ambiente
+        `IMPULSOETL_DATASUS_INDICE_CAMINHO`. Por padrão, é um subdiretório
+        `indices` do armazenamento local de arquivos baixados.
+    INDICE_VALIDADE: Tempo, em segundos, durante o qual o índice de um
+        diretório é considerado atualizado e pode ser usado sem consultar
+        novamente o servidor. Pode ser definido por meio da variável de
+        ambiente `IMPULSOETL_DATASUS_INDICE_VALIDADE`. Se o valor for zero,
+        o servidor é consultado a cada listagem.
+"""
+
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from ftplib import FTP, error_perm  # noqa: B402  # nosec: B402
+from pathlib import Path
+from typing import Any, Dict, Final
+
+from impulsoetl.loggers import logger
+from impulsoetl.utilitarios.datasus_cache import CACHE_CAMINHO
+
+INDICE_CAMINHO: Final[str] = os.getenv(
+    "IMPULSOETL_DATASUS_INDICE_CAMINHO",
+    os.path.join(CACHE_CAMINHO, "indices"),
+)
+INDICE_VALIDADE: Final[int] = int(
+    os.getenv("IMPULSOETL_DATASUS_INDICE_VALIDADE", 3600),
+)
+
+# nome do arquivo -> tamanho, data de modificação e instante em que essa
+# versão do arquivo foi vista pela primeira vez
+EntradasDiretorio = Dict[str, Dict[str, Any]]
+
+
+class IndiceDiretorioFtp(object):
+    """Representa os índices locais de diretórios de servidores FTP.
+
+    O conteúdo de cada diretório é obtido por meio do comando `MLSD`, que
+    informa o nome, o tamanho e a data de modificação de todos os arquivos
+    em uma única resposta; se o servidor não suportar o comando, são listados
+    apenas os nomes dos arquivos, com o comando `NLST`. O resultado é
+    guardado em disco e reaproveitado pelas listagens seguintes enquanto não
+    expirar.
+
+    As extrações sempre atualizam o índice antes de buscar os arquivos pelo
+    nome ou por expressões regulares, já que uma listagem guardada pode não
+    incluir partes de arquivos publicadas depois da última atualização. Em
+    troca, o tamanho e a data de modificação informados pela listagem são
+    usados para identificar a versão de cada arquivo extraído, sem que seja
+    necessário consultar o servidor arquivo por arquivo.
+
+    A cada atualização, o índice compara o conteúdo do diretório com a
+    listagem anterior e registra o instante em que cada arquivo - ou cada
+    nova versão de um arquivo republicado - foi visto pela primeira vez (ver
+    [`listar_alteracoes()`][]).
+
+    [`listar_alteracoes()`]: impulsoetl.utilitarios.datasus_indice.IndiceDiretorioFtp.listar_alteracoes
+    """
+
+    def __init__(
+        self,
+        diretorio: Path | str = INDICE_CAMINHO,
+        validade: int = INDICE_VALIDADE,
+    ):
+        """Instancia uma representação dos índices de diretórios FTP.
+
+        Argumentos:
+            diretorio: Caminho do diretório onde os índices devem ser
+                armazenados. É criado, caso ainda não exista.
+            validade: Tempo, em segundos, durante o qual um índice pode ser
+                usado sem consultar novamente o servidor.
+        """
+        self.diretorio = Path(diretorio)
+        self.validade = validade
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+
+    def _caminho(self, ftp: str, caminho_diretorio: str) -> Path:
+        identificacao = "{}|{}".format(ftp, caminho_diretorio.rstrip("/"))
+        return self.diretorio / "{}.json".format(
+            hashlib.sha256(identificacao.encode("utf-8")).hexdigest(),
+        )
+
+    def _ler(self, ftp: str, caminho_diretorio: str) -> dict | None:
+        try:
+            with open(
+                self._caminho(ftp, caminho_diretorio),
+                "r",
+                encoding="utf-8",
+            ) as arquivo:
+                return json.load(arquivo)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _gravar(self, ftp: str, caminho_diretorio: str, indice: dict) -> None:
+        # grava primeiro em um arquivo temporário, de forma que outros
+        # processos nunca vejam um índice incompleto
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=self.diretorio,
+            suffix=".parcial",
+            delete=False,
+        ) as arquivo:
+            json.dump(indice, arquivo)
+        os.replace(arquivo.name, self._caminho(ftp, caminho_diretorio))
+
+    @staticmethod
+    def _consultar_servidor(cliente_ftp: FTP) -> EntradasDiretorio:
+        """Lista os arquivos do diretório atual de uma conexão FTP."""
+        try:
+            return {
+                nome: {
+                    "tamanho": (
+                        int(fatos["size"]) if "size" in fatos else None
+                    ),
+                    "modificacao": fatos.get("modify"),
+                }
+                for nome, fatos in cliente_ftp.mlsd(
+                    facts=["type", "size", "modify"],
+                )
+                if fatos.get("type", "file") == "file"
+            }
+        except error_perm:
+            logger.debug(
+                "O servidor não suporta o comando MLSD; usando NLST...",
+            )
+        return {
+            nome: {"tamanho": None, "modificacao": None}
+            for nome in cliente_ftp.nlst()
+        }
+
+    def listar(
+        self,
+        cliente_ftp: FTP,
+        ftp: str,
+        caminho_diretorio: str,
+        atualizar: bool = False,
+    ) -> EntradasDiretorio:
+        """Lista os arquivos de um diretório de um servidor FTP.
+
+        Argumentos:
+            cliente_ftp: Instância de conexão com o servidor FTP, já no
+                diretório a ser listado.
+            ftp: Endereço do servidor FTP.
+            caminho_diretorio: Caminho do diretório no servidor FTP.
+            atualizar: Indica se o servidor deve ser consultado mesmo que o
+                índice guardado ainda não tenha expirado.
+
+        Retorna:
+            Um dicionário com os nomes dos arquivos como chaves e, como
+            valores, dicionários com o tamanho (`tamanho`) e a data de
+            modificação (`modificacao`) de cada arquivo - ou `None`, caso o
+            servidor não os informe -, além do instante, em segundos desde a
+            [época Unix][], em que essa versão do arquivo foi vista pela
+            primeira vez (`descoberta`).
+
+        [época Unix]: https://docs.python.org/3/library/time.html#epoch
+        """
+        indice_anterior = self._ler(ftp, caminho_diretorio)
+        agora = time.time()
+        if (
+            indice_anterior
+            and not atualizar
+            and agora - indice_anterior["atualizacao"] < self.validade
+        ):
+            logger.debug("Usando índice local de `{}`.", caminho_diretorio)
+            return indice_anterior["entradas"]
+
+        logger.info("Atualizando índice de `{}`...", caminho_diretorio)
+        entradas = self._consultar_servidor(cliente_ftp)
+        entradas_anteriores = (
+            indice_anterior["entradas"] if indice_anterior else {}
+        )
+        for nome, entrada in entradas.items():
+            entrada_anterior = entradas_anteriores.get(nome)
+            if entrada_anterior and (
+                entrada_anterior["tamanho"],
+                entrada_anterior["modificacao"],
+            ) == (entrada["tamanho"], entrada["modificacao"]):
+                entrada["descoberta"] = entrada_anterior["descoberta"]
+            else:
+                entrada["descoberta"] = agora
+
+        self._gravar(
+            ftp,
+            caminho_diretorio,
+            {"atualizacao": agora, "entradas": entradas},
+        )
+        return entradas
+
+    def listar_alteracoes(
+        self,
+        cliente_ftp: FTP,
+        ftp: str,
+        caminho_diretorio: str,
+        desde: float,
+        atualizar: bool = False,
+    ) -> EntradasDiretorio:
+        """Lista os arquivos adicionados ou republicados em um diretório.
+
+        Argumentos:
+            cliente_ftp: Instância de conexão com o servidor FTP, já no
+                diretório a ser listado.
+            ftp: Endereço do servidor FTP.
+            caminho_diretorio: Caminho do diretório no servidor FTP.
+            desde: Instante, em segundos desde a [época Unix][], a partir do
+                qual as alterações devem ser consideradas - por exemplo, o
+                início da última execução de uma captura.
+            atualizar: Indica se o servidor deve ser consultado mesmo que o
+                índice guardado ainda não tenha expirado.
+
+        Retorna:
+            Um dicionário no mesmo formato retornado pelo método
+            [`listar()`][], apenas com os arquivos cuja versão atual foi
+            vista pela primeira vez a partir do instante indicado.
+
+        [época Unix]: https://docs.python.org/3/library/time.html#epoch
+        [`listar()`]: impulsoetl.utilitarios.datasus_indice.IndiceDiretorioFtp.listar
+        """
+        entradas = self.listar(
+            cliente_ftp,
+            ftp,
+            caminho_diretorio,
+            atualizar=atualizar,
+        )
+        return {
+            nome: entrada
+            for nome, entrada in entradas.items()
+            if entrada["descoberta"] >= desde
+        }
@@ -0,0 +1,342 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Mantém cópias colunares dos arquivos de disseminação do DataSUS.
+
+Cada arquivo `.dbc` lido é convertido uma única vez em um arquivo Parquet,
+organizado em partições por fonte, unidade federativa e competência. Leituras
+posteriores do mesmo arquivo - por exemplo, ao reprocessar uma competência
+com novas condições ou para novas tabelas de destino - são feitas a partir
+dessa cópia, lendo apenas as colunas e grupos de linhas necessários, sem
+descompactar e decodificar novamente o arquivo original.
+
+Os valores são armazenados na forma em que são lidos do arquivo DBF: campos
+de texto como textos, e os demais campos como sequências de bytes, que são
+convertidas em valores Python na leitura com as mesmas regras usadas para os
+arquivos originais. O cabeçalho do arquivo DBF é guardado nos metadados do
+arquivo Parquet.
+
+Atributos:
+    PARQUET_CAMINHO: Diretório onde são guardadas as cópias colunares dos
+        arquivos do DataSUS. Pode ser definido por meio da variável de
+        ambiente `IMPULSOETL_DATASUS_PARQUET_CAMINHO`. Se não for definido,
+        as cópias colunares não são utilizadas.
+"""
+
+
+from __future__ import annotations
+
+import base64
+import io
+import os
+import re
+from pathlib import Path
+from typing import Final, Iterable, Iterator, SupportsInt
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from impulsoetl.loggers import logger
+from impulsoetl.utilitarios.condicoes import FiltroRegistros, OperacoesFiltro
+from impulsoetl.utilitarios.dbf import TabelaDBF
+
+PARQUET_CAMINHO: Final[str] = os.getenv(
+    "IMPULSOETL_DATASUS_PARQUET_CAMINHO",
+    "",
+)
+
+_METADADOS_CABECALHO: Final[bytes] = b"impulsoetl.dbf.cabecalho"
+
+
+class _OperacoesArrow(OperacoesFiltro):
+    """Traduz condições de filtro em expressões do Apache Arrow."""
+
+    def __init__(self, colunas_texto: Iterable[str]):
+        self.colunas_texto = {
+            coluna.strip().upper(): coluna for coluna in colunas_texto
+        }
+
+    def pertence(
+        self,
+        coluna: str,
+        valores: list[str],
+    ) -> ds.Expression | None:
+        nome = self.colunas_texto.get(coluna.strip().upper())
+        if nome is None:
+            return None
+        return ds.field(nome).isin(valores)
+
+
+def _tipo_arrow(tabela_dbf: TabelaDBF, campo) -> pa.DataType:
+    """Define o tipo de dados usado para armazenar um campo DBF."""
+    if campo.length and tabela_dbf.decodifica_como_texto(campo):
+        return pa.string()
+    return pa.binary()
+
+
+class ArmazenamentoParquet(object):
+    """Representa um diretório com cópias colunares de arquivos do DataSUS.
+
+    As cópias são organizadas em subdiretórios no formato
+    `fonte=<fonte>/uf=<uf>/competencia=<competencia>`, conforme o nome do
+    arquivo de disseminação (por exemplo, o arquivo `PASP2108a.dbc` é
+    guardado na partição `fonte=PA/uf=SP/competencia=2108`). Cada cópia é
+    identificada pela mesma chave usada para os arquivos originais no
+    [`CacheDatasus`][], de modo que uma republicação do arquivo no servidor
+    FTP gera uma nova cópia, que substitui a anterior.
+
+    [`CacheDatasus`]: impulsoetl.utilitarios.datasus_cache.CacheDatasus
+    """
+
+    def __init__(self, diretorio: Path | str = PARQUET_CAMINHO):
+        """Instancia uma representação do armazenamento de cópias colunares.
+
+        Argumentos:
+            diretorio: Caminho do diretório onde as cópias devem ser
+                armazenadas. É criado, caso ainda não exista.
+        """
+        self.diretorio = Path(diretorio)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def particionar(arquivo_nome: str) -> dict[str, str]:
+        """Identifica a fonte, a UF e a competência de um arquivo do DataSUS.
+
+        Argumentos:
+            arquivo_nome: Nome do arquivo de disseminação, como
+                `PASP2108a.dbc` ou `VIOLBR21.dbc`.
+
+        Retorna:
+            Um dicionário com os valores das partições do arquivo. Se o nome
+            não seguir o padrão de nomenclatura dos arquivos de disseminação,
+            apenas a fonte é definida, como o nome do arquivo sem extensão.
+        """
+        nome = Path(arquivo_nome).stem.upper()
+        correspondencia = re.match(
+            r"^(?P<fonte>[A-Z]+?)(?P<uf>[A-Z]{2})"
+            + r"(?P<competencia>\d{2}|\d{4})[A-Z]?$",
+            nome,
+        )
+        if not correspondencia:
+            return {"fonte": nome}
+        return correspondencia.groupdict()
+
+    def caminho(self, arquivo_nome: str, chave: str) -> Path:
+        """Define o caminho da cópia colunar de um arquivo do DataSUS.
+
+        Argumentos:
+            arquivo_nome: Nome do arquivo de disseminação.
+            chave: Identificador da versão do arquivo, conforme gerado pelo
+                método [`CacheDatasus.gerar_chave()`][].
+
+        Retorna:
+            O caminho do arquivo Parquet correspondente.
+
+        [`CacheDatasus.gerar_chave()`]: impulsoetl.utilitarios.datasus_cache.CacheDatasus.gerar_chave
+        """
+        diretorio = self.diretorio.joinpath(
+            *(
+                "{}={}".format(particao, valor)
+                for particao, valor in self.particionar(arquivo_nome).items()
+            ),
+        )
+        return diretorio / "{}-{}.parquet".format(
+            Path(arquivo_nome).stem,
+            chave[:16],
+        )
+
+    def obter(self, arquivo_nome: str, chave: str) -> Path | None:
+        """Busca a cópia colunar de uma versão de um arquivo do DataSUS.
+
+        Argumentos:
+            arquivo_nome: Nome do arquivo de disseminação.
+            chave: Identificador da versão do arquivo, conforme gerado pelo
+                método [`CacheDatasus.gerar_chave()`][].
+
+        Retorna:
+            O caminho do arquivo Parquet, se houver uma cópia da versão
+            desejada; ou `None`, caso contrário.
+
+        [`CacheDatasus.gerar_chave()`]: impulsoetl.utilitarios.datasus_cache.CacheDatasus.gerar_chave
+        """
+        caminho = self.caminho(arquivo_nome, chave)
+        if not caminho.exists():
+            return None
+        logger.info("Usando cópia colunar de `{}`.", arquivo_nome)
+        return caminho
+
+    def armazenar(
+        self,
+        tabela_dbf: TabelaDBF,
+        arquivo_nome: str,
+        chave: str,
+        passo: SupportsInt = 100000,
+    ) -> Path:
+        """Converte uma tabela DBF em uma cópia colunar.
+
+        Argumentos:
+            tabela_dbf: Tabela DBF ainda não lida, com todos os campos
+                selecionados.
+            arquivo_nome: Nome do arquivo de disseminação.
+            chave: Identificador da versão do arquivo, conforme gerado pelo
+                método [`CacheDatasus.gerar_chave()`][].
+            passo: Número de registros lidos da tabela a cada vez. Cada lote
+                lido é gravado como um grupo de linhas do arquivo Parquet.
+
+        Retorna:
+            O caminho do arquivo Parquet gerado.
+
+        [`CacheDatasus.gerar_chave()`]: impulsoetl.utilitarios.datasus_cache.CacheDatasus.gerar_chave
+        """
+        caminho = self.caminho(arquivo_nome, chave)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        esquema = pa.schema(
+            [
+                (campo.name, _tipo_arrow(tabela_dbf, campo))
+                for campo in tabela_dbf.campos_selecionados
+            ],
+            metadata={
+                _METADADOS_CABECALHO: base64.b64encode(tabela_dbf.cabecalho),
+            },
+        )
+
+        logger.info("Gerando cópia colunar de `{}`...", arquivo_nome)
+        # grava primeiro em um arquivo temporário, de forma que outros
+        # processos nunca vejam uma cópia incompleta
+        caminho_temporario = caminho.with_suffix(".parcial")
+        try:
+            with pq.ParquetWriter(
+                str(caminho_temporario),
+                esquema,
+                compression="zstd",
+            ) as escritor:
+                for colunas in tabela_dbf.ler_colunas_brutas(passo):
+                    escritor.write_table(
+                        pa.Table.from_arrays(
+                            [
+                                pa.array(colunas[coluna.name], coluna.type)
+                                for coluna in esquema
+                            ],
+                            schema=esquema,
+                        ),
+                    )
+        except BaseException:
+            caminho_temporario.unlink(missing_ok=True)
+            raise
+        os.replace(caminho_temporario, caminho)
+
+        # remove cópias de versões anteriores do mesmo arquivo
+        for caminho_antigo in caminho.parent.glob(
+            "{}-*.parquet".format(Path(arquivo_nome).stem),
+        ):
+            if caminho_antigo != caminho:
+                logger.debug("Removendo cópia antiga `{}`...", caminho_antigo)
+                caminho_antigo.unlink()
+
+        logger.debug(
+            "Cópia colunar de `{}` armazenada em `{}`.",
+            arquivo_nome,
+            caminho,
+        )
+        return caminho
+
+
+def abrir_tabela_parquet(
+    caminho: Path | str,
+    colunas: Iterable[str] | None = None,
+    **kwargs,
+) -> TabelaDBF:
+    """Reconstrói a tabela DBF de origem de uma cópia colunar.
+
+    Argumentos:
+        caminho: Caminho do arquivo Parquet.
+        colunas: Nomes das colunas a serem selecionadas, opcional.
+        \*\*kwargs: Argumentos adicionais a serem passados para o construtor
+            da classe [`TabelaDBF`][].
+
+    Retorna:
+        Uma instância da classe [`TabelaDBF`][] com o cabeçalho do arquivo
+        DBF original, sem registros.
+
+    [`TabelaDBF`]: impulsoetl.utilitarios.dbf.TabelaDBF
+    """
+    esquema = pq.read_schema(str(caminho))
+    return TabelaDBF(
+        io.BytesIO(base64.b64decode(esquema.metadata[_METADADOS_CABECALHO])),
+        colunas=colunas,
+        **kwargs,
+    )
+
+
+def ler_lotes_parquet(
+    caminho: Path | str,
+    passo: SupportsInt,
+    colunas: Iterable[str] | None = None,
+    filtro: FiltroRegistros | None = None,
+    **kwargs,
+) -> Iterator[pd.DataFrame]:
+    """Lê lotes de registros de uma cópia colunar de um arquivo do DataSUS.
+
+    Os DataFrames gerados são equivalentes aos obtidos com o método
+    [`TabelaDBF.ler_lotes()`][] a partir do arquivo original.
+
+    Argumentos:
+        caminho: Caminho do arquivo Parquet.
+        passo: Número máximo de registros em cada lote. Pode ser um objeto
+            conversível em inteiro, consultado no início da leitura.
+        colunas: Nomes das colunas a serem lidas. A comparação com os nomes
+            dos campos desconsidera diferenças entre maiúsculas e minúsculas
+            e espaços nas extremidades. Se for `None` (padrão), todas as
+            colunas são lidas.
+        filtro: Condições usadas para descartar grupos de linhas e registros
+            durante a leitura (ver [`FiltroRegistros`][]). Os registros que
+            certamente não atendem às condições são descartados; os demais
+            registros ainda precisam ser verificados com as condições
+            originais.
+        \*\*kwargs: Argumentos adicionais a serem passados para o construtor
+            da classe [`TabelaDBF`][], usada para converter os valores lidos.
+
+    Gera:
+        A cada iteração, um objeto [`pandas.DataFrame`][] com um lote de
+        registros.
+
+    [`TabelaDBF.ler_lotes()`]: impulsoetl.utilitarios.dbf.TabelaDBF.ler_lotes
+    [`FiltroRegistros`]: impulsoetl.utilitarios.condicoes.FiltroRegistros
+    [`TabelaDBF`]: impulsoetl.utilitarios.dbf.TabelaDBF
+    [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+    """
+    conjunto = ds.dataset(str(caminho), format="parquet")
+    tabela_dbf = abrir_tabela_parquet(caminho, colunas=colunas, **kwargs)
+    expressao = None
+    if filtro is not None:
+        expressao = filtro.traduzir(
+            _OperacoesArrow(
+                coluna.name
+                for coluna in conjunto.schema
+                if coluna.type == pa.string()
+            ),
+        )
+
+    campos = tabela_dbf.campos_selecionados
+    for lote in conjunto.to_batches(
+        columns=[campo.name for campo in campos],
+        filter=expressao,
+        batch_size=int(passo),
+    ):
+        if not lote.num_rows:
+            continue
+        valores = {}
+        for campo, coluna in zip(campos, lote.columns):
+            valores_coluna = coluna.to_numpy(zero_copy_only=False)
+            if coluna.type == pa.string():
+                valores[campo.name] = valores_coluna
+            else:
+                valores[campo.name] = tabela_dbf.converter_valores_brutos(
+                    campo,
+                    valores_coluna,
+                )
+        yield pd.DataFrame(valores).infer_objects()
@@ -0,0 +1,378 @@
+# SPDX-FileCopyrightText: 2003, 2012 Mark Adler
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT AND Zlib
+
+
+"""Descompacta arquivos .dbc do DataSUS sem gerar arquivos intermediários.
+
+Os arquivos `.dbc` distribuídos pelo DataSUS são arquivos DBF cujos registros
+foram comprimidos com a biblioteca *PKWare Data Compression Library* (DCL).
+O cabeçalho do arquivo DBF original é preservado sem compressão no início do
+arquivo `.dbc`, seguido de quatro bytes de verificação (CRC32) e do fluxo de
+dados comprimidos.
+
+Este módulo expõe o conteúdo descompactado como um objeto de arquivo, lido à
+medida em que os dados são descompactados - sem que seja necessário gravar em
+disco o arquivo DBF completo antes de iniciar a leitura.
+
+Sempre que o sistema operacional permite, a descompactação é feita pelo
+decodificador em C distribuído com o pacote [PySUS][], que grava os dados em
+um *pipe* lido pelo processo Python. Nos demais casos, é usado um
+decodificador escrito em Python puro - uma adaptação do programa
+[`blast.c`][], de Mark Adler, distribuído sob a licença zlib -, que é
+consideravelmente mais lento.
+
+[PySUS]: https://github.com/AlertaDengue/PySUS
+[`blast.c`]: https://github.com/madler/zlib/blob/master/contrib/blast/blast.c
+"""
+
+
+from __future__ import annotations
+
+import io
+import os
+import threading
+from pathlib import Path
+from typing import BinaryIO, Final, Iterator
+
+from pysus.utilities.readdbc import dbc2dbf
+
+from impulsoetl.loggers import logger
+
+# Tamanho máximo de um código de Huffman, em bits
+_CODIGO_BITS_MAX: Final[int] = 13
+# Tamanho máximo da janela de bytes que podem ser referenciados por cópias
+_JANELA_TAMANHO_MAX: Final[int] = 4096
+
+# Comprimentos dos códigos de literais, de comprimentos e de distâncias, no
+# formato compacto usado pela biblioteca PKWare (ver `blast.c`)
+_LITERAIS_COMPRIMENTOS: Final[bytes] = bytes(
+    [
+        11, 124, 8, 7, 28, 7, 188, 13, 76, 4, 10, 8, 12, 10, 12, 10, 8, 23,
+        8, 9, 7, 6, 7, 8, 7, 6, 55, 8, 23, 24, 12, 11, 7, 9, 11, 12, 6, 7,
+        22, 5, 7, 24, 6, 11, 9, 6, 7, 22, 7, 11, 38, 7, 9, 8, 25, 11, 8, 11,
+        9, 12, 8, 12, 5, 38, 5, 38, 5, 11, 7, 5, 6, 21, 6, 10, 53, 8, 7, 24,
+        10, 27, 44, 253, 253, 253, 252, 252, 252, 13, 12, 45, 12, 45, 12, 61,
+        12, 45, 44, 173,
+    ],
+)
+_COMPRIMENTOS_COMPRIMENTOS: Final[bytes] = bytes([2, 35, 36, 53, 38, 23])
+_DISTANCIAS_COMPRIMENTOS: Final[bytes] = bytes(
+    [2, 20, 53, 230, 247, 151, 248],
+)
+# Valores base e bits adicionais de cada código de comprimento
+_COMPRIMENTOS_BASE: Final[tuple[int, ...]] = (
+    3, 2, 4, 5, 6, 7, 8, 9, 10, 12, 16, 24, 40, 72, 136, 264,
+)
+_COMPRIMENTOS_BITS_EXTRAS: Final[tuple[int, ...]] = (
+    0, 0, 0, 0, 0, 0, 0, 0, 1, 2, 3, 4, 5, 6, 7, 8,
+)
+# Comprimento que sinaliza o fim do fluxo de dados comprimidos
+_COMPRIMENTO_FIM: Final[int] = 519
+
+
+def _construir_tabela(representacao: bytes) -> list[tuple[int, int]]:
+    """Gera uma tabela de decodificação para um código de Huffman.
+
+    Argumentos:
+        representacao: Comprimentos dos códigos de cada símbolo, no formato
+            compacto da biblioteca PKWare - em que os quatro bits menos
+            significativos de cada byte indicam um comprimento e os quatro
+            mais significativos, o número de repetições adicionais.
+
+    Retorna:
+        Uma lista com `2 ** 13` posições, indexada pelos próximos 13 bits do
+        fluxo de entrada (na ordem em que são lidos), em que cada posição
+        contém uma tupla com o símbolo decodificado e o número de bits que
+        o código desse símbolo ocupa.
+    """
+    comprimentos = []
+    for item in representacao:
+        comprimentos.extend([item & 15] * ((item >> 4) + 1))
+
+    # atribui os códigos canônicos, em ordem de comprimento e de símbolo
+    tabela: list[tuple[int, int]] = [(-1, 0)] * (1 << _CODIGO_BITS_MAX)
+    codigo = 0
+    for comprimento in range(1, _CODIGO_BITS_MAX + 1):
+        for simbolo, simbolo_comprimento in enumerate(comprimentos):
+            if simbolo_comprimento != comprimento:
+                continue
+            # os códigos são armazenados com os bits invertidos, a partir do
+            # bit mais significativo
+            valor = 0
+            for posicao in range(comprimento):
+                bit = (codigo >> (comprimento - 1 - posicao)) & 1
+                valor |= (bit ^ 1) << posicao
+            for complemento in range(1 << (_CODIGO_BITS_MAX - comprimento)):
+                tabela[valor | (complemento << comprimento)] = (
+                    simbolo,
+                    comprimento,
+                )
+            codigo += 1
+        codigo <<= 1
+    return tabela
+
+
+_LITERAIS_TABELA: Final = _construir_tabela(_LITERAIS_COMPRIMENTOS)
+_COMPRIMENTOS_TABELA: Final = _construir_tabela(_COMPRIMENTOS_COMPRIMENTOS)
+_DISTANCIAS_TABELA: Final = _construir_tabela(_DISTANCIAS_COMPRIMENTOS)
+
+
+def descompactar_blast(
+    entrada: BinaryIO,
+    bloco_tamanho: int = 2**16,
+) -> Iterator[bytes]:
+    """Descompacta um fluxo de dados comprimido com a biblioteca PKWare DCL.
+
+    Argumentos:
+        entrada: Objeto de arquivo binário, posicionado no início dos dados
+            comprimidos.
+        bloco_tamanho: Quantidade aproximada de bytes descompactados gerados
+            a cada iteração.
+
+    Gera:
+        Trechos sucessivos dos dados descompactados.
+
+    Exceções:
+        Levanta um erro [`ValueError`][] se o fluxo de dados for inválido ou
+        terminar antes do código de encerramento.
+
+    [`ValueError`]: https://docs.python.org/3/library/exceptions.html#ValueError
+    """
+    # Por desempenho, o laço principal usa apenas variáveis locais, e o
+    # acumulador de bits é reabastecido com seis bytes por vez sempre que
+    # houver menos bits do que o necessário para decodificar o maior
+    # elemento possível (1 + 13 + 8 + 13 + 6 = 41 bits).
+    cabecalho = entrada.read(2)
+    if len(cabecalho) < 2:
+        raise ValueError("Fluxo de dados comprimidos incompleto.")
+    literais_codificados, dicionario_bits = cabecalho
+    if literais_codificados > 1:
+        raise ValueError("Formato de literais inválido no fluxo comprimido.")
+    if not 4 <= dicionario_bits <= 6:
+        raise ValueError("Tamanho de dicionário inválido no fluxo comprimido.")
+
+    dados = b""
+    posicao = 0
+    acumulador = 0
+    bits_disponiveis = 0
+
+    literais = _LITERAIS_TABELA
+    comprimentos = _COMPRIMENTOS_TABELA
+    distancias = _DISTANCIAS_TABELA
+    comprimentos_base = _COMPRIMENTOS_BASE
+    comprimentos_extras = _COMPRIMENTOS_BITS_EXTRAS
+    mascara_codigo = (1 << _CODIGO_BITS_MAX) - 1
+    dicionario_mascara = (1 << dicionario_bits) - 1
+    janela_tamanho = _JANELA_TAMANHO_MAX
+    limite_saida = bloco_tamanho + janela_tamanho
+
+    saida = bytearray()
+    ler = entrada.read
+
+    while True:
+        if bits_disponiveis < 41:
+            if posicao + 6 > len(dados):
+                dados = dados[posicao:] + ler(bloco_tamanho)
+                posicao = 0
+            trecho = dados[posicao:posicao + 6]
+            acumulador |= int.from_bytes(trecho, "little") << bits_disponiveis
+            bits_disponiveis += 8 * len(trecho)
+            posicao += 6
+
+        if acumulador & 1:
+            # par comprimento/distância
+            simbolo, bits = comprimentos[(acumulador >> 1) & mascara_codigo]
+            acumulador >>= bits + 1
+            extras = comprimentos_extras[simbolo]
+            comprimento = comprimentos_base[simbolo] + (
+                acumulador & ((1 << extras) - 1)
+            )
+            acumulador >>= extras
+            bits_disponiveis -= bits + 1 + extras
+            if comprimento == _COMPRIMENTO_FIM:
+                break
+
+            simbolo, bits = distancias[acumulador & mascara_codigo]
+            acumulador >>= bits
+            if comprimento == 2:
+                distancia = ((simbolo << 2) | (acumulador & 3)) + 1
+                acumulador >>= 2
+                bits_disponiveis -= bits + 2
+            else:
+                distancia = (
+                    (simbolo << dicionario_bits)
+                    | (acumulador & dicionario_mascara)
+                ) + 1
+                acumulador >>= dicionario_bits
+                bits_disponiveis -= bits + dicionario_bits
+            if bits_disponiveis < 0:
+                break
+
+            inicio = len(saida) - distancia
+            if inicio < 0:
+                raise ValueError(
+                    "Distância inválida no fluxo de dados comprimidos.",
+                )
+            if distancia >= comprimento:
+                saida += saida[inicio:inicio + comprimento]
+            else:
+                # cópia sobreposta: repete o padrão dos últimos bytes
+                padrao = saida[inicio:]
+                repeticoes = comprimento // distancia + 1
+                saida += (padrao * repeticoes)[:comprimento]
+
+            if len(saida) >= limite_saida:
+                corte = len(saida) - janela_tamanho
+                yield bytes(saida[:corte])
+                del saida[:corte]
+        else:
+            # literal
+            if literais_codificados:
+                simbolo, bits = literais[(acumulador >> 1) & mascara_codigo]
+                acumulador >>= bits + 1
+                bits_disponiveis -= bits + 1
+            else:
+                simbolo = (acumulador >> 1) & 0xFF
+                acumulador >>= 9
+                bits_disponiveis -= 9
+            saida.append(simbolo)
+
+        if bits_disponiveis < 0:
+            break
+
+    if bits_disponiveis < 0:
+        raise ValueError(
+            "Fluxo de dados comprimidos terminou inesperadamente.",
+        )
+    if saida:
+        yield bytes(saida)
+
+
+class FluxoDbc(io.RawIOBase):
+    """Representa o conteúdo descompactado de um arquivo .dbc como um DBF.
+
+    Objetos desta classe se comportam como arquivos binários somente leitura,
+    cujo conteúdo é idêntico ao do arquivo DBF que seria obtido pela
+    descompactação completa do arquivo `.dbc`. Os dados são descompactados
+    sob demanda, à medida em que são lidos.
+
+    Exemplo:
+        ```py
+        >>> with FluxoDbc("PASP2201.dbc") as arquivo_dbf:
+        ...     cabecalho = arquivo_dbf.read(32)
+        ```
+    """
+
+    def __init__(self, caminho: Path | str):
+        """Abre um arquivo .dbc para leitura do DBF correspondente.
+
+        Argumentos:
+            caminho: Caminho do arquivo `.dbc` no sistema local.
+        """
+        super().__init__()
+        self._arquivo = open(caminho, "rb")
+        try:
+            preambulo = self._arquivo.read(10)
+            if len(preambulo) < 10:
+                raise ValueError(
+                    "O arquivo `{}` não é um arquivo .dbc válido.".format(
+                        caminho,
+                    ),
+                )
+            cabecalho_tamanho = int.from_bytes(preambulo[8:10], "little")
+            cabecalho = preambulo + self._arquivo.read(cabecalho_tamanho - 10)
+            # ignora os quatro bytes de verificação após o cabeçalho
+            self._arquivo.seek(cabecalho_tamanho + 4)
+        except BaseException:
+            self._arquivo.close()
+            raise
+        self._pendente = memoryview(cabecalho)
+        self._trechos = descompactar_blast(self._arquivo)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, destino) -> int:
+        while not self._pendente:
+            try:
+                self._pendente = memoryview(next(self._trechos))
+            except StopIteration:
+                return 0
+        quantidade = min(len(destino), len(self._pendente))
+        destino[:quantidade] = self._pendente[:quantidade]
+        self._pendente = self._pendente[quantidade:]
+        return quantidade
+
+    def close(self) -> None:
+        if not self.closed:
+            self._trechos.close()
+            self._arquivo.close()
+        super().close()
+
+
+class _LeitorTubo(io.BufferedReader):
+    """Lê de um *pipe* os dados gravados pelo decodificador em C."""
+
+    def __init__(self, caminho: Path | str):
+        leitura, self._escrita = os.pipe()
+        super().__init__(io.FileIO(leitura, "rb"), buffer_size=2**16)
+        self._erro: BaseException | None = None
+        self._descompactador = threading.Thread(
+            target=self._descompactar,
+            args=(str(caminho),),
+            name="descompactar-dbc",
+            daemon=True,
+        )
+        self._descompactador.start()
+
+    def _descompactar(self, caminho: str) -> None:
+        try:
+            dbc2dbf(caminho, "/dev/fd/{}".format(self._escrita))
+        except BaseException as erro:
+            self._erro = erro
+        finally:
+            # sinaliza o fim dos dados para o leitor
+            os.close(self._escrita)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        # fechar a leitura interrompe o decodificador, caso ele ainda esteja
+        # gravando dados que não serão mais lidos
+        super().close()
+        self._descompactador.join()
+        if self._erro is not None:
+            raise self._erro
+
+
+def abrir_dbc(caminho: Path | str, nativo: bool | None = None) -> BinaryIO:
+    """Abre um arquivo .dbc como um arquivo DBF descompactado sob demanda.
+
+    Argumentos:
+        caminho: Caminho do arquivo `.dbc` no sistema local.
+        nativo: Indica se deve ser usado o decodificador em C do pacote
+            PySUS. Por padrão, ele é usado sempre que o sistema operacional
+            oferece o diretório `/dev/fd`; caso contrário, os dados são
+            descompactados em Python puro.
+
+    Retorna:
+        Um objeto de arquivo binário somente leitura, com o conteúdo do
+        arquivo DBF original. O objeto não permite operações de busca
+        (`seek()`).
+
+    Exceções:
+        Levanta um erro [`FileNotFoundError`][] se o arquivo indicado não
+        existir.
+
+    [`FileNotFoundError`]: https://docs.python.org/3/library/exceptions.html#FileNotFoundError
+    """
+    if not Path(caminho).is_file():
+        raise FileNotFoundError(caminho)
+    if nativo is None:
+        nativo = os.path.isdir("/dev/fd")
+    if nativo:
+        return _LeitorTubo(caminho)
+    logger.debug("Descompactando arquivo .dbc com decodificador em Python.")
+    return io.BufferedReader(FluxoDbc(caminho), buffer_size=2**16)
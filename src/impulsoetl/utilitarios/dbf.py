@@ -0,0 +1,542 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Lê registros de arquivos DBF a partir de fluxos de bytes sequenciais."""
+
+
+from __future__ import annotations
+
+import codecs
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    SupportsInt,
+    Type,
+)
+
+import numpy as np
+import pandas as pd
+from dbfread import FieldParser
+from dbfread.dbf import DBFField, DBFHeader
+
+from impulsoetl.loggers import logger
+from impulsoetl.utilitarios.condicoes import FiltroRegistros
+
+
+def _zerar_caracteres_finais(bytes_campo: np.ndarray) -> np.ndarray:
+    """Substitui os espaços e nulos à direita de cada valor por zeros.
+
+    Recebe uma matriz com os bytes de um campo (registros x bytes) e devolve
+    uma nova matriz em que os caracteres que seriam removidos pelo método
+    `parseC()` do leitor de campos estão zerados.
+    """
+    largura = bytes_campo.shape[1]
+    significativos = (bytes_campo != 0x20) & (bytes_campo != 0)
+    comprimentos = largura - significativos[:, ::-1].argmax(axis=1)
+    comprimentos[~significativos.any(axis=1)] = 0
+    return np.where(
+        np.arange(largura) < comprimentos[:, np.newaxis],
+        bytes_campo,
+        0,
+    ).astype(np.uint8)
+
+
+def _fatorar_linhas(
+    bytes_campo: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray] | None:
+    """Identifica os valores distintos de uma matriz de bytes de um campo.
+
+    Os bytes de cada valor são agrupados em palavras de 64 bits, fatoradas
+    uma a uma com tabelas de dispersão (ver [`pandas.factorize()`][]), sem
+    criar objetos Python para cada registro.
+
+    Retorna:
+        Uma tupla com o código do valor distinto de cada registro e o índice
+        da primeira ocorrência de cada valor distinto; ou `None`, se a
+        primeira palavra já indicar que a maior parte dos valores é distinta
+        - caso em que a fatoração não compensa.
+
+    [`pandas.factorize()`]: https://pandas.pydata.org/docs/reference/api/pandas.factorize.html
+    """
+    registros_num, largura = bytes_campo.shape
+    palavras_num = -(-largura // 8)
+    palavras = np.zeros((registros_num, palavras_num * 8), dtype=np.uint8)
+    palavras[:, :largura] = bytes_campo
+    palavras = palavras.view(np.uint64)
+
+    codigos, unicos = pd.factorize(palavras[:, 0])
+    for indice in range(1, palavras_num):
+        if len(unicos) > registros_num // 2:
+            return None
+        codigos_palavra, unicos_palavra = pd.factorize(palavras[:, indice])
+        codigos, unicos = pd.factorize(
+            codigos.astype(np.int64) * len(unicos_palavra) + codigos_palavra,
+        )
+    if len(unicos) > registros_num // 2:
+        return None
+
+    primeiros = np.empty(len(unicos), dtype=np.intp)
+    # com índices repetidos, prevalece a última atribuição
+    primeiros[codigos[::-1]] = np.arange(registros_num - 1, -1, -1)
+    return codigos, primeiros
+
+
+def _decodificar_textos(bytes_campo: np.ndarray) -> np.ndarray:
+    """Converte uma matriz de bytes ISO-8859-1 em um vetor de objetos `str`.
+
+    Espera que os caracteres finais já tenham sido zerados (ver
+    [`_zerar_caracteres_finais()`][]). Valores repetidos compartilham o mesmo
+    objeto `str`, que é criado uma única vez.
+
+    [`_zerar_caracteres_finais()`]: impulsoetl.utilitarios.dbf._zerar_caracteres_finais
+    """
+    registros_num, largura = bytes_campo.shape
+
+    def decodificar(matriz: np.ndarray) -> np.ndarray:
+        return (
+            matriz.astype(np.uint32)
+            .view("U{}".format(largura))
+            .reshape(len(matriz))
+            .astype(object)
+        )
+
+    fatoracao = _fatorar_linhas(bytes_campo)
+    if fatoracao is None:
+        return decodificar(bytes_campo)
+    codigos, primeiros = fatoracao
+    return decodificar(bytes_campo[primeiros])[codigos]
+
+
+class TabelaDBF(object):
+    """Representa uma tabela DBF lida sequencialmente de um objeto de arquivo.
+
+    Diferentemente da classe [`dbfread.DBF`][], que exige um caminho no
+    sistema de arquivos e reposiciona o cursor de leitura, esta classe lê o
+    cabeçalho e os registros em uma única passagem - o que permite ler dados
+    de fontes que não admitem busca, como o fluxo de descompactação de um
+    arquivo `.dbc` (ver [`abrir_dbc()`][]).
+
+    A conversão dos valores de cada campo segue as mesmas regras do pacote
+    `dbfread`, e pode ser personalizada por meio de uma subclasse de
+    [`dbfread.FieldParser`][].
+
+    [`dbfread.DBF`]: https://dbfread.readthedocs.io/en/latest/dbf_objects.html
+    [`abrir_dbc()`]: impulsoetl.utilitarios.dbc.abrir_dbc
+    [`dbfread.FieldParser`]: https://dbfread.readthedocs.io/en/latest/introduction.html#custom-field-types
+    """
+
+    def __init__(
+        self,
+        arquivo: BinaryIO,
+        encoding: str = "iso-8859-1",
+        parserclass: Type[FieldParser] = FieldParser,
+        char_decode_errors: str = "strict",
+        lowernames: bool = False,
+        colunas: Iterable[str] | None = None,
+    ):
+        """Lê o cabeçalho de uma tabela DBF.
+
+        Argumentos:
+            arquivo: Objeto de arquivo binário, posicionado no início do
+                arquivo DBF.
+            encoding: Codificação dos textos armazenados na tabela.
+            parserclass: Classe responsável por converter os bytes de cada
+                campo em valores Python.
+            char_decode_errors: Tratamento de erros de decodificação de
+                textos, conforme o argumento `errors` de [`bytes.decode()`][].
+            lowernames: Indica se os nomes dos campos devem ser convertidos
+                para letras minúsculas.
+            colunas: Nomes dos campos a serem lidos. Os demais campos não são
+                decodificados, nem incluídos nos registros gerados. A
+                comparação com os nomes dos campos no arquivo desconsidera
+                diferenças entre maiúsculas e minúsculas e espaços nas
+                extremidades. Se for `None` (padrão), todos os campos são
+                lidos.
+
+        [`bytes.decode()`]: https://docs.python.org/3/library/stdtypes.html#bytes.decode
+        """
+        self.arquivo = arquivo
+        # atributos com nomes em inglês são requeridos pelo `FieldParser`
+        self.encoding = encoding
+        self.char_decode_errors = char_decode_errors
+        self.lowernames = lowernames
+        self._cabecalho = [arquivo.read(DBFHeader.size)]
+        self.header = DBFHeader.unpack(self._cabecalho[0])
+        self.fields: list = []
+        self.field_names: list[str] = []
+        self._ler_campos()
+        self.cabecalho = b"".join(self._cabecalho)
+        if colunas is None:
+            self.campos_selecionados = list(self.fields)
+        else:
+            colunas_normalizadas = {
+                coluna.strip().upper() for coluna in colunas
+            }
+            self.campos_selecionados = [
+                campo
+                for campo in self.fields
+                if campo.name.strip().upper() in colunas_normalizadas
+            ]
+        self._parser = parserclass(self)
+        self.registros_lidos = 0
+        self.estrutura = self._gerar_estrutura()
+
+    def _ler(self, tamanho: int) -> bytes:
+        """Lê bytes do cabeçalho, guardando uma cópia deles."""
+        dados = self.arquivo.read(tamanho)
+        self._cabecalho.append(dados)
+        return dados
+
+    def _ler_campos(self) -> None:
+        lidos = DBFHeader.size
+        while True:
+            separador = self._ler(1)
+            lidos += 1
+            if separador in {b"\r", b"\n", b""}:
+                break
+            campo = DBFField.unpack(
+                separador + self._ler(DBFField.size - 1),
+            )
+            lidos += DBFField.size - 1
+            campo.type = chr(ord(campo.type))
+            # em campos de texto com mais de 255 bytes, o byte mais
+            # significativo do tamanho é armazenado em `decimal_count`
+            if campo.type == "C":
+                campo.length |= campo.decimal_count << 8
+                campo.decimal_count = 0
+            campo.name = campo.name.split(b"\0")[0].decode(
+                self.encoding,
+                errors=self.char_decode_errors,
+            )
+            if self.lowernames:
+                campo.name = campo.name.lower()
+            self.fields.append(campo)
+            self.field_names.append(campo.name)
+
+        # avança até o início dos registros
+        if self.header.headerlen > lidos:
+            self._ler(self.header.headerlen - lidos)
+
+    def _gerar_estrutura(self) -> np.dtype:
+        """Descreve os registros da tabela como um tipo estruturado NumPy.
+
+        Cada campo selecionado é representado como um vetor de bytes sem
+        sinal, com o tamanho do campo; o primeiro byte de cada registro
+        (`_excluido`) indica se ele foi marcado como excluído. Os bytes dos
+        campos não selecionados são ignorados.
+        """
+        nomes = ["_excluido"]
+        formatos: list = ["u1"]
+        posicoes = [0]
+        posicao = 1
+        for indice, campo in enumerate(self.fields):
+            if any(campo is item for item in self.campos_selecionados):
+                # nomes repetidos não são aceitos em tipos estruturados
+                nomes.append("{}_{}".format(indice, campo.name))
+                formatos.append(("u1", (campo.length,)))
+                posicoes.append(posicao)
+            posicao += campo.length
+        return np.dtype(
+            {
+                "names": nomes,
+                "formats": formatos,
+                "offsets": posicoes,
+                "itemsize": self.header.recordlen,
+            },
+        )
+
+    def decodifica_como_texto(self, campo) -> bool:
+        """Informa se um campo pode ser lido como texto ISO-8859-1 vetorizado.
+
+        Nesses casos, o resultado é idêntico ao do método `parseC()` do
+        leitor de campos: os bytes nulos e espaços à direita são removidos, e
+        cada byte é convertido no caractere Unicode de mesmo código.
+        """
+        metodo = getattr(type(self._parser), "parse" + campo.type, None)
+        return (
+            metodo is FieldParser.parseC
+            and codecs.lookup(self.encoding).name == "iso8859-1"
+        )
+
+    def converter_valores_brutos(
+        self,
+        campo,
+        valores_brutos: np.ndarray,
+    ) -> np.ndarray:
+        """Converte os valores brutos de um campo em valores Python.
+
+        Apenas os valores distintos são convertidos, com as mesmas regras
+        usadas na leitura registro a registro.
+
+        Argumentos:
+            campo: Descrição do campo, conforme lida do cabeçalho da tabela.
+            valores_brutos: Vetor com os bytes de cada valor do campo, sem
+                os bytes nulos à direita (ver [`ler_colunas_brutas()`][]).
+
+        Retorna:
+            Um vetor de objetos Python, com os valores convertidos.
+
+        [`ler_colunas_brutas()`]: impulsoetl.utilitarios.dbf.TabelaDBF.ler_colunas_brutas
+        """
+        codigos, valores_distintos = pd.factorize(valores_brutos)
+        valores_convertidos = np.empty(len(valores_distintos), dtype=object)
+        valores_convertidos[:] = [
+            self._parser.parse(campo, valor_bruto.ljust(campo.length, b"\0"))
+            for valor_bruto in valores_distintos
+        ]
+        return valores_convertidos[codigos]
+
+    def _converter_coluna(self, campo, bytes_campo: np.ndarray) -> Any:
+        """Converte os bytes de um campo em textos ou valores brutos.
+
+        Campos de texto são decodificados (ver [`decodifica_como_texto()`][]);
+        dos demais campos, são retornados os bytes de cada valor, sem os
+        bytes nulos à direita.
+
+        [`decodifica_como_texto()`]: impulsoetl.utilitarios.dbf.TabelaDBF.decodifica_como_texto
+        """
+        registros_num, largura = bytes_campo.shape
+        if largura == 0:
+            return np.zeros(registros_num, dtype="S1")
+
+        if self.decodifica_como_texto(campo):
+            return _decodificar_textos(_zerar_caracteres_finais(bytes_campo))
+
+        return (
+            np.ascontiguousarray(bytes_campo)
+            .view("S{}".format(largura))
+            .reshape(registros_num)
+        )
+
+    def _decodificar_coluna(self, campo, bytes_campo: np.ndarray) -> Any:
+        """Converte os bytes de um campo em uma coluna de valores Python."""
+        valores = self._converter_coluna(campo, bytes_campo)
+        if campo.length and self.decodifica_como_texto(campo):
+            return valores
+        return self.converter_valores_brutos(campo, valores)
+
+    def _filtrar(
+        self,
+        registros: np.ndarray,
+        filtro: FiltroRegistros,
+    ) -> np.ndarray:
+        """Descarta registros que não atendem às condições de um filtro."""
+        campos_por_nome = {
+            campo.name.strip().upper(): (campo, nome_interno)
+            for campo, nome_interno in zip(
+                self.campos_selecionados,
+                self.estrutura.names[1:],
+            )
+        }
+        textos_normalizados: dict[str, np.ndarray | None] = {}
+
+        def obter_textos(coluna: str) -> np.ndarray | None:
+            nome = coluna.strip().upper()
+            if nome not in textos_normalizados:
+                campo, nome_interno = campos_por_nome.get(nome, (None, None))
+                if campo is None or not self.decodifica_como_texto(campo):
+                    textos_normalizados[nome] = None
+                else:
+                    textos_normalizados[nome] = _zerar_caracteres_finais(
+                        registros[nome_interno],
+                    )
+            return textos_normalizados[nome]
+
+        mascara = filtro.avaliar(obter_textos, codificacao=self.encoding)
+        if mascara is None:
+            return registros
+        return registros[mascara]
+
+    def ler_lotes(
+        self,
+        passo: SupportsInt,
+        filtro: FiltroRegistros | None = None,
+    ) -> Iterator[pd.DataFrame]:
+        """Gera lotes de registros da tabela, na forma de DataFrames.
+
+        Os bytes de cada lote são interpretados de uma só vez como um vetor
+        de registros de tamanho fixo (ver [`numpy.frombuffer()`][]), e cada
+        coluna é decodificada com operações vetorizadas. Os DataFrames
+        gerados são equivalentes aos que seriam obtidos convertendo os
+        registros lidos com [`iter()`][] em DataFrames.
+
+        Argumentos:
+            passo: Número de registros lidos do arquivo a cada lote. Os lotes
+                podem ter menos registros, caso haja registros marcados como
+                excluídos ou descartados pelo filtro. Pode ser um objeto
+                conversível em inteiro, consultado antes da leitura de cada
+                lote (ver [`PassoAdaptativo`][]).
+            filtro: Condições avaliadas diretamente sobre os bytes de cada
+                lote, antes da decodificação dos valores (ver
+                [`FiltroRegistros`][]). Os registros que certamente não
+                atendem às condições são descartados; os demais registros
+                ainda precisam ser verificados com as condições originais.
+                Se for `None` (padrão), todos os registros são decodificados.
+
+        Gera:
+            A cada iteração, um objeto [`pandas.DataFrame`][] com um lote de
+            registros.
+
+        Exceções:
+            Levanta um erro [`ValueError`][] se o arquivo terminar antes do
+            número de registros declarado no cabeçalho (sem que haja um
+            marcador de fim de arquivo).
+
+        [`numpy.frombuffer()`]: https://numpy.org/doc/stable/reference/generated/numpy.frombuffer.html
+        [`PassoAdaptativo`]: impulsoetl.utilitarios.memoria.PassoAdaptativo
+        [`FiltroRegistros`]: impulsoetl.utilitarios.condicoes.FiltroRegistros
+        [`iter()`]: https://docs.python.org/3/library/functions.html#iter
+        [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+        [`ValueError`]: https://docs.python.org/3/library/exceptions.html#ValueError
+        """
+        for registros in self._ler_registros(passo, filtro=filtro):
+            yield pd.DataFrame(
+                {
+                    campo.name: self._decodificar_coluna(
+                        campo,
+                        registros[nome_interno],
+                    )
+                    for campo, nome_interno in zip(
+                        self.campos_selecionados,
+                        self.estrutura.names[1:],
+                    )
+                },
+            ).infer_objects()
+
+    def ler_colunas_brutas(
+        self,
+        passo: SupportsInt,
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """Gera lotes de registros da tabela, com os valores não convertidos.
+
+        Funciona como o método [`ler_lotes()`][], mas apenas os campos de
+        texto são decodificados (ver [`decodifica_como_texto()`][]). Para os
+        demais campos, são gerados os bytes de cada valor, sem os bytes nulos
+        à direita - que podem ser convertidos posteriormente com o método
+        [`converter_valores_brutos()`][].
+
+        Argumentos:
+            passo: Número de registros lidos do arquivo a cada lote, ou
+                objeto conversível em inteiro consultado antes de cada lote.
+
+        Gera:
+            A cada iteração, um dicionário com os nomes dos campos
+            selecionados como chaves e vetores NumPy com os valores de cada
+            campo no lote.
+
+        Exceções:
+            Levanta um erro [`ValueError`][] se o arquivo terminar antes do
+            número de registros declarado no cabeçalho (sem que haja um
+            marcador de fim de arquivo).
+
+        [`ler_lotes()`]: impulsoetl.utilitarios.dbf.TabelaDBF.ler_lotes
+        [`decodifica_como_texto()`]: impulsoetl.utilitarios.dbf.TabelaDBF.decodifica_como_texto
+        [`converter_valores_brutos()`]: impulsoetl.utilitarios.dbf.TabelaDBF.converter_valores_brutos
+        [`ValueError`]: https://docs.python.org/3/library/exceptions.html#ValueError
+        """
+        for registros in self._ler_registros(passo):
+            yield {
+                campo.name: self._converter_coluna(
+                    campo,
+                    registros[nome_interno],
+                )
+                for campo, nome_interno in zip(
+                    self.campos_selecionados,
+                    self.estrutura.names[1:],
+                )
+            }
+
+    def _ler_registros(
+        self,
+        passo: SupportsInt,
+        filtro: FiltroRegistros | None = None,
+    ) -> Iterator[np.ndarray]:
+        """Gera vetores estruturados com os registros válidos de cada lote."""
+        registro_tamanho = self.header.recordlen
+
+        while self.registros_lidos < self.header.numrecords:
+            registros_num = min(
+                int(passo),
+                self.header.numrecords - self.registros_lidos,
+            )
+            dados = self.arquivo.read(registros_num * registro_tamanho)
+            registros_num = len(dados) // registro_tamanho
+            registros = np.frombuffer(
+                dados,
+                dtype=self.estrutura,
+                count=registros_num,
+            )
+
+            marcadores_fim = np.flatnonzero(registros["_excluido"] == 0x1A)
+            restante = dados[registros_num * registro_tamanho:]
+            encerrado = len(marcadores_fim) > 0 or restante[:1] == b"\x1a"
+            if len(marcadores_fim):
+                registros = registros[: marcadores_fim[0]]
+            elif not encerrado and (restante or not registros_num):
+                raise ValueError("O arquivo DBF terminou inesperadamente.")
+            self.registros_lidos += len(registros)
+
+            registros = registros[registros["_excluido"] == 0x20]
+            if filtro is not None and len(registros):
+                registros = self._filtrar(registros, filtro)
+            if len(registros):
+                yield registros
+
+            if encerrado:
+                logger.warning(
+                    "Lidos {:n} de {:n} registros declarados no cabeçalho.",
+                    self.registros_lidos,
+                    self.header.numrecords,
+                )
+                return
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Gera os registros da tabela, na forma de dicionários.
+
+        Registros marcados como excluídos são ignorados.
+
+        Exceções:
+            Levanta um erro [`ValueError`][] se o arquivo terminar antes do
+            número de registros declarado no cabeçalho (sem que haja um
+            marcador de fim de arquivo).
+
+        [`ValueError`]: https://docs.python.org/3/library/exceptions.html#ValueError
+        """
+        registro_tamanho = self.header.recordlen
+        campos = []
+        inicio = 1
+        for campo in self.fields:
+            if any(campo is item for item in self.campos_selecionados):
+                campos.append(
+                    (campo.name, campo, inicio, inicio + campo.length),
+                )
+            inicio += campo.length
+        ler = self.arquivo.read
+        converter = self._parser.parse
+
+        while self.registros_lidos < self.header.numrecords:
+            registro = ler(registro_tamanho)
+            if registro[:1] == b"\x1a":
+                # marcador de fim de arquivo antes do número declarado de
+                # registros; o `dbfread` aceita esses arquivos sem erros
+                logger.warning(
+                    "Lidos {:n} de {:n} registros declarados no cabeçalho.",
+                    self.registros_lidos,
+                    self.header.numrecords,
+                )
+                return
+            if len(registro) < registro_tamanho:
+                raise ValueError("O arquivo DBF terminou inesperadamente.")
+            self.registros_lidos += 1
+            if registro[:1] != b" ":
+                # registro excluído
+                continue
+            yield {
+                nome: converter(campo, registro[inicio:fim])
+                for nome, campo, inicio, fim in campos
+            }
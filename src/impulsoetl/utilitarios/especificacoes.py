@@ -0,0 +1,412 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Compila especificações declarativas das transformações de cada fonte.
+
+As transformações dos arquivos de disseminação do DataSUS repetem as mesmas
+operações sobre as colunas originais: renomeá-las conforme um dicionário
+`DE_PARA_*`, substituir textos vazios e outros códigos de dados ausentes por
+nulos, interpretar datas e valores lógicos e, por fim, converter cada coluna
+para o tipo definido em um dicionário `TIPOS_*`.
+
+Uma [`EspecificacaoFonte`][] descreve essas operações para cada coluna de
+destino, e é compilada em um [`PlanoTransformacao`][]. O plano processa
+cada coluna uma única vez - aplicando em sequência a substituição de nulos e
+a interpretação -, e monta o DataFrame resultante de uma só vez, sem as
+cópias intermediárias de cada etapa de um encadeamento de métodos.
+
+[`EspecificacaoFonte`]: impulsoetl.utilitarios.especificacoes.EspecificacaoFonte
+[`PlanoTransformacao`]: impulsoetl.utilitarios.especificacoes.PlanoTransformacao
+"""
+
+
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+from frozendict import frozendict
+
+from impulsoetl.utilitarios.valores_nulos import identificar_sentinelas
+
+# Função que recebe uma coluna de um lote de registros e devolve a coluna
+# interpretada, com o mesmo índice.
+Interpretador = Callable[[pd.Series], pd.Series]
+
+
+def interpretar_booleano(
+    verdadeiros: Iterable[str],
+    falsos: Iterable[str] | None = None,
+) -> Interpretador:
+    """Cria um interpretador de códigos que representam valores lógicos.
+
+    Argumentos:
+        verdadeiros: Códigos que representam o valor `True`.
+        falsos: Códigos que representam o valor `False`, opcional. Se não
+            forem informados, todos os demais valores - inclusive os nulos -
+            são considerados falsos. Se forem informados, os valores que não
+            estiverem entre os verdadeiros nem entre os falsos são
+            convertidos em nulos.
+
+    Retorna:
+        Uma função que recebe uma coluna de códigos e devolve a coluna de
+        valores lógicos correspondente.
+    """
+    verdadeiros = list(verdadeiros)
+    if falsos is None:
+        return lambda serie: serie.isin(verdadeiros)
+
+    falsos = list(falsos)
+
+    def interpretar(serie: pd.Series) -> pd.Series:
+        valores = np.full(len(serie), np.nan, dtype=object)
+        valores[serie.isin(verdadeiros).to_numpy()] = True
+        valores[serie.isin(falsos).to_numpy()] = False
+        return pd.Series(valores, index=serie.index)
+
+    return interpretar
+
+
+def interpretar_contem(texto: str) -> Interpretador:
+    """Cria um interpretador que indica se cada valor contém um texto.
+
+    Valores nulos são considerados como não contendo o texto.
+    """
+    return lambda serie: serie.str.contains(texto, regex=False, na=False)
+
+
+def interpretar_fatia(inicio: int, fim: int | None = None) -> Interpretador:
+    """Cria um interpretador que seleciona um trecho de cada texto.
+
+    Valores nulos são mantidos como nulos.
+    """
+    return lambda serie: serie.str.slice(inicio, fim)
+
+
+def interpretar_preenchido(serie: pd.Series) -> pd.Series:
+    """Indica se cada valor é um texto não vazio.
+
+    Valores nulos são considerados como não preenchidos.
+    """
+    return serie.str.len().fillna(0) > 0
+
+
+class PlanoTransformacao(object):
+    """Aplica de forma vetorizada as transformações de uma fonte de dados.
+
+    Os planos devem ser criados por meio do método
+    [`EspecificacaoFonte.compilar()`][].
+
+    [`EspecificacaoFonte.compilar()`]: impulsoetl.utilitarios.especificacoes.EspecificacaoFonte.compilar
+    """
+
+    def __init__(
+        self,
+        etapas: list[
+            tuple[
+                str,
+                str,
+                str | None,
+                Interpretador | None,
+                str | None,
+                list[tuple[str, Interpretador]],
+            ]
+        ],
+        descartar: frozenset[str],
+        tipos: Mapping[str, Any],
+        opcionais: frozenset[str] = frozenset(),
+    ):
+        self._etapas = etapas
+        self._descartar = descartar
+        self._opcionais = opcionais
+        self._tipos = tipos
+        self._categoricas = frozenset(
+            coluna for coluna, tipo in tipos.items() if str(tipo) == "category"
+        )
+        # HACK: ver https://github.com/pandas-dev/pandas/issues/25472
+        self._tipos_intermediarios = {
+            coluna: "float"
+            for coluna, tipo in tipos.items()
+            if str(tipo).lower() in ("int64", "float64")
+        }
+
+    def _executar(
+        self,
+        dados: pd.DataFrame,
+        tempos: dict[str, float] | None = None,
+    ) -> pd.DataFrame:
+        colunas_originais = {
+            str(coluna).strip(): coluna for coluna in dados.columns
+        }
+        colunas: dict[str, pd.Series] = {}
+        colunas_derivadas: dict[str, pd.Series] = {}
+        renomeadas = set()
+        for (
+            origem,
+            destino,
+            padrao,
+            interpretador,
+            padrao_interpretado,
+            derivadas,
+        ) in self._etapas:
+            inicio = time.perf_counter()
+            if origem in colunas_originais:
+                serie = dados[colunas_originais[origem]]
+            elif destino in self._opcionais:
+                # colunas ausentes de alguns arquivos são tratadas como vazias
+                serie = pd.Series(np.nan, index=dados.index, dtype=object)
+            else:
+                continue
+            if padrao is None:
+                nulos = serie.isin([""])
+            else:
+                nulos = identificar_sentinelas(serie, padrao)
+            if nulos.any():
+                serie = serie.mask(nulos)
+            # colunas derivadas partem dos valores originais, já sem nulos
+            for derivada, interpretador_derivada in derivadas:
+                colunas_derivadas[derivada] = self._compactar(
+                    derivada,
+                    interpretador_derivada(serie),
+                )
+            if interpretador is not None:
+                serie = interpretador(serie)
+            if padrao_interpretado is not None:
+                serie = serie.mask(
+                    identificar_sentinelas(serie, padrao_interpretado),
+                )
+            colunas[destino] = self._compactar(destino, serie)
+            renomeadas.add(origem)
+            if tempos is not None:
+                tempos[destino] = time.perf_counter() - inicio
+
+        # colunas sem especificação são mantidas, com os nomes corrigidos
+        for coluna, coluna_original in colunas_originais.items():
+            if coluna not in renomeadas and coluna not in colunas:
+                serie = dados[coluna_original]
+                colunas[coluna] = serie.mask(serie.isin([""]))
+
+        colunas.update(colunas_derivadas)
+        for coluna in self._descartar:
+            colunas.pop(coluna, None)
+        return pd.DataFrame(colunas, index=dados.index, copy=False)
+
+    def _compactar(self, coluna: str, serie: pd.Series) -> pd.Series:
+        """Converte em categorias as colunas com esse tipo especificado.
+
+        A conversão é feita logo após a interpretação, para que as etapas
+        seguintes da transformação já operem sobre as colunas compactas.
+        """
+        if coluna in self._categoricas:
+            return serie.astype("category")
+        return serie
+
+    def interpretar(self, dados: pd.DataFrame) -> pd.DataFrame:
+        """Renomeia, limpa e interpreta as colunas de um lote de registros.
+
+        Argumentos:
+            dados: Objeto [`pandas.DataFrame`][] com as colunas originais do
+                arquivo de disseminação.
+
+        Retorna:
+            Um novo objeto [`pandas.DataFrame`][], com as colunas renomeadas
+            e interpretadas e as colunas derivadas. As colunas do tipo
+            `category` já são convertidas nesta etapa; os demais tipos
+            finais só são aplicados pelo método [`tipar()`][], de modo que
+            a fonte possa aplicar transformações adicionais entre as duas
+            etapas.
+
+        [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+        [`tipar()`]: impulsoetl.utilitarios.especificacoes.PlanoTransformacao.tipar
+        """
+        return self._executar(dados)
+
+    def tipar(self, dados: pd.DataFrame) -> pd.DataFrame:
+        """Converte as colunas de um lote para os tipos especificados.
+
+        Argumentos:
+            dados: Objeto [`pandas.DataFrame`][] com as colunas de destino.
+
+        Retorna:
+            Um novo objeto [`pandas.DataFrame`][] com os tipos de dados
+            especificados.
+
+        [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+        """
+        return dados.astype(self._tipos_intermediarios).astype(self._tipos)
+
+    def medir(
+        self,
+        dados: pd.DataFrame,
+        repeticoes: int = 3,
+    ) -> pd.DataFrame:
+        """Mede o tempo gasto na interpretação de cada coluna de um lote.
+
+        Argumentos:
+            dados: Objeto [`pandas.DataFrame`][] com as colunas originais do
+                arquivo de disseminação.
+            repeticoes: Número de vezes que o plano deve ser executado.
+
+        Retorna:
+            Um objeto [`pandas.DataFrame`][] indexado pelos nomes das colunas
+            de destino, com o menor tempo (`segundos`) gasto em cada coluna
+            entre as repetições e a respectiva fração do tempo total
+            (`proporcao`), em ordem decrescente de tempo. O tempo gasto com a
+            conversão de tipos é registrado na linha `(tipar)`, e o das
+            colunas derivadas é somado ao de suas colunas de origem.
+
+        [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+        """
+        medicoes: list[dict[str, float]] = []
+        for _ in range(repeticoes):
+            tempos: dict[str, float] = {}
+            interpretados = self._executar(dados, tempos=tempos)
+            inicio = time.perf_counter()
+            # as colunas adicionadas pela fonte após a interpretação - como
+            # identificadores e datas de criação - não estão presentes aqui
+            interpretados.astype(
+                {
+                    coluna: tipo
+                    for coluna, tipo in self._tipos_intermediarios.items()
+                    if coluna in interpretados
+                },
+            ).astype(
+                {
+                    coluna: tipo
+                    for coluna, tipo in self._tipos.items()
+                    if coluna in interpretados
+                },
+            )
+            tempos["(tipar)"] = time.perf_counter() - inicio
+            medicoes.append(tempos)
+        segundos = pd.DataFrame(medicoes).min().sort_values(ascending=False)
+        return pd.DataFrame(
+            {"segundos": segundos, "proporcao": segundos / segundos.sum()},
+        )
+
+
+class EspecificacaoFonte(object):
+    """Descreve as transformações das colunas de uma fonte de dados."""
+
+    def __init__(
+        self,
+        de_para: Mapping[str, str],
+        tipos: Mapping[str, Any],
+        interpretadores: Mapping[str, Interpretador] = frozendict(),
+        nulos: Mapping[str, str] = frozendict(),
+        nulos_interpretados: Mapping[str, str] = frozendict(),
+        derivadas: Mapping[str, tuple[str, Interpretador]] = frozendict(),
+        descartar: Iterable[str] = (),
+        opcionais: Iterable[str] = (),
+    ):
+        """Instancia a especificação das transformações de uma fonte.
+
+        Argumentos:
+            de_para: Dicionário com os nomes das colunas originais como
+                chaves e os nomes das colunas de destino como valores.
+            tipos: Dicionário com os nomes das colunas de destino como chaves
+                e os respectivos tipos de dados como valores, no formato
+                aceito pelo método [`pandas.DataFrame.astype()`][]. Colunas
+                de códigos com poucos valores distintos podem ser declaradas
+                com o tipo `category`, que armazena cada valor distinto uma
+                única vez.
+            interpretadores: Dicionário com nomes de colunas de destino como
+                chaves e, como valores, funções que recebem a coluna
+                original - já com os valores nulos substituídos - e devolvem
+                a coluna interpretada. Colunas sem interpretador são mantidas
+                como textos.
+            nulos: Dicionário com nomes de colunas de destino como chaves e,
+                como valores, expressões regulares que identificam códigos
+                que representam dados ausentes em cada coluna (ver
+                [`valores_nulos`][]). Textos vazios são sempre substituídos
+                por nulos.
+            nulos_interpretados: Dicionário no mesmo formato do argumento
+                `nulos`, com expressões regulares verificadas nos valores já
+                interpretados - para códigos que só se revelam ausentes após
+                a limpeza, como textos sem nenhum algarismo completados com
+                zeros.
+            derivadas: Dicionário com os nomes de novas colunas como chaves
+                e, como valores, tuplas com o nome de uma coluna de destino e
+                a função que gera a nova coluna a partir dos valores dela -
+                já com os nulos substituídos, mas ainda não interpretados.
+            descartar: Colunas de destino a serem removidas após o cálculo
+                das colunas derivadas.
+            opcionais: Colunas de destino cujas colunas originais podem
+                estar ausentes de alguns arquivos de disseminação. Nesses
+                arquivos, são tratadas como colunas sem nenhum valor
+                preenchido.
+
+        [`pandas.DataFrame.astype()`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.astype.html
+        [`valores_nulos`]: impulsoetl.utilitarios.valores_nulos
+        """
+        self.de_para = frozendict(de_para)
+        self.tipos = frozendict(tipos)
+        self.interpretadores = frozendict(interpretadores)
+        self.nulos = frozendict(nulos)
+        self.nulos_interpretados = frozendict(nulos_interpretados)
+        self.derivadas = frozendict(derivadas)
+        self.descartar = frozenset(descartar)
+        self.opcionais = frozenset(opcionais)
+
+    def compilar(self) -> PlanoTransformacao:
+        """Gera o plano de execução das transformações especificadas.
+
+        Retorna:
+            Uma instância da classe [`PlanoTransformacao`][].
+
+        Exceções:
+            Levanta um erro [`ValueError`][] se algum interpretador, regra de
+            nulos, coluna derivada ou coluna opcional se referir a uma coluna
+            de destino inexistente.
+
+        [`PlanoTransformacao`]: impulsoetl.utilitarios.especificacoes.PlanoTransformacao
+        [`ValueError`]: https://docs.python.org/3/library/exceptions.html#ValueError
+        """
+        destinos = set(self.de_para.values())
+        referencias = (
+            set(self.interpretadores)
+            | set(self.nulos)
+            | set(self.nulos_interpretados)
+            | self.opcionais
+            | {origem for origem, _ in self.derivadas.values()}
+        )
+        desconhecidas = referencias - destinos
+        if desconhecidas:
+            raise ValueError(
+                "Colunas de destino não encontradas no de-para: {}.".format(
+                    ", ".join(sorted(desconhecidas)),
+                ),
+            )
+        etapas = [
+            (
+                origem,
+                destino,
+                # o padrão também identifica textos vazios
+                "(?:{})?".format(self.nulos[destino])
+                if destino in self.nulos
+                else None,
+                self.interpretadores.get(destino),
+                "(?:{})?".format(self.nulos_interpretados[destino])
+                if destino in self.nulos_interpretados
+                else None,
+                [
+                    (derivada, interpretador)
+                    for derivada, (
+                        coluna_base,
+                        interpretador,
+                    ) in self.derivadas.items()
+                    if coluna_base == destino
+                ],
+            )
+            for origem, destino in self.de_para.items()
+        ]
+        return PlanoTransformacao(
+            etapas=etapas,
+            descartar=self.descartar,
+            tipos=self.tipos,
+            opcionais=self.opcionais,
+        )
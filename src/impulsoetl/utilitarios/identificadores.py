@@ -0,0 +1,127 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Gera identificadores únicos para lotes de registros.
+
+Os identificadores seguem o formato [UUIDv7][], o mesmo usado pela função
+[`uuid6.uuid7()`][]: os primeiros 48 bits contêm o instante de geração em
+milissegundos, seguidos da versão, de 20 bits com a fração do milissegundo
+em nanossegundos, da variante e de 54 bits aleatórios. Em vez de criar um
+objeto [`uuid.UUID`][] por registro, as funções deste módulo montam todos os
+identificadores de um lote de uma só vez em vetores do NumPy.
+
+Dentro de cada lote - e entre lotes gerados no mesmo processo -, os
+identificadores são estritamente crescentes: cada identificador recebe um
+instante um nanossegundo posterior ao do anterior.
+
+[UUIDv7]: https://datatracker.ietf.org/doc/html/draft-peabody-dispatch-new-uuid-format-04#section-5.2
+[`uuid6.uuid7()`]: https://github.com/oittaa/uuid6-python
+[`uuid.UUID`]: https://docs.python.org/3/library/uuid.html#uuid.UUID
+"""
+
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+_NANOSSEGUNDOS_POR_MILISSEGUNDO = 10 ** 6
+_HEXADECIMAIS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
+_trava = threading.Lock()
+_ultimo_instante = 0
+
+
+def _reservar_instantes(quantidade: int) -> np.ndarray:
+    """Reserva instantes crescentes, em nanossegundos, para um lote."""
+    global _ultimo_instante
+    with _trava:
+        inicio = max(time.time_ns(), _ultimo_instante + 1)
+        _ultimo_instante = inicio + quantidade - 1
+    return inicio + np.arange(quantidade, dtype=np.int64)
+
+
+def gerar_uuids7_bytes(quantidade: int) -> np.ndarray:
+    """Gera identificadores UUIDv7 em sua representação binária.
+
+    Argumentos:
+        quantidade: Número de identificadores a serem gerados.
+
+    Retorna:
+        Um vetor do NumPy com dimensões `(quantidade, 16)` e tipo `uint8`,
+        em que cada linha contém os 16 bytes de um identificador, na ordem
+        de rede (*big-endian*).
+    """
+    instantes = _reservar_instantes(quantidade)
+    milissegundos, nanossegundos = np.divmod(
+        instantes,
+        _NANOSSEGUNDOS_POR_MILISSEGUNDO,
+    )
+    fracoes = (
+        (nanossegundos << 20) // _NANOSSEGUNDOS_POR_MILISSEGUNDO
+    ).astype(np.uint64)
+    aleatorios = np.frombuffer(
+        os.urandom(8 * quantidade),
+        dtype=np.uint64,
+    ) >> np.uint64(10)
+
+    partes = np.empty(quantidade, dtype=[("alta", ">u8"), ("baixa", ">u8")])
+    # 48 bits de milissegundos, versão e 12 bits mais significativos da fração
+    partes["alta"] = (
+        (milissegundos.astype(np.uint64) << np.uint64(16))
+        | np.uint64(0x7000)
+        | (fracoes >> np.uint64(8))
+    )
+    # variante, 8 bits menos significativos da fração e 54 bits aleatórios
+    partes["baixa"] = (
+        np.uint64(0b10 << 62)
+        | ((fracoes & np.uint64(0xFF)) << np.uint64(54))
+        | aleatorios
+    )
+    return partes.view(np.uint8).reshape(quantidade, 16)
+
+
+def gerar_uuids7(quantidade: int) -> np.ndarray:
+    """Gera identificadores UUIDv7 em sua representação hexadecimal.
+
+    Argumentos:
+        quantidade: Número de identificadores a serem gerados.
+
+    Retorna:
+        Um vetor do NumPy com tipo `object`, contendo um texto de 32
+        caracteres hexadecimais para cada identificador - equivalente ao
+        atributo `hex` de um objeto [`uuid.UUID`][].
+
+    [`uuid.UUID`]: https://docs.python.org/3/library/uuid.html#uuid.UUID
+    """
+    octetos = gerar_uuids7_bytes(quantidade)
+    digitos = np.empty((quantidade, 32), dtype=np.uint8)
+    digitos[:, 0::2] = _HEXADECIMAIS[octetos >> 4]
+    digitos[:, 1::2] = _HEXADECIMAIS[octetos & 0x0F]
+    return digitos.view("S32").ravel().astype("U32").astype(object)
+
+
+def adicionar_uuids7(
+    dados: pd.DataFrame,
+    coluna: str = "id",
+) -> pd.DataFrame:
+    """Adiciona uma coluna com identificadores UUIDv7 a um DataFrame.
+
+    Argumentos:
+        dados: Objeto [`pandas.DataFrame`][] ao qual os identificadores
+            devem ser adicionados.
+        coluna: Nome da coluna a ser criada. Por padrão, `id`.
+
+    Retorna:
+        Uma cópia do objeto original, com uma coluna adicional contendo a
+        representação hexadecimal de um novo identificador para cada linha.
+
+    [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+    """
+    return dados.assign(**{coluna: gerar_uuids7(len(dados))})
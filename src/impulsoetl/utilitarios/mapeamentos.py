@@ -0,0 +1,136 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Aplica funções uma única vez a cada valor distinto de uma coluna.
+
+Boa parte das colunas dos arquivos do DataSUS contém poucos valores
+distintos - códigos de uma ou duas posições, indicadores lógicos, números
+romanos de regiões de saúde -, repetidos em milhões de registros. Em vez de
+chamar uma função do Python para cada linha, as funções deste módulo
+fatoram a coluna com [`pandas.factorize()`][], avaliam a função apenas para
+os valores distintos e replicam os resultados para todas as linhas por meio
+dos códigos da fatoração.
+
+A função [`por_valor_distinto()`][] adapta uma função aplicada elemento a
+elemento para ser usada nos encadeamentos de métodos das transformações, com
+o argumento `elementwise=False` dos métodos do pyjanitor:
+
+```py
+>>> import pandas as pd
+>>> from impulsoetl.utilitarios.mapeamentos import por_valor_distinto
+>>> mantido = por_valor_distinto(lambda elemento: elemento == "M")
+>>> mantido(pd.Series(["M", "", "M", "M"]))
+0     True
+1    False
+2     True
+3     True
+dtype: bool
+```
+
+[`pandas.factorize()`]: https://pandas.pydata.org/docs/reference/api/pandas.factorize.html
+[`por_valor_distinto()`]: impulsoetl.utilitarios.mapeamentos.por_valor_distinto
+"""
+
+
+from __future__ import annotations
+
+from functools import wraps
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+
+def aplicar_por_valor_distinto(
+    serie: pd.Series,
+    funcao: Callable[[Any], Any],
+) -> pd.Series:
+    """Aplica uma função a cada valor distinto de uma coluna.
+
+    Equivale ao método [`pandas.Series.apply()`][], mas chama a função uma
+    única vez para cada valor distinto da série - e uma única vez para os
+    valores nulos, se houver.
+
+    Argumentos:
+        serie: Objeto [`pandas.Series`][] a ser transformado.
+        funcao: Função que recebe um elemento da série e retorna o valor
+            transformado. Deve depender apenas do elemento recebido.
+
+    Retorna:
+        Uma série com o mesmo índice e nome da série original, contendo os
+        valores transformados, com o tipo inferido a partir dos resultados.
+
+    [`pandas.Series.apply()`]: https://pandas.pydata.org/docs/reference/api/pandas.Series.apply.html
+    [`pandas.Series`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.html
+    """
+    posicoes, valores = pd.factorize(serie)
+    resultados = np.empty(len(valores) + 1, dtype=object)
+    resultados[:-1] = [funcao(valor) for valor in valores]
+    nulos = posicoes < 0
+    if nulos.any():
+        # valores nulos recebem a posição -1, que aponta para o último
+        # elemento; a função é avaliada com o primeiro deles
+        resultados[-1] = funcao(serie[nulos].iloc[0])
+    return pd.Series(
+        resultados[posicoes],
+        index=serie.index,
+        name=serie.name,
+        dtype=object,
+    ).infer_objects()
+
+
+def transformar_por_valor_distinto(
+    serie: pd.Series,
+    funcao: Callable[[pd.Series], pd.Series],
+    nulo: Any = np.nan,
+) -> pd.Series:
+    """Aplica uma função vetorizada aos valores distintos de uma coluna.
+
+    Argumentos:
+        serie: Objeto [`pandas.Series`][] a ser transformado.
+        funcao: Função que recebe uma série com os valores distintos e não
+            nulos da série original e retorna uma série de mesmo tamanho com
+            os valores transformados.
+        nulo: Valor atribuído aos elementos nulos da série original. Por
+            padrão, `numpy.nan`.
+
+    Retorna:
+        Uma série com o mesmo índice e nome da série original, contendo os
+        valores transformados.
+
+    [`pandas.Series`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.html
+    """
+    posicoes, valores = pd.factorize(serie)
+    resultados = funcao(pd.Series(valores, dtype=object)).to_numpy()
+    # valores nulos recebem a posição -1, que aponta para o último elemento
+    resultados = np.append(resultados, nulo)
+    return pd.Series(resultados[posicoes], index=serie.index, name=serie.name)
+
+
+def por_valor_distinto(
+    funcao: Callable[[Any], Any],
+) -> Callable[[pd.Series], pd.Series]:
+    """Adapta uma função de elementos para ser aplicada a colunas inteiras.
+
+    Argumentos:
+        funcao: Função que recebe um elemento de uma coluna e retorna o
+            valor transformado.
+
+    Retorna:
+        Uma função que recebe um objeto [`pandas.Series`][] e aplica a função
+        original a cada um de seus valores distintos, conforme
+        [`aplicar_por_valor_distinto()`][]. Pode ser passada aos métodos
+        `transform_column()` e `transform_columns()` do pyjanitor com o
+        argumento `elementwise=False`.
+
+    [`pandas.Series`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.html
+    [`aplicar_por_valor_distinto()`]: impulsoetl.utilitarios.mapeamentos.aplicar_por_valor_distinto
+    """
+
+    @wraps(funcao)
+    def aplicar(serie: pd.Series) -> pd.Series:
+        return aplicar_por_valor_distinto(serie, funcao)
+
+    return aplicar
@@ -0,0 +1,170 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Ajusta o tamanho dos lotes de registros a um limite de memória."""
+
+
+from __future__ import annotations
+
+import sys
+
+import pandas as pd
+from pandas.api.types import is_object_dtype
+
+from impulsoetl.loggers import logger
+from impulsoetl.utilitarios.dbf import TabelaDBF
+
+# bytes ocupados por um ponteiro em colunas do tipo `object`, e por um valor
+# em colunas numéricas ou de datas
+_PONTEIRO_TAMANHO = 8
+
+# número máximo de registros de cada lote usados para medir a memória
+# ocupada pelos DataFrames, sem percorrer todos os valores do lote
+_AMOSTRA_TAMANHO = 2000
+
+
+def medir_memoria(dados: pd.DataFrame) -> int:
+    """Mede a memória ocupada pelos valores de um DataFrame.
+
+    Diferentemente do método [`pandas.DataFrame.memory_usage()`][] com o
+    argumento `deep=True`, cada objeto Python referenciado por colunas do
+    tipo `object` é contado uma única vez - o que corresponde à memória
+    efetivamente ocupada quando registros com valores repetidos compartilham
+    o mesmo objeto (ver [`TabelaDBF.ler_lotes()`][]).
+
+    Argumentos:
+        dados: Objeto [`pandas.DataFrame`][] a ser medido.
+
+    Retorna:
+        O número de bytes ocupados pelos valores, desconsiderando o índice.
+
+    [`pandas.DataFrame.memory_usage()`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.memory_usage.html
+    [`TabelaDBF.ler_lotes()`]: impulsoetl.utilitarios.dbf.TabelaDBF.ler_lotes
+    [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+    """
+    memoria = 0
+    for _, serie in dados.items():
+        if is_object_dtype(serie):
+            objetos = {id(valor): valor for valor in serie.to_numpy()}
+            memoria += serie.memory_usage(index=False)
+            memoria += sum(sys.getsizeof(valor) for valor in objetos.values())
+        else:
+            memoria += serie.memory_usage(deep=True, index=False)
+    return int(memoria)
+
+
+def estimar_bytes_por_registro(tabela_dbf: TabelaDBF) -> int:
+    """Estima a memória ocupada por registro de uma tabela DBF decodificada.
+
+    A estimativa considera que cada campo de texto é convertido em um objeto
+    `str` do Python, e que os demais campos ocupam um valor de 64 bits.
+
+    Argumentos:
+        tabela_dbf: Tabela DBF com os campos a serem lidos já selecionados.
+
+    Retorna:
+        O número estimado de bytes ocupados por um registro em um objeto
+        [`pandas.DataFrame`][].
+
+    [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+    """
+    texto_vazio_tamanho = sys.getsizeof("")
+    return sum(
+        _PONTEIRO_TAMANHO + texto_vazio_tamanho + campo.length
+        if tabela_dbf.decodifica_como_texto(campo)
+        else _PONTEIRO_TAMANHO
+        for campo in tabela_dbf.campos_selecionados
+    )
+
+
+class PassoAdaptativo(object):
+    """Calcula o número de registros de cada lote a partir de um orçamento.
+
+    O número de registros é escolhido de forma que os bytes lidos do arquivo
+    e o DataFrame gerado a partir deles, juntos, ocupem aproximadamente a
+    memória disponível para cada lote. Inicialmente, a memória ocupada pelos
+    registros decodificados é estimada a partir da estrutura da tabela DBF
+    (ver [`estimar_bytes_por_registro()`][]); a cada lote gerado, a
+    estimativa é corrigida com a memória efetivamente ocupada pelo
+    DataFrame. Aumentos na memória por registro são incorporados
+    imediatamente, e reduções, de forma gradual.
+
+    As instâncias podem ser usadas no lugar de um número inteiro de
+    registros por lote nos métodos [`TabelaDBF.ler_lotes()`][] e
+    [`TabelaDBF.ler_colunas_brutas()`][], que consultam o número de
+    registros antes da leitura de cada lote.
+
+    [`estimar_bytes_por_registro()`]: impulsoetl.utilitarios.memoria.estimar_bytes_por_registro
+    [`TabelaDBF.ler_lotes()`]: impulsoetl.utilitarios.dbf.TabelaDBF.ler_lotes
+    [`TabelaDBF.ler_colunas_brutas()`]: impulsoetl.utilitarios.dbf.TabelaDBF.ler_colunas_brutas
+    """
+
+    def __init__(
+        self,
+        memoria_max: int,
+        passo_max: int | None = None,
+        passo_min: int = 1000,
+    ):
+        """Instancia um calculador do número de registros por lote.
+
+        Argumentos:
+            memoria_max: Memória disponível para cada lote, em bytes.
+            passo_max: Número máximo de registros por lote, opcional.
+            passo_min: Número mínimo de registros por lote, usado mesmo que
+                os registros ocupem mais memória do que a disponível.
+        """
+        self.memoria_max = memoria_max
+        self.passo_max = passo_max
+        self.passo_min = passo_min
+        self.registro_tamanho = 0
+        self.bytes_por_registro: float = 0
+
+    def configurar(self, tabela_dbf: TabelaDBF) -> None:
+        """Define a estrutura dos registros lidos a seguir.
+
+        Se já houver medições de lotes anteriores com a mesma estrutura de
+        registros - por exemplo, de outras partes do mesmo arquivo de
+        disseminação -, elas continuam sendo usadas.
+
+        Argumentos:
+            tabela_dbf: Tabela DBF a ser lida, com os campos a serem lidos
+                já selecionados.
+        """
+        registro_tamanho = tabela_dbf.header.recordlen
+        if registro_tamanho != self.registro_tamanho:
+            self.registro_tamanho = registro_tamanho
+            self.bytes_por_registro = estimar_bytes_por_registro(tabela_dbf)
+
+    def registrar(self, lote: pd.DataFrame) -> None:
+        """Corrige a estimativa de memória com a medição de um lote gerado.
+
+        Argumentos:
+            lote: Objeto [`pandas.DataFrame`][] gerado a partir de um lote
+                de registros.
+
+        [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+        """
+        if not len(lote):
+            return
+        amostra = lote.iloc[:_AMOSTRA_TAMANHO]
+        observado = medir_memoria(amostra) / len(amostra)
+        if observado >= self.bytes_por_registro:
+            self.bytes_por_registro = observado
+        else:
+            self.bytes_por_registro = (self.bytes_por_registro + observado) / 2
+        logger.debug(
+            "Memória por registro: {:.0f} bytes; próximo lote: {:n} "
+            + "registros.",
+            self.bytes_por_registro,
+            int(self),
+        )
+
+    def __int__(self) -> int:
+        """Calcula o número de registros do próximo lote."""
+        custo = self.registro_tamanho + self.bytes_por_registro
+        passo = int(self.memoria_max // custo) if custo else self.passo_min
+        if self.passo_max is not None:
+            passo = min(passo, self.passo_max)
+        return max(passo, self.passo_min)
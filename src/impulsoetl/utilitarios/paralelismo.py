@@ -0,0 +1,226 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Distribui a transformação de lotes de registros entre vários processos.
+
+As transformações dos arquivos do DataSUS são operações do pandas e do
+Python limitadas a um único núcleo de processamento. A função
+[`transformar_lotes()`][] permite que os lotes lidos de um arquivo sejam
+transformados simultaneamente em processos separados, e devolvidos na ordem
+original para serem carregados por uma única conexão com o banco de dados.
+
+Os lotes são transmitidos entre os processos no formato de fluxo do
+[Apache Arrow][arrow-ipc], em vez de serializados objeto a objeto. Cada
+processo mantém sua própria sessão com o banco de dados, com as tabelas de
+períodos e de unidades geográficas carregadas em memória.
+
+Atributos:
+    TRANSFORMACAO_PROCESSOS: Número de processos usados para transformar os
+        lotes de registros de cada captura. Pode ser definido por meio da
+        variável de ambiente `IMPULSOETL_TRANSFORMACAO_PROCESSOS`. Se o valor
+        for zero, os lotes são transformados no próprio processo principal.
+
+[`transformar_lotes()`]: impulsoetl.utilitarios.paralelismo.transformar_lotes
+[arrow-ipc]: https://arrow.apache.org/docs/python/ipc.html
+"""
+
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import pickle
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Final, Iterable, Iterator, Tuple
+
+import pandas as pd
+import pyarrow as pa
+from sqlalchemy.orm import Session
+
+from impulsoetl.loggers import logger
+
+TRANSFORMACAO_PROCESSOS: Final[int] = int(
+    os.getenv("IMPULSOETL_TRANSFORMACAO_PROCESSOS", 0),
+)
+
+# lotes que não podem ser representados no formato do Arrow são serializados
+# com o `pickle`, cujos dados começam sempre com o byte do protocolo
+_PICKLE_MARCADOR: Final[bytes] = pickle.PROTO
+
+# sessão com o banco de dados de cada processo auxiliar
+_sessao: Session | None = None
+
+
+def serializar_dataframe(dados: pd.DataFrame) -> bytes:
+    """Serializa um DataFrame no formato de fluxo do Apache Arrow.
+
+    Argumentos:
+        dados: Objeto [`pandas.DataFrame`][] a ser serializado.
+
+    Retorna:
+        Os bytes do fluxo Arrow, incluindo os metadados necessários para
+        restaurar os tipos do pandas - como colunas categóricas e de
+        inteiros anuláveis. Se alguma coluna contiver objetos sem equivalente
+        no Arrow, o DataFrame é serializado com o módulo [`pickle`][].
+
+    [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+    [`pickle`]: https://docs.python.org/3/library/pickle.html
+    """
+    try:
+        tabela = pa.Table.from_pandas(dados)
+    except (ValueError, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        logger.debug("Lote serializado sem o formato Arrow.")
+        return pickle.dumps(dados, protocol=pickle.HIGHEST_PROTOCOL)
+    destino = pa.BufferOutputStream()
+    with pa.ipc.new_stream(destino, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return destino.getvalue().to_pybytes()
+
+
+def desserializar_dataframe(dados_serializados: bytes) -> pd.DataFrame:
+    """Restaura um DataFrame serializado com [`serializar_dataframe()`][].
+
+    [`serializar_dataframe()`]: impulsoetl.utilitarios.paralelismo.serializar_dataframe
+    """
+    if dados_serializados[:1] == _PICKLE_MARCADOR:
+        return pickle.loads(dados_serializados)  # noqa: S301  # nosec: B301
+    with pa.ipc.open_stream(dados_serializados) as leitor:
+        return leitor.read_all().to_pandas()
+
+
+def carregar_dimensoes(sessao: Session) -> None:
+    """Carrega em memória as tabelas de períodos e unidades geográficas.
+
+    Argumentos:
+        sessao: objeto [`sqlalchemy.orm.session.Session`][] que permite
+            acessar a base de dados da ImpulsoGov.
+
+    [`sqlalchemy.orm.session.Session`]: https://docs.sqlalchemy.org/en/14/orm/session_api.html#sqlalchemy.orm.Session
+    """
+    # importados aqui porque refletem tabelas do banco de dados ao serem
+    # carregados
+    from impulsoetl.comum.datas import indice_periodos
+    from impulsoetl.comum.geografias import dimensao_geografica
+
+    indice_periodos(sessao, "mensal")
+    dimensao_geografica(sessao)
+
+
+def _inicializar_processo(
+    preparar: Callable[[Session], None] | None,
+) -> None:
+    """Cria a sessão com o banco de dados de um processo auxiliar."""
+    global _sessao
+    from impulsoetl.bd import Sessao
+
+    _sessao = Sessao()
+    if preparar is not None:
+        preparar(_sessao)
+
+
+def _transformar_serializado(
+    transformar: Callable[..., pd.DataFrame],
+    argumento: str,
+    lote_serializado: bytes,
+    kwargs: dict[str, Any],
+) -> bytes:
+    """Transforma um lote serializado em um processo auxiliar."""
+    lote = desserializar_dataframe(lote_serializado)
+    kwargs[argumento] = lote
+    return serializar_dataframe(transformar(sessao=_sessao, **kwargs))
+
+
+def transformar_lotes(
+    transformar: Callable[..., pd.DataFrame],
+    lotes: Iterable[pd.DataFrame],
+    sessao: Session,
+    argumento: str,
+    processos: int = TRANSFORMACAO_PROCESSOS,
+    preparar: Callable[[Session], None] | None = carregar_dimensoes,
+    **kwargs,
+) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """Transforma lotes de registros, opcionalmente em vários processos.
+
+    Argumentos:
+        transformar: Função de transformação da fonte de dados, que recebe
+            uma sessão com o banco de dados no argumento `sessao` e um lote
+            de registros no argumento indicado por `argumento`. Para ser
+            usada em outros processos, deve ser definida no nível superior
+            de um módulo.
+        lotes: Iterável com os lotes de registros originais.
+        sessao: objeto [`sqlalchemy.orm.session.Session`][] usado nas
+            transformações executadas no processo principal.
+        argumento: Nome do argumento da função de transformação que recebe
+            cada lote.
+        processos: Número de processos auxiliares. Se for zero, os lotes são
+            transformados sequencialmente no processo principal. Por padrão,
+            usa o valor de [`TRANSFORMACAO_PROCESSOS`][].
+        preparar: Função executada uma vez em cada processo auxiliar com a
+            sessão do processo, antes das transformações. Por padrão, carrega
+            em memória as tabelas de períodos e unidades geográficas (ver
+            [`carregar_dimensoes()`][]).
+        \\*\\*kwargs: Argumentos adicionais repassados à função de
+            transformação.
+
+    Gera:
+        A cada iteração, uma tupla com o número de registros do lote
+        original e o objeto [`pandas.DataFrame`][] transformado, na mesma
+        ordem dos lotes originais. Em modo paralelo, até `2 * processos`
+        lotes são enviados aos processos auxiliares antes que o primeiro
+        deles seja devolvido.
+
+    [`sqlalchemy.orm.session.Session`]: https://docs.sqlalchemy.org/en/14/orm/session_api.html#sqlalchemy.orm.Session
+    [`TRANSFORMACAO_PROCESSOS`]: impulsoetl.utilitarios.paralelismo.TRANSFORMACAO_PROCESSOS
+    [`carregar_dimensoes()`]: impulsoetl.utilitarios.paralelismo.carregar_dimensoes
+    [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+    """
+    if processos <= 0:
+        for lote in lotes:
+            kwargs[argumento] = lote
+            yield len(lote), transformar(sessao=sessao, **kwargs)
+        return
+
+    logger.info(
+        "Transformando lotes em {} processos auxiliares.",
+        processos,
+    )
+    pendentes: Deque[Tuple[int, Future]] = deque()
+    # processos iniciados do zero não herdam as conexões com o banco de dados
+    # abertas pelo processo principal
+    executor = ProcessPoolExecutor(
+        max_workers=processos,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_inicializar_processo,
+        initargs=(preparar,),
+    )
+    try:
+        for lote in lotes:
+            pendentes.append(
+                (
+                    len(lote),
+                    executor.submit(
+                        _transformar_serializado,
+                        transformar,
+                        argumento,
+                        serializar_dataframe(lote),
+                        kwargs,
+                    ),
+                ),
+            )
+            # libera o lote original enquanto as transformações são feitas
+            del lote
+            if len(pendentes) >= 2 * processos:
+                lote_tamanho, futuro = pendentes.popleft()
+                yield lote_tamanho, desserializar_dataframe(futuro.result())
+        while pendentes:
+            lote_tamanho, futuro = pendentes.popleft()
+            yield lote_tamanho, desserializar_dataframe(futuro.result())
+    finally:
+        # interrompe as transformações não iniciadas caso a iteração seja
+        # encerrada antes do fim
+        for _, futuro in pendentes:
+            futuro.cancel()
+        executor.shutdown(wait=True)
@@ -0,0 +1,146 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Substitui por valores nulos os códigos que representam dados ausentes.
+
+Os arquivos de disseminação do DataSUS costumam representar informações não
+preenchidas com valores especiais - textos vazios, códigos compostos apenas
+por zeros ou por noves, ou idades iguais a `999`, entre outros. As funções
+deste módulo substituem esses valores por nulos em colunas inteiras de um
+objeto [`pandas.DataFrame`][], e podem ser encadeadas nas transformações por
+meio do método [`pandas.DataFrame.pipe()`][]:
+
+```py
+>>> import pandas as pd
+>>> from impulsoetl.utilitarios.valores_nulos import remover_zeros
+>>> df = pd.DataFrame({"cnpj": ["00000000000000", "12345678000199", None]})
+>>> df.pipe(remover_zeros, ["cnpj"])
+             cnpj
+0             NaN
+1  12345678000199
+2            None
+```
+
+Em vez de avaliar uma função do Python para cada elemento, a verificação é
+feita uma única vez para cada valor distinto de cada coluna, e o resultado é
+aplicado à coluna inteira de uma só vez.
+
+[`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+[`pandas.DataFrame.pipe()`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.pipe.html
+"""
+
+
+from __future__ import annotations
+
+from typing import Final, Iterable
+
+import pandas as pd
+from pandas.api.types import is_object_dtype, is_string_dtype
+
+PADRAO_ZEROS: Final[str] = r"0*"
+PADRAO_NOVES: Final[str] = r"9*"
+
+
+def _e_texto(serie: pd.Series) -> bool:
+    return is_object_dtype(serie) or is_string_dtype(serie)
+
+
+def identificar_sentinelas(serie: pd.Series, padrao: str) -> pd.Series:
+    """Identifica os valores de texto que correspondem a um padrão.
+
+    Argumentos:
+        serie: Coluna a ser verificada.
+        padrao: Expressão regular que deve corresponder ao valor inteiro de
+            cada elemento.
+
+    Retorna:
+        Uma série de valores booleanos, com o mesmo índice da série original,
+        indicando os elementos que correspondem ao padrão. Valores nulos e
+        que não sejam textos nunca são considerados correspondentes.
+    """
+    if not _e_texto(serie):
+        return pd.Series(False, index=serie.index)
+    valores = pd.Series(pd.unique(serie.dropna()), dtype=object)
+    sentinelas = valores[valores.str.fullmatch(padrao, na=False)]
+    return serie.isin(sentinelas)
+
+
+def remover_sentinelas(
+    dados: pd.DataFrame,
+    colunas: Iterable[str],
+    padrao: str,
+) -> pd.DataFrame:
+    """Substitui por nulos os valores que correspondem a um padrão.
+
+    Argumentos:
+        dados: Objeto [`pandas.DataFrame`][] a ser transformado.
+        colunas: Nomes das colunas a serem verificadas.
+        padrao: Expressão regular que deve corresponder ao valor inteiro de
+            cada elemento a ser substituído.
+
+    Retorna:
+        Uma cópia do objeto original, com os valores correspondentes ao
+        padrão substituídos por nulos.
+
+    [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+    """
+    dados = dados.copy()
+    for coluna in colunas:
+        dados[coluna] = dados[coluna].mask(
+            identificar_sentinelas(dados[coluna], padrao),
+        )
+    return dados
+
+
+def remover_zeros(
+    dados: pd.DataFrame,
+    colunas: Iterable[str],
+) -> pd.DataFrame:
+    """Substitui por nulos os valores compostos apenas pelo dígito zero.
+
+    Ver [`remover_sentinelas()`][].
+
+    [`remover_sentinelas()`]: impulsoetl.utilitarios.valores_nulos.remover_sentinelas
+    """
+    return remover_sentinelas(dados, colunas, PADRAO_ZEROS)
+
+
+def remover_noves(
+    dados: pd.DataFrame,
+    colunas: Iterable[str],
+) -> pd.DataFrame:
+    """Substitui por nulos os valores compostos apenas pelo dígito nove.
+
+    Ver [`remover_sentinelas()`][].
+
+    [`remover_sentinelas()`]: impulsoetl.utilitarios.valores_nulos.remover_sentinelas
+    """
+    return remover_sentinelas(dados, colunas, PADRAO_NOVES)
+
+
+def remover_vazios(
+    dados: pd.DataFrame,
+    colunas: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    """Substitui por nulos os textos vazios.
+
+    Argumentos:
+        dados: Objeto [`pandas.DataFrame`][] a ser transformado.
+        colunas: Nomes das colunas a serem verificadas. Por padrão, verifica
+            todas as colunas com valores de texto.
+
+    Retorna:
+        Uma cópia do objeto original, com os textos vazios substituídos por
+        nulos.
+
+    [`pandas.DataFrame`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.html
+    """
+    if colunas is None:
+        colunas = [coluna for coluna in dados if _e_texto(dados[coluna])]
+    dados = dados.copy()
+    for coluna in colunas:
+        # comparação direta, sem expressões regulares
+        dados[coluna] = dados[coluna].mask(dados[coluna].isin([""]))
+    return dados
@@ -3,28 +3,154 @@
 # SPDX-License-Identifier: MIT
 
 
+"""Verifica a presença de códigos de listas de referência em colunas.
+
+Listas como os códigos do capítulo V da CID-10 ou os procedimentos da tabela
+SIGTAP realizados em Centros de Atenção Psicossocial podem ter centenas de
+elementos. Em vez de comparar cada célula com cada código da lista, a função
+[`compilar_prefixos()`][] organiza os códigos em uma árvore de prefixos e a
+converte em uma única expressão regular, cujo custo de verificação depende
+do tamanho dos textos, e não do número de códigos. A expressão é aplicada uma
+única vez para cada valor distinto da coluna verificada.
+
+[`compilar_prefixos()`]: impulsoetl.utilitarios.variaveis_codificadas.compilar_prefixos
+"""
+
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+import pandas as pd
+
+# expressão que não corresponde a nenhum texto
+_NENHUM: str = r"(?!)"
+
+_Arvore = Dict[str, "_Arvore"]
+
+# marcador de fim de código; sempre comparado pela identidade do objeto
+_FIM: _Arvore = {"": {}}
+
+
+def _montar_arvore(codigos: Iterable[str]) -> _Arvore | None:
+    """Organiza os códigos em uma árvore de prefixos.
+
+    Retorna `None` se um dos códigos for vazio, caso em que qualquer texto
+    corresponde à lista.
+    """
+    arvore: _Arvore = {}
+    # os códigos mais curtos são inseridos antes; códigos que começam com
+    # outro código da lista são redundantes
+    for codigo in sorted(set(codigos), key=len):
+        if not codigo:
+            return None
+        no = arvore
+        for caractere in codigo[:-1]:
+            no = no.setdefault(caractere, {})
+            if no is _FIM:
+                break
+        else:
+            no[codigo[-1]] = _FIM
+    return arvore
+
+
+def _expressao_arvore(arvore: _Arvore) -> str:
+    """Converte uma árvore de prefixos em uma expressão regular."""
+    terminais = sorted(
+        caractere for caractere, filho in arvore.items() if filho is _FIM
+    )
+    alternativas = [
+        re.escape(caractere) + _expressao_arvore(filho)
+        for caractere, filho in sorted(arvore.items())
+        if filho is not _FIM
+    ]
+    if len(terminais) == 1:
+        alternativas.append(re.escape(terminais[0]))
+    elif terminais:
+        classe = "".join(re.escape(caractere) for caractere in terminais)
+        alternativas.append("[" + classe + "]")
+    if len(alternativas) == 1:
+        return alternativas[0]
+    return "(?:" + "|".join(alternativas) + ")"
+
+
+@lru_cache(maxsize=64)
+def _compilar(codigos: tuple, varios_codigos_por_celula: bool) -> re.Pattern:
+    arvore = _montar_arvore(codigos)
+    if arvore is None:
+        expressao = ""
+    elif not arvore:
+        expressao = _NENHUM
+    else:
+        expressao = _expressao_arvore(arvore)
+    if varios_codigos_por_celula:
+        # o código deve estar no início do texto ou após um caractere que
+        # não seja alfanumérico
+        expressao = r"(?<!\w)" + expressao
+    return re.compile(expressao, re.ASCII)
+
+
+def compilar_prefixos(
+    codigos_alvo: Iterable[str],
+    varios_codigos_por_celula: bool = False,
+) -> re.Pattern:
+    """Compila uma expressão regular que reconhece uma lista de códigos.
+
+    Argumentos:
+        codigos_alvo: Códigos a serem reconhecidos. Um texto corresponde à
+            lista se começar com qualquer um dos códigos - de forma que um
+            código de categoria da CID-10 (como `F32`) também reconhece suas
+            subcategorias (como `F320`).
+        varios_codigos_por_celula: Se verdadeiro, a expressão reconhece
+            códigos em qualquer posição do texto que esteja no início do
+            texto ou após um caractere não alfanumérico, para uso em textos
+            com vários códigos concatenados (como `F320/F410`). Por padrão,
+            apenas o início do texto é considerado.
+
+    Retorna:
+        Um objeto [`re.Pattern`][], a ser usado com o método `search()`.
+        Expressões compiladas para uma mesma lista de códigos são
+        reaproveitadas.
+
+    [`re.Pattern`]: https://docs.python.org/3/library/re.html#regular-expression-objects
+    """
+    return _compilar(
+        tuple(sorted(set(codigos_alvo))),
+        varios_codigos_por_celula,
+    )
+
+
 def checar_codigos(
     serie: pd.Series,
     codigos_alvo: List[str],
     varios_codigos_por_celula: bool = False,
 ) -> pd.Series:
-    """Verifica se há elementos de uma lista de códigos em uma `pd.Series`."""
+    """Verifica se há elementos de uma lista de códigos em uma `pd.Series`.
 
-    if varios_codigos_por_celula:
-        return serie.apply(
-            lambda elemento: any(
-                [elemento.startswith(cod) for cod in codigos_alvo],
-            ),
-        )
-
-    # se a série contiver vários códigos em uma mesma célula, concatenados
-    # por algum caractere alfanumérico, utilizar o módulo `re` para
-    # verificar se algum se aplica (mais lento)
-    return serie.apply(
-        lambda elemento: any(
-            [
-                re.search(r"\W{}".format(cod), elemento, re.ASCII)
-                for cod in codigos_alvo
-            ],
-        ),
-    )
+    Argumentos:
+        serie: Objeto [`pandas.Series`][] com os textos a serem verificados.
+        codigos_alvo: Lista de códigos a serem procurados. Ver
+            [`compilar_prefixos()`][].
+        varios_codigos_por_celula: Indica se as células podem conter vários
+            códigos, concatenados por algum caractere não alfanumérico.
+
+    Retorna:
+        Uma série de valores booleanos, com o mesmo índice da série original,
+        indicando os elementos que começam com algum dos códigos da lista -
+        ou, se `varios_codigos_por_celula` for verdadeiro, que contêm algum
+        código iniciado com um dos códigos da lista. Valores nulos e que não
+        sejam textos nunca são considerados correspondentes.
+
+    [`pandas.Series`]: https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.Series.html
+    [`compilar_prefixos()`]: impulsoetl.utilitarios.variaveis_codificadas.compilar_prefixos
+    """
+    padrao = compilar_prefixos(codigos_alvo, varios_codigos_por_celula)
+    valores = pd.Series(pd.unique(serie.dropna()), dtype=object)
+    correspondentes = valores[
+        valores.str.contains(padrao, na=False)
+        if varios_codigos_por_celula
+        else valores.str.match(padrao, na=False)
+    ]
+    return serie.isin(correspondentes)
@@ -8,9 +8,17 @@
 
 from __future__ import annotations
 
+import pandas as pd
 import pytest
 
-from impulsoetl.comum.condicoes_saude import e_cid10, remover_ponto_cid10
+from impulsoetl.comum.condicoes_saude import (
+    e_cid10,
+    listar_cids10,
+    normalizar_cids10,
+    remover_ponto_cid10,
+    separar_cids10,
+    validar_cids10,
+)
 
 
 @pytest.mark.parametrize(
@@ -44,3 +52,44 @@ def teste_e_cid10_nao(texto):
 def teste_remover_ponto_cid10(texto,resultado_esperado):
     """Testa identificar que um texto é um CID10 válido."""
     assert remover_ponto_cid10(texto) == resultado_esperado
+
+
+def teste_validar_cids10():
+    """Testa identificar CID10 válidos em uma coluna inteira."""
+    textos = ["F99", "F9X", "K09.2", None, "N189I500", "F99"]
+    resultado = validar_cids10(pd.Series(textos, index=list("abcdef")))
+    assert resultado.dtype == bool
+    assert resultado.index.tolist() == list("abcdef")
+    assert resultado.tolist() == [True, False, True, False, False, True]
+
+
+def teste_normalizar_cids10():
+    """Testa remover os pontos dos CID10 de uma coluna inteira."""
+    textos = ["K09.2", "M10.06*M45.X3", None, "K09.2"]
+    resultado = normalizar_cids10(pd.Series(textos))
+    assert resultado.tolist()[:2] == ["K092", "M1006*M45X3"]
+    assert pd.isna(resultado[2])
+    assert resultado[3] == "K092"
+
+
+def teste_separar_cids10():
+    """Testa separar os CID10 de uma coluna com listas de condições."""
+    textos = ["R578/J969", "", "/ /B342 U071", None, "R578/J969"]
+    resultado = separar_cids10(pd.Series(textos, index=[9, 8, 7, 6, 5]))
+    assert resultado.index.tolist() == [9, 9, 7, 7, 5, 5]
+    assert resultado.tolist() == [
+        "R578",
+        "J969",
+        "B342",
+        "U071",
+        "R578",
+        "J969",
+    ]
+
+
+def teste_listar_cids10():
+    """Testa converter listas de condições em arrays do PostgreSQL."""
+    textos = ["*R578*J969", "/ /B342 U071*P3", "", None]
+    resultado = listar_cids10(pd.Series(textos))
+    assert resultado.tolist()[:3] == ["{R578,J969}", "{B342,U071}", "{}"]
+    assert pd.isna(resultado[3])
@@ -10,11 +10,19 @@ from __future__ import annotations
 
 import pandas as pd
 import pytest
+from sqlalchemy.orm.exc import NoResultFound
 
 from impulsoetl.comum.datas import (
+    IndicePeriodos,
+    de_aaaamm_para_datas,
+    de_aaaammdd_para_datas,
     de_aaaammdd_para_timestamp,
+    de_ano_mes_para_datas,
+    de_hhmm_para_horas,
+    de_textos_para_datas,
     obter_proximo_periodo,
     periodo_por_data,
+    periodos_por_datas,
 )
 
 
@@ -49,6 +57,61 @@ def teste_de_aaaammdd_para_timestamp_incorreto(comportamento):
             assert pd.isna(data)
 
 
+def teste_de_aaaammdd_para_datas():
+    textos = pd.Series(
+        ["20201005", "2020 1 7", "20202 13", "blablabla", None, "20201005"],
+        index=list("abcdef"),
+    )
+    datas = de_aaaammdd_para_datas(textos)
+    assert datas.dtype == "datetime64[ns]"
+    assert datas.index.tolist() == list("abcdef")
+    assert datas[["a", "b", "c", "f"]].tolist() == [
+        pd.Timestamp(2020, 10, 5),
+        pd.Timestamp(2020, 1, 7),
+        pd.Timestamp(2020, 2, 13),
+        pd.Timestamp(2020, 10, 5),
+    ]
+    assert datas[["d", "e"]].isna().all()
+
+
+def teste_de_aaaamm_para_datas():
+    datas = de_aaaamm_para_datas(pd.Series(["202108", "2021", "", None]))
+    assert datas.dtype == "datetime64[ns]"
+    assert datas[0] == pd.Timestamp(2021, 8, 1)
+    assert datas[1:].isna().all()
+
+
+def teste_de_textos_para_datas():
+    datas = de_textos_para_datas(
+        pd.Series(["05/10/2020", "31/02/2020"]),
+        "%d/%m/%Y",  # noqa: WPS323
+    )
+    assert datas[0] == pd.Timestamp(2020, 10, 5)
+    assert pd.isna(datas[1])
+
+
+def teste_de_ano_mes_para_datas():
+    datas = de_ano_mes_para_datas(
+        pd.Series(["2021", "2021", "", "2020"]),
+        pd.Series(["08", "9", "1", "13"]),
+    )
+    assert datas.dtype == "datetime64[ns]"
+    assert datas[:2].tolist() == [
+        pd.Timestamp(2021, 8, 1),
+        pd.Timestamp(2021, 9, 1),
+    ]
+    assert datas[2:].isna().all()
+
+
+def teste_de_hhmm_para_horas():
+    horas = de_hhmm_para_horas(
+        pd.Series(["0930", "2359", "2400", "", None, "0930"]),
+    )
+    assert horas[:2].tolist() == ["09:30", "23:59"]
+    assert horas[2:5].isna().all()
+    assert horas[5] == "09:30"
+
+
 @pytest.mark.parametrize(
     "data,tipo_periodo,id_esperado",
     [
@@ -77,6 +140,55 @@ def teste_periodo_por_data(data, tipo_periodo, id_esperado, sessao):
     assert periodo_id == id_esperado
 
 
+def teste_indice_periodos_localizar():
+    indice = IndicePeriodos(
+        pd.DataFrame(
+            {
+                "id": ["fevereiro", "janeiro", "abril"],
+                "data_inicio": ["2021-02-01", "2021-01-01", "2021-04-01"],
+                "data_fim": ["2021-02-28", "2021-01-31", "2021-04-30"],
+            },
+        ),
+    )
+    datas = pd.Series(
+        pd.to_datetime(
+            ["2021-01-31", "2021-02-01", None, "2021-03-15", "2021-04-01"],
+        ),
+        index=[10, 20, 30, 40, 50],
+    )
+    periodos_ids = indice.localizar(datas, erros="coerce")
+    assert periodos_ids.index.tolist() == [10, 20, 30, 40, 50]
+    assert periodos_ids.tolist() == [
+        "janeiro",
+        "fevereiro",
+        None,
+        None,
+        "abril",
+    ]
+    with pytest.raises(NoResultFound):
+        indice.localizar(datas)
+
+
+@pytest.mark.parametrize("tipo_periodo", ["mensal", "quadrimestral"])
+def teste_periodos_por_datas(tipo_periodo, sessao):
+    datas = pd.Series(
+        pd.date_range("2020-11-15", "2021-10-15", freq="MS"),
+    )
+    periodos_ids = periodos_por_datas(
+        sessao=sessao,
+        datas=datas,
+        tipo_periodo=tipo_periodo,
+    )
+    assert periodos_ids.tolist() == [
+        periodo_por_data(
+            sessao=sessao,
+            data=data,
+            tipo_periodo=tipo_periodo,
+        ).id
+        for data in datas
+    ]
+
+
 @pytest.mark.parametrize(
     "periodo_id,id_esperado",
     [
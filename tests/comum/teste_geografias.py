@@ -8,12 +8,17 @@
 
 from __future__ import annotations
 
+import pandas as pd
 import pytest
+from sqlalchemy.orm.exc import NoResultFound
 
 from impulsoetl.comum.geografias import (
+    DimensaoGeografica,
     id_impulso_para_id_sus,
     id_sim_para_id_impulso,
     id_sus_para_id_impulso,
+    ids_sim_para_ids_impulso,
+    ids_sus_para_ids_impulso,
     uf_id_ibge_para_sigla,
 )
 
@@ -62,3 +67,71 @@ def teste_id_impulso_para_id_sus(id_impulso, id_esperado, sessao):
     assert id_sus
     assert isinstance(id_sus, str)
     assert id_sus == id_esperado
+
+
+@pytest.fixture
+def dimensao_geografica():
+    return DimensaoGeografica(
+        pd.DataFrame(
+            {
+                "id": ["id-aracaju", "id-planaltina", "id-sergipe"],
+                "id_sus": ["280030", "530020", "28"],
+                "id_sim": ["280030", "539914", None],
+            },
+        ),
+        pd.DataFrame({"id_ibge": ["28", "53"], "sigla": ["SE", "DF"]}),
+    )
+
+
+def teste_dimensao_geografica_converter(dimensao_geografica):
+    """Testa converter colunas inteiras de códigos geográficos em memória."""
+    ids_sus = pd.Series(["280030", "280030", 530020], index=[5, 6, 7])
+    ids_impulso = dimensao_geografica.converter(
+        "id_sus_para_id_impulso",
+        ids_sus,
+    )
+    assert ids_impulso.index.tolist() == [5, 6, 7]
+    assert ids_impulso.tolist() == [
+        "id-aracaju",
+        "id-aracaju",
+        "id-planaltina",
+    ]
+    assert dimensao_geografica.converter(
+        "uf_id_ibge_para_sigla",
+        pd.Series([53, 28]),
+    ).tolist() == ["DF", "SE"]
+
+
+def teste_dimensao_geografica_codigos_desconhecidos(dimensao_geografica):
+    """Testa converter colunas com códigos geográficos desconhecidos."""
+    ids_sim = pd.Series(["539914", "999999"])
+    with pytest.raises(NoResultFound, match="999999"):
+        dimensao_geografica.converter("id_sim_para_id_impulso", ids_sim)
+    ids_impulso = dimensao_geografica.converter(
+        "id_sim_para_id_impulso",
+        ids_sim,
+        erros="coerce",
+    )
+    assert ids_impulso[0] == "id-planaltina"
+    assert pd.isna(ids_impulso[1])
+
+
+def teste_ids_sus_para_ids_impulso(sessao):
+    """Testa converter uma coluna de identificadores SUS."""
+    ids_impulso = ids_sus_para_ids_impulso(
+        sessao=sessao,
+        ids_sus=pd.Series(["280030", "280030"]),
+    )
+    assert ids_impulso.tolist() == [
+        "e8cb5dcc-46d4-45af-a237-4ab683b8ce8e",
+        "e8cb5dcc-46d4-45af-a237-4ab683b8ce8e",
+    ]
+
+
+def teste_ids_sim_para_ids_impulso(sessao):
+    """Testa converter uma coluna de identificadores SIM."""
+    ids_impulso = ids_sim_para_ids_impulso(
+        sessao=sessao,
+        ids_sim=pd.Series(["539914"]),
+    )
+    assert ids_impulso.tolist() == ["0630e740-d46f-7dca-a009-6f1232e66823"]
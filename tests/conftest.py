@@ -14,6 +14,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine, URL
 from sqlalchemy.orm import sessionmaker
 
+from tests.simulacoes import gerar_dbc
+
 
 @pytest.fixture(scope="session", autouse=True)
 def carregar_variaveis_ambiente():
@@ -79,3 +81,15 @@ def passo():
         yield 100
     finally:
         os.environ["IMPULSOETL_LOTE_TAMANHO"] = lote_tamanho_original
+
+
+@pytest.fixture(scope="module")
+def registros():
+    return [("SP", "355030"), ("RJ", "330455"), ("MG", "310620")] * 500
+
+
+@pytest.fixture(scope="function")
+def arquivo_dbc(tmp_path, registros):
+    caminho = tmp_path / "TESTE.dbc"
+    caminho.write_bytes(gerar_dbc(registros))
+    return caminho
@@ -0,0 +1,146 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Simula arquivos e servidores do DataSUS para os casos de teste."""
+
+
+from __future__ import annotations
+
+import struct
+
+from impulsoetl.utilitarios.dbc import _COMPRIMENTOS_TABELA
+
+CAMPOS = (
+    (b"MUNIC", b"C", 6, 0),
+    (b"NOME", b"C", 10, 0),
+    (b"DTOBITO", b"D", 8, 0),
+    (b"QTD", b"N", 5, 0),
+    (b"VALOR", b"N", 8, 2),
+    (b"ATIVO", b"L", 1, 0),
+)
+
+
+def gerar_registro(*valores: bytes, excluido: bool = False) -> bytes:
+    return (b"*" if excluido else b" ") + b"".join(
+        valor.ljust(campo[2]) if campo[1] in b"CD" else valor.rjust(campo[2])
+        for valor, campo in zip(valores, CAMPOS)
+    )
+
+
+REGISTROS = [
+    gerar_registro(
+        b"355030", b"S\xe3o Paulo", b"20220131", b"12", b"10.50", b"T",
+    ),
+    gerar_registro(b"330455", b"Rio", b"20220201", b"0", b"0.00", b"F"),
+    gerar_registro(b"310620", b"Belo", b"", b"**", b"", b"?", excluido=True),
+    gerar_registro(b"310620", b"", b"20220203", b"", b"", b"?"),
+    gerar_registro(
+        b"420540", b"Floripa \0", b"20220204", b"-3", b"-1,25", b" ",
+    ),
+]
+
+
+def gerar_dbf(registros: list[bytes], fim: bytes = b"\x1a") -> bytes:
+    campos = b"".join(
+        struct.pack("<11scLBB14s", nome, tipo, 0, tamanho, decimais, b"")
+        for nome, tipo, tamanho, decimais in CAMPOS
+    )
+    registro_tamanho = 1 + sum(campo[2] for campo in CAMPOS)
+    assert all(len(registro) == registro_tamanho for registro in registros)
+    cabecalho = struct.pack(
+        "<BBBBLHH20s",
+        3,
+        22,
+        1,
+        1,
+        len(registros),
+        32 + len(campos) + 1,
+        registro_tamanho,
+        b"",
+    )
+    return cabecalho + campos + b"\r" + b"".join(registros) + fim
+
+
+def compactar_literais(dados: bytes) -> bytes:
+    """Gera um fluxo PKWare DCL válido, com todos os bytes como literais."""
+    # cabeçalho: literais não codificados; dicionário de 4096 bytes
+    acumulador = 0
+    bits = 0
+    for byte in dados:
+        acumulador |= (byte << 1) << bits
+        bits += 9
+    # código de fim: comprimento 264 + 255 = 519
+    valor, comprimento = next(
+        (indice, item[1])
+        for indice, item in enumerate(_COMPRIMENTOS_TABELA)
+        if item[0] == 15
+    )
+    valor &= (1 << comprimento) - 1
+    acumulador |= (1 | (valor << 1) | (255 << (comprimento + 1))) << bits
+    bits += 1 + comprimento + 8
+    return bytes([0, 6]) + acumulador.to_bytes((bits + 7) // 8, "little")
+
+
+def gerar_dbf_municipios(registros: list[tuple[str, str]]) -> bytes:
+    """Gera um arquivo DBF com os campos de texto `UF` e `MUNIC`."""
+    campos = b"".join(
+        struct.pack("<11scLBB14s", nome, b"C", 0, tamanho, 0, b"")
+        for nome, tamanho in ((b"UF", 2), (b"MUNIC", 6))
+    )
+    cabecalho_tamanho = 32 + len(campos) + 1
+    cabecalho = struct.pack(
+        "<BBBBLHH20s",
+        3,
+        22,
+        1,
+        1,
+        len(registros),
+        cabecalho_tamanho,
+        9,
+        b"",
+    )
+    dados = b"".join(
+        b" " + uf.encode("latin1") + municipio.encode("latin1")
+        for uf, municipio in registros
+    )
+    return cabecalho + campos + b"\r" + dados + b"\x1a"
+
+
+def gerar_dbc(registros: list[tuple[str, str]]) -> bytes:
+    """Gera um arquivo .dbc com os campos de texto `UF` e `MUNIC`."""
+    dbf = gerar_dbf_municipios(registros)
+    cabecalho_tamanho = int.from_bytes(dbf[8:10], "little")
+    return (
+        dbf[:cabecalho_tamanho]
+        + bytes(4)
+        + compactar_literais(dbf[cabecalho_tamanho:])
+    )
+
+
+class ClienteFtpArquivos(object):
+    """Simula um servidor FTP com arquivos em memória."""
+
+    def __init__(self, arquivos: dict):
+        self.arquivos = arquivos
+        self.retomadas = []
+
+    def mlsd(self, path="", facts=()):
+        for nome, (conteudo, modificacao) in self.arquivos.items():
+            yield nome, {
+                "type": "file",
+                "size": str(len(conteudo)),
+                "modify": modificacao,
+            }
+
+    def size(self, nome):
+        return len(self.arquivos[nome][0])
+
+    def sendcmd(self, comando):
+        return "213 " + self.arquivos[comando.split()[-1]][1]
+
+    def retrbinary(self, comando, callback, blocksize=8192, rest=None):
+        self.retomadas.append(rest)
+        conteudo = self.arquivos[comando.split()[-1]][0]
+        callback(conteudo[rest or 0 :])
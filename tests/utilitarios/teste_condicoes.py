@@ -0,0 +1,134 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Casos de teste para a análise de condições de filtragem de registros."""
+
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from impulsoetl.utilitarios.condicoes import (
+    FiltroRegistros,
+    colunas_necessarias,
+    listar_colunas_referenciadas,
+)
+
+
+@pytest.mark.unitario
+@pytest.mark.parametrize(
+    "condicoes,colunas_esperadas",
+    [
+        ("PA_TPUPS == '70'", {"PA_TPUPS"}),
+        (
+            "(PA_TPUPS == '70') and PA_PROC_ID.str.startswith('0301')",
+            {"PA_TPUPS", "PA_PROC_ID"},
+        ),
+        ("`PA CBO` in ['225125', '225142']", {"PA CBO"}),
+        ("PA_TPUPS ==", None),
+    ],
+)
+def teste_listar_colunas_referenciadas(condicoes, colunas_esperadas):
+    assert listar_colunas_referenciadas(condicoes) == colunas_esperadas
+
+
+@pytest.mark.unitario
+def teste_colunas_necessarias():
+    assert colunas_necessarias(["PA_CODUNI"]) == ["PA_CODUNI"]
+    assert colunas_necessarias(
+        ["PA_CODUNI"],
+        condicoes="PA_TPUPS == '70' and PA_CODUNI != ''",
+    ) == ["PA_CODUNI", "PA_TPUPS"]
+    assert colunas_necessarias(["PA_CODUNI"], condicoes="PA_TPUPS ==") is None
+
+
+REGISTROS = pd.DataFrame(
+    {
+        "PA_TPUPS": ["70", "70", "05", "", "70"],
+        "PA_PROC_ID": [
+            "0301010072",
+            "0101010010",
+            "0301060029",
+            "0301010072",
+            "0214010015",
+        ],
+        "PA_CBO": ["225125", "", "225142", "322205", "225125"],
+        "PA_QTDPRO": [1, 2, 3, 4, 5],
+    },
+)
+
+
+def obter_textos(coluna: str):
+    if coluna not in REGISTROS or REGISTROS[coluna].dtype != object:
+        return None
+    valores = REGISTROS[coluna].str.encode("iso-8859-1")
+    largura = max(valores.str.len().max(), 1)
+    return (
+        np.array(valores.tolist(), dtype="S{}".format(largura))
+        .view(np.uint8)
+        .reshape(len(valores), largura)
+    )
+
+
+@pytest.mark.unitario
+@pytest.mark.parametrize(
+    "condicoes,mascara_esperada",
+    [
+        ("PA_TPUPS == '70'", [True, True, False, False, True]),
+        ("'70' != PA_TPUPS", [False, False, True, True, False]),
+        ("PA_TPUPS == ''", [False, False, False, True, False]),
+        (
+            "PA_CBO in ['225125', '322205']",
+            [True, False, False, True, True],
+        ),
+        ("PA_CBO.isin(('225142',))", [False, False, True, False, False]),
+        (
+            "PA_PROC_ID.str.startswith('0301')"
+            + " | PA_PROC_ID.str.startswith('02')",
+            [True, False, True, True, True],
+        ),
+        (
+            "(PA_TPUPS == '70') & ~PA_PROC_ID.str.startswith('0301')",
+            [False, True, False, False, True],
+        ),
+        (
+            "not (`PA_CBO` == '225125' or PA_TPUPS != '70')",
+            [False, True, False, False, False],
+        ),
+        ("PA_PROC_ID.str.startswith('03010100720')", [False] * 5),
+        # condições não suportadas não restringem a conjunção
+        (
+            "PA_TPUPS == '70' and PA_QTDPRO > 1",
+            [True, True, False, False, True],
+        ),
+        ("PA_TPUPS == '70' or PA_QTDPRO > 1", None),
+        # a negação de condições avaliadas parcialmente não é aplicada
+        ("not (PA_TPUPS == '70' and PA_QTDPRO > 1)", None),
+        ("~((PA_TPUPS == '70') & (PA_QTDPRO > 1))", None),
+        (
+            "PA_CBO == '225142' and not (PA_TPUPS == '70' and PA_QTDPRO > 1)",
+            [False, False, True, False, False],
+        ),
+        ("PA_QTDPRO == '1'", None),
+        ("PA_INEXISTENTE == '1'", None),
+        ("PA_TPUPS.str.contains('7')", None),
+    ],
+)
+def teste_filtro_registros(condicoes, mascara_esperada):
+    filtro = FiltroRegistros.compilar(condicoes)
+    mascara = filtro.avaliar(obter_textos)
+    if mascara_esperada is None:
+        assert mascara is None
+    else:
+        assert mascara.tolist() == mascara_esperada
+        # o filtro nunca descarta registros que atendem às condições
+        resultado = REGISTROS.query(condicoes, engine="python")
+        assert mascara[resultado.index].all()
+
+
+@pytest.mark.unitario
+def teste_filtro_registros_condicoes_invalidas():
+    assert FiltroRegistros.compilar(None) is None
+    assert FiltroRegistros.compilar("PA_TPUPS ==") is None
@@ -0,0 +1,90 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Casos de teste para o reaproveitamento de conexões com servidores FTP."""
+
+
+from ftplib import error_temp
+
+import pytest
+
+from impulsoetl.utilitarios.conexoes_ftp import PoolConexoesFtp
+
+
+class ClienteFtpFalso(object):
+    def __init__(self):
+        self.ativo = True
+        self.comandos = []
+
+    def voidcmd(self, cmd):
+        self.comandos.append(cmd)
+        if not self.ativo:
+            raise error_temp("421 Timeout.")
+        return "200 OK"
+
+    def quit(self):
+        self.ativo = False
+
+    def close(self):
+        self.ativo = False
+
+
+class PoolConexoesFalsas(PoolConexoesFtp):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, manter_ativa_intervalo=0, **kwargs)
+        self.abertas = []
+
+    def _abrir(self):
+        cliente_ftp = ClienteFtpFalso()
+        self.abertas.append(cliente_ftp)
+        return cliente_ftp
+
+
+@pytest.mark.unitario
+def teste_pool_reaproveita_conexao():
+    pool = PoolConexoesFalsas("ftp.datasus.gov.br")
+    with pool.conexao() as cliente_ftp_1:
+        pass
+    with pool.conexao() as cliente_ftp_2:
+        pass
+    assert cliente_ftp_1 is cliente_ftp_2
+    assert len(pool.abertas) == 1
+    assert cliente_ftp_2.comandos == ["NOOP"]
+
+
+@pytest.mark.unitario
+def teste_pool_descarta_conexao_inativa():
+    pool = PoolConexoesFalsas("ftp.datasus.gov.br")
+    with pool.conexao() as cliente_ftp_1:
+        pass
+    cliente_ftp_1.ativo = False
+    with pool.conexao() as cliente_ftp_2:
+        pass
+    assert cliente_ftp_1 is not cliente_ftp_2
+    assert len(pool.abertas) == 2
+
+
+@pytest.mark.unitario
+def teste_pool_descarta_conexao_apos_erro():
+    pool = PoolConexoesFalsas("ftp.datasus.gov.br")
+    with pytest.raises(ValueError):
+        with pool.conexao():
+            raise ValueError()
+    with pool.conexao():
+        pass
+    assert len(pool.abertas) == 2
+    assert not pool.abertas[0].ativo
+
+
+@pytest.mark.unitario
+def teste_pool_encerra_conexoes_ociosas_antigas():
+    pool = PoolConexoesFalsas("ftp.datasus.gov.br", ociosidade_max=0)
+    with pool.conexao() as cliente_ftp:
+        pass
+    pool.manter_ativas()
+    assert not cliente_ftp.ativo
+    with pool.conexao():
+        pass
+    assert len(pool.abertas) == 2
@@ -0,0 +1,149 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Casos de teste para o armazenamento local de arquivos do DataSUS."""
+
+
+import os
+import threading
+
+import pytest
+
+from impulsoetl.utilitarios.datasus_cache import CacheDatasus
+
+
+@pytest.fixture(scope="function")
+def cache(tmp_path):
+    return CacheDatasus(diretorio=tmp_path / "cache", tamanho_max=100)
+
+
+def _criar_arquivo(diretorio, nome, conteudo):
+    caminho = diretorio / nome
+    caminho.write_bytes(conteudo)
+    return caminho
+
+
+@pytest.mark.unitario
+def teste_gerar_chave_distingue_versoes():
+    chave = CacheDatasus.gerar_chave(
+        ftp="ftp.datasus.gov.br",
+        caminho="/dissemin/publicos/SIASUS/200801_/Dados/PASE2108.dbc",
+        tamanho=10,
+        modificacao="20210915120000",
+    )
+    chave_republicada = CacheDatasus.gerar_chave(
+        ftp="ftp.datasus.gov.br",
+        caminho="/dissemin/publicos/SIASUS/200801_/Dados/PASE2108.dbc",
+        tamanho=10,
+        modificacao="20211015120000",
+    )
+    assert chave != chave_republicada
+
+
+@pytest.mark.unitario
+def teste_armazenar_e_obter(cache, tmp_path):
+    arquivo = _criar_arquivo(tmp_path, "PASE2108.dbc", b"0123456789")
+    cache.armazenar(chave="a", arquivo_origem=arquivo, caminho="PASE2108.dbc")
+    assert not arquivo.exists()
+    caminho = cache.obter("a")
+    assert caminho is not None
+    assert caminho.read_bytes() == b"0123456789"
+    assert cache.obter("b") is None
+
+
+@pytest.mark.unitario
+def teste_obter_arquivo_corrompido(cache, tmp_path):
+    arquivo = _criar_arquivo(tmp_path, "PASE2108.dbc", b"0123456789")
+    caminho = cache.armazenar(
+        chave="a",
+        arquivo_origem=arquivo,
+        caminho="PASE2108.dbc",
+    )
+    caminho.write_bytes(b"9876543210")
+    assert cache.obter("a") is None
+    assert not caminho.exists()
+
+
+@pytest.mark.unitario
+def teste_remover_menos_usados(cache, tmp_path):
+    for indice, chave in enumerate("ab"):
+        arquivo = _criar_arquivo(tmp_path, chave, bytes(40))
+        caminho = cache.armazenar(
+            chave=chave,
+            arquivo_origem=arquivo,
+            caminho=chave,
+        )
+        os.utime(caminho, (indice, indice))
+        cache.devolver(caminho)
+    # acessar 'a' o torna mais recente do que 'b'
+    cache.devolver(cache.obter("a"))
+    # 'c' não cabe junto com 'a' e 'b'; 'b' deve ser removido
+    arquivo = _criar_arquivo(tmp_path, "c", bytes(40))
+    cache.devolver(
+        cache.armazenar(chave="c", arquivo_origem=arquivo, caminho="c"),
+    )
+    assert cache.obter("a") is not None
+    assert cache.obter("b") is None
+    assert cache.obter("c") is not None
+
+
+@pytest.mark.unitario
+def teste_manter_entradas_em_uso(cache, tmp_path):
+    arquivo = _criar_arquivo(tmp_path, "a", bytes(40))
+    caminho_a = cache.armazenar(chave="a", arquivo_origem=arquivo, caminho="a")
+    os.utime(caminho_a, (0, 0))
+    arquivo = _criar_arquivo(tmp_path, "b", bytes(40))
+    caminho_b = cache.armazenar(chave="b", arquivo_origem=arquivo, caminho="b")
+    cache.devolver(caminho_b)
+    # 'a' é a entrada mais antiga, mas ainda não foi devolvida
+    arquivo = _criar_arquivo(tmp_path, "c", bytes(40))
+    caminho_c = cache.armazenar(chave="c", arquivo_origem=arquivo, caminho="c")
+    assert caminho_a.read_bytes() == bytes(40)
+    assert not caminho_b.exists()
+    assert caminho_c.exists()
+    # sem entradas livres para remover, o arquivo não é guardado
+    arquivo = _criar_arquivo(tmp_path, "d", bytes(40))
+    caminho_d = cache.armazenar(chave="d", arquivo_origem=arquivo, caminho="d")
+    assert caminho_d == arquivo
+    cache.devolver_todos()
+    arquivo = _criar_arquivo(tmp_path, "e", bytes(40))
+    cache.armazenar(chave="e", arquivo_origem=arquivo, caminho="e")
+    assert not caminho_a.exists()
+
+
+@pytest.mark.unitario
+def teste_armazenar_simultaneamente(tmp_path):
+    diretorio = tmp_path / "cache"
+    falhas = []
+
+    def armazenar(linha: int) -> None:
+        # cada linha de execução usa sua própria instância, como processos
+        # diferentes que compartilham o mesmo diretório
+        cache = CacheDatasus(diretorio=diretorio, tamanho_max=50_000)
+        try:
+            for indice in range(100):
+                chave = "{}-{}".format(linha, indice % 20)
+                conteudo = bytes([linha]) * (2_000 + indice)
+                arquivo = _criar_arquivo(tmp_path, chave, conteudo)
+                caminho = cache.obter(chave) or cache.armazenar(
+                    chave=chave,
+                    arquivo_origem=arquivo,
+                    caminho=chave,
+                )
+                assert caminho.read_bytes()[:1] == bytes([linha])
+                cache.devolver(caminho)
+        except Exception as erro:  # noqa: B902
+            falhas.append(erro)
+
+    linhas = [
+        threading.Thread(target=armazenar, args=(linha,)) for linha in range(8)
+    ]
+    for linha in linhas:
+        linha.start()
+    for linha in linhas:
+        linha.join()
+    assert falhas == []
+    entradas = diretorio.glob("*.dbc")
+    assert sum(caminho.stat().st_size for caminho in entradas) <= 50_000
@@ -0,0 +1,209 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Casos de teste para os espelhos locais dos repositórios do DataSUS."""
+
+
+import re
+from contextlib import contextmanager
+
+import pytest
+
+from impulsoetl.utilitarios import datasus_ftp
+from impulsoetl.utilitarios.datasus_espelho import (
+    EspelhoDatasus,
+    resolver_ftp_substituto,
+)
+from impulsoetl.utilitarios.datasus_indice import IndiceDiretorioFtp
+from tests.simulacoes import ClienteFtpArquivos
+
+FTP_ENDERECO = "ftp.datasus.gov.br"
+DIRETORIO = "/dissemin/publicos/SIASUS/200801_/Dados"
+
+
+@pytest.fixture
+def cliente_ftp(monkeypatch):
+    cliente = ClienteFtpArquivos(
+        {
+            "PASP2108a.dbc": (b"a" * 100, "20210920101010"),
+            "PASP2108b.dbc": (b"b" * 200, "20210920101010"),
+            "BISP2108.dbc": (b"c" * 50, "20210920101010"),
+        },
+    )
+
+    @contextmanager
+    def conectar(ftp, caminho_diretorio):
+        yield cliente
+
+    monkeypatch.setattr(datasus_ftp, "_conectar", conectar)
+    return cliente
+
+
+@pytest.mark.unitario
+@pytest.mark.parametrize(
+    "espelho,esperado",
+    [
+        ("", (FTP_ENDERECO, DIRETORIO)),
+        ("/mnt/espelho", (FTP_ENDERECO, DIRETORIO)),
+        ("ftp://espelho.local", ("espelho.local", DIRETORIO)),
+        (
+            "ftp://espelho.local/datasus/",
+            ("espelho.local", "/datasus" + DIRETORIO),
+        ),
+    ],
+)
+def teste_resolver_ftp_substituto(espelho, esperado):
+    assert (
+        resolver_ftp_substituto(FTP_ENDERECO, DIRETORIO, espelho=espelho)
+        == esperado
+    )
+
+
+@pytest.mark.unitario
+def teste_listar_desatualizados(tmp_path):
+    espelho = EspelhoDatasus(tmp_path)
+    diretorio = espelho.caminho(FTP_ENDERECO, DIRETORIO)
+    diretorio.mkdir(parents=True)
+    for arquivo_nome, tamanho in (("PASP2108a.dbc", 100), ("X.dbc", 10)):
+        caminho_parcial = espelho.caminho_parcial(
+            FTP_ENDERECO,
+            DIRETORIO,
+            arquivo_nome,
+            "20210920101010",
+        )
+        caminho_parcial.write_bytes(b"a" * tamanho)
+        espelho.concluir(
+            caminho_parcial,
+            FTP_ENDERECO,
+            DIRETORIO,
+            arquivo_nome,
+            "20210920101010",
+        )
+    # transferências em andamento não são listadas
+    (diretorio / "PASP2108b.dbc.20210920101010.parcial").write_bytes(b"b")
+
+    assert espelho.listar(FTP_ENDERECO, DIRETORIO) == {
+        "PASP2108a.dbc": {"tamanho": 100, "modificacao": "20210920101010"},
+        "X.dbc": {"tamanho": 10, "modificacao": "20210920101010"},
+    }
+    entradas = {
+        # atualizado
+        "PASP2108a.dbc": {"tamanho": 100, "modificacao": "20210920101010"},
+        # ausente
+        "PASP2108b.dbc": {"tamanho": 200, "modificacao": "20210920101010"},
+        # republicado
+        "X.dbc": {"tamanho": 10, "modificacao": "20211015080000.000"},
+    }
+    assert espelho.listar_desatualizados(
+        FTP_ENDERECO,
+        DIRETORIO,
+        entradas,
+    ) == ["PASP2108b.dbc", "X.dbc"]
+
+
+@pytest.mark.unitario
+def teste_sincronizar_espelho(tmp_path, cliente_ftp):
+    espelho = EspelhoDatasus(tmp_path / "espelho")
+    indice = IndiceDiretorioFtp(tmp_path / "indices")
+    diretorio = espelho.caminho(FTP_ENDERECO, DIRETORIO)
+    diretorio.mkdir(parents=True)
+    # transferência interrompida em uma execução anterior
+    espelho.caminho_parcial(
+        FTP_ENDERECO,
+        DIRETORIO,
+        "PASP2108b.dbc",
+        "20210920101010",
+    ).write_bytes(b"b" * 120)
+
+    copiados = datasus_ftp.sincronizar_espelho(
+        FTP_ENDERECO,
+        DIRETORIO,
+        arquivo_nome=re.compile(r"PASP2108[a-z]?\.dbc"),
+        espelho=espelho,
+        downloads_paralelos=2,
+        indice=indice,
+    )
+    assert copiados == ["PASP2108a.dbc", "PASP2108b.dbc"]
+    assert sorted(cliente_ftp.retomadas, key=str) == [120, None]
+    assert (diretorio / "PASP2108b.dbc").read_bytes() == b"b" * 200
+    assert sorted(caminho.name for caminho in diretorio.iterdir()) == [
+        "PASP2108a.dbc",
+        "PASP2108b.dbc",
+    ]
+
+    # uma nova sincronização só copia os arquivos republicados
+    cliente_ftp.arquivos["PASP2108a.dbc"] = (b"A" * 110, "20211015080000")
+    assert datasus_ftp.sincronizar_espelho(
+        FTP_ENDERECO,
+        DIRETORIO,
+        arquivo_nome=re.compile(r"PASP2108[a-z]?\.dbc"),
+        espelho=espelho,
+        indice=indice,
+    ) == ["PASP2108a.dbc"]
+    assert (diretorio / "PASP2108a.dbc").read_bytes() == b"A" * 110
+
+
+@pytest.mark.unitario
+def teste_extrair_dbc_lotes_espelho(tmp_path, monkeypatch, arquivo_dbc):
+    conteudo = arquivo_dbc.read_bytes()
+    cliente = ClienteFtpArquivos(
+        {
+            "TESTEa.dbc": (conteudo, "20210920101010"),
+            "TESTEb.dbc": (conteudo, "20211015080000"),
+            "TESTEc.dbc": (conteudo, "20211015080000"),
+        },
+    )
+
+    @contextmanager
+    def conectar(ftp, caminho_diretorio):
+        yield cliente
+
+    monkeypatch.setattr(datasus_ftp, "_conectar", conectar)
+    monkeypatch.setattr(
+        datasus_ftp,
+        "IndiceDiretorioFtp",
+        lambda: IndiceDiretorioFtp(tmp_path / "indices"),
+    )
+
+    # cópia atualizada da parte a e cópia anterior à republicação da parte
+    # b; a parte c ainda não foi copiada para o espelho
+    espelho = EspelhoDatasus(tmp_path / "espelho")
+    espelho.caminho(FTP_ENDERECO, DIRETORIO).mkdir(parents=True)
+    for arquivo_nome, modificacao in (
+        ("TESTEa.dbc", "20210920101010"),
+        ("TESTEb.dbc", "20210920101010"),
+    ):
+        caminho_parcial = espelho.caminho_parcial(
+            FTP_ENDERECO,
+            DIRETORIO,
+            arquivo_nome,
+            modificacao,
+        )
+        caminho_parcial.write_bytes(conteudo)
+        espelho.concluir(
+            caminho_parcial,
+            FTP_ENDERECO,
+            DIRETORIO,
+            arquivo_nome,
+            modificacao,
+        )
+
+    monkeypatch.setattr(datasus_ftp, "ESPELHO_CAMINHO", str(espelho.diretorio))
+    lotes = list(
+        datasus_ftp.extrair_dbc_lotes(
+            FTP_ENDERECO,
+            DIRETORIO,
+            re.compile(r"TESTE[a-z]\.dbc", re.IGNORECASE),
+            passo=1000,
+            usar_cache=False,
+            downloads_paralelos=1,
+            usar_parquet=False,
+            lotes_antecipados=0,
+        ),
+    )
+    assert [len(lote) for lote in lotes] == [1000, 500] * 3
+    assert lotes[0].columns.tolist() == ["UF", "MUNIC"]
+    # apenas os arquivos ausentes ou desatualizados no espelho são baixados
+    assert len(cliente.retomadas) == 2
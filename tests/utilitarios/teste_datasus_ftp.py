@@ -6,16 +6,102 @@
 """Casos de teste para funções utilitárias relacionadas ao FTP do DataSUS."""
 
 
+from __future__ import annotations
+
 import re
-from ftplib import FTP, error_perm
+import threading
+import time
+from contextlib import contextmanager
+from ftplib import FTP, error_perm, error_temp
 
 import pandas as pd
 import pytest
 
+from impulsoetl.utilitarios import datasus_ftp
 from impulsoetl.utilitarios.datasus_ftp import (
-    _listar_arquivos,
+    _antecipar_lotes,
+    _listar_entradas,
+    _transferir_arquivo,
     extrair_dbc_lotes,
 )
+from impulsoetl.utilitarios.datasus_cache import CacheDatasus
+from impulsoetl.utilitarios.datasus_impressoes import ImpressoesPendentes
+from impulsoetl.utilitarios.datasus_indice import IndiceDiretorioFtp
+from tests.simulacoes import ClienteFtpArquivos, gerar_dbc
+
+
+class ClienteFtpInstavel(object):
+    """Simula um servidor FTP que interrompe as transferências."""
+
+    def __init__(self, conteudo: bytes, interrupcoes: list[int]):
+        self.conteudo = conteudo
+        self.interrupcoes = interrupcoes
+        self.deslocamentos = []
+        self.reconexoes = 0
+
+    def retrbinary(self, cmd, callback, blocksize=8192, rest=None):
+        inicio = rest or 0
+        self.deslocamentos.append(inicio)
+        fim = len(self.conteudo)
+        if self.interrupcoes:
+            fim = self.interrupcoes.pop(0)
+        for posicao in range(inicio, fim, blocksize):
+            callback(self.conteudo[posicao:min(posicao + blocksize, fim)])
+        if fim < len(self.conteudo):
+            raise error_temp("426 Connection closed; transfer aborted.")
+
+    def close(self):
+        pass
+
+    def connect(self, host, timeout=None):
+        self.reconexoes += 1
+
+    def login(self):
+        pass
+
+    def cwd(self, caminho):
+        pass
+
+
+class ClienteFtpConcorrente(ClienteFtpArquivos):
+    """Simula um servidor FTP em que cada download aguarda uma liberação."""
+
+    def __init__(
+        self,
+        arquivos: dict,
+        liberacoes: dict[str, threading.Event],
+        encadeamentos: dict[str, str] | None = None,
+    ):
+        super().__init__(arquivos)
+        self.liberacoes = liberacoes
+        # ao concluir o download de um arquivo, libera o arquivo associado
+        self.encadeamentos = encadeamentos or {}
+        self.iniciados = []
+        self.concluidos = []
+
+    def retrbinary(self, comando, callback, blocksize=8192, rest=None):
+        arquivo_nome = comando.split()[-1]
+        self.iniciados.append(arquivo_nome)
+        assert self.liberacoes[arquivo_nome].wait(timeout=10)
+        super().retrbinary(comando, callback, blocksize, rest)
+        self.concluidos.append(arquivo_nome)
+        if arquivo_nome in self.encadeamentos:
+            self.liberacoes[self.encadeamentos[arquivo_nome]].set()
+
+
+def simular_servidor(monkeypatch, tmp_path, cliente) -> None:
+    """Substitui as conexões com o FTP do DataSUS por um cliente simulado."""
+
+    @contextmanager
+    def conectar(ftp, caminho_diretorio):
+        yield cliente
+
+    monkeypatch.setattr(datasus_ftp, "_conectar", conectar)
+    monkeypatch.setattr(
+        datasus_ftp,
+        "IndiceDiretorioFtp",
+        lambda: IndiceDiretorioFtp(tmp_path / "indices"),
+    )
 
 
 @pytest.fixture(scope="function")
@@ -33,11 +119,11 @@ def cliente_ftp_siasus():
     "arquivo_nome_ou_padrao",
     ["PARR2108.dbc", re.compile("PASP1112[a-z]?.dbc", re.IGNORECASE)]
 )
-def teste_listar_arquivos_existentes(
+def teste_listar_entradas_existentes(
     cliente_ftp_siasus,
     arquivo_nome_ou_padrao,
 ):
-    lista_arquivos = _listar_arquivos(
+    lista_arquivos = _listar_entradas(
         cliente_ftp=cliente_ftp_siasus,
         arquivo_nome_ou_padrao=arquivo_nome_ou_padrao,
     )
@@ -50,12 +136,12 @@ def teste_listar_arquivos_existentes(
     "arquivo_nome_ou_padrao",
     ["PAZZ2108.dbc", re.compile("PAZZ1112[a-z]?.dbc", re.IGNORECASE)]
 )
-def teste_listar_arquivos_inexistentes(
+def teste_listar_entradas_inexistentes(
     cliente_ftp_siasus,
     arquivo_nome_ou_padrao,
 ):
     with pytest.raises(error_perm):
-        lista_arquivos = _listar_arquivos(
+        lista_arquivos = _listar_entradas(
             cliente_ftp=cliente_ftp_siasus,
             arquivo_nome_ou_padrao=arquivo_nome_ou_padrao,
         )
@@ -84,3 +170,302 @@ def teste_extrair_dbc_lotes(ftp, caminho_diretorio, arquivo_nome, passo):
     lote_2 = next(lotes)
     assert isinstance(lote_2, pd.DataFrame)
     assert len(lote_2) > 0, "Apenas um DataFrame gerado."
+
+
+@pytest.mark.unitario
+def teste_extrair_dbc_lotes_memoria_max(tmp_path, monkeypatch, arquivo_dbc):
+    cliente_ftp = ClienteFtpArquivos(
+        {"TESTE.dbc": (arquivo_dbc.read_bytes(), "20210920101010")},
+    )
+    simular_servidor(monkeypatch, tmp_path, cliente_ftp)
+    lotes = extrair_dbc_lotes(
+        ftp="ftp.datasus.gov.br",
+        caminho_diretorio="/dissemin/publicos/SIASUS/200801_/Dados",
+        arquivo_nome="TESTE.dbc",
+        passo=100,
+        usar_cache=False,
+        usar_parquet=False,
+        usar_espelho=False,
+        lotes_antecipados=0,
+        memoria_max=1,
+    )
+    # os registros estreitos do arquivo cabem em um único lote, maior que o
+    # valor do argumento `passo`
+    assert [len(lote) for lote in lotes] == [1500]
+
+
+@pytest.mark.unitario
+def teste_extrair_dbc_lotes_downloads_paralelos(tmp_path, monkeypatch):
+    # as partes são listadas fora de ordem, e cada download só termina após
+    # a conclusão do download da parte seguinte
+    partes = {"TESTEc.dbc": 300, "TESTEa.dbc": 100, "TESTEb.dbc": 200}
+    liberacoes = {arquivo_nome: threading.Event() for arquivo_nome in partes}
+    liberacoes["TESTEc.dbc"].set()
+    cliente_ftp = ClienteFtpConcorrente(
+        {
+            arquivo_nome: (
+                gerar_dbc([("SP", "355030")] * registros_quantidade),
+                "20210920101010",
+            )
+            for arquivo_nome, registros_quantidade in partes.items()
+        },
+        liberacoes=liberacoes,
+        encadeamentos={"TESTEc.dbc": "TESTEb.dbc", "TESTEb.dbc": "TESTEa.dbc"},
+    )
+    simular_servidor(monkeypatch, tmp_path, cliente_ftp)
+    lotes = extrair_dbc_lotes(
+        ftp="ftp.datasus.gov.br",
+        caminho_diretorio="/dissemin/publicos/SIASUS/200801_/Dados",
+        arquivo_nome=re.compile(r"TESTE[a-c]\.dbc"),
+        passo=1000,
+        usar_cache=False,
+        usar_parquet=False,
+        usar_espelho=False,
+        lotes_antecipados=0,
+        downloads_paralelos=3,
+    )
+    assert [len(lote) for lote in lotes] == [100, 200, 300]
+    assert cliente_ftp.concluidos == ["TESTEc.dbc", "TESTEb.dbc", "TESTEa.dbc"]
+
+
+@pytest.mark.unitario
+def teste_extrair_dbc_lotes_cancela_downloads_pendentes(
+    tmp_path,
+    monkeypatch,
+    arquivo_dbc,
+):
+    # a primeira parte é liberada de imediato; as duas seguintes ocupam as
+    # conexões disponíveis até que a leitura seja interrompida
+    partes = ["TESTEa.dbc", "TESTEb.dbc", "TESTEc.dbc", "TESTEd.dbc"]
+    liberacoes = {arquivo_nome: threading.Event() for arquivo_nome in partes}
+    liberacoes["TESTEa.dbc"].set()
+    cliente_ftp = ClienteFtpConcorrente(
+        {
+            arquivo_nome: (arquivo_dbc.read_bytes(), "20210920101010")
+            for arquivo_nome in partes
+        },
+        liberacoes=liberacoes,
+    )
+    simular_servidor(monkeypatch, tmp_path, cliente_ftp)
+    lotes = extrair_dbc_lotes(
+        ftp="ftp.datasus.gov.br",
+        caminho_diretorio="/dissemin/publicos/SIASUS/200801_/Dados",
+        arquivo_nome=re.compile(r"TESTE[a-d]\.dbc"),
+        passo=1500,
+        usar_cache=False,
+        usar_parquet=False,
+        usar_espelho=False,
+        lotes_antecipados=0,
+        downloads_paralelos=2,
+    )
+    assert len(next(lotes)) == 1500
+    # libera os downloads em andamento apenas depois que o fechamento do
+    # gerador tiver cancelado o download pendente
+    liberacao = threading.Timer(
+        0.5,
+        lambda: [liberacoes[nome].set() for nome in partes],
+    )
+    liberacao.start()
+    lotes.close()
+    liberacao.join()
+    assert "TESTEd.dbc" not in cliente_ftp.iniciados
+    assert sorted(cliente_ftp.concluidos) == [
+        "TESTEa.dbc",
+        "TESTEb.dbc",
+        "TESTEc.dbc",
+    ]
+
+
+@pytest.mark.unitario
+def teste_extrair_dbc_lotes_partes_excedem_cache(
+    tmp_path,
+    monkeypatch,
+    arquivo_dbc,
+):
+    # as partes terminam de ser baixadas em ordem inversa e, juntas, não
+    # cabem no armazenamento local; as que aguardam leitura não podem ser
+    # removidas para dar lugar às seguintes
+    conteudo = arquivo_dbc.read_bytes()
+    partes = ["TESTEa.dbc", "TESTEb.dbc", "TESTEc.dbc"]
+    liberacoes = {arquivo_nome: threading.Event() for arquivo_nome in partes}
+    liberacoes["TESTEc.dbc"].set()
+    cliente_ftp = ClienteFtpConcorrente(
+        {
+            arquivo_nome: (conteudo, "20210920101010")
+            for arquivo_nome in partes
+        },
+        liberacoes=liberacoes,
+        encadeamentos={"TESTEc.dbc": "TESTEb.dbc", "TESTEb.dbc": "TESTEa.dbc"},
+    )
+    simular_servidor(monkeypatch, tmp_path, cliente_ftp)
+    caches = []
+
+    class CacheLimitado(CacheDatasus):
+        def __init__(self):
+            super().__init__(tmp_path / "cache", tamanho_max=2 * len(conteudo))
+            caches.append(self)
+
+    monkeypatch.setattr(datasus_ftp, "CacheDatasus", CacheLimitado)
+    lotes = extrair_dbc_lotes(
+        ftp="ftp.datasus.gov.br",
+        caminho_diretorio="/dissemin/publicos/SIASUS/200801_/Dados",
+        arquivo_nome=re.compile(r"TESTE[a-c]\.dbc"),
+        passo=1500,
+        usar_cache=True,
+        usar_parquet=False,
+        usar_espelho=False,
+        lotes_antecipados=0,
+        downloads_paralelos=3,
+    )
+    assert [len(lote) for lote in lotes] == [1500, 1500, 1500]
+    assert cliente_ftp.concluidos == ["TESTEc.dbc", "TESTEb.dbc", "TESTEa.dbc"]
+    # todas as cópias locais são devolvidas ao final da leitura
+    assert caches[0]._reservas == {}
+    entradas = (tmp_path / "cache").glob("*.dbc")
+    assert sum(caminho.stat().st_size for caminho in entradas) <= (
+        2 * len(conteudo)
+    )
+
+
+@pytest.mark.unitario
+def teste_extrair_dbc_lotes_usa_versoes_listagem(
+    tmp_path,
+    monkeypatch,
+    arquivo_dbc,
+):
+    class ClienteFtpSemConsultas(ClienteFtpArquivos):
+        """Simula um servidor FTP que registra as consultas por arquivo."""
+
+        consultas = []
+
+        def size(self, nome):
+            self.consultas.append("SIZE " + nome)
+            return super().size(nome)
+
+        def sendcmd(self, comando):
+            self.consultas.append(comando)
+            return super().sendcmd(comando)
+
+    cliente_ftp = ClienteFtpSemConsultas(
+        {
+            arquivo_nome: (arquivo_dbc.read_bytes(), "20210920101010.123")
+            for arquivo_nome in ("TESTEa.dbc", "TESTEb.dbc")
+        },
+    )
+    simular_servidor(monkeypatch, tmp_path, cliente_ftp)
+
+    class CacheTemporario(CacheDatasus):
+        def __init__(self):
+            super().__init__(tmp_path / "cache")
+
+    monkeypatch.setattr(datasus_ftp, "CacheDatasus", CacheTemporario)
+    for _ in range(2):
+        impressoes = ImpressoesPendentes()
+        lotes = extrair_dbc_lotes(
+            ftp="ftp.datasus.gov.br",
+            caminho_diretorio="/dissemin/publicos/SIASUS/200801_/Dados",
+            arquivo_nome=re.compile(r"TESTE[a-b]\.dbc"),
+            passo=1500,
+            usar_cache=True,
+            usar_parquet=False,
+            usar_espelho=False,
+            lotes_antecipados=0,
+            impressoes=impressoes,
+        )
+        assert [len(lote) for lote in lotes] == [1500, 1500]
+    # a segunda extração usa as cópias locais, identificadas pelos atributos
+    # informados na listagem do diretório
+    assert cliente_ftp.retomadas == [None, None]
+    assert cliente_ftp.consultas == []
+    impressao = impressoes._impressoes[
+        ("ftp.datasus.gov.br", "/dissemin/publicos/SIASUS/200801_/Dados")
+    ]["TESTEa.dbc"]
+    assert impressao["tamanho"] == len(arquivo_dbc.read_bytes())
+    assert impressao["modificacao"] == "20210920101010"
+
+
+@pytest.mark.unitario
+def teste_transferir_arquivo_retoma_download(tmp_path):
+    conteudo = bytes(range(256)) * 1000
+    cliente_ftp = ClienteFtpInstavel(conteudo, interrupcoes=[70000, 150000])
+    arquivo_destino = tmp_path / "PARR2108.dbc"
+    _transferir_arquivo(
+        cliente_ftp=cliente_ftp,
+        ftp="ftp.datasus.gov.br",
+        caminho_diretorio="/dissemin/publicos/SIASUS/200801_/Dados",
+        arquivo_nome=arquivo_destino.name,
+        arquivo_destino=arquivo_destino,
+        tamanho_esperado=len(conteudo),
+    )
+    assert arquivo_destino.read_bytes() == conteudo
+    assert cliente_ftp.deslocamentos == [0, 70000, 150000]
+    assert cliente_ftp.reconexoes == 2
+
+
+@pytest.mark.unitario
+def teste_transferir_arquivo_esgota_tentativas(tmp_path):
+    conteudo = bytes(100000)
+    cliente_ftp = ClienteFtpInstavel(conteudo, interrupcoes=[10, 20, 30])
+    with pytest.raises(error_temp):
+        _transferir_arquivo(
+            cliente_ftp=cliente_ftp,
+            ftp="ftp.datasus.gov.br",
+            caminho_diretorio="/dissemin/publicos/SIASUS/200801_/Dados",
+            arquivo_nome="PARR2108.dbc",
+            arquivo_destino=tmp_path / "PARR2108.dbc",
+            tamanho_esperado=len(conteudo),
+            tentativas=3,
+        )
+    assert (tmp_path / "PARR2108.dbc").stat().st_size == 30
+
+
+class LotesContados(object):
+    """Gera lotes de exemplo, registrando quantos foram lidos."""
+
+    def __init__(self, quantidade: int, erro: Exception | None = None):
+        self.quantidade = quantidade
+        self.erro = erro
+        self.lidos = 0
+        self.encerrado = False
+
+    def gerar(self):
+        try:
+            for indice in range(self.quantidade):
+                self.lidos += 1
+                yield pd.DataFrame({"indice": [indice]})
+            if self.erro:
+                raise self.erro
+        finally:
+            self.encerrado = True
+
+
+@pytest.mark.unitario
+def teste_antecipar_lotes_mantem_ordem():
+    lotes = LotesContados(10)
+    indices = [
+        lote["indice"].item() for lote in _antecipar_lotes(lotes.gerar(), 3)
+    ]
+    assert indices == list(range(10))
+    assert lotes.encerrado
+
+
+@pytest.mark.unitario
+def teste_antecipar_lotes_limita_antecipacao():
+    lotes = LotesContados(100)
+    lotes_antecipados = _antecipar_lotes(lotes.gerar(), 2)
+    next(lotes_antecipados)
+    time.sleep(0.5)
+    # um lote consumido, dois na fila e um aguardando espaço na fila
+    assert lotes.lidos == 4
+    lotes_antecipados.close()
+    assert lotes.encerrado
+
+
+@pytest.mark.unitario
+def teste_antecipar_lotes_repassa_excecoes():
+    lotes = LotesContados(3, erro=error_perm("550 Arquivo inexistente."))
+    indices = []
+    with pytest.raises(error_perm):
+        for lote in _antecipar_lotes(lotes.gerar(), 2):
+            indices.append(lote["indice"].item())
+    assert indices == [0, 1, 2]
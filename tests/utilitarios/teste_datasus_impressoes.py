@@ -0,0 +1,145 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Casos de teste para o registro de versões dos arquivos do DataSUS."""
+
+
+from datetime import date
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from impulsoetl.utilitarios import datasus_impressoes
+from impulsoetl.utilitarios.datasus_impressoes import (
+    ImpressoesPendentes,
+    _selecionar_capturas,
+    listar_republicacoes,
+    registrar_impressoes,
+)
+
+IMPRESSOES = {
+    "PASP2108a.dbc": {
+        "tamanho": 100,
+        "modificacao": "20210920101010",
+        "sha256": "a" * 64,
+    },
+    "PASP2108b.dbc": {
+        "tamanho": 200,
+        "modificacao": "20210920101010",
+        "sha256": "b" * 64,
+    },
+    "PASP2109a.dbc": {
+        "tamanho": 300,
+        "modificacao": "20211020080000",
+        "sha256": "c" * 64,
+    },
+}
+
+
+@pytest.mark.unitario
+def teste_listar_republicacoes():
+    entradas = {
+        # inalterado, com frações de segundo na data de modificação
+        "PASP2108a.dbc": {"tamanho": 100, "modificacao": "20210920101010.000"},
+        # republicado
+        "PASP2108b.dbc": {"tamanho": 250, "modificacao": "20211015080000"},
+        # ainda não extraído
+        "PASP2110a.dbc": {"tamanho": 400, "modificacao": "20211120080000"},
+    }
+    assert listar_republicacoes(IMPRESSOES, entradas) == ["PASP2108b.dbc"]
+
+
+@pytest.mark.unitario
+def teste_listar_republicacoes_sem_atributos():
+    entradas = {
+        nome: {"tamanho": None, "modificacao": None} for nome in IMPRESSOES
+    }
+    assert listar_republicacoes(IMPRESSOES, entradas) == []
+
+
+@pytest.mark.unitario
+def teste_selecionar_capturas():
+    operacoes = {
+        "procedimentos": "PA{uf_sigla}{periodo_data_inicio:%y%m}[a-z]?.dbc",
+        "bpa_i": "BI{uf_sigla}{periodo_data_inicio:%y%m}.dbc",
+    }
+    capturas = [
+        {
+            "operacao_id": operacao_id,
+            "periodo_id": "{:%Y%m}".format(periodo_data_inicio),
+            "unidade_geografica_id": uf_sigla,
+            "periodo_data_inicio": periodo_data_inicio,
+            "uf_sigla": uf_sigla,
+        }
+        for operacao_id in operacoes
+        for uf_sigla in ("SP", "RJ")
+        for periodo_data_inicio in (date(2021, 8, 1), date(2021, 9, 1))
+    ]
+    recapturas = _selecionar_capturas(
+        capturas,
+        operacoes=operacoes,
+        republicacoes=["PASP2108b.dbc"],
+    )
+    assert recapturas == [
+        {
+            "operacao_id": "procedimentos",
+            "periodo_id": "202108",
+            "unidade_geografica_id": "SP",
+        },
+    ]
+
+
+@pytest.mark.unitario
+def teste_impressoes_pendentes(monkeypatch):
+    registros = []
+    monkeypatch.setattr(
+        datasus_impressoes,
+        "registrar_impressoes",
+        lambda sessao, **kwargs: registros.append((sessao, kwargs)),
+    )
+    impressoes = ImpressoesPendentes()
+    for arquivo_nome, impressao in IMPRESSOES.items():
+        impressoes.adicionar(
+            ftp="ftp.datasus.gov.br",
+            caminho_diretorio="/dissemin/publicos/SIASUS/200801_/Dados",
+            arquivo_nome=arquivo_nome,
+            impressao=impressao,
+        )
+    # nada é gravado antes da chamada ao método `registrar()`
+    assert registros == []
+
+    sessao = object()
+    impressoes.registrar(sessao)
+    assert registros == [
+        (
+            sessao,
+            {
+                "ftp": "ftp.datasus.gov.br",
+                "caminho_diretorio": "/dissemin/publicos/SIASUS/200801_/Dados",
+                "impressoes": IMPRESSOES,
+            },
+        ),
+    ]
+
+    # as impressões já registradas não são gravadas novamente
+    impressoes.registrar(sessao)
+    assert len(registros) == 1
+
+
+@pytest.mark.unitario
+def teste_registrar_impressoes_sem_tabela(caplog):
+    motor = sa.create_engine("sqlite://")
+    with motor.connect() as conexao:
+        # esquema vazio, sem a tabela de impressões
+        conexao.execute(sa.text("ATTACH DATABASE ':memory:' AS configuracoes"))
+        with Session(bind=conexao) as sessao:
+            registrar_impressoes(
+                sessao,
+                ftp="ftp.datasus.gov.br",
+                caminho_diretorio="/dissemin/publicos/SIASUS/200801_/Dados",
+                impressoes=IMPRESSOES,
+            )
+    assert "não serão registradas" in caplog.text
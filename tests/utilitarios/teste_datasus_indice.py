@@ -0,0 +1,151 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Casos de teste para os índices locais de diretórios do FTP do DataSUS."""
+
+
+import re
+from ftplib import error_perm
+from types import SimpleNamespace
+
+import pytest
+
+from impulsoetl.utilitarios.datasus_ftp import _listar_entradas
+from impulsoetl.utilitarios import datasus_indice
+from impulsoetl.utilitarios.datasus_indice import IndiceDiretorioFtp
+
+
+class ClienteFtpListagem(object):
+    """Simula as respostas de um servidor FTP às listagens de diretórios."""
+
+    def __init__(self, arquivos: dict, suporta_mlsd: bool = True):
+        self.arquivos = arquivos
+        self.suporta_mlsd = suporta_mlsd
+        self.consultas = 0
+
+    def mlsd(self, path="", facts=()):
+        self.consultas += 1
+        if not self.suporta_mlsd:
+            raise error_perm("500 Unknown command.")
+        yield ".", {"type": "cdir"}
+        for nome, (tamanho, modificacao) in self.arquivos.items():
+            yield nome, {
+                "type": "file",
+                "size": str(tamanho),
+                "modify": modificacao,
+            }
+
+    def nlst(self):
+        self.consultas += 1
+        return list(self.arquivos)
+
+
+FTP_ENDERECO = "ftp.datasus.gov.br"
+DIRETORIO = "/dissemin/publicos/SIASUS/200801_/Dados"
+
+
+@pytest.mark.unitario
+def teste_listar_reaproveita_indice(tmp_path):
+    cliente_ftp = ClienteFtpListagem(
+        {"PASP2108a.dbc": (100, "20210920101010")},
+    )
+    indice = IndiceDiretorioFtp(tmp_path, validade=3600)
+    entradas = indice.listar(cliente_ftp, FTP_ENDERECO, DIRETORIO)
+    assert list(entradas) == ["PASP2108a.dbc"]
+    assert entradas["PASP2108a.dbc"]["tamanho"] == 100
+    assert entradas["PASP2108a.dbc"]["modificacao"] == "20210920101010"
+
+    # outra instância usa o índice gravado em disco
+    indice = IndiceDiretorioFtp(tmp_path, validade=3600)
+    assert indice.listar(cliente_ftp, FTP_ENDERECO, DIRETORIO) == entradas
+    assert cliente_ftp.consultas == 1
+
+
+@pytest.mark.unitario
+def teste_listar_alteracoes(tmp_path, monkeypatch):
+    # controla o relógio usado para registrar as descobertas de arquivos
+    relogio = SimpleNamespace(agora=1632132610.0)
+    monkeypatch.setattr(
+        datasus_indice,
+        "time",
+        SimpleNamespace(time=lambda: relogio.agora),
+    )
+    cliente_ftp = ClienteFtpListagem(
+        {
+            "PASP2108a.dbc": (100, "20210920101010"),
+            "PASP2108b.dbc": (200, "20210920101010"),
+        },
+    )
+    indice = IndiceDiretorioFtp(tmp_path, validade=0)
+    primeira_listagem = indice.listar(cliente_ftp, FTP_ENDERECO, DIRETORIO)
+    desde = max(
+        entrada["descoberta"] for entrada in primeira_listagem.values()
+    )
+    assert not indice.listar_alteracoes(
+        cliente_ftp,
+        FTP_ENDERECO,
+        DIRETORIO,
+        desde=desde + 1e-3,
+    )
+
+    # republica uma parte e adiciona um novo arquivo
+    relogio.agora += 60
+    cliente_ftp.arquivos["PASP2108b.dbc"] = (250, "20211015080000")
+    cliente_ftp.arquivos["PASP2109a.dbc"] = (300, "20211020080000")
+    alteracoes = indice.listar_alteracoes(
+        cliente_ftp,
+        FTP_ENDERECO,
+        DIRETORIO,
+        desde=desde + 1e-3,
+    )
+    assert sorted(alteracoes) == ["PASP2108b.dbc", "PASP2109a.dbc"]
+
+
+@pytest.mark.unitario
+def teste_listar_sem_suporte_mlsd(tmp_path):
+    cliente_ftp = ClienteFtpListagem(
+        {"PASP2108a.dbc": (100, "20210920101010")},
+        suporta_mlsd=False,
+    )
+    indice = IndiceDiretorioFtp(tmp_path)
+    entradas = indice.listar(cliente_ftp, FTP_ENDERECO, DIRETORIO)
+    assert entradas["PASP2108a.dbc"]["tamanho"] is None
+
+
+@pytest.mark.unitario
+def teste_listar_entradas_atualiza_indice_desatualizado(tmp_path):
+    cliente_ftp = ClienteFtpListagem(
+        {"PASP2108a.dbc": (100, "20210920101010")},
+    )
+    indice = IndiceDiretorioFtp(tmp_path, validade=3600)
+    indice.listar(cliente_ftp, FTP_ENDERECO, DIRETORIO)
+    # nova parte publicada depois da última atualização do índice
+    cliente_ftp.arquivos["PASP2108b.dbc"] = (200, "20211015080000")
+
+    entradas = _listar_entradas(
+        cliente_ftp=cliente_ftp,
+        arquivo_nome_ou_padrao=re.compile(r"PASP2108[a-z]?\.dbc"),
+        ftp=FTP_ENDERECO,
+        caminho_diretorio=DIRETORIO,
+        indice=indice,
+    )
+    assert list(entradas) == ["PASP2108a.dbc", "PASP2108b.dbc"]
+    assert entradas["PASP2108b.dbc"]["tamanho"] == 200
+    assert cliente_ftp.consultas == 2
+    # o índice guardado também é atualizado
+    assert "PASP2108b.dbc" in indice.listar(
+        cliente_ftp,
+        FTP_ENDERECO,
+        DIRETORIO,
+    )
+
+    with pytest.raises(error_perm):
+        _listar_entradas(
+            cliente_ftp=cliente_ftp,
+            arquivo_nome_ou_padrao="PASP2110a.dbc",
+            ftp=FTP_ENDERECO,
+            caminho_diretorio=DIRETORIO,
+            indice=indice,
+        )
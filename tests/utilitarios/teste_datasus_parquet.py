@@ -0,0 +1,111 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Casos de teste para as cópias colunares dos arquivos do DataSUS."""
+
+
+import io
+
+import pandas as pd
+import pytest
+
+from impulsoetl.utilitarios.condicoes import FiltroRegistros
+from impulsoetl.utilitarios.datasus_ftp import LeitorCamposDBF
+from impulsoetl.utilitarios.datasus_parquet import (
+    ArmazenamentoParquet,
+    ler_lotes_parquet,
+)
+from impulsoetl.utilitarios.dbf import TabelaDBF
+from tests.simulacoes import REGISTROS, gerar_dbf
+
+
+def abrir_tabela(dbf: bytes) -> TabelaDBF:
+    return TabelaDBF(io.BytesIO(dbf), parserclass=LeitorCamposDBF)
+
+
+@pytest.mark.unitario
+@pytest.mark.parametrize(
+    "arquivo_nome,particoes",
+    [
+        ("PASP2108a.dbc", {"fonte": "PA", "uf": "SP", "competencia": "2108"}),
+        ("RDAC2201.dbc", {"fonte": "RD", "uf": "AC", "competencia": "2201"}),
+        ("VIOLBR21.dbc", {"fonte": "VIOL", "uf": "BR", "competencia": "21"}),
+        ("DOSP2020.dbc", {"fonte": "DO", "uf": "SP", "competencia": "2020"}),
+        ("arquivo.dbc", {"fonte": "ARQUIVO"}),
+    ],
+)
+def teste_particionar(arquivo_nome, particoes):
+    assert ArmazenamentoParquet.particionar(arquivo_nome) == particoes
+
+
+@pytest.mark.unitario
+def teste_armazenar_e_ler(tmp_path):
+    armazenamento = ArmazenamentoParquet(tmp_path)
+    dbf = gerar_dbf(REGISTROS * 3)
+    assert armazenamento.obter("PASP2108a.dbc", chave="a" * 64) is None
+    caminho = armazenamento.armazenar(
+        abrir_tabela(dbf),
+        arquivo_nome="PASP2108a.dbc",
+        chave="a" * 64,
+        passo=4,
+    )
+    assert caminho.relative_to(tmp_path).parts[:3] == (
+        "fonte=PA",
+        "uf=SP",
+        "competencia=2108",
+    )
+    assert armazenamento.obter("PASP2108a.dbc", chave="a" * 64) == caminho
+
+    esperado = pd.concat(abrir_tabela(dbf).ler_lotes(100), ignore_index=True)
+    lotes = list(ler_lotes_parquet(caminho, 5, parserclass=LeitorCamposDBF))
+    assert max(len(lote) for lote in lotes) <= 5
+    pd.testing.assert_frame_equal(
+        pd.concat(lotes, ignore_index=True),
+        esperado,
+    )
+
+
+@pytest.mark.unitario
+def teste_ler_colunas_e_filtro(tmp_path):
+    armazenamento = ArmazenamentoParquet(tmp_path)
+    dbf = gerar_dbf(REGISTROS * 3)
+    caminho = armazenamento.armazenar(
+        abrir_tabela(dbf),
+        arquivo_nome="PASP2108a.dbc",
+        chave="a" * 64,
+    )
+    condicoes = "MUNIC in ['330455', '420540'] and VALOR < 1"
+    resultado = pd.concat(
+        ler_lotes_parquet(
+            caminho,
+            100,
+            colunas=["munic", "VALOR"],
+            filtro=FiltroRegistros.compilar(condicoes),
+            parserclass=LeitorCamposDBF,
+        ),
+        ignore_index=True,
+    )
+    assert resultado.columns.tolist() == ["MUNIC", "VALOR"]
+    assert set(resultado["MUNIC"]) == {"330455", "420540"}
+    assert len(resultado) == 6
+
+
+@pytest.mark.unitario
+def teste_armazenar_substitui_versao_anterior(tmp_path):
+    armazenamento = ArmazenamentoParquet(tmp_path)
+    dbf = gerar_dbf(REGISTROS)
+    caminho_antigo = armazenamento.armazenar(
+        abrir_tabela(dbf),
+        arquivo_nome="PASP2108a.dbc",
+        chave="a" * 64,
+    )
+    caminho_novo = armazenamento.armazenar(
+        abrir_tabela(dbf),
+        arquivo_nome="PASP2108a.dbc",
+        chave="b" * 64,
+    )
+    assert caminho_novo.exists()
+    assert not caminho_antigo.exists()
+    assert armazenamento.obter("PASP2108a.dbc", chave="a" * 64) is None
@@ -0,0 +1,52 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Casos de teste para a descompactação de arquivos .dbc do DataSUS."""
+
+
+from __future__ import annotations
+
+import io
+
+import pytest
+
+from impulsoetl.utilitarios.dbc import abrir_dbc, descompactar_blast
+from impulsoetl.utilitarios.dbf import TabelaDBF
+from tests.simulacoes import gerar_dbf_municipios
+
+
+@pytest.mark.unitario
+def teste_descompactar_blast():
+    # exemplo de Ben Rudiak-Gould, conforme corrigido em `blast.c`
+    dados = bytes([0x00, 0x04, 0x82, 0x24, 0x25, 0x8F, 0x80, 0x7F])
+    resultado = b"".join(descompactar_blast(io.BytesIO(dados)))
+    assert resultado == b"AIAIAIAIAIAIA"
+
+
+@pytest.mark.unitario
+def teste_descompactar_blast_incompleto():
+    dados = bytes([0x00, 0x04, 0x82, 0x24, 0x25])
+    with pytest.raises(ValueError):
+        b"".join(descompactar_blast(io.BytesIO(dados)))
+
+
+@pytest.mark.unitario
+@pytest.mark.parametrize("nativo", [True, False])
+def teste_abrir_dbc(arquivo_dbc, registros, nativo):
+    with abrir_dbc(arquivo_dbc, nativo=nativo) as arquivo_dbf:
+        tabela = TabelaDBF(arquivo_dbf)
+        assert tabela.field_names == ["UF", "MUNIC"]
+        registros_lidos = list(tabela)
+    assert registros_lidos == [
+        {"UF": uf, "MUNIC": municipio} for uf, municipio in registros
+    ]
+
+
+@pytest.mark.unitario
+def teste_tabela_dbf_truncada(registros):
+    dbf = gerar_dbf_municipios(registros)
+    tabela = TabelaDBF(io.BytesIO(dbf[:-100]))
+    with pytest.raises(ValueError):
+        list(tabela)
@@ -0,0 +1,139 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Casos de teste para a leitura de arquivos DBF."""
+
+
+from __future__ import annotations
+
+import io
+import struct
+
+import pandas as pd
+import pytest
+from more_itertools import ichunked
+
+from impulsoetl.utilitarios.condicoes import FiltroRegistros
+from impulsoetl.utilitarios.datasus_ftp import LeitorCamposDBF
+from impulsoetl.utilitarios.dbf import TabelaDBF
+from tests.simulacoes import REGISTROS, gerar_dbf
+
+
+@pytest.mark.unitario
+@pytest.mark.parametrize("passo", [1, 2, 3, 100])
+def teste_ler_lotes_equivale_a_registros(passo):
+    dbf = gerar_dbf(REGISTROS * 3)
+    lotes_esperados = [
+        pd.DataFrame(fatia)
+        for fatia in ichunked(
+            TabelaDBF(io.BytesIO(dbf), parserclass=LeitorCamposDBF),
+            passo,
+        )
+    ]
+    lotes = list(
+        TabelaDBF(io.BytesIO(dbf), parserclass=LeitorCamposDBF).ler_lotes(
+            passo,
+        ),
+    )
+    lotes = [lote for lote in lotes if len(lote)]
+    pd.testing.assert_frame_equal(
+        pd.concat(lotes, ignore_index=True),
+        pd.concat(lotes_esperados, ignore_index=True),
+    )
+
+
+@pytest.mark.unitario
+def teste_ler_lotes_tipos():
+    dbf = gerar_dbf(REGISTROS)
+    lote = next(
+        TabelaDBF(io.BytesIO(dbf), parserclass=LeitorCamposDBF).ler_lotes(10),
+    )
+    assert len(lote) == 4
+    assert lote["NOME"].tolist() == ["São Paulo", "Rio", "", "Floripa"]
+    assert lote["DTOBITO"].tolist()[0] == "20220131"
+    assert lote["QTD"].dtype == "float64"
+    assert lote["VALOR"].tolist()[0] == 10.5
+    assert lote["ATIVO"].tolist() == [True, False, None, None]
+
+
+@pytest.mark.unitario
+def teste_ler_lotes_textos_compartilhados():
+    dbf = gerar_dbf(REGISTROS * 100)
+    lote = next(
+        TabelaDBF(io.BytesIO(dbf), parserclass=LeitorCamposDBF).ler_lotes(
+            500,
+        ),
+    )
+    # valores repetidos apontam para um único objeto `str`
+    assert len({id(nome) for nome in lote["NOME"]}) == 4
+    assert lote["NOME"].tolist() == ["São Paulo", "Rio", "", "Floripa"] * 100
+
+
+@pytest.mark.unitario
+def teste_ler_lotes_arquivo_truncado():
+    dbf = gerar_dbf(REGISTROS, fim=b"")
+    tabela = TabelaDBF(io.BytesIO(dbf[:-10]), parserclass=LeitorCamposDBF)
+    with pytest.raises(ValueError):
+        list(tabela.ler_lotes(2))
+
+
+@pytest.mark.unitario
+def teste_ler_lotes_marcador_fim_antecipado():
+    dbf = gerar_dbf(REGISTROS)
+    # declara mais registros do que os existentes no arquivo
+    dbf = dbf[:4] + struct.pack("<L", 10) + dbf[8:]
+    tabela = TabelaDBF(io.BytesIO(dbf), parserclass=LeitorCamposDBF)
+    assert sum(len(lote) for lote in tabela.ler_lotes(3)) == 4
+
+
+@pytest.mark.unitario
+def teste_ler_lotes_colunas_selecionadas():
+    dbf = gerar_dbf(REGISTROS)
+    tabela = TabelaDBF(
+        io.BytesIO(dbf),
+        parserclass=LeitorCamposDBF,
+        colunas=["valor", " MUNIC", "INEXISTENTE"],
+    )
+    lote = next(tabela.ler_lotes(10))
+    assert lote.columns.tolist() == ["MUNIC", "VALOR"]
+    assert lote["VALOR"].tolist()[0] == 10.5
+
+
+@pytest.mark.unitario
+@pytest.mark.parametrize(
+    "condicoes",
+    [
+        "MUNIC == '310620'",
+        "NOME.isin(['Rio', 'Floripa']) or MUNIC.str.startswith('3550')",
+        "DTOBITO != '20220131' and VALOR > 0",
+        "VALOR > 0",
+        "not (MUNIC == '355030' and VALOR > 20)",
+        "~((MUNIC == '355030') & (QTD > 100))",
+    ],
+)
+def teste_ler_lotes_filtro(condicoes):
+    dbf = gerar_dbf(REGISTROS * 3)
+    esperado = (
+        pd.concat(
+            TabelaDBF(io.BytesIO(dbf), parserclass=LeitorCamposDBF).ler_lotes(
+                2,
+            ),
+            ignore_index=True,
+        )
+        .query(condicoes, engine="python")
+        .reset_index(drop=True)
+    )
+    lotes = TabelaDBF(io.BytesIO(dbf), parserclass=LeitorCamposDBF).ler_lotes(
+        2,
+        filtro=FiltroRegistros.compilar(condicoes),
+    )
+    resultado = pd.concat(lotes, ignore_index=True)
+    pd.testing.assert_frame_equal(
+        resultado.query(condicoes, engine="python").reset_index(drop=True),
+        esperado,
+        check_dtype=False,
+    )
+    if "VALOR" not in condicoes:
+        assert len(resultado) == len(esperado)
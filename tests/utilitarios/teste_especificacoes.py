@@ -0,0 +1,185 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Casos de teste para as especificações declarativas de transformações."""
+
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from impulsoetl.comum.datas import (
+    de_aaaamm_para_datas,
+    de_aaaammdd_para_datas,
+)
+from impulsoetl.utilitarios.especificacoes import (
+    EspecificacaoFonte,
+    interpretar_booleano,
+    interpretar_contem,
+    interpretar_fatia,
+    interpretar_preenchido,
+)
+from impulsoetl.utilitarios.valores_nulos import PADRAO_ZEROS
+
+
+@pytest.fixture
+def especificacao():
+    return EspecificacaoFonte(
+        de_para={
+            "CNPJ": "cnpj",
+            "CMP": "periodo_data_inicio",
+            "DTNASC": "nascimento_data",
+            "OBITO": "obito",
+            "DROGA": "substancias",
+            "SERVICO": "servico",
+            "QTD": "quantidade",
+        },
+        tipos={
+            "cnpj": "object",
+            "periodo_data_inicio": "datetime64[ns]",
+            "nascimento_data": "datetime64[ns]",
+            "obito": "bool",
+            "substancias": "bool",
+            "substancias_alcool": "bool",
+            "servico_id": "object",
+            "quantidade": "Int64",
+        },
+        interpretadores={
+            "periodo_data_inicio": de_aaaamm_para_datas,
+            "nascimento_data": de_aaaammdd_para_datas,
+            "obito": interpretar_booleano(["1"], ["0"]),
+            "substancias": interpretar_preenchido,
+        },
+        nulos={"cnpj": PADRAO_ZEROS},
+        derivadas={
+            "substancias_alcool": ("substancias", interpretar_contem("A")),
+            "servico_id": ("servico", interpretar_fatia(0, 3)),
+        },
+        descartar=["servico"],
+    )
+
+
+@pytest.fixture
+def dados():
+    return pd.DataFrame(
+        {
+            "CNPJ ": ["00000000000000", "12345678000199", ""],
+            "CMP": ["202108", "202108", "2021"],
+            "DTNASC": ["20000131", "2000 1 5", "20000230"],
+            "OBITO": ["1", "0", ""],
+            "DROGA": ["AC", "", "O"],
+            "SERVICO": ["115001", "", "1"],
+            "QTD": ["1", "", "3"],
+            "EXTRA": ["a", "", "c"],
+        },
+    )
+
+
+@pytest.mark.unitario
+def teste_plano_interpretar(especificacao, dados):
+    plano = especificacao.compilar()
+    resultado = plano.interpretar(dados)
+
+    assert "servico" not in resultado
+    assert resultado["cnpj"].isna().tolist() == [True, False, True]
+    assert resultado["periodo_data_inicio"].tolist()[:2] == [
+        pd.Timestamp(2021, 8, 1),
+    ] * 2
+    assert pd.isna(resultado.loc[2, "periodo_data_inicio"])
+    assert resultado["nascimento_data"].tolist()[:2] == [
+        pd.Timestamp(2000, 1, 31),
+        pd.Timestamp(2000, 1, 5),
+    ]
+    assert pd.isna(resultado.loc[2, "nascimento_data"])
+    assert resultado["obito"].tolist()[:2] == [True, False]
+    assert pd.isna(resultado.loc[2, "obito"])
+    assert resultado["substancias"].tolist() == [True, False, True]
+    assert resultado["substancias_alcool"].tolist() == [True, False, False]
+    assert resultado["servico_id"].tolist()[::2] == ["115", "1"]
+    assert pd.isna(resultado.loc[1, "servico_id"])
+    # colunas sem especificação são mantidas
+    assert resultado["EXTRA"].isna().tolist() == [False, True, False]
+
+
+@pytest.mark.unitario
+def teste_plano_tipar(especificacao, dados):
+    plano = especificacao.compilar()
+    resultado = plano.tipar(plano.interpretar(dados).drop(columns="EXTRA"))
+    assert resultado["quantidade"].dtype == pd.Int64Dtype()
+    assert resultado["quantidade"].isna().tolist() == [False, True, False]
+    assert resultado["obito"].dtype == np.bool_
+
+
+@pytest.mark.unitario
+def teste_plano_medir(especificacao, dados):
+    tempos = especificacao.compilar().medir(dados, repeticoes=2)
+    assert "(tipar)" in tempos.index
+    assert "cnpj" in tempos.index
+    assert tempos["proporcao"].sum() == pytest.approx(1)
+
+
+@pytest.mark.unitario
+def teste_compilar_coluna_desconhecida():
+    especificacao = EspecificacaoFonte(
+        de_para={"CNPJ": "cnpj"},
+        tipos={"cnpj": "object"},
+        nulos={"cpf": PADRAO_ZEROS},
+    )
+    with pytest.raises(ValueError, match="cpf"):
+        especificacao.compilar()
+
+
+@pytest.mark.unitario
+def teste_plano_categorias(dados):
+    especificacao = EspecificacaoFonte(
+        de_para={"CNPJ": "cnpj", "SERVICO": "servico"},
+        tipos={"cnpj": "category", "servico_id": "category"},
+        nulos={"cnpj": PADRAO_ZEROS},
+        derivadas={"servico_id": ("servico", interpretar_fatia(0, 3))},
+    )
+    plano = especificacao.compilar()
+    resultado = plano.interpretar(dados)
+    # colunas categóricas são convertidas já na interpretação
+    assert resultado["cnpj"].dtype == "category"
+    assert resultado["cnpj"].cat.categories.tolist() == ["12345678000199"]
+    assert resultado["servico_id"].dtype == "category"
+    assert resultado["servico"].dtype == object
+    tipados = plano.tipar(resultado[["cnpj", "servico_id"]])
+    assert tipados["cnpj"].isna().tolist() == [True, False, True]
+
+
+@pytest.mark.unitario
+def teste_plano_nulos_interpretados(dados):
+    especificacao = EspecificacaoFonte(
+        de_para={"CNPJ": "cnpj", "SERVICO": "servico"},
+        tipos={"cnpj": "object", "servico": "object"},
+        interpretadores={
+            "cnpj": interpretar_fatia(0, 4),
+            "servico": interpretar_fatia(1),
+        },
+        nulos_interpretados={"cnpj": PADRAO_ZEROS, "servico": PADRAO_ZEROS},
+    )
+    resultado = especificacao.compilar().interpretar(dados)
+    # códigos só reconhecidos como ausentes após a interpretação
+    assert resultado["cnpj"].tolist()[1] == "1234"
+    assert resultado["cnpj"][::2].isna().all()
+    assert resultado["servico"].tolist()[0] == "15001"
+    assert resultado["servico"][1:].isna().all()
+
+
+@pytest.mark.unitario
+def teste_plano_opcionais(dados):
+    especificacao = EspecificacaoFonte(
+        de_para={"CNPJ": "cnpj", "RACA": "raca_cor", "SEXO": "sexo"},
+        tipos={"cnpj": "object", "raca_cor": "category", "sexo": "object"},
+        interpretadores={"raca_cor": interpretar_preenchido},
+        opcionais=["raca_cor"],
+    )
+    resultado = especificacao.compilar().interpretar(dados)
+    # colunas opcionais ausentes são criadas sem nenhum valor preenchido
+    assert resultado["raca_cor"].tolist() == [False] * 3
+    assert resultado["raca_cor"].dtype == "category"
+    # as demais colunas ausentes continuam sendo ignoradas
+    assert "sexo" not in resultado
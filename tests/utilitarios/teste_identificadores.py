@@ -0,0 +1,56 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Casos de teste para a geração de identificadores em lote."""
+
+
+import time
+from uuid import RFC_4122, UUID
+
+import pandas as pd
+import pytest
+
+from impulsoetl.utilitarios.identificadores import (
+    adicionar_uuids7,
+    gerar_uuids7,
+    gerar_uuids7_bytes,
+)
+
+
+@pytest.mark.unitario
+def teste_gerar_uuids7_formato():
+    inicio_ms = time.time_ns() // 10 ** 6
+    identificadores = [UUID(hex=valor) for valor in gerar_uuids7(1000)]
+    assert all(
+        identificador.version == 7 and identificador.variant == RFC_4122
+        for identificador in identificadores
+    )
+    # os 48 primeiros bits contêm o instante de geração, em milissegundos
+    assert abs((identificadores[0].int >> 80) - inicio_ms) < 1000
+
+
+@pytest.mark.unitario
+def teste_gerar_uuids7_crescentes():
+    lote_a = gerar_uuids7(10000).tolist()
+    lote_b = gerar_uuids7(10000).tolist()
+    assert lote_a + lote_b == sorted(set(lote_a + lote_b))
+
+
+@pytest.mark.unitario
+def teste_gerar_uuids7_bytes():
+    octetos = gerar_uuids7_bytes(3)
+    assert octetos.shape == (3, 16)
+    assert [UUID(bytes=bytes(linha)).version for linha in octetos] == [7] * 3
+    assert gerar_uuids7_bytes(0).shape == (0, 16)
+
+
+@pytest.mark.unitario
+def teste_adicionar_uuids7():
+    dados = pd.DataFrame({"valor": range(5)})
+    resultado = adicionar_uuids7(dados)
+    assert resultado.columns.tolist() == ["valor", "id"]
+    assert resultado["id"].str.len().eq(32).all()
+    assert resultado["id"].is_unique
+    assert "id" not in dados
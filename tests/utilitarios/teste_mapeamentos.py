@@ -0,0 +1,84 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Casos de teste para a aplicação de funções a valores distintos."""
+
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from impulsoetl.utilitarios.mapeamentos import (
+    aplicar_por_valor_distinto,
+    por_valor_distinto,
+    transformar_por_valor_distinto,
+)
+
+
+@pytest.fixture
+def serie():
+    return pd.Series(
+        ["1", "0", None, "1", "", np.nan, "1"],
+        index=list("abcdefg"),
+        name="atendimento_sus",
+    )
+
+
+@pytest.mark.unitario
+def teste_aplicar_por_valor_distinto(serie):
+    chamadas = []
+
+    def para_booleano(valor):
+        chamadas.append(valor)
+        return {"1": True, "0": False}.get(valor, np.nan)
+
+    resultado = aplicar_por_valor_distinto(serie, para_booleano)
+    pd.testing.assert_series_equal(resultado, serie.apply(para_booleano))
+    # uma chamada para cada valor distinto, e uma para os nulos
+    assert len(chamadas) == 4 + len(serie)
+
+
+@pytest.mark.unitario
+def teste_aplicar_por_valor_distinto_tipo_inferido():
+    resultado = aplicar_por_valor_distinto(
+        pd.Series(["M", "", "M"]),
+        lambda elemento: elemento == "M",
+    )
+    assert resultado.dtype == bool
+    assert resultado.tolist() == [True, False, True]
+
+
+@pytest.mark.unitario
+def teste_transformar_por_valor_distinto(serie):
+    tamanhos = []
+
+    def medir(valores):
+        tamanhos.append(len(valores))
+        return valores.str.len()
+
+    resultado = transformar_por_valor_distinto(serie, medir)
+    assert tamanhos == [3]
+    assert resultado.index.tolist() == list("abcdefg")
+    assert resultado.name == "atendimento_sus"
+    assert resultado.tolist()[:2] == [1, 1]
+    assert resultado[["c", "f"]].isna().all()
+
+
+@pytest.mark.unitario
+def teste_por_valor_distinto(serie):
+    def preenchido(valor):
+        return bool(valor) and pd.notna(valor)
+
+    transformar = por_valor_distinto(preenchido)
+    assert transformar.__name__ == "preenchido"
+    assert transformar(serie).tolist() == [
+        True,
+        True,
+        False,
+        True,
+        False,
+        False,
+        True,
+    ]
@@ -0,0 +1,106 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Casos de teste para o ajuste dos lotes a um limite de memória."""
+
+
+import io
+
+import pandas as pd
+import pytest
+
+from impulsoetl.utilitarios.datasus_ftp import LeitorCamposDBF
+from impulsoetl.utilitarios.dbf import TabelaDBF
+from impulsoetl.utilitarios.memoria import (
+    PassoAdaptativo,
+    estimar_bytes_por_registro,
+    medir_memoria,
+)
+from tests.simulacoes import REGISTROS, gerar_dbf
+
+
+@pytest.fixture
+def tabela_dbf():
+    return TabelaDBF(
+        io.BytesIO(gerar_dbf(REGISTROS * 1000)),
+        parserclass=LeitorCamposDBF,
+    )
+
+
+@pytest.mark.unitario
+def teste_estimar_bytes_por_registro(tabela_dbf):
+    estimativa = estimar_bytes_por_registro(tabela_dbf)
+    # campos de texto ocupam mais que o seu tamanho no arquivo
+    assert estimativa > tabela_dbf.header.recordlen
+
+
+@pytest.mark.unitario
+@pytest.mark.parametrize(
+    "memoria_max,passo_max,passo_min",
+    [(10 ** 9, 5000, 100), (10, None, 100), (10 ** 6, None, 1)],
+)
+def teste_passo_adaptativo_limites(
+    tabela_dbf,
+    memoria_max,
+    passo_max,
+    passo_min,
+):
+    passo = PassoAdaptativo(memoria_max, passo_max, passo_min)
+    passo.configurar(tabela_dbf)
+    assert int(passo) >= passo_min
+    assert int(passo) <= (passo_max or max(memoria_max, passo_min))
+    if int(passo) > passo_min:
+        assert (
+            int(passo)
+            * (tabela_dbf.header.recordlen + passo.bytes_por_registro)
+            <= memoria_max
+        )
+
+
+@pytest.mark.unitario
+def teste_passo_adaptativo_registrar(tabela_dbf):
+    passo = PassoAdaptativo(10 ** 6, passo_min=1)
+    passo.configurar(tabela_dbf)
+    passo_inicial = int(passo)
+
+    # lotes que ocupam mais memória que a estimada reduzem os lotes seguintes
+    passo.registrar(
+        pd.DataFrame({"TEXTO": ["x" * 1000 + str(i) for i in range(10)]}),
+    )
+    assert int(passo) < passo_inicial
+
+    # lotes menores aumentam os lotes seguintes gradualmente
+    passo_reduzido = int(passo)
+    passo.registrar(pd.DataFrame({"QTD": range(10)}))
+    assert passo_reduzido < int(passo) < passo_inicial
+
+
+@pytest.mark.unitario
+def teste_medir_memoria_objetos_compartilhados():
+    texto = "x" * 1000
+    compartilhados = pd.DataFrame({"TEXTO": [texto] * 10})
+    distintos = pd.DataFrame({"TEXTO": [texto + str(i) for i in range(10)]})
+    assert medir_memoria(compartilhados) < 1200
+    assert medir_memoria(distintos) > 10000
+    # colunas sem objetos são medidas como no pandas
+    numeros = pd.DataFrame({"QTD": range(10)})
+    assert medir_memoria(numeros) == numeros.memory_usage(index=False).sum()
+
+
+@pytest.mark.unitario
+def teste_ler_lotes_passo_adaptativo(tabela_dbf):
+    passo = PassoAdaptativo(
+        100 * (tabela_dbf.header.recordlen + 50),
+        passo_min=1,
+    )
+    passo.configurar(tabela_dbf)
+    tamanhos = []
+    for lote in tabela_dbf.ler_lotes(passo):
+        passo.registrar(lote)
+        tamanhos.append(len(lote))
+    # registros excluídos não são lidos
+    assert sum(tamanhos) == 4000
+    assert len(set(tamanhos[:-1])) > 1 or len(tamanhos) == 1
+    assert max(tamanhos) < 4000
@@ -0,0 +1,76 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Casos de teste para a transformação de lotes em vários processos."""
+
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from impulsoetl.utilitarios.paralelismo import (
+    desserializar_dataframe,
+    serializar_dataframe,
+    transformar_lotes,
+)
+
+
+def transformar_teste(sessao, lote, fator=1):
+    return lote.assign(dobro=lote["valor"] * 2 * fator)
+
+
+@pytest.fixture
+def dados():
+    return pd.DataFrame(
+        {
+            "codigo": pd.Series(["a", None, "b", "a"], dtype="category"),
+            "quantidade": pd.Series([1, None, 3, 4], dtype="Int64"),
+            "valor": pd.Series([1.5, np.nan, 2.0, 0], dtype="Float64"),
+            "texto": ["x", None, "", "y"],
+            "data": pd.to_datetime(["2021-08-01", None, "2021-08-03", None]),
+            "ativo": [True, False, True, True],
+        },
+        index=[3, 5, 7, 9],
+    )
+
+
+@pytest.mark.unitario
+def teste_serializar_dataframe(dados):
+    serializado = serializar_dataframe(dados)
+    assert serializado[:4] == b"\xff\xff\xff\xff"
+    pd.testing.assert_frame_equal(desserializar_dataframe(serializado), dados)
+
+
+@pytest.mark.unitario
+def teste_serializar_dataframe_objetos_mistos():
+    dados = pd.DataFrame({"misto": [1, "a", None]})
+    pd.testing.assert_frame_equal(
+        desserializar_dataframe(serializar_dataframe(dados)),
+        dados,
+    )
+
+
+@pytest.mark.unitario
+@pytest.mark.parametrize("processos", [0, 2])
+def teste_transformar_lotes(processos):
+    lotes = [
+        pd.DataFrame({"valor": np.arange(inicio, inicio + 10, dtype=float)})
+        for inicio in range(0, 100, 10)
+    ]
+    transformados = list(
+        transformar_lotes(
+            transformar_teste,
+            lotes,
+            sessao=None,
+            argumento="lote",
+            processos=processos,
+            preparar=None,
+            fator=3,
+        ),
+    )
+    assert [tamanho for tamanho, _ in transformados] == [10] * 10
+    # os lotes são devolvidos na ordem original
+    resultado = pd.concat(lote for _, lote in transformados)
+    assert resultado["dobro"].tolist() == [valor * 6 for valor in range(100)]
@@ -0,0 +1,96 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Casos de teste para a substituição de códigos de dados ausentes."""
+
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from impulsoetl.utilitarios.valores_nulos import (
+    remover_noves,
+    remover_sentinelas,
+    remover_vazios,
+    remover_zeros,
+)
+
+
+@pytest.fixture
+def dados():
+    return pd.DataFrame(
+        {
+            "cnpj": ["00000000000000", "12345678000199", None, "0", ""],
+            "municipio": ["999999", "355030", "9", np.nan, "990"],
+            "idade": ["999", "099", "9999", "10", None],
+            "quantidade": [0, 9, 999, 1, 2],
+        },
+    )
+
+
+@pytest.mark.unitario
+def teste_remover_zeros(dados):
+    resultado = remover_zeros(dados, ["cnpj", "quantidade"])
+    assert resultado["cnpj"].isna().tolist() == [
+        True,
+        False,
+        True,
+        True,
+        True,
+    ]
+    # colunas que não são de texto não são alteradas
+    pd.testing.assert_series_equal(
+        resultado["quantidade"],
+        dados["quantidade"],
+    )
+    # o objeto original não é alterado
+    assert dados["cnpj"].notna().sum() == 4
+
+
+@pytest.mark.unitario
+def teste_remover_noves(dados):
+    resultado = remover_noves(dados, ["municipio"])
+    assert resultado["municipio"].isna().tolist() == [
+        True,
+        False,
+        True,
+        True,
+        False,
+    ]
+
+
+@pytest.mark.unitario
+def teste_remover_sentinelas(dados):
+    resultado = remover_sentinelas(dados, ["idade"], padrao="999")
+    assert resultado["idade"].isna().tolist() == [
+        True,
+        False,
+        False,
+        False,
+        True,
+    ]
+
+
+@pytest.mark.unitario
+def teste_remover_vazios(dados):
+    resultado = remover_vazios(dados)
+    assert resultado["cnpj"].isna().tolist() == [
+        False,
+        False,
+        True,
+        False,
+        True,
+    ]
+    pd.testing.assert_frame_equal(
+        resultado.drop(columns="cnpj"),
+        dados.drop(columns="cnpj"),
+    )
+
+
+@pytest.mark.unitario
+def teste_remover_zeros_texto_pandas(dados):
+    dados = dados.astype({"cnpj": "string"})
+    resultado = remover_zeros(dados, ["cnpj"])
+    assert resultado["cnpj"].isna().sum() == 4
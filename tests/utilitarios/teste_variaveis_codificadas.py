@@ -0,0 +1,50 @@
+# SPDX-FileCopyrightText: 2022 ImpulsoGov <contato@impulsogov.org>
+#
+# SPDX-License-Identifier: MIT
+
+
+"""Casos de teste para a verificação de listas de códigos."""
+
+
+import pandas as pd
+import pytest
+
+from impulsoetl.utilitarios.variaveis_codificadas import (
+    checar_codigos,
+    compilar_prefixos,
+)
+
+
+@pytest.mark.unitario
+def teste_compilar_prefixos():
+    padrao = compilar_prefixos(["F32", "F320", "F33", "F4", "G1", "X.1"])
+    # códigos iniciados por outro código da lista são redundantes
+    assert padrao.pattern == r"(?:F(?:3[23]|4)|G1|X\.1)"
+    assert compilar_prefixos(["F33", "F4", "G1", "F32", "X.1"]) is padrao
+
+
+@pytest.mark.unitario
+def teste_compilar_prefixos_lista_vazia():
+    assert compilar_prefixos([]).search("F32") is None
+
+
+@pytest.mark.unitario
+def teste_checar_codigos():
+    serie = pd.Series(
+        ["F320", "F41", "F4", "XF32", None, "G10", "F320"],
+        index=list("abcdefg"),
+    )
+    resultado = checar_codigos(serie, ["F32", "F41", "G1"])
+    assert resultado.index.tolist() == list("abcdefg")
+    assert resultado.tolist() == [True, True, False, False, False, True, True]
+
+
+@pytest.mark.unitario
+def teste_checar_codigos_varios_por_celula():
+    serie = pd.Series(["R578/F320", "F410 I10", "XF32/I10", "", None])
+    resultado = checar_codigos(
+        serie,
+        ["F32", "F41"],
+        varios_codigos_por_celula=True,
+    )
+    assert resultado.tolist() == [True, True, False, False, False]